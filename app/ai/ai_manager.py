@@ -18,8 +18,9 @@ from pathlib import Path
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from queue import PriorityQueue, Queue
-import aiohttp
-import numpy as np
+from app.utils.lazy_import import lazy_module
+aiohttp = lazy_module("aiohttp")
+np = lazy_module("numpy")
 
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer, QThread
 
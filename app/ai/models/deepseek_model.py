@@ -4,7 +4,8 @@
 import asyncio
 import json
 from typing import Dict, List, Optional, Any
-import aiohttp
+from app.utils.lazy_import import lazy_module
+aiohttp = lazy_module("aiohttp")
 from .base_model import BaseAIModel, AIModelConfig, AIResponse
 
 
@@ -6,7 +6,8 @@ OpenAI模型集成
 
 import json
 import asyncio
-import aiohttp
+from app.utils.lazy_import import lazy_module
+aiohttp = lazy_module("aiohttp")
 from typing import Dict, List, Optional, Any
 from .base_model import BaseAIModel, AIModelConfig, AIResponse
 
@@ -3,7 +3,8 @@
 
 import json
 import asyncio
-import aiohttp
+from app.utils.lazy_import import lazy_module
+aiohttp = lazy_module("aiohttp")
 from typing import Dict, List, Optional, Any
 from .base_model import BaseAIModel, AIModelConfig, AIResponse
 
@@ -8,7 +8,8 @@ import hashlib
 import base64
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-import aiohttp
+from app.utils.lazy_import import lazy_module
+aiohttp = lazy_module("aiohttp")
 from .base_model import BaseAIModel, AIModelConfig, AIResponse
 
 
@@ -2,7 +2,8 @@
 # -*- coding: utf-8 -*-
 
 import asyncio
-import aiohttp
+from app.utils.lazy_import import lazy_module
+aiohttp = lazy_module("aiohttp")
 import subprocess
 import platform
 import os
@@ -20,8 +20,9 @@ from concurrent.futures import ThreadPoolExecutor, as_completed
 from queue import PriorityQueue, Queue
 
 from PyQt6.QtCore import QEventLoop, QTimer
-import aiohttp
-import numpy as np
+from app.utils.lazy_import import lazy_module
+aiohttp = lazy_module("aiohttp")
+np = lazy_module("numpy")
 from collections import defaultdict, deque
 
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer, QThread
@@ -15,8 +15,9 @@ from dataclasses import dataclass, field, asdict
 from enum import Enum
 from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor, as_completed
-import aiohttp
-import numpy as np
+from app.utils.lazy_import import lazy_module
+aiohttp = lazy_module("aiohttp")
+np = lazy_module("numpy")
 from collections import defaultdict, deque
 
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
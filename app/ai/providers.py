@@ -12,11 +12,12 @@ from typing import Any, Dict, List, Optional, Union, AsyncGenerator
 from dataclasses import dataclass, field
 from enum import Enum
 import time
-import aiohttp
-import openai
-from openai import AsyncOpenAI
-import dashscope
-from ollama import AsyncClient
+from app.utils.lazy_import import lazy_module
+# 提供商SDK在首次创建客户端时才加载
+aiohttp = lazy_module("aiohttp")
+openai = lazy_module("openai")
+dashscope = lazy_module("dashscope")
+ollama = lazy_module("ollama")
 import logging
 from tenacity import retry, stop_after_attempt, wait_exponential
 
@@ -101,7 +102,7 @@ class OpenAIProvider(AIProviderInterface):
     
     def __init__(self, api_key: Optional[str] = None):
         super().__init__(api_key)
-        self.client = AsyncOpenAI(api_key=api_key) if api_key else None
+        self.client = openai.AsyncOpenAI(api_key=api_key) if api_key else None
         self.models = ["gpt-4", "gpt-4-turbo", "gpt-3.5-turbo"]
     
     async def generate_content(self, request: AIRequest) -> AIResponse:
@@ -431,7 +432,7 @@ class OllamaProvider(AIProviderInterface):
     
     def __init__(self, base_url: str = "http://localhost:11434"):
         super().__init__(base_url=base_url)
-        self.client = AsyncClient(host=base_url)
+        self.client = ollama.AsyncClient(host=base_url)
         self.models = ["llama2", "mistral", "codellama", "qwen:7b"]
     
     async def generate_content(self, request: AIRequest) -> AIResponse:
@@ -4,11 +4,14 @@
 import cv2
 import numpy as np
 import asyncio
+from contextlib import contextmanager
 from typing import List, Dict, Tuple, Optional, Any
 from dataclasses import dataclass
 from PyQt6.QtCore import QObject, pyqtSignal
 
 from app.core.video_manager import VideoClip
+from app.core.memory_manager import get_frame_buffer_pool
+from app.core.decoder_pool import get_decoder_pool
 
 
 @dataclass
@@ -53,6 +56,9 @@ class SceneDetector(QObject):
             "quiet": "安静场景",
             "transition": "转场场景"
         }
+        
+        # 分析分辨率 (宽, 高)
+        self.analysis_size = (320, 240)
     
     async def detect_scenes(self, video: VideoClip) -> List[SceneInfo]:
         """检测视频中的场景"""
@@ -60,7 +66,7 @@ class SceneDetector(QObject):
             return []
         
         scenes = []
-        cap = cv2.VideoCapture(video.file_path)
+        cap = get_decoder_pool().acquire(video.file_path)
         
         try:
             # 获取视频信息
@@ -117,44 +123,76 @@ class SceneDetector(QObject):
         finally:
             cap.release()
     
+    @contextmanager
+    def _analysis_buffers(self, cap: cv2.VideoCapture):
+        """从帧缓冲池租用分析缓冲区：解码帧、全尺寸灰度图和两个交替使用的缩小灰度图"""
+        pool = get_frame_buffer_pool()
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        analysis_width, analysis_height = self.analysis_size
+        
+        buffers = (
+            pool.acquire(height, width),
+            pool.acquire(height, width, 1),
+            pool.acquire(analysis_height, analysis_width, 1),
+            pool.acquire(analysis_height, analysis_width, 1)
+        )
+        try:
+            yield buffers
+        finally:
+            for buffer in buffers:
+                pool.release(buffer)
+    
+    def _read_analysis_frame(self, cap: cv2.VideoCapture, frame_buffer: np.ndarray,
+                             gray_buffer: np.ndarray, output: np.ndarray) -> Optional[np.ndarray]:
+        """读取当前帧并转换为降低分辨率的灰度图，结果写入output"""
+        ret, frame = cap.read(frame_buffer)
+        if not ret:
+            return None
+        
+        # 实际帧尺寸与容器信息不一致时OpenCV会重新分配，此时不使用灰度缓冲区
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_buffer if frame is frame_buffer else None)
+        return cv2.resize(gray, self.analysis_size, dst=output)
+    
     async def _detect_scene_changes(self, cap: cv2.VideoCapture, fps: float, total_frames: int) -> List[Tuple[int, int]]:
         """检测场景变化点"""
         scene_changes = []
-        prev_frame = None
         scene_start = 0
         
         # 采样间隔（每秒采样几帧）
         sample_interval = max(1, int(fps / 5))  # 每秒采样5帧
         
-        for frame_idx in range(0, total_frames, sample_interval):
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            
-            if not ret:
-                break
-            
-            # 转换为灰度图
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.resize(gray, (320, 240))  # 降低分辨率加速处理
+        with self._analysis_buffers(cap) as (frame_buffer, gray_buffer, current, previous):
+            has_previous = False
             
-            if prev_frame is not None:
-                # 计算帧间差异
-                diff = cv2.absdiff(prev_frame, gray)
-                diff_score = np.mean(diff) / 255.0
+            for frame_idx in range(0, total_frames, sample_interval):
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
                 
-                # 检测场景变化
-                if diff_score > self.scene_change_threshold:
-                    # 检查场景时长
-                    scene_duration = (frame_idx - scene_start) / fps
-                    if scene_duration >= self.min_scene_duration:
-                        scene_changes.append((scene_start, frame_idx))
-                        scene_start = frame_idx
-            
-            prev_frame = gray
-            
-            # 让出控制权
-            if frame_idx % (sample_interval * 10) == 0:
-                await asyncio.sleep(0.001)
+                # 转换为灰度图并降低分辨率加速处理
+                gray = self._read_analysis_frame(cap, frame_buffer, gray_buffer, current)
+                if gray is None:
+                    break
+                
+                if has_previous:
+                    # 计算帧间差异
+                    diff = cv2.absdiff(previous, gray)
+                    diff_score = np.mean(diff) / 255.0
+                    
+                    # 检测场景变化
+                    if diff_score > self.scene_change_threshold:
+                        # 检查场景时长
+                        scene_duration = (frame_idx - scene_start) / fps
+                        if scene_duration >= self.min_scene_duration:
+                            scene_changes.append((scene_start, frame_idx))
+                            scene_start = frame_idx
+                
+                # 当前帧作为下一次比较的前一帧
+                current, previous = previous, current
+                has_previous = True
+                
+                # 让出控制权
+                if frame_idx % (sample_interval * 10) == 0:
+                    await asyncio.sleep(0.001)
         
         # 添加最后一个场景
         if scene_start < total_frames:
@@ -173,28 +211,29 @@ class SceneDetector(QObject):
         motion_scores = []
         brightness_scores = []
         
-        for i in range(sample_frames):
-            frame_idx = start_frame + i * frame_interval
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
-            ret, frame = cap.read()
-            
-            if not ret:
-                continue
-            
-            # 转换为灰度图
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.resize(gray, (320, 240))
-            
-            # 计算运动强度（使用光流法的简化版本）
-            if i > 0:
-                motion_score = self._calculate_motion_score(prev_gray, gray)
-                motion_scores.append(motion_score)
+        with self._analysis_buffers(cap) as (frame_buffer, gray_buffer, current, previous):
+            has_previous = False
             
-            # 计算亮度
-            brightness = np.mean(gray) / 255.0
-            brightness_scores.append(brightness)
-            
-            prev_gray = gray
+            for i in range(sample_frames):
+                frame_idx = start_frame + i * frame_interval
+                cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+                
+                # 转换为灰度图
+                gray = self._read_analysis_frame(cap, frame_buffer, gray_buffer, current)
+                if gray is None:
+                    continue
+                
+                # 计算运动强度（使用光流法的简化版本）
+                if has_previous:
+                    motion_score = self._calculate_motion_score(previous, gray)
+                    motion_scores.append(motion_score)
+                
+                # 计算亮度
+                brightness = np.mean(gray) / 255.0
+                brightness_scores.append(brightness)
+                
+                current, previous = previous, current
+                has_previous = True
         
         # 分析场景特征
         avg_motion = np.mean(motion_scores) if motion_scores else 0
@@ -10,8 +10,9 @@ import os
 import sys
 import logging
 import time
+import importlib
 import traceback
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, TYPE_CHECKING
 
 from PyQt6.QtWidgets import QApplication, QMessageBox, QSplashScreen
 from PyQt6.QtCore import QTimer, Qt, QThreadPool, QSettings, QTranslator
@@ -19,18 +20,28 @@ from PyQt6.QtGui import QPixmap, QFont, QIcon
 
 from app.config.settings_manager import SettingsManager
 from app.core.project_manager import ProjectManager
-from app.ai import create_unified_ai_service
 from app.core.service_container import ServiceContainer
-from app.core.unified_media_manager import UnifiedMediaManager
-from app.core.intelligent_video_processing_engine import IntelligentVideoProcessingEngine
-
-from app.ui.main_window_management import ManagementMainWindow
-from app.ui.unified_theme_system import UnifiedThemeManager, ThemeType
+from app.core.startup_orchestrator import StartupOrchestrator, StartupStep
 from app.core.performance_optimizer import (
     get_enhanced_performance_optimizer,
     start_enhanced_performance_monitoring
 )
 from app.core.memory_manager import get_memory_manager, start_memory_monitoring
+from app.utils.font_index import get_font_index
+
+if TYPE_CHECKING:
+    from app.ui.main_window_management import ManagementMainWindow
+
+
+# 后台预加载的模块：导入耗时较长且不创建QObject，可与GUI线程上的步骤并行
+AI_MODULES = ("app.ai",)
+UI_MODULES = ("app.ui.unified_theme_system", "app.ui.main_window_management")
+
+# 启动线程池大小
+STARTUP_WORKERS = 2
+
+# 首个窗口显示里程碑
+FIRST_WINDOW_MILESTONE = "首个窗口显示"
 
 
 # 配置日志
@@ -68,7 +79,7 @@ class ApplicationLauncher:
     def __init__(self):
         self.logger = setup_logging()
         self.app: Optional[QApplication] = None
-        self.main_window: Optional[ManagementMainWindow] = None
+        self.main_window: Optional["ManagementMainWindow"] = None
         self.splash_screen: Optional[QSplashScreen] = None
         self.service_container: Optional[ServiceContainer] = None
 
@@ -88,77 +99,29 @@ class ApplicationLauncher:
             "完成初始化"
         ]
         self.current_step = 0
+        self.orchestrator: Optional[StartupOrchestrator] = None
+        self.startup_report: Dict[str, Any] = {}
 
     def launch(self, args: List[str]) -> int:
         """启动应用程序"""
         try:
             self.logger.info("启动 CineAIStudio 应用程序...")
 
-            # 步骤1: 初始化应用程序
-            self.update_progress("初始化应用程序")
-            self.app = QApplication(args)
-            self.app.setApplicationName("CineAIStudio")
-            self.app.setApplicationVersion("2.0.0")
-            self.app.setOrganizationName("CineAIStudio Team")
-
-            # 显示启动画面（必须在QApplication创建后）
-            self.show_splash_screen()
-
-            # 设置应用程序样式
-            self.setup_application_style()
-
-            # 步骤2: 创建服务容器
-            self.update_progress("创建服务容器")
-            self.service_container = ServiceContainer()
-
-            # 步骤3: 初始化设置管理器
-            self.update_progress("初始化设置管理器")
-            self.initialize_settings_manager()
-
-            # 步骤4: 初始化主题系统
-            self.update_progress("初始化主题系统")
-            self.initialize_theme_system()
-
-            # 应用主题（在QApplication创建后）
-            self.apply_theme()
-
-            # 步骤5: 初始化AI服务
-            self.update_progress("初始化AI服务")
-            self.initialize_ai_services()
-
-            # 步骤6: 初始化项目管理器
-            self.update_progress("初始化项目管理器")
-            self.initialize_project_manager()
-
-            # 步骤7: 初始化媒体管理器
-            self.update_progress("初始化媒体管理器")
-            self.initialize_media_manager()
-
-            # 步骤8: 初始化视频处理引擎
-            self.update_progress("初始化视频处理引擎")
-            self.initialize_video_processing_engine()
-
-            # 步骤9: 初始化性能监控
-            self.update_progress("初始化性能监控")
-            self.initialize_performance_monitoring()
-
-            # 步骤10: 初始化内存管理
-            self.update_progress("初始化内存管理")
-            self.initialize_memory_management()
-
-            # 步骤11: 创建主窗口
-            self.update_progress("创建主窗口")
-            self.create_main_window()
-
-            # 步骤12: 完成初始化
-            self.update_progress("完成初始化")
-            self.finalize_initialization()
+            # 按依赖关系执行启动步骤：模块预加载在后台线程，QObject创建在GUI线程
+            self.orchestrator = StartupOrchestrator(
+                max_workers=STARTUP_WORKERS,
+                idle_callback=self._process_events
+            )
+            self.register_startup_steps(args)
+            self.orchestrator.run(on_step_started=self._on_startup_step_started)
 
             # 关闭启动画面
             self.hide_splash_screen()
 
             # 显示主窗口
             self.show_main_window()
+            self.orchestrator.mark(FIRST_WINDOW_MILESTONE)
+            self.log_startup_report()
 
             # 运行应用程序
             self.logger.info("应用程序启动完成")
@@ -178,6 +141,99 @@ class ApplicationLauncher:
 
             return 1
 
+    def register_startup_steps(self, args: List[str]):
+        """注册启动步骤及其依赖关系"""
+        add = self.orchestrator.add_step
+
+        # 后台线程：预加载重量级模块
+        add("加载AI模块", lambda: self.preload_modules(AI_MODULES), critical=False)
+        add("加载界面模块", lambda: self.preload_modules(UI_MODULES), critical=False)
+        # 字体索引在自己的后台线程中建立，首次渲染文字时不再扫描字体目录
+        add("建立字体索引", lambda: get_font_index().load_in_background(), critical=False)
+
+        # GUI线程：按 initialization_steps 中的名称执行
+        add("初始化应用程序", lambda: self.initialize_application(args), main_thread=True)
+        add("创建服务容器", self.create_service_container,
+            ("初始化应用程序",), main_thread=True)
+        add("初始化设置管理器", self.initialize_settings_manager,
+            ("创建服务容器",), main_thread=True)
+        add("初始化项目管理器", self.initialize_project_manager,
+            ("创建服务容器",), main_thread=True)
+        add("初始化媒体管理器", self.initialize_media_manager,
+            ("创建服务容器",), main_thread=True)
+        add("初始化视频处理引擎", self.initialize_video_processing_engine,
+            ("创建服务容器",), main_thread=True)
+        add("初始化性能监控", self.initialize_performance_monitoring,
+            ("初始化应用程序",), main_thread=True)
+        add("初始化内存管理", self.initialize_memory_management,
+            ("初始化应用程序",), main_thread=True)
+        add("初始化主题系统", self.initialize_theme_system,
+            ("初始化设置管理器", "加载界面模块"), main_thread=True)
+        add("初始化AI服务", self.initialize_ai_services,
+            ("初始化设置管理器", "加载AI模块"), main_thread=True)
+        add("创建主窗口", self.create_main_window,
+            ("初始化主题系统", "初始化AI服务", "初始化项目管理器"), main_thread=True)
+        add("完成初始化", self.finalize_initialization,
+            ("创建主窗口",), main_thread=True)
+
+    def preload_modules(self, module_names):
+        """在后台线程中导入模块，失败时留给GUI线程上的正式导入报告错误"""
+        for module_name in module_names:
+            try:
+                importlib.import_module(module_name)
+            except Exception as e:
+                self.logger.warning(f"预加载模块失败: {module_name} - {e}")
+
+    def initialize_application(self, args: List[str]):
+        """创建QApplication并显示启动画面"""
+        self.app = QApplication(args)
+        self.app.setApplicationName("CineAIStudio")
+        self.app.setApplicationVersion("2.0.0")
+        self.app.setOrganizationName("CineAIStudio Team")
+
+        # 显示启动画面（必须在QApplication创建后）
+        self.show_splash_screen()
+
+        # 设置应用程序样式
+        self.setup_application_style()
+
+    def create_service_container(self):
+        """创建服务容器"""
+        self.service_container = ServiceContainer()
+
+    def _on_startup_step_started(self, step: StartupStep):
+        """GUI线程步骤开始前更新启动画面"""
+        if step.name in self.initialization_steps:
+            self.update_progress(step.name)
+
+    def _process_events(self):
+        """等待后台步骤时保持启动画面响应"""
+        if self.app:
+            self.app.processEvents()
+
+    def log_startup_report(self):
+        """记录各启动步骤耗时和首个窗口显示时间"""
+        if not self.orchestrator:
+            return
+
+        report = self.orchestrator.get_report()
+        self.startup_report = report.to_dict()
+
+        steps = sorted(
+            (item for item in report.steps.items() if item[1]['start'] is not None),
+            key=lambda item: item[1]['start']
+        )
+        for name, timing in steps:
+            self.logger.info(
+                f"启动步骤 {name}: 开始 {timing['start'] * 1000:.1f}ms, "
+                f"耗时 {timing['duration'] * 1000:.1f}ms ({timing['thread']})"
+            )
+
+        first_window = report.milestones.get(FIRST_WINDOW_MILESTONE)
+        if first_window is not None:
+            self.logger.info(f"首个窗口显示耗时: {first_window:.3f}s")
+        self.logger.info(f"启动关键路径: {' -> '.join(self.orchestrator.get_critical_path())}")
+
     def show_splash_screen(self):
         """显示启动画面"""
         try:
@@ -264,6 +320,8 @@ class ApplicationLauncher:
     def initialize_theme_system(self):
         """初始化主题系统"""
         try:
+            from app.ui.unified_theme_system import UnifiedThemeManager, ThemeType
+
             theme_manager = UnifiedThemeManager()
             self.service_container.register_instance('theme_manager', theme_manager)
 
@@ -276,6 +334,9 @@ class ApplicationLauncher:
 
             self.logger.info("主题系统初始化完成")
 
+            # 应用主题（在QApplication创建后）
+            self.apply_theme()
+
         except Exception as e:
             self.logger.error(f"初始化主题系统失败: {e}")
             raise
@@ -283,6 +344,8 @@ class ApplicationLauncher:
     def initialize_ai_services(self):
         """初始化AI服务"""
         try:
+            from app.ai import create_unified_ai_service
+
             settings_manager = self.service_container.get('settings_manager')
             ai_service = create_unified_ai_service(settings_manager)
             self.service_container.register_instance('ai_service', ai_service)
@@ -330,22 +393,28 @@ class ApplicationLauncher:
             raise
 
     def initialize_media_manager(self):
-        """初始化媒体管理器"""
+        """初始化媒体管理器（首次使用时创建）"""
         try:
-            media_manager = UnifiedMediaManager()
-            self.service_container.register_instance('media_manager', media_manager)
-            self.logger.info("媒体管理器初始化完成")
+            def create_media_manager(container):
+                from app.core.unified_media_manager import UnifiedMediaManager
+                return UnifiedMediaManager()
+
+            self.service_container.register_lazy_singleton('media_manager', factory=create_media_manager)
+            self.logger.info("媒体管理器已注册（延迟创建）")
 
         except Exception as e:
             self.logger.error(f"初始化媒体管理器失败: {e}")
             raise
 
     def initialize_video_processing_engine(self):
-        """初始化视频处理引擎"""
+        """初始化视频处理引擎（首次使用时创建）"""
         try:
-            video_engine = IntelligentVideoProcessingEngine()
-            self.service_container.register_instance('video_engine', video_engine)
-            self.logger.info("视频处理引擎初始化完成")
+            def create_video_engine(container):
+                from app.core.intelligent_video_processing_engine import IntelligentVideoProcessingEngine
+                return IntelligentVideoProcessingEngine()
+
+            self.service_container.register_lazy_singleton('video_engine', factory=create_video_engine)
+            self.logger.info("视频处理引擎已注册（延迟创建）")
 
         except Exception as e:
             self.logger.error(f"初始化视频处理引擎失败: {e}")
@@ -405,6 +474,8 @@ class ApplicationLauncher:
     def create_main_window(self):
         """创建主窗口"""
         try:
+            from app.ui.main_window_management import ManagementMainWindow
+
             # 从服务容器获取依赖
             settings_manager = self.service_container.get('settings_manager')
             project_manager = self.service_container.get('project_manager')
@@ -1,13 +1,27 @@
 """
 核心功能模块
+导出名称在首次访问时才导入对应子模块（video_engine 会加载 OpenCV/NumPy）
 """
 
-from .base import BaseModel, ViewModel, ServiceInterface, AppState
-from .event_system import event_bus, Event, EventType
-from .video_engine import VideoEngine, VideoInfo, VideoOperation, ProcessingOptions, TimelineClip
+from app.utils.lazy_import import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'BaseModel': '.base',
+    'ViewModel': '.base',
+    'ServiceInterface': '.base',
+    'AppState': '.base',
+    'event_bus': '.event_system',
+    'Event': '.event_system',
+    'EventType': '.event_system',
+    'VideoEngine': '.video_engine',
+    'VideoInfo': '.video_engine',
+    'VideoOperation': '.video_engine',
+    'ProcessingOptions': '.video_engine',
+    'TimelineClip': '.video_engine',
+})
 
 __all__ = [
     'BaseModel', 'ViewModel', 'ServiceInterface', 'AppState',
     'event_bus', 'Event', 'EventType',
     'VideoEngine', 'VideoInfo', 'VideoOperation', 'ProcessingOptions', 'TimelineClip'
-]
\ No newline at end of file
+]
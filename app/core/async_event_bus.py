@@ -0,0 +1,533 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+统一异步事件总线 - 有界队列、溢出策略和分发指标
+每个订阅拥有独立的有界收件箱，由总线事件循环线程上的工作协程按顺序处理，
+不同订阅之间并发执行；队列满时按主题配置丢弃最旧、丢弃最新、合并或等待
+"""
+
+import time
+import asyncio
+import logging
+import threading
+import itertools
+from collections import deque
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+ALL_TOPICS = "*"
+
+# 标记当前线程正在执行总线的同步处理函数，此时发布不能等待队列空位
+_handler_context = threading.local()
+
+
+class OverflowPolicy(Enum):
+    """队列满时的处理策略"""
+    DROP_OLDEST = "drop_oldest"  # 丢弃队首最旧的事件
+    DROP_NEWEST = "drop_newest"  # 丢弃新发布的事件
+    COALESCE = "coalesce"        # 相同合并键的事件只保留最新值
+    BLOCK = "block"              # 发布方等待队列空出位置（不丢事件，不可等待的线程超出上限入队）
+
+
+@dataclass
+class TopicConfig:
+    """主题队列配置"""
+    max_queue_size: int = 1000
+    overflow: OverflowPolicy = OverflowPolicy.DROP_OLDEST
+    coalesce_key: Optional[Callable[[Any], Hashable]] = None
+
+
+@dataclass
+class TopicMetrics:
+    """主题分发指标"""
+    published: int = 0
+    delivered: int = 0
+    dropped: int = 0
+    coalesced: int = 0
+    errors: int = 0
+    max_queue_depth: int = 0
+    lag_total: float = 0.0
+    lag_max: float = 0.0
+    handler_time_total: float = 0.0
+    handler_time_max: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'published': self.published,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'max_queue_depth': self.max_queue_depth,
+            'lag_avg': self.lag_total / self.delivered if self.delivered else 0.0,
+            'lag_max': self.lag_max,
+            'handler_time_avg': self.handler_time_total / self.delivered if self.delivered else 0.0,
+            'handler_time_max': self.handler_time_max
+        }
+
+
+class _QueuedEvent:
+    """收件箱中的事件，合并时原地替换"""
+
+    __slots__ = ("topic", "event", "published_at", "key")
+
+    def __init__(self, topic: str, event: Any, published_at: float, key: Optional[Hashable]):
+        self.topic = topic
+        self.event = event
+        self.published_at = published_at
+        self.key = key
+
+
+@dataclass
+class _Subscription:
+    """订阅及其收件箱"""
+    subscription_id: str
+    topic: str
+    handler: Callable
+    is_async: bool
+    inline: bool
+    config: Optional[TopicConfig] = None  # 订阅自己的队列配置，优先于主题配置
+    queue: Deque[_QueuedEvent] = field(default_factory=deque)
+    pending_keys: Dict[Hashable, _QueuedEvent] = field(default_factory=dict)
+    space_waiters: List[asyncio.Future] = field(default_factory=list)
+    scheduled: bool = False
+    active: bool = True
+    handled: int = 0
+    handler_time_total: float = 0.0
+    max_queue_depth: int = 0
+
+
+class AsyncEventBus:
+    """统一异步事件总线
+
+    事件循环运行在总线自己的后台线程中，任何线程都可以发布事件。
+    异步处理函数在总线事件循环上执行；同步处理函数默认在执行器中运行，
+    inline为True时直接在事件循环线程上运行（适合很轻量的处理函数）。
+    """
+
+    def __init__(self, default_config: Optional[TopicConfig] = None,
+                 executor: Optional[Executor] = None, name: str = "event-bus"):
+        self.default_config = default_config or TopicConfig()
+        self.name = name
+        self._executor = executor
+
+        self._topic_configs: Dict[str, TopicConfig] = {}
+        self._subscriptions: Dict[str, _Subscription] = {}
+        self._topic_subscriptions: Dict[str, tuple] = {}
+        self._metrics: Dict[str, TopicMetrics] = {}
+        self._ids = itertools.count(1)
+
+        self._lock = threading.RLock()
+        self._idle = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)
+        self._active_drains = 0
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # 配置和订阅
+    def configure_topic(self, topic: str, max_queue_size: Optional[int] = None,
+                        overflow: Optional[OverflowPolicy] = None,
+                        coalesce_key: Optional[Callable[[Any], Hashable]] = None) -> TopicConfig:
+        """配置主题的队列长度和溢出策略，对已有订阅同样生效"""
+        with self._lock:
+            current = self._topic_configs.get(topic, self.default_config)
+            config = TopicConfig(
+                max_queue_size=current.max_queue_size if max_queue_size is None else max_queue_size,
+                overflow=current.overflow if overflow is None else overflow,
+                coalesce_key=coalesce_key if coalesce_key is not None else current.coalesce_key
+            )
+            self._topic_configs[topic] = config
+            return config
+
+    def get_topic_config(self, topic: str) -> TopicConfig:
+        with self._lock:
+            return self._topic_configs.get(topic, self.default_config)
+
+    def subscribe(self, topic: str, handler: Callable, inline: bool = False,
+                  is_async: Optional[bool] = None, config: Optional[TopicConfig] = None) -> str:
+        """订阅主题，topic为"*"时接收所有主题，返回订阅ID
+
+        config 为该订阅的收件箱指定队列长度和溢出策略（不受共享总线上主题配置的影响）
+        """
+        subscription = _Subscription(
+            subscription_id=f"{self.name}-{next(self._ids)}",
+            topic=topic,
+            handler=handler,
+            is_async=asyncio.iscoroutinefunction(handler) if is_async is None else is_async,
+            inline=inline,
+            config=config
+        )
+        with self._lock:
+            self._subscriptions[subscription.subscription_id] = subscription
+            self._topic_subscriptions.clear()
+        return subscription.subscription_id
+
+    def unsubscribe(self, subscription_id: str) -> bool:
+        """取消订阅，收件箱中未处理的事件被丢弃"""
+        with self._lock:
+            subscription = self._subscriptions.pop(subscription_id, None)
+            if subscription is None:
+                return False
+            subscription.active = False
+            subscription.queue.clear()
+            subscription.pending_keys.clear()
+            self._topic_subscriptions.clear()
+            self._idle.notify_all()
+            self._space.notify_all()
+        self._wake_waiters(subscription)
+        return True
+
+    # 发布
+    def publish_nowait(self, topic: str, event: Any) -> int:
+        """发布事件（线程安全），返回接收该事件的订阅数量
+
+        BLOCK策略的队列已满时阻塞发布线程直到处理函数消费；
+        总线事件循环线程、GUI主线程和同步处理函数内发布时不能阻塞，事件超出上限直接入队。
+        """
+        subscriptions = self._get_topic_subscriptions(topic)
+        with self._lock:
+            self._get_metrics(topic).published += 1
+        queued = 0
+        for subscription in subscriptions:
+            if self._enqueue(subscription, topic, event):
+                queued += 1
+        return queued
+
+    async def publish(self, topic: str, event: Any) -> int:
+        """发布事件；BLOCK策略的主题在队列满时等待处理函数消费"""
+        subscriptions = self._get_topic_subscriptions(topic)
+        topic_config = self.get_topic_config(topic)
+        if not any((subscription.config or topic_config).overflow is OverflowPolicy.BLOCK
+                   for subscription in subscriptions):
+            return self.publish_nowait(topic, event)
+
+        with self._lock:
+            self._get_metrics(topic).published += 1
+
+        queued = 0
+        blocked = []
+        for subscription in subscriptions:
+            if self._enqueue(subscription, topic, event, wait=False):
+                queued += 1
+            else:
+                blocked.append(subscription)
+
+        if blocked:
+            # 队列已满的订阅在总线事件循环上等待空位
+            loop = self._ensure_running()
+            waiting = self._wait_for_space(blocked, topic, event)
+            if asyncio.get_running_loop() is loop:
+                queued += await waiting
+            else:
+                queued += await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(waiting, loop))
+        return queued
+
+    def deliver(self, subscription_id: str, event: Any, topic: Optional[str] = None) -> bool:
+        """直接投递给指定订阅（由调用方完成订阅选择时使用）"""
+        with self._lock:
+            subscription = self._subscriptions.get(subscription_id)
+        if subscription is None:
+            return False
+        topic = topic or subscription.topic
+        with self._lock:
+            self._get_metrics(topic).published += 1
+        return self._enqueue(subscription, topic, event)
+
+    # 生命周期
+    def start(self):
+        """启动总线事件循环线程"""
+        self._ensure_running()
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """等待所有收件箱处理完毕"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._active_drains or any(s.queue for s in self._subscriptions.values()):
+                if not self.is_running:
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining if remaining is not None else 0.1)
+        return True
+
+    def stop(self, wait: bool = True, timeout: Optional[float] = 5.0):
+        """停止总线，wait为True时先处理完已排队的事件"""
+        if not self.is_running:
+            return
+        if wait:
+            self.wait_idle(timeout)
+
+        loop, thread = self._loop, self._thread
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        with self._lock:
+            self._loop = None
+            self._thread = None
+            for subscription in self._subscriptions.values():
+                subscription.scheduled = False
+        logger.debug(f"事件总线已停止: {self.name}")
+
+    # 指标
+    def get_metrics(self) -> Dict[str, Any]:
+        """返回各主题和订阅的队列深度、延迟和处理耗时"""
+        with self._lock:
+            topics = {topic: metrics.to_dict() for topic, metrics in self._metrics.items()}
+            for metrics in topics.values():
+                metrics['queue_depth'] = 0
+
+            subscriptions = {}
+            for subscription in self._subscriptions.values():
+                depth = len(subscription.queue)
+                for queued in subscription.queue:
+                    if queued.topic in topics:
+                        topics[queued.topic]['queue_depth'] += 1
+                subscriptions[subscription.subscription_id] = {
+                    'topic': subscription.topic,
+                    'queue_depth': depth,
+                    'max_queue_depth': subscription.max_queue_depth,
+                    'handled': subscription.handled,
+                    'handler_time_avg': (subscription.handler_time_total / subscription.handled
+                                         if subscription.handled else 0.0)
+                }
+
+            return {
+                'running': self.is_running,
+                'queue_depth': sum(s['queue_depth'] for s in subscriptions.values()),
+                'topics': topics,
+                'subscriptions': subscriptions
+            }
+
+    # 内部实现
+    def _get_metrics(self, topic: str) -> TopicMetrics:
+        metrics = self._metrics.get(topic)
+        if metrics is None:
+            metrics = self._metrics[topic] = TopicMetrics()
+        return metrics
+
+    def _get_topic_subscriptions(self, topic: str) -> tuple:
+        with self._lock:
+            subscriptions = self._topic_subscriptions.get(topic)
+            if subscriptions is None:
+                subscriptions = tuple(s for s in self._subscriptions.values()
+                                      if s.topic == topic or s.topic == ALL_TOPICS)
+                self._topic_subscriptions[topic] = subscriptions
+        return subscriptions
+
+    def _may_block(self) -> bool:
+        """当前发布线程能否等待队列空位
+
+        事件循环线程等待自己消费会死锁；GUI主线程阻塞会冻结界面；
+        同步处理函数向已满主题发布时，消费方可能正在等待它返回。
+        """
+        current = threading.current_thread()
+        return (self.is_running and current is not self._thread
+                and current is not threading.main_thread()
+                and not getattr(_handler_context, 'active', False))
+
+    def _enqueue(self, subscription: _Subscription, topic: str, event: Any, wait: bool = True) -> bool:
+        """放入订阅收件箱并按溢出策略处理满队列
+
+        BLOCK策略下wait为False且队列已满时返回False，由异步发布方等待。
+        """
+        config = subscription.config or self.get_topic_config(topic)
+        now = time.perf_counter()
+
+        with self._lock:
+            if not subscription.active:
+                return False
+            metrics = self._get_metrics(topic)
+
+            key = None
+            if config.coalesce_key is not None and config.overflow is OverflowPolicy.COALESCE:
+                key = (topic, config.coalesce_key(event))
+                queued = subscription.pending_keys.get(key)
+                if queued is not None:
+                    # 保留原来的排队位置和发布时间，只替换为最新事件
+                    queued.event = event
+                    metrics.coalesced += 1
+                    return True
+
+            while len(subscription.queue) >= config.max_queue_size:
+                if config.overflow is OverflowPolicy.BLOCK:
+                    if not wait:
+                        return False
+                    if not self._may_block():
+                        # 不能等待的线程直接超出上限入队，不丢事件
+                        break
+                    self._space.wait(0.1)
+                    if not subscription.active:
+                        return False
+                    continue
+                if config.overflow is OverflowPolicy.DROP_NEWEST:
+                    metrics.dropped += 1
+                    return False
+                dropped = subscription.queue.popleft()
+                if dropped.key is not None:
+                    subscription.pending_keys.pop(dropped.key, None)
+                self._get_metrics(dropped.topic).dropped += 1
+                break
+
+            queued = _QueuedEvent(topic, event, now, key)
+            subscription.queue.append(queued)
+            if key is not None:
+                subscription.pending_keys[key] = queued
+
+            depth = len(subscription.queue)
+            if depth > subscription.max_queue_depth:
+                subscription.max_queue_depth = depth
+            if depth > metrics.max_queue_depth:
+                metrics.max_queue_depth = depth
+
+            schedule = not subscription.scheduled
+            subscription.scheduled = True
+
+        if schedule:
+            self._schedule_drain(subscription)
+        return True
+
+    async def _wait_for_space(self, subscriptions: List[_Subscription], topic: str, event: Any) -> int:
+        queued = 0
+        for subscription in subscriptions:
+            while not self._enqueue(subscription, topic, event, wait=False):
+                if not subscription.active:
+                    break
+                waiter = asyncio.get_running_loop().create_future()
+                with self._lock:
+                    # 入队失败后处理函数可能已经消费，重新检查避免错过唤醒
+                    config = subscription.config or self.get_topic_config(topic)
+                    if len(subscription.queue) < config.max_queue_size:
+                        continue
+                    subscription.space_waiters.append(waiter)
+                await waiter
+            else:
+                queued += 1
+        return queued
+
+    def _wake_waiters(self, subscription: _Subscription):
+        with self._lock:
+            waiters, subscription.space_waiters = subscription.space_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(
+                    lambda w=waiter: w.done() or w.set_result(None)
+                )
+
+    def _ensure_running(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None:
+                return self._loop
+
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=run, name=self.name, daemon=True)
+            self._loop = loop
+            self._thread.start()
+            started.wait()
+
+            # 总线停止期间排队的事件
+            pending = [s for s in self._subscriptions.values() if s.queue and not s.scheduled]
+            for subscription in pending:
+                subscription.scheduled = True
+        for subscription in pending:
+            self._schedule_drain(subscription)
+        return loop
+
+    def _schedule_drain(self, subscription: _Subscription):
+        loop = self._ensure_running()
+        loop.call_soon_threadsafe(loop.create_task, self._drain(subscription))
+
+    async def _drain(self, subscription: _Subscription):
+        """按顺序处理订阅收件箱中的事件"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._active_drains += 1
+
+        try:
+            while True:
+                with self._lock:
+                    if not subscription.queue or not subscription.active:
+                        subscription.scheduled = False
+                        return
+                    queued = subscription.queue.popleft()
+                    if queued.key is not None:
+                        subscription.pending_keys.pop(queued.key, None)
+                    self._space.notify_all()
+                if subscription.space_waiters:
+                    self._wake_waiters(subscription)
+
+                start_time = time.perf_counter()
+                error = False
+                try:
+                    if subscription.is_async:
+                        await subscription.handler(queued.event)
+                    elif subscription.inline:
+                        subscription.handler(queued.event)
+                    else:
+                        await loop.run_in_executor(self._executor, _call_handler,
+                                                   subscription.handler, queued.event)
+                except Exception as e:
+                    error = True
+                    logger.error(f"事件处理函数出错 ({queued.topic}): {e}")
+                end_time = time.perf_counter()
+
+                with self._lock:
+                    lag = start_time - queued.published_at
+                    handler_time = end_time - start_time
+                    metrics = self._get_metrics(queued.topic)
+                    metrics.delivered += 1
+                    metrics.errors += error
+                    metrics.lag_total += lag
+                    metrics.lag_max = max(metrics.lag_max, lag)
+                    metrics.handler_time_total += handler_time
+                    metrics.handler_time_max = max(metrics.handler_time_max, handler_time)
+                    subscription.handled += 1
+                    subscription.handler_time_total += handler_time
+        finally:
+            with self._lock:
+                self._active_drains -= 1
+                self._idle.notify_all()
+
+
+# 全局事件总线
+def _call_handler(handler: Callable, event: Any):
+    """在执行器线程中调用同步处理函数，并标记处理函数上下文"""
+    _handler_context.active = True
+    try:
+        return handler(event)
+    finally:
+        _handler_context.active = False
+
+
+_async_event_bus: Optional[AsyncEventBus] = None
+_async_event_bus_lock = threading.Lock()
+
+
+def get_async_event_bus() -> AsyncEventBus:
+    """获取全局事件总线"""
+    global _async_event_bus
+    if _async_event_bus is None:
+        with _async_event_bus_lock:
+            if _async_event_bus is None:
+                # 发布方多在GUI线程，队列满时丢弃最旧事件而不是阻塞；
+                # 需要不丢事件的主题另行配置为BLOCK，进度类主题配置为合并
+                _async_event_bus = AsyncEventBus(TopicConfig(max_queue_size=10000,
+                                                             overflow=OverflowPolicy.DROP_OLDEST))
+    return _async_event_bus
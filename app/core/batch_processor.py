@@ -11,7 +11,6 @@ import json
 import time
 import logging
 import threading
-import queue
 from typing import Dict, List, Optional, Any, Tuple, Union, Callable
 from dataclasses import dataclass, field
 from enum import Enum
@@ -21,6 +20,10 @@ import psutil
 import shutil
 from datetime import datetime
 
+from ..utils.probe_cache import get_probe_cache
+from .resource_governor import ResourceBudget, ResourceCost, ResourceGovernor, ResourceUsage
+from .task_graph import NodeState, TaskGraph, TaskNode
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,6 +44,24 @@ class BatchTaskType(Enum):
     CUSTOM = "custom"
 
 
+# 各类任务的相对耗时估计，用于计算关键路径（可通过 task.metadata["estimated_cost"] 覆盖）
+TASK_COST_ESTIMATES = {
+    BatchTaskType.ANALYZE: 2.0,
+    BatchTaskType.GENERATE_THUMBNAILS: 1.0,
+    BatchTaskType.EXTRACT_FRAMES: 2.0,
+    BatchTaskType.RESIZE: 4.0,
+    BatchTaskType.WATERMARK: 4.0,
+    BatchTaskType.CONVERT: 5.0,
+    BatchTaskType.COMPRESS: 6.0,
+    BatchTaskType.COLOR_CORRECT: 6.0,
+    BatchTaskType.OPTIMIZE: 8.0,
+    BatchTaskType.DENOISE: 10.0,
+    BatchTaskType.STABILIZE: 12.0,
+    BatchTaskType.UPSCALE: 15.0,
+    BatchTaskType.CUSTOM: 5.0,
+}
+
+
 class BatchPriority(Enum):
     """批量任务优先级"""
     LOW = 0
@@ -103,6 +124,7 @@ class BatchJob:
     total_tasks: int = 0
     completed_tasks: int = 0
     failed_tasks: int = 0
+    cancelled_tasks: int = 0
     processing_time: float = 0.0
     config: Dict[str, Any] = field(default_factory=dict)
     
@@ -113,7 +135,7 @@ class BatchJob:
 @dataclass
 class BatchConfig:
     """批量处理配置"""
-    max_concurrent_tasks: int = 4
+    max_concurrent_tasks: int = 0  # 0 表示由资源预算决定（CPU核数的两倍），关闭准入控制时为4
     max_workers_per_task: int = 2
     task_timeout: int = 3600  # 秒
     retry_enabled: bool = True
@@ -128,6 +150,10 @@ class BatchConfig:
     result_dir: str = "/tmp/batch_processor/results"
     cleanup_enabled: bool = True
     cleanup_days: int = 7
+    admission_control: bool = True  # 按CPU、内存、磁盘预算放行任务
+    cpu_budget: float = 0.0  # 核数，0 表示本机核数
+    io_budget_mbps: float = 400.0
+    resource_history_path: Optional[str] = None  # 学习到的任务资源需求的保存位置
 
 
 @dataclass
@@ -150,20 +176,35 @@ class BatchResult:
 class BatchProcessor:
     """批量处理器"""
     
+    # 子进程资源采样间隔（秒）
+    USAGE_SAMPLE_INTERVAL = 0.2
+    
     def __init__(self, config: BatchConfig = None):
         self.config = config or BatchConfig()
         
-        # 任务队列
-        self.task_queue = queue.PriorityQueue()
+        # 任务依赖图：依赖计数归零的任务才进入就绪堆，失败和取消沿依赖传播
+        self.scheduler = TaskGraph(on_finished=self._on_task_finished)
         self.active_tasks: Dict[str, BatchTask] = {}
         self.completed_tasks: List[BatchTask] = []
         
         # 作业管理
         self.jobs: Dict[str, BatchJob] = {}
         self.job_lock = threading.Lock()
+        self._task_jobs: Dict[str, str] = {}  # 任务ID -> 作业ID
+        
+        # 资源准入：预算（内存以 memory_limit_mb 为上限）有余量时才放行任务
+        self.governor: Optional[ResourceGovernor] = None
+        if self.config.admission_control:
+            budget = ResourceBudget.from_system(self.config.cpu_budget, self.config.memory_limit_mb,
+                                                self.config.io_budget_mbps)
+            self.governor = ResourceGovernor(budget, history_path=self.config.resource_history_path,
+                                             pressure_probe=lambda: not self._check_memory_usage())
+        self._grants: Dict[str, Any] = {}  # 任务ID -> ResourceGrant
+        self._usage: Dict[str, ResourceUsage] = {}  # 任务ID -> 子进程实测用量
+        self.worker_count = self._worker_count()
         
         # 线程池
-        self.thread_pool = ThreadPoolExecutor(max_workers=self.config.max_concurrent_tasks)
+        self.thread_pool = ThreadPoolExecutor(max_workers=self.worker_count)
         self.process_pool = ProcessPoolExecutor(max_workers=self.config.max_workers_per_task)
         
         # 状态管理
@@ -179,6 +220,7 @@ class BatchProcessor:
             "total_tasks": 0,
             "completed_tasks": 0,
             "failed_tasks": 0,
+            "cancelled_tasks": 0,
             "total_processing_time": 0.0,
             "average_task_time": 0.0,
             "success_rate": 0.0
@@ -218,7 +260,7 @@ class BatchProcessor:
         self.running = True
         
         # 启动任务处理线程
-        for i in range(self.config.max_concurrent_tasks):
+        for i in range(self.worker_count):
             worker_thread = threading.Thread(target=self._worker_loop, daemon=True, name=f"BatchWorker-{i}")
             worker_thread.start()
         
@@ -245,30 +287,133 @@ class BatchProcessor:
                     time.sleep(1)
                     continue
                 
-                # 获取任务
-                task = self.task_queue.get(timeout=1)
-                if task is None:  # 停止信号
-                    break
+                # 获取依赖已满足、关键路径最长且资源预算放得下的任务
+                if self.governor is not None:
+                    node = self.scheduler.pop_ready(timeout=1, admit=self._admit)
+                else:
+                    node = self.scheduler.pop_ready(timeout=1)
+                if node is None:
+                    continue
+                if self.paused:
+                    self._release_grant(node.task_id)
+                    self.scheduler.release(node.task_id)
+                    continue
                 
-                # 检查内存使用
-                if not self._check_memory_usage():
+                # 未启用准入控制时只检查内存使用
+                if self.governor is None and not self._check_memory_usage():
                     logger.warning("内存使用过高，延迟处理任务")
-                    self.task_queue.put(task)
+                    self.scheduler.release(node.task_id)
                     time.sleep(5)
                     continue
                 
                 # 处理任务
-                self._process_task(task)
+                self._process_task(node.payload)
                 
-            except queue.Empty:
-                continue
             except Exception as e:
                 logger.error(f"工作线程错误: {e}")
                 time.sleep(5)
     
+    def _worker_count(self) -> int:
+        """工作线程数：显式配置优先，启用准入控制时按CPU预算放宽，实际并发由资源预算决定"""
+        if self.config.max_concurrent_tasks > 0:
+            return self.config.max_concurrent_tasks
+        if self.governor is not None:
+            return max(int(self.governor.budget.cpu * 2), 4)
+        return 4
+    
+    @staticmethod
+    def _resource_profile(task: BatchTask) -> str:
+        return task.metadata.get("resource_profile", task.task_type.value)
+    
+    @staticmethod
+    def _declared_resources(task: BatchTask) -> Optional[ResourceCost]:
+        """任务显式声明的资源需求（metadata["resources"]，提交时已校验）"""
+        resources = task.metadata.get("resources")
+        return resources if isinstance(resources, ResourceCost) else None
+    
+    @staticmethod
+    def _validate_tasks(tasks: List[BatchTask]):
+        """提交前校验资源声明，字典形式转换为 ResourceCost，非法声明抛出 ValueError"""
+        for task in tasks:
+            resources = task.metadata.get("resources")
+            if resources is None or isinstance(resources, ResourceCost):
+                continue
+            if not isinstance(resources, dict):
+                raise ValueError(f"任务 {task.task_id} 的资源声明类型无效: {type(resources).__name__}")
+            try:
+                task.metadata["resources"] = ResourceCost(**resources)
+            except TypeError as e:
+                raise ValueError(f"任务 {task.task_id} 的资源声明无效: {e}") from e
+    
+    def _admit(self, node: TaskNode) -> bool:
+        """准入检查，在任务图锁内调用"""
+        task: BatchTask = node.payload
+        grant = self.governor.try_acquire(task.task_id, self._resource_profile(task),
+                                          self._declared_resources(task))
+        if grant is None:
+            return False
+        self._grants[task.task_id] = grant
+        return True
+    
+    def _release_grant(self, task_id: str, usage: Optional[ResourceUsage] = None):
+        """归还任务占用的资源并唤醒等待资源的工作线程"""
+        grant = self._grants.pop(task_id, None)
+        if grant is None:
+            return
+        self.governor.release(grant, usage)
+        self.scheduler.wake()
+    
+    def _thread_args(self, task: BatchTask) -> List[str]:
+        """按实际分到的核数设置 ffmpeg 线程数"""
+        grant = self._grants.get(task.task_id)
+        return ["-threads", str(grant.threads)] if grant is not None else []
+    
+    def _run_command(self, task: BatchTask, cmd: List[str],
+                     timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """执行外部命令，运行期间采样子进程的CPU时间、内存峰值和磁盘读写，累计到任务的实测用量"""
+        usage = ResourceUsage()
+        started = time.monotonic()
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            monitor = psutil.Process(process.pid)
+        except psutil.Error:
+            monitor = None
+        
+        while True:
+            try:
+                stdout, stderr = process.communicate(timeout=self.USAGE_SAMPLE_INTERVAL)
+                break
+            except subprocess.TimeoutExpired:
+                if timeout is not None and time.monotonic() - started > timeout:
+                    process.kill()
+                    process.communicate()
+                    raise subprocess.TimeoutExpired(cmd, timeout)
+                if monitor is not None:
+                    self._sample_usage(monitor, usage)
+        
+        usage.wall_seconds = time.monotonic() - started
+        self._usage.setdefault(task.task_id, ResourceUsage()).merge(usage)
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+    
+    @staticmethod
+    def _sample_usage(monitor: psutil.Process, usage: ResourceUsage):
+        try:
+            with monitor.oneshot():
+                cpu_times = monitor.cpu_times()
+                memory_mb = monitor.memory_info().rss / (1024 * 1024)
+                io = monitor.io_counters() if hasattr(monitor, "io_counters") else None
+        except psutil.Error:
+            return
+        usage.cpu_seconds = cpu_times.user + cpu_times.system
+        usage.peak_memory_mb = max(usage.peak_memory_mb, memory_mb)
+        if io is not None:
+            usage.io_bytes = io.read_bytes + io.write_bytes
+        usage.samples += 1
+    
     def _process_task(self, task: BatchTask):
         """处理单个任务"""
         start_time = time.time()
+        succeeded = False
         
         try:
             # 更新任务状态
@@ -276,12 +421,6 @@ class BatchProcessor:
             task.started_at = start_time
             self.active_tasks[task.task_id] = task
             
-            # 检查依赖
-            if not self._check_dependencies(task):
-                task.status = BatchStatus.FAILED
-                task.error_message = "依赖任务未完成"
-                return
-            
             # 获取输入文件大小
             if os.path.exists(task.input_path):
                 task.file_size = os.path.getsize(task.input_path)
@@ -294,54 +433,100 @@ class BatchProcessor:
             # 更新任务状态
             task.completed_at = time.time()
             task.processing_time = task.completed_at - task.started_at
+            self.active_tasks.pop(task.task_id, None)
+            
+            # 先归还资源再调度后继，只用成功运行的实测用量学习资源需求
+            succeeded = bool(result["success"])
+            self._release_grant(task.task_id, self._usage.pop(task.task_id, None) if succeeded else None)
+            
+            if self.scheduler.state(task.task_id) != NodeState.RUNNING:
+                # 执行期间已超时处理，结果丢弃
+                return
             
             if result["success"]:
-                task.status = BatchStatus.COMPLETED
                 if os.path.exists(task.output_path):
                     task.output_file_size = os.path.getsize(task.output_path)
                 
                 # 更新统计
-                self.stats["completed_tasks"] += 1
                 self.stats["total_processing_time"] += task.processing_time
                 
                 logger.info(f"任务完成: {task.task_id}, 耗时: {task.processing_time:.2f}s")
+                self.scheduler.complete(task.task_id)
             else:
-                task.status = BatchStatus.FAILED
                 task.error_message = result.get("error", "未知错误")
                 
                 # 重试逻辑
                 if self.config.retry_enabled and task.retry_count < task.max_retries:
                     task.retry_count += 1
                     task.status = BatchStatus.PENDING
-                    task.created_at = time.time() + self.config.retry_delay
-                    self.task_queue.put(task)
                     logger.info(f"任务重试: {task.task_id}, 重试次数: {task.retry_count}")
+                    self.scheduler.retry(task.task_id, self.config.retry_delay)
                 else:
-                    self.stats["failed_tasks"] += 1
                     logger.error(f"任务失败: {task.task_id}, 错误: {task.error_message}")
-            
-            # 更新作业状态
-            self._update_job_status(task)
-            
-            # 移动到已完成列表
-            self.completed_tasks.append(task)
-            self.active_tasks.pop(task.task_id, None)
+                    self.scheduler.fail(task.task_id, task.error_message)
             
         except Exception as e:
-            task.status = BatchStatus.FAILED
             task.error_message = str(e)
             task.completed_at = time.time()
             task.processing_time = task.completed_at - task.started_at
+            self.active_tasks.pop(task.task_id, None)
             
-            self.stats["failed_tasks"] += 1
             logger.error(f"任务处理异常: {task.task_id}, 错误: {e}")
-            
-            # 更新作业状态
-            self._update_job_status(task)
-            
-            # 移动到已完成列表
-            self.completed_tasks.append(task)
-            self.active_tasks.pop(task.task_id, None)
+            self.scheduler.fail(task.task_id, task.error_message)
+        
+        finally:
+            self._usage.pop(task.task_id, None)
+            self._release_grant(task.task_id)
+    
+    def _on_task_finished(self, node: TaskNode):
+        """任务进入终态（完成、失败、取消或因上游失败被连带取消）"""
+        task: BatchTask = node.payload
+        if task is None:
+            return
+        
+        if node.state == NodeState.COMPLETED:
+            task.status = BatchStatus.COMPLETED
+            self.stats["completed_tasks"] += 1
+        elif node.state == NodeState.FAILED:
+            task.status = BatchStatus.FAILED
+            task.error_message = node.error or task.error_message
+            self.stats["failed_tasks"] += 1
+        else:
+            task.status = BatchStatus.CANCELLED
+            task.error_message = node.error
+            self.stats["cancelled_tasks"] += 1
+            if task.completed_at is None:
+                task.completed_at = time.time()
+            logger.info(f"任务已取消: {task.task_id}, 原因: {node.error}")
+        
+        if self.governor is not None:
+            self.governor.forget(task.task_id)
+        
+        # 更新作业状态
+        self._update_job_status(task)
+        
+        # 移动到已完成列表
+        self.completed_tasks.append(task)
+        
+        if task.status == BatchStatus.FAILED and self.error_callback:
+            try:
+                self.error_callback(task)
+            except Exception as e:
+                logger.error(f"错误回调失败: {e}")
+    
+    @staticmethod
+    def _estimate_cost(task: BatchTask) -> float:
+        """任务耗时估计（关键路径权重）"""
+        if "estimated_cost" in task.metadata:
+            return float(task.metadata["estimated_cost"])
+        return TASK_COST_ESTIMATES.get(task.task_type, 1.0)
+    
+    def _submit_tasks(self, tasks: List[BatchTask]):
+        """把任务及其依赖关系提交到任务图"""
+        self.scheduler.add_many(
+            (task.task_id, task, task.dependencies, self._estimate_cost(task), task.priority.value)
+            for task in tasks
+        )
     
     def _execute_task(self, task: BatchTask) -> Dict[str, Any]:
         """执行任务"""
@@ -394,11 +579,12 @@ class BatchProcessor:
                 "-preset", task.params.get("preset", "medium"),
                 "-c:a", "aac",
                 "-b:a", f"{task.params.get('audio_bitrate', 128)}k",
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -419,11 +605,12 @@ class BatchProcessor:
                 "-i", task.input_path,
                 "-c:v", task.params.get("video_codec", "libx264"),
                 "-c:a", task.params.get("audio_codec", "aac"),
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -448,11 +635,12 @@ class BatchProcessor:
                 "-tune", "film",
                 "-c:a", "aac",
                 "-b:a", "128k",
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -476,11 +664,12 @@ class BatchProcessor:
                 "-i", task.input_path,
                 "-vf", f"scale={width}:{height}",
                 "-c:a", "copy",
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -506,11 +695,12 @@ class BatchProcessor:
                 "-i", watermark_path,
                 "-filter_complex", "overlay=10:10",
                 "-c:a", "copy",
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -535,11 +725,12 @@ class BatchProcessor:
                 "ffmpeg",
                 "-i", task.input_path,
                 "-vf", f"fps={frame_rate}",
+                *self._thread_args(task),
                 os.path.join(output_dir, "frame_%04d.jpg")
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -561,9 +752,7 @@ class BatchProcessor:
             os.makedirs(output_dir, exist_ok=True)
             
             # 获取视频时长
-            cmd = ["ffprobe", "-v", "quiet", "-show_format", "-print_format", "json", task.input_path]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            data = json.loads(result.stdout)
+            data = get_probe_cache().probe(task.input_path)
             duration = float(data["format"]["duration"])
             
             # 生成缩略图
@@ -577,10 +766,11 @@ class BatchProcessor:
                     "-i", task.input_path,
                     "-vframes", "1",
                     "-vf", f"scale={size}",
+                    *self._thread_args(task),
                     "-y", output_path
                 ]
                 
-                subprocess.run(cmd, capture_output=True, text=True)
+                self._run_command(task, cmd)
             
             return {"success": True}
                 
@@ -590,29 +780,13 @@ class BatchProcessor:
     def _analyze_video(self, task: BatchTask) -> Dict[str, Any]:
         """分析视频"""
         try:
-            # 构建FFprobe命令
-            cmd = [
-                "ffprobe",
-                "-v", "quiet",
-                "-print_format", "json",
-                "-show_format",
-                "-show_streams",
-                task.input_path
-            ]
+            data = get_probe_cache().probe(task.input_path)
             
-            # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
-            
-            if result.returncode == 0:
-                # 保存分析结果
-                with open(task.output_path, 'w') as f:
-                    f.write(result.stdout)
-                return {"success": True}
-            else:
-                return {"success": False, "error": result.stderr}
+            # 保存分析结果
+            with open(task.output_path, 'w') as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+            return {"success": True}
                 
-        except subprocess.TimeoutExpired:
-            return {"success": False, "error": "分析超时"}
         except Exception as e:
             return {"success": False, "error": str(e)}
     
@@ -625,11 +799,12 @@ class BatchProcessor:
                 "-i", task.input_path,
                 "-vf", "deshake=rx=64:ry=64:edge=1:blocksize=32",
                 "-c:a", "copy",
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -653,11 +828,12 @@ class BatchProcessor:
                 "-i", task.input_path,
                 "-vf", f"eq=brightness={brightness}:contrast={contrast}",
                 "-c:a", "copy",
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -680,11 +856,12 @@ class BatchProcessor:
                 "-i", task.input_path,
                 "-vf", f"hqdn3d=luma_spatial={strength}:chroma_spatial={strength}",
                 "-c:a", "copy",
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -707,11 +884,12 @@ class BatchProcessor:
                 "-i", task.input_path,
                 "-vf", f"scale=iw*{scale_factor}:ih*{scale_factor}",
                 "-c:a", "copy",
+                *self._thread_args(task),
                 "-y", task.output_path
             ]
             
             # 执行命令
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, cmd, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -739,7 +917,7 @@ class BatchProcessor:
                 command.append(cmd_part)
             
             # 执行命令
-            result = subprocess.run(command, capture_output=True, text=True, timeout=self.config.task_timeout)
+            result = self._run_command(task, command, self.config.task_timeout)
             
             if result.returncode == 0:
                 return {"success": True}
@@ -751,18 +929,6 @@ class BatchProcessor:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
-    def _check_dependencies(self, task: BatchTask) -> bool:
-        """检查任务依赖"""
-        for dep_task_id in task.dependencies:
-            # 检查依赖任务是否完成
-            dep_completed = any(
-                t.task_id == dep_task_id and t.status == BatchStatus.COMPLETED
-                for t in self.completed_tasks
-            )
-            if not dep_completed:
-                return False
-        return True
-    
     def _check_memory_usage(self) -> bool:
         """检查内存使用"""
         memory = psutil.virtual_memory()
@@ -772,27 +938,40 @@ class BatchProcessor:
         """更新作业状态"""
         with self.job_lock:
             # 查找对应的作业
-            for job in self.jobs.values():
-                for job_task in job.tasks:
-                    if job_task.task_id == task.task_id:
-                        # 更新作业统计
-                        if task.status == BatchStatus.COMPLETED:
-                            job.completed_tasks += 1
-                        elif task.status == BatchStatus.FAILED:
-                            job.failed_tasks += 1
-                        
-                        # 更新作业状态
-                        if job.completed_tasks + job.failed_tasks == job.total_tasks:
-                            job.status = BatchStatus.COMPLETED if job.failed_tasks == 0 else BatchStatus.FAILED
-                            job.completed_at = time.time()
-                            job.processing_time = job.completed_at - job.started_at if job.started_at else 0
-                            
-                            # 更新统计
-                            self.stats["completed_jobs"] += 1
-                            if job.failed_tasks > 0:
-                                self.stats["failed_jobs"] += 1
-                        
-                        break
+            job = self.jobs.get(self._task_jobs.get(task.task_id))
+            if job is None:
+                return
+            
+            # 更新作业统计
+            if task.status == BatchStatus.COMPLETED:
+                job.completed_tasks += 1
+            elif task.status == BatchStatus.FAILED:
+                job.failed_tasks += 1
+            elif task.status == BatchStatus.CANCELLED:
+                job.cancelled_tasks += 1
+            
+            if job.status == BatchStatus.PENDING:
+                job.status = BatchStatus.RUNNING
+                job.started_at = task.started_at or time.time()
+            
+            # 更新作业状态
+            if job.completed_tasks + job.failed_tasks + job.cancelled_tasks == job.total_tasks:
+                if job.status != BatchStatus.CANCELLED:
+                    job.status = BatchStatus.COMPLETED if job.failed_tasks + job.cancelled_tasks == 0 \
+                        else BatchStatus.FAILED
+                    job.completed_at = time.time()
+                job.processing_time = job.completed_at - job.started_at if job.started_at else 0
+                
+                # 更新统计
+                self.stats["completed_jobs"] += 1
+                if job.status != BatchStatus.COMPLETED:
+                    self.stats["failed_jobs"] += 1
+                
+                if self.completion_callback:
+                    try:
+                        self.completion_callback(job)
+                    except Exception as e:
+                        logger.error(f"完成回调失败: {e}")
     
     def _monitor_loop(self):
         """监控循环"""
@@ -864,20 +1043,13 @@ class BatchProcessor:
         
         for task_id, task in list(self.active_tasks.items()):
             if task.started_at and current_time - task.started_at > self.config.task_timeout:
-                task.status = BatchStatus.FAILED
-                task.error_message = "任务超时"
                 task.completed_at = current_time
                 task.processing_time = task.completed_at - task.started_at
-                
-                self.stats["failed_tasks"] += 1
                 logger.warning(f"任务超时: {task_id}")
                 
-                # 更新作业状态
-                self._update_job_status(task)
-                
-                # 移动到已完成列表
-                self.completed_tasks.append(task)
+                # 下游任务随之取消，工作线程结束后结果丢弃
                 self.active_tasks.pop(task_id, None)
+                self.scheduler.fail(task_id, "任务超时")
     
     def _cleanup_temp_files(self):
         """清理临时文件"""
@@ -914,14 +1086,16 @@ class BatchProcessor:
     
     def _get_overall_progress(self) -> Dict[str, Any]:
         """获取总体进度"""
-        total_tasks = len(self.completed_tasks) + len(self.active_tasks) + self.task_queue.qsize()
-        completed_tasks = len([t for t in self.completed_tasks if t.status == BatchStatus.COMPLETED])
+        scheduler_stats = self.scheduler.get_stats()
+        pending_tasks = max(scheduler_stats["pending"] - len(self.active_tasks), 0)
+        total_tasks = len(self.completed_tasks) + len(self.active_tasks) + pending_tasks
+        completed_tasks = scheduler_stats["completed"]
         
         return {
             "total_tasks": total_tasks,
             "completed_tasks": completed_tasks,
             "active_tasks": len(self.active_tasks),
-            "pending_tasks": self.task_queue.qsize(),
+            "pending_tasks": pending_tasks,
             "progress_percent": (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
             "active_jobs": len([j for j in self.jobs.values() if j.status == BatchStatus.RUNNING]),
             "completed_jobs": len([j for j in self.jobs.values() if j.status == BatchStatus.COMPLETED])
@@ -930,6 +1104,7 @@ class BatchProcessor:
     def create_batch_job(self, name: str, description: str, tasks: List[BatchTask], 
                         config: Dict[str, Any] = None) -> str:
         """创建批量作业"""
+        self._validate_tasks(tasks)
         job_id = f"batch_{int(time.time() * 1000)}"
         
         job = BatchJob(
@@ -941,11 +1116,19 @@ class BatchProcessor:
         )
         
         with self.job_lock:
+            # 同一毫秒内创建的作业追加序号
+            suffix = 1
+            while job.job_id in self.jobs:
+                job.job_id = f"{job_id}_{suffix}"
+                suffix += 1
+            job_id = job.job_id
             self.jobs[job_id] = job
+            for task in tasks:
+                self._task_jobs[task.task_id] = job_id
         
-        # 将任务添加到队列
-        for task in tasks:
-            self.task_queue.put(task)
+        # 将任务及依赖关系提交到任务图；作业提交后仍未出现的依赖不会再补交，相关任务直接取消
+        self._submit_tasks(tasks)
+        self.scheduler.cancel_unresolved(task.task_id for task in tasks)
         
         self.stats["total_jobs"] += 1
         self.stats["total_tasks"] += len(tasks)
@@ -956,7 +1139,8 @@ class BatchProcessor:
     
     def add_task_to_queue(self, task: BatchTask):
         """添加任务到队列"""
-        self.task_queue.put(task)
+        self._validate_tasks([task])
+        self._submit_tasks([task])
         self.stats["total_tasks"] += 1
         logger.info(f"添加任务到队列: {task.task_id}")
     
@@ -973,16 +1157,17 @@ class BatchProcessor:
     def cancel_job(self, job_id: str) -> bool:
         """取消作业"""
         with self.job_lock:
-            if job_id in self.jobs:
-                job = self.jobs[job_id]
-                job.status = BatchStatus.CANCELLED
-                job.completed_at = time.time()
-                
-                # 取消队列中的任务
-                # 注意：这是一个简化的实现，实际需要更复杂的取消机制
-                logger.info(f"已取消作业: {job_id}")
-                return True
-            return False
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            job.status = BatchStatus.CANCELLED
+            job.completed_at = time.time()
+        
+        # 等待和就绪的任务立即取消，运行中的任务结束后不再调度其下游；依赖这些任务的其他作业任务一并取消
+        for task in job.tasks:
+            self.scheduler.cancel(task.task_id, f"作业已取消: {job_id}")
+        logger.info(f"已取消作业: {job_id}")
+        return True
     
     def pause_processing(self):
         """暂停处理"""
@@ -1011,6 +1196,9 @@ class BatchProcessor:
         else:
             stats["average_task_time"] = 0.0
         
+        if self.governor is not None:
+            stats["resources"] = self.governor.get_stats()
+        
         return stats
     
     def get_active_tasks(self) -> List[BatchTask]:
@@ -1106,8 +1294,9 @@ class BatchProcessor:
         self.running = False
         
         # 停止工作线程
-        for i in range(self.config.max_concurrent_tasks):
-            self.task_queue.put(None)
+        self.scheduler.close()
+        if self.governor is not None:
+            self.governor.save_history()
         
         # 等待线程结束
         time.sleep(2)
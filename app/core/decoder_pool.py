@@ -0,0 +1,420 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+解码器池 - 按文件路径共享 cv2.VideoCapture 句柄
+预览、场景检测、质量分析、OCR、特效渲染等模块不再各自打开同一个文件：
+句柄按路径复用并记录当前读取位置，请求优先分配给位置离目标帧最近的空闲句柄，
+顺序读取无需seek；打开的解码器总数受上限约束，超出时按LRU关闭空闲句柄。
+空闲句柄按 (路径, 大小, 修改时间) 归档，文件被替换后不会复用旧句柄，空闲超时后自动关闭
+"""
+
+import os
+import time
+import logging
+import threading
+import weakref
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.utils.lazy_import import lazy_module
+
+try:
+    cv2 = lazy_module("cv2")
+    CV2_AVAILABLE = True
+except ImportError:
+    cv2 = None
+    CV2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# OpenCV 属性常量（cv2不可用时使用相同数值，便于注入其他解码器实现）
+CAP_PROP_POS_MSEC = 0
+CAP_PROP_POS_FRAMES = 1
+CAP_PROP_FPS = 5
+CAP_PROP_FRAME_COUNT = 7
+
+
+@dataclass
+class DecoderPoolStats:
+    """解码器池统计"""
+    opens: int = 0
+    reuses: int = 0
+    evictions: int = 0
+    seeks: int = 0
+    seeks_avoided: int = 0
+    frames_skipped: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            'opens': self.opens,
+            'reuses': self.reuses,
+            'evictions': self.evictions,
+            'seeks': self.seeks,
+            'seeks_avoided': self.seeks_avoided,
+            'frames_skipped': self.frames_skipped
+        }
+
+
+class DecoderHandle:
+    """池化的解码器句柄，接口与 cv2.VideoCapture 兼容
+
+    句柄记录下一次 read() 返回的帧号。对 CAP_PROP_POS_FRAMES / CAP_PROP_POS_MSEC 的 set()
+    在目标就是当前位置时不做任何操作，目标在前方少量帧内时用 grab() 跳过，否则才真正seek。
+    release() 把句柄归还给池而不是关闭解码器。
+    """
+
+    def __init__(self, pool: "DecoderPool", path: str, capture: Any,
+                 signature: Tuple[int, int] = (-1, -1)):
+        self._pool = pool
+        self._capture = capture
+        self.path = path
+        self.signature = signature  # 打开时文件的 (大小, 修改时间)
+        self.position = 0
+        self.refcount = 0
+        self.last_used = time.monotonic()
+        self.closed = False
+        self.invalidated = False  # 文件已变化，归还后关闭
+
+        self.fps = float(capture.get(CAP_PROP_FPS) or 0.0)
+        self.frame_count = int(capture.get(CAP_PROP_FRAME_COUNT) or 0)
+
+        # 使用者丢弃句柄而未归还时，随句柄对象回收关闭底层解码器
+        self._finalizer = weakref.finalize(self, _close_leaked_capture, capture, path)
+
+    @property
+    def idle_key(self) -> Tuple[str, Tuple[int, int]]:
+        return self.path, self.signature
+
+    # VideoCapture 兼容接口
+    def isOpened(self) -> bool:
+        return not self.closed and self._capture.isOpened()
+
+    def read(self, image=None) -> Tuple[bool, Any]:
+        ret, frame = self._capture.read() if image is None else self._capture.read(image)
+        if ret:
+            self.position += 1
+        return ret, frame
+
+    def grab(self) -> bool:
+        ret = self._capture.grab()
+        if ret:
+            self.position += 1
+        return ret
+
+    def retrieve(self, image=None, flag: int = 0) -> Tuple[bool, Any]:
+        if image is None:
+            return self._capture.retrieve(None, flag)
+        return self._capture.retrieve(image, flag)
+
+    def get(self, prop_id: int) -> float:
+        if prop_id == CAP_PROP_POS_FRAMES:
+            return float(self.position)
+        return self._capture.get(prop_id)
+
+    def set(self, prop_id: int, value: float) -> bool:
+        if prop_id == CAP_PROP_POS_FRAMES:
+            return self.seek(int(value))
+        if prop_id == CAP_PROP_POS_MSEC and self.fps > 0:
+            return self.seek(int(round(value / 1000.0 * self.fps)))
+        return self._capture.set(prop_id, value)
+
+    def release(self):
+        """归还句柄到池"""
+        self._pool.release(self)
+
+    def retain(self) -> "DecoderHandle":
+        """共享当前租用，需要额外调用一次 release()"""
+        return self._pool.retain(self)
+
+    # 位置管理
+    def seek(self, frame_index: int) -> bool:
+        """定位到帧号，必要时才真正seek"""
+        frame_index = max(0, frame_index)
+        gap = frame_index - self.position
+        if gap == 0:
+            self._pool._record(seeks_avoided=1)
+            return True
+
+        if 0 < gap <= self._pool.max_skip_frames:
+            # 短距离前进：解码丢弃比seek到关键帧再解码更便宜
+            for _ in range(gap):
+                if not self.grab():
+                    break
+            self._pool._record(seeks_avoided=1, frames_skipped=gap)
+            return self.position == frame_index
+
+        self._pool._record(seeks=1)
+        ret = self._capture.set(CAP_PROP_POS_FRAMES, frame_index)
+        self.position = frame_index
+        return ret
+
+    def seek_cost(self, frame_index: int) -> int:
+        """定位到帧号的估计代价（需要解码的帧数），需要seek时代价高于任何短距离前进"""
+        gap = frame_index - self.position
+        if 0 <= gap <= self._pool.max_skip_frames:
+            return gap
+        return self._pool.max_skip_frames + 1 + abs(gap)
+
+    def _close(self):
+        self.closed = True
+        self._finalizer.detach()
+        try:
+            self._capture.release()
+        except Exception as e:
+            logger.debug(f"关闭解码器失败: {self.path} - {e}")
+
+    def __enter__(self) -> "DecoderHandle":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+    def __repr__(self) -> str:
+        return f"<DecoderHandle {self.path} @{self.position} refs={self.refcount}>"
+
+
+class DecoderPool:
+    """解码器池
+
+    池只持有空闲句柄；租出的句柄由使用者持有（弱引用计数），
+    使用者丢弃句柄而未归还时由句柄的终结器关闭解码器，不会永久占用名额。
+    空闲超过 idle_timeout 秒的句柄由后台定时器关闭，避免长期占用文件（Windows 上会阻止删除和重命名）。
+    """
+
+    def __init__(self, max_open: int = 8, max_skip_frames: int = 30,
+                 opener: Optional[Callable[[str], Any]] = None, idle_timeout: float = 30.0):
+        if opener is None and not CV2_AVAILABLE:
+            raise ImportError("解码器池需要 OpenCV (cv2)")
+
+        self.max_open = max_open
+        self.max_skip_frames = max_skip_frames
+        self.idle_timeout = idle_timeout
+        self._opener = opener or cv2.VideoCapture
+
+        self._idle: Dict[Tuple[str, Tuple[int, int]], List[DecoderHandle]] = {}
+        self._leased: "weakref.WeakSet[DecoderHandle]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._sweep_timer: Optional[threading.Timer] = None
+        self.stats = DecoderPoolStats()
+
+    @staticmethod
+    def normalize_path(path: str) -> str:
+        return os.path.abspath(os.fspath(path))
+
+    def acquire(self, path: str, frame_index: int = 0) -> DecoderHandle:
+        """租用定位在 frame_index 的句柄，用完后调用 release()（或 handle.release()）
+
+        同一句柄同时只租给一个使用者；没有空闲句柄时打开新的解码器。
+        文件大小或修改时间变化后，该路径的旧空闲句柄被关闭而不是复用。
+        文件无法打开时返回的句柄 isOpened() 为 False，与 cv2.VideoCapture 行为一致。
+        """
+        key = self.normalize_path(path)
+        signature = self._signature(key)
+        with self._lock:
+            stale = self._pop_stale_locked(key, signature)
+            idle = self._idle.get((key, signature), ())
+            handle = min(idle, key=lambda h: (h.seek_cost(frame_index), -h.last_used), default=None)
+            if handle is not None:
+                self._remove_idle(handle)
+                self._lease(handle)
+                self.stats.reuses += 1
+
+        for old in stale:
+            old._close()
+        if handle is None:
+            handle = self._open(key, signature)
+
+        if handle.isOpened():
+            handle.seek(frame_index)
+        return handle
+
+    def retain(self, handle: DecoderHandle) -> DecoderHandle:
+        """增加句柄引用计数（与其他组件共享同一租用），每次 retain 对应一次 release"""
+        with self._lock:
+            if handle.refcount <= 0:
+                raise ValueError("句柄未被租用")
+            handle.refcount += 1
+        return handle
+
+    def release(self, handle: DecoderHandle):
+        """释放一次引用，计数归零时归还句柄；打开的解码器超过上限时关闭最久未用的空闲句柄"""
+        stale = []
+        with self._lock:
+            if handle.refcount <= 0:
+                return
+            handle.refcount -= 1
+            if handle.refcount > 0:
+                return
+
+            self._leased.discard(handle)
+            handle.last_used = time.monotonic()
+            if handle.invalidated or not handle.isOpened():
+                # 打开失败或文件已变化
+                stale.append(handle)
+            else:
+                self._idle.setdefault(handle.idle_key, []).append(handle)
+                self._schedule_sweep_locked()
+            stale.extend(self._evict_locked())
+
+        for handle in stale:
+            handle._close()
+
+    @contextmanager
+    def open(self, path: str, frame_index: int = 0) -> Iterator[DecoderHandle]:
+        """with 语句租用句柄"""
+        handle = self.acquire(path, frame_index)
+        try:
+            yield handle
+        finally:
+            handle.release()
+
+    def invalidate(self, path: str):
+        """文件变化后关闭该路径的空闲句柄，使用中的句柄归还时关闭"""
+        key = self.normalize_path(path)
+        with self._lock:
+            stale = self._pop_stale_locked(key)
+            for handle in self._leased:
+                if handle.path == key:
+                    handle.invalidated = True
+        for handle in stale:
+            handle._close()
+
+    def close_all(self):
+        """关闭所有空闲句柄"""
+        with self._lock:
+            stale = [handle for handles in self._idle.values() for handle in handles]
+            self._idle.clear()
+            if self._sweep_timer is not None:
+                self._sweep_timer.cancel()
+                self._sweep_timer = None
+        for handle in stale:
+            handle._close()
+
+    def open_count(self) -> int:
+        """当前打开的解码器数（空闲 + 租用中）"""
+        with self._lock:
+            return self._idle_count() + len(self._leased)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = self.stats.to_dict()
+            stats['idle'] = self._idle_count()
+            stats['in_use'] = len(self._leased)
+        return stats
+
+    # 内部实现
+    @staticmethod
+    def _signature(key: str) -> Tuple[int, int]:
+        try:
+            st = os.stat(key)
+        except OSError:
+            return -1, -1
+        return st.st_size, st.st_mtime_ns
+
+    def _record(self, **counts: int):
+        """累加统计（句柄在锁外seek时调用）"""
+        with self._lock:
+            for name, value in counts.items():
+                setattr(self.stats, name, getattr(self.stats, name) + value)
+
+    def _open(self, key: str, signature: Tuple[int, int]) -> DecoderHandle:
+        # 在锁外打开：打开容器和初始化编解码器是主要开销
+        handle = DecoderHandle(self, key, self._opener(key), signature)
+
+        with self._lock:
+            self.stats.opens += 1
+            self._lease(handle)
+            evicted = self._evict_locked()
+
+        for stale in evicted:
+            stale._close()
+        return handle
+
+    def _lease(self, handle: DecoderHandle):
+        handle.refcount = 1
+        handle.last_used = time.monotonic()
+        self._leased.add(handle)
+
+    def _idle_count(self) -> int:
+        return sum(len(handles) for handles in self._idle.values())
+
+    def _remove_idle(self, handle: DecoderHandle):
+        handles = self._idle.get(handle.idle_key)
+        if handles and handle in handles:
+            handles.remove(handle)
+            if not handles:
+                del self._idle[handle.idle_key]
+
+    def _pop_stale_locked(self, key: str, signature: Optional[Tuple[int, int]] = None) -> List[DecoderHandle]:
+        """移除该路径下与当前文件签名不符的空闲句柄（signature 为 None 时全部移除）"""
+        stale = []
+        for idle_key in [k for k in self._idle if k[0] == key and k[1] != signature]:
+            stale.extend(self._idle.pop(idle_key))
+        return stale
+
+    def _schedule_sweep_locked(self, delay: Optional[float] = None):
+        if self._sweep_timer is not None or self.idle_timeout <= 0:
+            return
+        delay = self.idle_timeout if delay is None else delay
+        self._sweep_timer = threading.Timer(max(delay, 0.01), self._sweep_idle)
+        self._sweep_timer.name = "decoder-pool-sweep"
+        self._sweep_timer.daemon = True
+        self._sweep_timer.start()
+
+    def _sweep_idle(self):
+        """关闭空闲超时的句柄，仍有空闲句柄时重新计时"""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            self._sweep_timer = None
+            for handles in list(self._idle.values()):
+                expired.extend(handle for handle in handles if now - handle.last_used >= self.idle_timeout)
+            for handle in expired:
+                self._remove_idle(handle)
+            remaining = [handle.last_used for handles in self._idle.values() for handle in handles]
+            if remaining:
+                self._schedule_sweep_locked(min(remaining) + self.idle_timeout - now)
+        for handle in expired:
+            handle._close()
+        if expired:
+            logger.debug(f"关闭 {len(expired)} 个空闲超时的解码器")
+
+    def _evict_locked(self) -> List[DecoderHandle]:
+        """超出上限时移除最久未用的空闲句柄，返回需要在锁外关闭的句柄"""
+        excess = self._idle_count() + len(self._leased) - self.max_open
+        if excess <= 0:
+            return []
+
+        idle = sorted((handle for handles in self._idle.values() for handle in handles),
+                      key=lambda h: h.last_used)
+        evicted = idle[:excess]
+        for handle in evicted:
+            self._remove_idle(handle)
+        self.stats.evictions += len(evicted)
+        return evicted
+
+
+def _close_leaked_capture(capture: Any, path: str):
+    """未归还的句柄被回收时关闭解码器"""
+    logger.debug(f"解码器句柄未归还，随对象回收关闭: {path}")
+    try:
+        capture.release()
+    except Exception as e:
+        logger.debug(f"关闭解码器失败: {path} - {e}")
+
+
+_decoder_pool: Optional[DecoderPool] = None
+_decoder_pool_lock = threading.Lock()
+
+
+def get_decoder_pool() -> DecoderPool:
+    """获取全局解码器池"""
+    global _decoder_pool
+    if _decoder_pool is None:
+        with _decoder_pool_lock:
+            if _decoder_pool is None:
+                _decoder_pool = DecoderPool()
+    return _decoder_pool
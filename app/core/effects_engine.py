@@ -16,6 +16,9 @@ from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 from PyQt6.QtGui import QImage, QPixmap
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from .memory_manager import get_frame_buffer_pool
+from .decoder_pool import get_decoder_pool
+
 # Optional OpenGL imports for GPU acceleration
 try:
     import OpenGL.GL as gl
@@ -313,8 +316,9 @@ class EffectsEngine(QObject):
         """视频渲染线程"""
         try:
             # 打开视频文件
-            cap = cv2.VideoCapture(video_path)
+            cap = get_decoder_pool().acquire(video_path)
             if not cap.isOpened():
+                cap.release()
                 return False
             
             # 获取视频信息
@@ -327,12 +331,16 @@ class EffectsEngine(QObject):
             fourcc = cv2.VideoWriter_fourcc(*'mp4v')
             out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
             
+            # 解码缓冲区整个渲染过程复用
+            frame_pool = get_frame_buffer_pool()
+            decode_buffer = frame_pool.acquire(height, width)
+            
             processed_frames = 0
             while True:
                 if self.render_cancel_flag:
                     break
                 
-                ret, frame = cap.read()
+                ret, frame = cap.read(decode_buffer)
                 if not ret:
                     break
                 
@@ -359,6 +367,7 @@ class EffectsEngine(QObject):
             # 清理
             cap.release()
             out.release()
+            frame_pool.release(decode_buffer)
             
             return True
             
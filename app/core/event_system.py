@@ -3,13 +3,15 @@
 提供事件发布和订阅功能
 """
 
-from typing import Dict, List, Callable, Any
+from typing import Dict, List, Callable, Any, Optional, Tuple
 from enum import Enum
 import asyncio
 import logging
 from dataclasses import dataclass
 from datetime import datetime
 
+from .async_event_bus import AsyncEventBus, OverflowPolicy, get_async_event_bus
+
 class EventType(Enum):
     """事件类型枚举"""
     PROJECT_CREATED = "project_created"
@@ -41,68 +43,65 @@ class Event:
             self.timestamp = datetime.now()
 
 class EventBus:
-    """事件总线"""
+    """事件总线
+    
+    基于统一异步事件总线的兼容接口：每个订阅有独立的有界队列，
+    进度类事件按来源合并，只保留最新进度
+    """
+    
+    # 高频进度事件，按来源合并
+    COALESCED_EVENT_TYPES = (EventType.AI_GENERATION_PROGRESS, EventType.EXPORT_PROGRESS)
     
-    def __init__(self):
-        self._subscribers: Dict[EventType, List[Callable]] = {}
-        self._event_queue = asyncio.Queue()
+    def __init__(self, bus: Optional[AsyncEventBus] = None):
+        self._bus = bus or AsyncEventBus(name="event-bus-compat")
+        self._subscribers: Dict[EventType, List[Tuple[Callable, str]]] = {}
         self._running = False
         self._logger = logging.getLogger(__name__)
+        
+        for event_type in self.COALESCED_EVENT_TYPES:
+            self._bus.configure_topic(event_type.value, overflow=OverflowPolicy.COALESCE,
+                                      coalesce_key=lambda event: event.source)
+    
+    @property
+    def bus(self) -> AsyncEventBus:
+        return self._bus
     
     def subscribe(self, event_type: EventType, handler: Callable):
         """订阅事件"""
-        if event_type not in self._subscribers:
-            self._subscribers[event_type] = []
-        self._subscribers[event_type].append(handler)
+        # 同步处理函数与原来一样直接在事件循环中执行
+        subscription_id = self._bus.subscribe(event_type.value, handler, inline=True)
+        self._subscribers.setdefault(event_type, []).append((handler, subscription_id))
         self._logger.debug(f"Subscribed to {event_type}")
     
     def unsubscribe(self, event_type: EventType, handler: Callable):
         """取消订阅"""
-        if event_type in self._subscribers:
-            try:
-                self._subscribers[event_type].remove(handler)
+        for index, (subscribed, subscription_id) in enumerate(self._subscribers.get(event_type, [])):
+            if subscribed == handler:
+                self._bus.unsubscribe(subscription_id)
+                del self._subscribers[event_type][index]
                 self._logger.debug(f"Unsubscribed from {event_type}")
-            except ValueError:
-                pass
+                return
     
     async def publish(self, event: Event):
         """发布事件"""
-        await self._event_queue.put(event)
+        await self._bus.publish(event.type.value, event)
         self._logger.debug(f"Event published: {event.type}")
     
     async def start(self):
         """启动事件处理"""
         self._running = True
-        asyncio.create_task(self._process_events())
+        self._bus.start()
         self._logger.info("Event bus started")
     
     async def stop(self):
         """停止事件处理"""
         self._running = False
+        await asyncio.get_running_loop().run_in_executor(None, self._bus.stop)
         self._logger.info("Event bus stopped")
     
-    async def _process_events(self):
-        """处理事件队列"""
-        while self._running:
-            try:
-                event = await asyncio.wait_for(self._event_queue.get(), timeout=1.0)
-                await self._handle_event(event)
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                self._logger.error(f"Error processing event: {e}")
-    
-    async def _handle_event(self, event: Event):
-        """处理单个事件"""
-        handlers = self._subscribers.get(event.type, [])
-        for handler in handlers:
-            try:
-                if asyncio.iscoroutinefunction(handler):
-                    await handler(event)
-                else:
-                    handler(event)
-            except Exception as e:
-                self._logger.error(f"Error in event handler: {e}")
+    def get_metrics(self) -> Dict[str, Any]:
+        """队列深度、延迟和处理耗时"""
+        return self._bus.get_metrics()
 
 # 全局事件总线
-event_bus = EventBus()
\ No newline at end of file
+event_bus = EventBus(get_async_event_bus())
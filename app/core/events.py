@@ -3,18 +3,37 @@ Event system for VideoEpicCreator
 
 This module provides a comprehensive event system for decoupled communication
 between components with support for prioritization, async handling, and event filtering.
+
+Dispatch reads per-event-type handler snapshots that are rebuilt only when
+handlers change, so emitting never takes the registration lock. In
+high-throughput mode synchronous handlers run inline and high-frequency
+events (progress updates) are coalesced to the latest value per source.
+
+Handlers that do not run inline are delivered through the unified
+AsyncEventBus: each one gets a bounded inbox processed in order, so a slow
+handler neither blocks the emitter nor reorders its own events.
 """
 
 import asyncio
 import logging
-from typing import Any, Dict, List, Optional, Callable, Union
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Callable, Tuple, Union
 from dataclasses import dataclass, field
 from enum import Enum
 from datetime import datetime
 import uuid
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import threading
 
+from .async_event_bus import ALL_TOPICS, AsyncEventBus, OverflowPolicy, TopicConfig, get_async_event_bus
+
+
+# Event types coalesced by default in high-throughput mode
+DEFAULT_COALESCED_SUFFIXES = ("progress", "progress_changed")
+DEFAULT_COALESCE_INTERVAL = 0.05  # seconds, ~20 updates per second
+
 
 class EventPriority(Enum):
     """Event priority levels"""
@@ -48,38 +67,100 @@ class EventHandler:
     filter_func: Optional[Callable[[Event], bool]] = None
     async_handler: bool = False
     once: bool = False
+    inline: bool = False
     active: bool = True
     call_count: int = 0
     max_calls: Optional[int] = None
     handler_id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    subscription_id: Optional[str] = None
 
 
 class EventSystem:
     """Central event system for the application"""
     
-    def __init__(self, max_workers: int = 4):
+    def __init__(self, max_workers: int = 4, high_throughput: bool = False,
+                 max_history_size: int = 1000, bus: Optional[AsyncEventBus] = None):
         self.logger = logging.getLogger("videoepiccreator.events")
         self._handlers: Dict[str, List[EventHandler]] = {}
         self._global_handlers: List[EventHandler] = []
-        self._event_history: List[Event] = []
-        self._max_history_size = 1000
+        self._event_history: Deque[Event] = deque(maxlen=max_history_size)
+        self._max_history_size = max_history_size
         self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._owns_bus = bus is None
+        # Handlers must not lose events, so a full inbox blocks worker emitters;
+        # the GUI thread and bus handlers never wait and overfill the inbox instead.
+        # Inboxes carry their own config so a shared bus's lossy defaults don't apply
+        self._inbox_config = TopicConfig(overflow=OverflowPolicy.BLOCK)
+        self._bus = bus or AsyncEventBus(self._inbox_config, executor=self._executor, name="event-system")
         self._lock = threading.RLock()
         self._running = False
-        self._stats = {
+        self._high_throughput = high_throughput
+        
+        # Handler snapshots per event type (specific + global), rebuilt on change
+        self._dispatch_cache: Dict[str, Tuple[EventHandler, ...]] = {}
+        
+        # Coalescing of high-frequency events, keyed by (event_type, source)
+        self._coalesce_intervals: Dict[str, float] = {}
+        self._pending_events: Dict[Tuple[str, str], Event] = {}
+        self._last_dispatch: Dict[Tuple[str, str], float] = {}
+        self._flush_timers: Dict[Tuple[str, str], threading.Timer] = {}
+        
+        self._stats = self._new_stats()
+    
+    @staticmethod
+    def _new_stats() -> Dict[str, Any]:
+        return {
             "events_emitted": 0,
             "events_handled": 0,
+            "events_coalesced": 0,
+            "handlers_inline": 0,
             "handlers_registered": 0,
-            "errors": 0
+            "errors": 0,
+            "emit_latency_total": 0.0,
+            "emit_latency_max": 0.0
         }
     
+    @property
+    def high_throughput(self) -> bool:
+        return self._high_throughput
+    
+    def set_coalescing(self, event_type: str, interval: Optional[float] = DEFAULT_COALESCE_INTERVAL):
+        """Deliver at most one event per interval for each source of this event type.
+        
+        Events emitted inside the interval replace the pending one; the latest
+        event is always delivered when the interval ends. Pass None to disable.
+        """
+        with self._lock:
+            if interval is None:
+                self._coalesce_intervals.pop(event_type, None)
+            else:
+                self._coalesce_intervals[event_type] = interval
+        if interval is None:
+            self.flush_coalesced(event_type)
+    
+    def flush_coalesced(self, event_type: Optional[str] = None):
+        """Deliver pending coalesced events immediately"""
+        with self._lock:
+            keys = [key for key in self._pending_events if event_type is None or key[0] == event_type]
+            for key in keys:
+                timer = self._flush_timers.pop(key, None)
+                if timer is not None:
+                    timer.cancel()
+        for key in keys:
+            self._flush_pending(key)
+    
     def register_handler(self, event_type: str, handler: Callable, 
                         priority: EventPriority = EventPriority.NORMAL,
                         filter_func: Optional[Callable[[Event], bool]] = None,
                         async_handler: bool = False,
                         once: bool = False,
-                        max_calls: Optional[int] = None) -> str:
-        """Register an event handler"""
+                        max_calls: Optional[int] = None,
+                        inline: Optional[bool] = None) -> str:
+        """Register an event handler
+        
+        Inline handlers run on the emitting thread instead of the thread pool;
+        in high-throughput mode synchronous handlers are inline by default.
+        """
         with self._lock:
             event_handler = EventHandler(
                 handler=handler,
@@ -87,14 +168,18 @@ class EventSystem:
                 filter_func=filter_func,
                 async_handler=async_handler,
                 once=once,
+                inline=self._high_throughput if inline is None else inline,
                 max_calls=max_calls
             )
             
             if event_type not in self._handlers:
                 self._handlers[event_type] = []
+                if self._high_throughput and event_type.endswith(DEFAULT_COALESCED_SUFFIXES):
+                    self._coalesce_intervals.setdefault(event_type, DEFAULT_COALESCE_INTERVAL)
             
-            self._handlers[event_type].append(event_handler)
-            self._handlers[event_type].sort(key=lambda h: h.priority.value, reverse=True)
+            self._subscribe(event_type, event_handler)
+            self._insert_handler(self._handlers[event_type], event_handler)
+            self._dispatch_cache.clear()
             
             self._stats["handlers_registered"] += 1
             self.logger.debug(f"Registered handler for {event_type}: {event_handler.handler_id}")
@@ -106,7 +191,8 @@ class EventSystem:
                                filter_func: Optional[Callable[[Event], bool]] = None,
                                async_handler: bool = False,
                                once: bool = False,
-                               max_calls: Optional[int] = None) -> str:
+                               max_calls: Optional[int] = None,
+                               inline: Optional[bool] = None) -> str:
         """Register a global event handler (receives all events)"""
         with self._lock:
             event_handler = EventHandler(
@@ -115,11 +201,13 @@ class EventSystem:
                 filter_func=filter_func,
                 async_handler=async_handler,
                 once=once,
+                inline=self._high_throughput if inline is None else inline,
                 max_calls=max_calls
             )
             
-            self._global_handlers.append(event_handler)
-            self._global_handlers.sort(key=lambda h: h.priority.value, reverse=True)
+            self._subscribe(ALL_TOPICS, event_handler)
+            self._insert_handler(self._global_handlers, event_handler)
+            self._dispatch_cache.clear()
             
             self._stats["handlers_registered"] += 1
             self.logger.debug(f"Registered global handler: {event_handler.handler_id}")
@@ -134,6 +222,8 @@ class EventSystem:
                 for handler in handlers[:]:
                     if handler.handler_id == handler_id:
                         handlers.remove(handler)
+                        self._unsubscribe(handler)
+                        self._dispatch_cache.clear()
                         self.logger.debug(f"Unregistered handler for {event_type}: {handler_id}")
                         return True
             
@@ -141,6 +231,8 @@ class EventSystem:
             for handler in self._global_handlers[:]:
                 if handler.handler_id == handler_id:
                     self._global_handlers.remove(handler)
+                    self._unsubscribe(handler)
+                    self._dispatch_cache.clear()
                     self.logger.debug(f"Unregistered global handler: {handler_id}")
                     return True
             
@@ -149,11 +241,15 @@ class EventSystem:
     def unregister_all_handlers(self, event_type: Optional[str] = None):
         """Unregister all handlers for a specific event type or all handlers"""
         with self._lock:
+            self._dispatch_cache.clear()
             if event_type:
                 if event_type in self._handlers:
-                    del self._handlers[event_type]
+                    for handler in self._handlers.pop(event_type):
+                        self._unsubscribe(handler)
                     self.logger.debug(f"Unregistered all handlers for {event_type}")
             else:
+                for handler in self._global_handlers + [h for hs in self._handlers.values() for h in hs]:
+                    self._unsubscribe(handler)
                 self._handlers.clear()
                 self._global_handlers.clear()
                 self.logger.debug("Unregistered all handlers")
@@ -174,53 +270,89 @@ class EventSystem:
     
     def emit_event(self, event: Event) -> Event:
         """Emit a pre-constructed event"""
+        start_time = time.perf_counter()
+        
+        # Record under the lock so history snapshots and clears see a consistent deque
         with self._lock:
-            self._stats["events_emitted"] += 1
-            
-            # Add to history
             self._event_history.append(event)
-            if len(self._event_history) > self._max_history_size:
-                self._event_history.pop(0)
         
         # Log event emission
-        self.logger.debug(f"Emitted event: {event.event_type} from {event.source}")
+        self.logger.debug("Emitted event: %s from %s", event.event_type, event.source)
+        
+        # Process handlers, unless the event is held back for coalescing
+        handled = inline = 0
+        if event.event_type not in self._coalesce_intervals or self._should_dispatch(event):
+            handled, inline = self._process_event(event)
         
-        # Process handlers
-        self._process_event(event)
+        latency = time.perf_counter() - start_time
+        with self._lock:
+            self._stats["events_emitted"] += 1
+            self._stats["events_handled"] += handled
+            self._stats["handlers_inline"] += inline
+            self._stats["emit_latency_total"] += latency
+            if latency > self._stats["emit_latency_max"]:
+                self._stats["emit_latency_max"] = latency
         
         return event
     
-    def _process_event(self, event: Event):
-        """Process event through all applicable handlers"""
-        handlers_to_process = []
-        
-        with self._lock:
-            # Get specific handlers for this event type
-            specific_handlers = self._handlers.get(event.event_type, [])
-            
-            # Combine with global handlers
-            all_handlers = specific_handlers + self._global_handlers
-            
-            # Filter active handlers that pass the filter function
-            for handler in all_handlers:
-                if (handler.active and 
-                    (handler.max_calls is None or handler.call_count < handler.max_calls) and
-                    (handler.filter_func is None or handler.filter_func(event))):
-                    handlers_to_process.append(handler)
+    def _subscribe(self, topic: str, handler: EventHandler):
+        """Give pooled and async handlers their own inbox on the bus"""
+        if handler.async_handler:
+            handler.subscription_id = self._bus.subscribe(
+                topic, partial(self._run_async_handler, handler), is_async=True, config=self._inbox_config
+            )
+        elif not handler.inline:
+            handler.subscription_id = self._bus.subscribe(
+                topic, partial(self._run_sync_handler, handler), is_async=False, config=self._inbox_config
+            )
+    
+    def _unsubscribe(self, handler: EventHandler):
+        if handler.subscription_id is not None:
+            self._bus.unsubscribe(handler.subscription_id)
+            handler.subscription_id = None
+    
+    def _get_dispatch_handlers(self, event_type: str) -> Tuple[EventHandler, ...]:
+        """Handler snapshot for an event type, specific handlers before global ones"""
+        handlers = self._dispatch_cache.get(event_type)
+        if handlers is None:
+            with self._lock:
+                handlers = tuple(self._handlers.get(event_type, ())) + tuple(self._global_handlers)
+                self._dispatch_cache[event_type] = handlers
+        return handlers
+    
+    @staticmethod
+    def _insert_handler(handlers: List[EventHandler], event_handler: EventHandler):
+        """Insert keeping descending priority, after handlers of equal priority"""
+        index = len(handlers)
+        while index > 0 and handlers[index - 1].priority.value < event_handler.priority.value:
+            index -= 1
+        handlers.insert(index, event_handler)
+    
+    @staticmethod
+    def _accepts(handler: EventHandler, event: Event) -> bool:
+        return (handler.active and
+                (handler.max_calls is None or handler.call_count < handler.max_calls) and
+                (handler.filter_func is None or handler.filter_func(event)))
+    
+    def _process_event(self, event: Event) -> Tuple[int, int]:
+        """Process event through all applicable handlers, returns (handled, inline) counts"""
+        handled = inline = 0
         
-        # Process handlers
-        for handler in handlers_to_process:
+        for handler in self._get_dispatch_handlers(event.event_type):
             try:
-                if handler.async_handler:
-                    # Run async handler
-                    asyncio.create_task(self._run_async_handler(handler, event))
+                if not self._accepts(handler, event):
+                    continue
+                
+                if handler.subscription_id is not None:
+                    # Queue to the handler's inbox on the bus (async or pooled handler)
+                    self._bus.deliver(handler.subscription_id, event, event.event_type)
                 else:
-                    # Run sync handler
-                    self._executor.submit(self._run_sync_handler, handler, event)
+                    # Cheap handler, run on the emitting thread
+                    self._run_sync_handler(handler, event)
+                    inline += 1
                 
-                with self._lock:
-                    handler.call_count += 1
-                    self._stats["events_handled"] += 1
+                handler.call_count += 1
+                handled += 1
                 
                 # Remove one-time handlers
                 if handler.once:
@@ -230,6 +362,51 @@ class EventSystem:
                 with self._lock:
                     self._stats["errors"] += 1
                 self.logger.error(f"Error processing event {event.event_type} with handler {handler.handler_id}: {e}")
+        
+        return handled, inline
+    
+    def _should_dispatch(self, event: Event) -> bool:
+        """Coalescing gate: dispatch now, or keep as the pending event of its source"""
+        key = (event.event_type, event.source)
+        now = time.monotonic()
+        
+        with self._lock:
+            interval = self._coalesce_intervals.get(event.event_type)
+            if interval is None:
+                return True
+            
+            elapsed = now - self._last_dispatch.get(key, float("-inf"))
+            if elapsed >= interval and key not in self._pending_events:
+                self._last_dispatch[key] = now
+                return True
+            
+            previous = self._pending_events.get(key)
+            if previous is not None:
+                event.metadata["coalesced_count"] = previous.metadata.get("coalesced_count", 1) + 1
+                self._stats["events_coalesced"] += 1
+            self._pending_events[key] = event
+            
+            if key not in self._flush_timers:
+                timer = threading.Timer(max(0.0, interval - elapsed), self._flush_pending, args=(key,))
+                timer.daemon = True
+                self._flush_timers[key] = timer
+                timer.start()
+        
+        return False
+    
+    def _flush_pending(self, key: Tuple[str, str]):
+        """Deliver the latest pending event of a coalesced source"""
+        with self._lock:
+            self._flush_timers.pop(key, None)
+            event = self._pending_events.pop(key, None)
+            if event is None:
+                return
+            self._last_dispatch[key] = time.monotonic()
+        
+        handled, inline = self._process_event(event)
+        with self._lock:
+            self._stats["events_handled"] += handled
+            self._stats["handlers_inline"] += inline
     
     async def _run_async_handler(self, handler: EventHandler, event: Event):
         """Run an async event handler"""
@@ -269,26 +446,15 @@ class EventSystem:
         with self._lock:
             self._stats["events_emitted"] += 1
             self._event_history.append(event)
-            if len(self._event_history) > self._max_history_size:
-                self._event_history.pop(0)
         
         results = []
         
-        # Get handlers to process
-        handlers_to_process = []
-        with self._lock:
-            specific_handlers = self._handlers.get(event.event_type, [])
-            all_handlers = specific_handlers + self._global_handlers
-            
-            for handler in all_handlers:
-                if (handler.active and not handler.async_handler and
-                    (handler.max_calls is None or handler.call_count < handler.max_calls) and
-                    (handler.filter_func is None or handler.filter_func(event))):
-                    handlers_to_process.append(handler)
-        
         # Process handlers synchronously
-        for handler in handlers_to_process:
+        for handler in self._get_dispatch_handlers(event.event_type):
             try:
+                if handler.async_handler or not self._accepts(handler, event):
+                    continue
+                
                 result = handler.handler(event)
                 results.append(result)
                 
@@ -310,7 +476,7 @@ class EventSystem:
                           limit: Optional[int] = None) -> List[Event]:
         """Get event history, optionally filtered by event type"""
         with self._lock:
-            history = self._event_history.copy()
+            history = list(self._event_history)
         
         if event_type:
             history = [e for e in history if e.event_type == event_type]
@@ -332,8 +498,12 @@ class EventSystem:
     def get_stats(self) -> Dict[str, Any]:
         """Get event system statistics"""
         with self._lock:
+            emitted = self._stats["events_emitted"]
             return {
                 **self._stats,
+                "emit_latency_avg": self._stats["emit_latency_total"] / emitted if emitted else 0.0,
+                "pending_coalesced": len(self._pending_events),
+                "bus": self._bus.get_metrics(),
                 "handler_count": self.get_handler_count(),
                 "event_types": list(self._handlers.keys()),
                 "history_size": len(self._event_history),
@@ -349,12 +519,7 @@ class EventSystem:
     def reset_stats(self):
         """Reset event system statistics"""
         with self._lock:
-            self._stats = {
-                "events_emitted": 0,
-                "events_handled": 0,
-                "handlers_registered": 0,
-                "errors": 0
-            }
+            self._stats = self._new_stats()
             self.logger.debug("Event system stats reset")
     
     def start(self):
@@ -365,6 +530,9 @@ class EventSystem:
     def stop(self):
         """Stop the event system"""
         self._running = False
+        self.flush_coalesced()
+        if self._owns_bus:
+            self._bus.stop(wait=True)
         self._executor.shutdown(wait=True)
         self.logger.info("Event system stopped")
     
@@ -386,7 +554,7 @@ def get_event_system() -> EventSystem:
     """Get the global event system instance"""
     global _event_system
     if _event_system is None:
-        _event_system = EventSystem()
+        _event_system = EventSystem(bus=get_async_event_bus())
     return _event_system
 
 
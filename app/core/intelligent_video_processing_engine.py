@@ -33,6 +33,7 @@ from .effects_engine import EffectsEngine, EffectType
 from .batch_processor import BatchProcessor
 from .video_codec_manager import VideoCodecManager
 from .video_optimizer import VideoOptimizer
+from .decoder_pool import get_decoder_pool
 
 from ..ai.interfaces import (
     IAIService, AIRequest, AIResponse, AITaskType, AIPriority,
@@ -398,8 +399,8 @@ class IntelligentVideoProcessingEngine:
         try:
             frames = []
 
-            # 使用OpenCV提取帧
-            cap = cv2.VideoCapture(video_path)
+            # 从解码器池租用句柄，相邻时间段的分析顺序读取无需重新打开和seek
+            cap = get_decoder_pool().acquire(video_path)
 
             # 设置起始时间
             cap.set(cv2.CAP_PROP_POS_MSEC, start_time * 1000)
@@ -414,9 +415,9 @@ class IntelligentVideoProcessingEngine:
                 frames.append(frame)
                 frame_count += 1
 
-                # 跳过一些帧
+                # 跳过一些帧（只解复用不解码）
                 for _ in range(10):
-                    cap.read()
+                    cap.grab()
 
             cap.release()
             return frames
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+媒体库数据库访问层 - WAL模式的SQLite连接池
+读操作使用每线程复用的连接并发执行（线程结束时关闭），写操作经由写队列合并为批量事务
+"""
+
+import os
+import queue
+import sqlite3
+import logging
+import threading
+import weakref
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+WriteOperation = Callable[[sqlite3.Cursor], Any]
+
+
+class _ThreadConnection:
+    """保存在线程局部存储中的读连接，线程结束时被回收并关闭连接"""
+    __slots__ = ("connection", "__weakref__")
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+
+def _close_thread_connection(connections: List[sqlite3.Connection], lock: threading.Lock,
+                             stats: dict, conn: sqlite3.Connection):
+    with lock:
+        if conn not in connections:
+            return  # 已由 close() 关闭
+        connections.remove(conn)
+        stats["connections_closed"] += 1
+    try:
+        conn.close()
+    except sqlite3.Error as e:
+        logger.debug(f"关闭线程读连接失败: {e}")
+
+
+class MediaDatabase:
+    """媒体库SQLite访问层"""
+
+    def __init__(self, db_path: str, cached_statements: int = 256, max_batch_size: int = 512,
+                 busy_timeout_ms: int = 30000):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        self.max_batch_size = max_batch_size
+        self.busy_timeout_ms = busy_timeout_ms
+
+        # 每线程读连接，线程结束时关闭（导入、缩略图等短生命周期工作线程不会累积连接）
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._connection_hooks: List[Callable[[sqlite3.Connection], None]] = []
+
+        # 写队列和写线程
+        self._write_queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+
+        self.stats = {
+            "connections_opened": 0,
+            "connections_closed": 0,
+            "write_batches": 0,
+            "write_operations": 0,
+            "max_batch_size": 0
+        }
+
+        db_dir = os.path.dirname(self.db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        # WAL模式是数据库级别的持久设置，只需设置一次
+        conn = self._open_connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.close()
+
+    def add_connection_hook(self, hook: Callable[[sqlite3.Connection], None]):
+        """注册连接初始化钩子（如自定义SQL函数），对已打开的连接立即生效"""
+        with self._connections_lock:
+            self._connection_hooks.append(hook)
+            for conn in self._connections:
+                hook(conn)
+
+    # 读操作
+    def fetchone(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        """执行查询并返回第一行"""
+        return self._get_connection().execute(sql, params).fetchone()
+
+    def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """执行查询并返回所有行"""
+        return self._get_connection().execute(sql, params).fetchall()
+
+    # 写操作
+    def execute_write(self, sql: str, params: Sequence = (), wait: bool = True) -> Any:
+        """执行单条写语句，返回影响的行数"""
+        return self.submit_write(lambda cursor: cursor.execute(sql, params).rowcount, wait)
+
+    def executemany_write(self, sql: str, seq_of_params: Iterable[Sequence], wait: bool = True) -> Any:
+        """批量执行写语句"""
+        rows = list(seq_of_params)
+        return self.submit_write(lambda cursor: cursor.executemany(sql, rows).rowcount, wait)
+
+    def submit_write(self, operation: WriteOperation, wait: bool = True) -> Any:
+        """提交写操作
+
+        同一批次中的写操作在一个事务中提交，每个操作使用独立的保存点，
+        单个操作失败只回滚它自己。wait为False时返回Future。
+        """
+        if self._closed:
+            raise RuntimeError("数据库已关闭")
+
+        self._ensure_writer()
+        future: Future = Future()
+        self._write_queue.put((operation, future))
+
+        if wait:
+            return future.result()
+        return future
+
+    def flush(self):
+        """等待写队列中已提交的操作全部完成"""
+        if self._writer_thread is None:
+            return
+        self.submit_write(lambda cursor: None)
+
+    def close(self):
+        """停止写线程并关闭所有连接"""
+        if self._closed:
+            return
+        self._closed = True
+
+        if self._writer_thread is not None:
+            self._write_queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.ProgrammingError:
+                    # 其他线程创建的连接在此关闭可能被拒绝，进程退出时自动释放
+                    pass
+            self._connections.clear()
+
+    # 内部实现
+    def _open_connection(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, cached_statements=self.cached_statements,
+                               check_same_thread=False, isolation_level=None)
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        self.stats["connections_opened"] += 1
+        return conn
+
+    def _open_pooled_connection(self) -> sqlite3.Connection:
+        conn = self._open_connection()
+        with self._connections_lock:
+            for hook in self._connection_hooks:
+                hook(conn)
+            self._connections.append(conn)
+        return conn
+
+    def _get_connection(self) -> sqlite3.Connection:
+        holder = getattr(self._local, "connection", None)
+        if holder is None:
+            conn = self._open_pooled_connection()
+            holder = _ThreadConnection(conn)
+            weakref.finalize(holder, _close_thread_connection, self._connections, self._connections_lock,
+                             self.stats, conn)
+            self._local.connection = holder
+        return holder.connection
+
+    def _ensure_writer(self):
+        if self._writer_thread is not None:
+            return
+        with self._writer_lock:
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(target=self._writer_loop,
+                                                       name="media-db-writer", daemon=True)
+                self._writer_thread.start()
+
+    def _writer_loop(self):
+        conn = self._open_pooled_connection()
+        cursor = conn.cursor()
+        running = True
+
+        while running:
+            item = self._write_queue.get()
+            if item is None:
+                break
+
+            # 合并队列中已有的写操作
+            batch = [item]
+            while len(batch) < self.max_batch_size:
+                try:
+                    next_item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if next_item is None:
+                    running = False
+                    break
+                batch.append(next_item)
+
+            self._execute_batch(conn, cursor, batch)
+
+        conn.close()
+
+    def _execute_batch(self, conn: sqlite3.Connection, cursor: sqlite3.Cursor, batch: List[tuple]):
+        results = []
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for operation, future in batch:
+                cursor.execute('SAVEPOINT write_op')
+                try:
+                    results.append((future, operation(cursor), None))
+                    cursor.execute('RELEASE SAVEPOINT write_op')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO SAVEPOINT write_op')
+                    cursor.execute('RELEASE SAVEPOINT write_op')
+                    results.append((future, None, e))
+            cursor.execute('COMMIT')
+        except Exception as e:
+            logger.error(f"媒体库写事务失败: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.stats["write_batches"] += 1
+        self.stats["write_operations"] += len(batch)
+        self.stats["max_batch_size"] = max(self.stats["max_batch_size"], len(batch))
+
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+媒体导入流水线 - 面向大规模素材盘的并行增量导入
+发现阶段只做stat，哈希/探测/缩略图阶段并行执行，最后一次性批量写入数据库
+"""
+
+import os
+import time
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Tuple, Callable, Iterable
+from dataclasses import dataclass, field
+from enum import Enum
+from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, Future, wait
+
+from .unified_media_manager import (
+    UnifiedMediaManager, MediaItem, MediaMetadata, MediaType
+)
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_MEDIA_EXTENSIONS = [
+    '.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm',  # 视频
+    '.mp3', '.wav', '.aac', '.flac', '.ogg', '.m4a',       # 音频
+    '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif',     # 图片
+    '.pdf', '.doc', '.docx', '.txt'                    # 文档
+]
+
+
+class ImportStage(Enum):
+    """导入阶段"""
+    DISCOVERY = "discovery"
+    HASHING = "hashing"
+    PROBING = "probing"
+    THUMBNAIL = "thumbnail"
+    WRITING = "writing"
+
+
+@dataclass
+class ImportProgress:
+    """导入进度"""
+    stage: ImportStage
+    completed: int
+    total: int
+    current_path: Optional[str] = None
+
+    @property
+    def percent(self) -> float:
+        """阶段完成百分比"""
+        if self.total <= 0:
+            return 100.0
+        return self.completed * 100.0 / self.total
+
+
+@dataclass
+class DiscoveredFile:
+    """发现阶段得到的文件（仅包含stat信息）"""
+    path: str
+    size: int
+    mtime: float
+    ctime: float
+    atime: float
+    media_type: MediaType
+
+
+@dataclass
+class ImportResult:
+    """导入结果"""
+    imported: List[MediaItem] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    discovered: int = 0
+    cancelled: bool = False
+    stage_times: Dict[str, float] = field(default_factory=dict)
+
+
+class MediaImportPipeline:
+    """并行增量媒体导入流水线"""
+
+    def __init__(self, manager: UnifiedMediaManager, hash_workers: int = 4,
+                 probe_workers: int = 4, thumbnail_workers: int = 2,
+                 progress_callback: Optional[Callable[[ImportProgress], None]] = None,
+                 max_in_flight: int = 0):
+        self.manager = manager
+        self.hash_workers = max(1, hash_workers)
+        self.probe_workers = max(1, probe_workers)
+        self.thumbnail_workers = max(1, thumbnail_workers)
+        # 同时在途的文件数，默认为最大阶段并发数的4倍
+        self.max_in_flight = max_in_flight if max_in_flight > 0 else \
+            4 * max(self.hash_workers, self.probe_workers, self.thumbnail_workers)
+        self.progress_callback = progress_callback
+
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        """取消当前导入"""
+        self._cancel_event.set()
+
+    def import_directory(self, directory_path: str, recursive: bool = True,
+                         file_extensions: List[str] = None) -> ImportResult:
+        """扫描并导入目录"""
+        start_time = time.perf_counter()
+        discovered = self.discover_directory(directory_path, recursive, file_extensions)
+        discovery_time = time.perf_counter() - start_time
+        result = self._run(discovered)
+        result.stage_times[ImportStage.DISCOVERY.value] = discovery_time
+        return result
+
+    def import_files(self, file_paths: Iterable[str]) -> ImportResult:
+        """导入文件列表"""
+        start_time = time.perf_counter()
+        discovered = self.discover_files(file_paths)
+        discovery_time = time.perf_counter() - start_time
+        result = self._run(discovered)
+        result.stage_times[ImportStage.DISCOVERY.value] = discovery_time
+        return result
+
+    # 发现阶段
+    def discover_directory(self, directory_path: str, recursive: bool = True,
+                           file_extensions: List[str] = None) -> List[DiscoveredFile]:
+        """只使用stat遍历目录，不读取文件内容"""
+        extensions = tuple(ext.lower() for ext in (file_extensions or DEFAULT_MEDIA_EXTENSIONS))
+        discovered = []
+        pending_dirs = [os.path.abspath(directory_path)]
+
+        while pending_dirs and not self._cancel_event.is_set():
+            current_dir = pending_dirs.pop()
+            try:
+                with os.scandir(current_dir) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                if recursive:
+                                    pending_dirs.append(entry.path)
+                                continue
+
+                            if not entry.name.lower().endswith(extensions):
+                                continue
+
+                            discovered.append(self._make_discovered(entry.path, entry.stat()))
+                        except OSError as e:
+                            logger.warning(f"读取文件信息失败: {entry.path}, 错误: {e}")
+            except OSError as e:
+                logger.warning(f"扫描目录失败: {current_dir}, 错误: {e}")
+
+            self._report(ImportStage.DISCOVERY, len(discovered), 0, current_dir)
+
+        return discovered
+
+    def discover_files(self, file_paths: Iterable[str]) -> List[DiscoveredFile]:
+        """对文件列表执行stat"""
+        discovered = []
+        for file_path in file_paths:
+            if self._cancel_event.is_set():
+                break
+
+            file_path = os.path.abspath(file_path)
+            try:
+                discovered.append(self._make_discovered(file_path, os.stat(file_path)))
+            except OSError:
+                logger.error(f"文件不存在: {file_path}")
+
+        self._report(ImportStage.DISCOVERY, len(discovered), len(discovered))
+        return discovered
+
+    def _make_discovered(self, path: str, stat_result: os.stat_result) -> DiscoveredFile:
+        return DiscoveredFile(
+            path=path,
+            size=stat_result.st_size,
+            mtime=stat_result.st_mtime,
+            ctime=stat_result.st_ctime,
+            atime=stat_result.st_atime,
+            media_type=self.manager._detect_media_type(path)
+        )
+
+    # 主流程
+    def _run(self, discovered: List[DiscoveredFile]) -> ImportResult:
+        result = ImportResult(discovered=len(discovered))
+
+        # 增量快速路径：(path, size, mtime) 未变化的文件直接跳过
+        known_stats = self.manager.get_file_stats_index()
+        pending: List[DiscoveredFile] = []
+        for item in discovered:
+            if known_stats.get(item.path) == (item.size, item.mtime):
+                result.unchanged.append(item.path)
+            else:
+                pending.append(item)
+
+        self._report(ImportStage.DISCOVERY, len(discovered), len(discovered))
+
+        if not pending:
+            logger.info(f"导入流水线: {len(discovered)} 个文件均未变化")
+            return result
+
+        hashes, metadata_map, thumbnails = self._run_parallel_stages(pending, result)
+        if self._cancel_event.is_set():
+            result.cancelled = True
+            return result
+        failed_paths = set(result.failed)
+
+        # 组装媒体项，已在库中的文件保留原有的组织信息和AI数据
+        # （没有文件状态记录的旧版媒体库或逐个导入的文件也可能已在库中）
+        existing_items = {item.path: item for item in self.manager.get_media_items_by_paths(
+            [item.path for item in pending if item.path not in failed_paths])}
+        media_items = []
+        for item in pending:
+            if item.path in failed_paths:
+                continue
+            media_items.append(self._build_media_item(
+                item, hashes.get(item.path, ""), metadata_map.get(item.path),
+                thumbnails.get(item.path), existing_items.get(item.path)
+            ))
+
+        # 批量写入
+        write_start = time.perf_counter()
+        self._report(ImportStage.WRITING, 0, len(media_items))
+        try:
+            self.manager.save_media_items_batch(
+                media_items,
+                {item.path: (item.size, item.mtime) for item in pending}
+            )
+            result.imported = media_items
+        except Exception as e:
+            logger.error(f"批量写入媒体项失败: {e}")
+            result.failed.extend(item.path for item in media_items)
+            media_items = []
+        result.stage_times[ImportStage.WRITING.value] = time.perf_counter() - write_start
+        self._report(ImportStage.WRITING, len(media_items), len(media_items))
+
+        if self.manager.media_added_callback:
+            for media_item in media_items:
+                self.manager.media_added_callback(media_item)
+
+        logger.info(f"导入流水线完成: 导入 {len(result.imported)}, 未变化 {len(result.unchanged)}, "
+                    f"失败 {len(result.failed)}")
+        return result
+
+    def _run_parallel_stages(self, pending: List[DiscoveredFile], result: ImportResult
+                             ) -> Tuple[Dict[str, str], Dict[str, MediaMetadata], Dict[str, Optional[str]]]:
+        """并行执行哈希、探测和缩略图阶段
+
+        同时在途的文件数受 max_in_flight 限制，超大目录不会一次性为所有文件创建任务。
+        """
+        hashes: Dict[str, str] = {}
+        metadata_map: Dict[str, MediaMetadata] = {}
+        thumbnails: Dict[str, Optional[str]] = {}
+
+        total = len(pending)
+        completed = {ImportStage.HASHING: 0, ImportStage.PROBING: 0, ImportStage.THUMBNAIL: 0}
+        stage_start = time.perf_counter()
+        failed = set()
+
+        hash_pool = ThreadPoolExecutor(max_workers=self.hash_workers, thread_name_prefix="import-hash")
+        probe_pool = ThreadPoolExecutor(max_workers=self.probe_workers, thread_name_prefix="import-probe")
+        thumb_pool = ThreadPoolExecutor(max_workers=self.thumbnail_workers, thread_name_prefix="import-thumb")
+
+        futures: Dict[Future, Tuple[ImportStage, DiscoveredFile]] = {}
+        remaining = iter(pending)
+        in_flight: Dict[str, int] = {}  # 文件路径 -> 未完成的阶段数
+        try:
+            while True:
+                # 补充提交，保持在途文件数不超过上限
+                while len(in_flight) < self.max_in_flight and not self._cancel_event.is_set():
+                    item = next(remaining, None)
+                    if item is None:
+                        break
+                    futures[hash_pool.submit(self.manager._calculate_file_hash, item.path)] = \
+                        (ImportStage.HASHING, item)
+                    futures[probe_pool.submit(self.manager._probe_metadata, item.path, item.media_type)] = \
+                        (ImportStage.PROBING, item)
+                    futures[thumb_pool.submit(self.manager._generate_thumbnail_sync, item.path,
+                                              item.media_type)] = (ImportStage.THUMBNAIL, item)
+                    in_flight[item.path] = 3
+
+                if not futures or self._cancel_event.is_set():
+                    break
+
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, item = futures.pop(future)
+                    try:
+                        value = future.result()
+                        if stage == ImportStage.HASHING:
+                            hashes[item.path] = value
+                        elif stage == ImportStage.PROBING:
+                            metadata_map[item.path] = value
+                        else:
+                            thumbnails[item.path] = value
+                    except Exception as e:
+                        if stage == ImportStage.THUMBNAIL:
+                            # 缩略图失败不影响导入
+                            thumbnails[item.path] = None
+                        else:
+                            logger.error(f"导入阶段 {stage.value} 失败: {item.path}, 错误: {e}")
+                            failed.add(item.path)
+
+                    in_flight[item.path] -= 1
+                    if not in_flight[item.path]:
+                        del in_flight[item.path]
+                    completed[stage] += 1
+                    if completed[stage] == total:
+                        result.stage_times[stage.value] = time.perf_counter() - stage_start
+                    self._report(stage, completed[stage], total, item.path)
+        finally:
+            for future in futures:
+                future.cancel()
+            for pool in (hash_pool, probe_pool, thumb_pool):
+                pool.shutdown(wait=True)
+
+        # 失败列表与发现顺序一致
+        result.failed.extend(item.path for item in pending if item.path in failed)
+        return hashes, metadata_map, thumbnails
+
+    def _build_media_item(self, item: DiscoveredFile, file_hash: str, metadata: Optional[MediaMetadata],
+                          thumbnail_path: Optional[str], existing: Optional[MediaItem]) -> MediaItem:
+        """根据各阶段结果组装媒体项"""
+        metadata = metadata or MediaMetadata()
+        metadata.size_bytes = item.size
+        metadata.created_at = datetime.fromtimestamp(item.ctime)
+        metadata.modified_at = datetime.fromtimestamp(item.mtime)
+        metadata.accessed_at = datetime.fromtimestamp(item.atime)
+        metadata.file_hash = file_hash
+
+        if existing:
+            metadata.tags = existing.metadata.tags
+            metadata.rating = existing.metadata.rating
+            metadata.description = existing.metadata.description
+            return MediaItem(
+                id=existing.id,
+                name=os.path.basename(item.path),
+                path=item.path,
+                type=item.media_type,
+                storage_location=existing.storage_location,
+                thumbnail_path=thumbnail_path,
+                preview_path=existing.preview_path,
+                metadata=metadata,
+                scene_analysis=existing.scene_analysis,
+                edit_decisions=existing.edit_decisions,
+                ai_tags=existing.ai_tags,
+                collection_id=existing.collection_id,
+                folder_id=existing.folder_id,
+                created_at=existing.created_at
+            )
+
+        return MediaItem(
+            id=hashlib.md5(item.path.encode()).hexdigest(),
+            name=os.path.basename(item.path),
+            path=item.path,
+            type=item.media_type,
+            thumbnail_path=thumbnail_path,
+            metadata=metadata
+        )
+
+    def _report(self, stage: ImportStage, completed: int, total: int, current_path: Optional[str] = None):
+        """报告阶段进度"""
+        if self.progress_callback:
+            try:
+                self.progress_callback(ImportProgress(stage, completed, total, current_path))
+            except Exception as e:
+                logger.warning(f"导入进度回调失败: {e}")
+
+
+def create_media_import_pipeline(manager: UnifiedMediaManager,
+                                 progress_callback: Optional[Callable[[ImportProgress], None]] = None,
+                                 **kwargs) -> MediaImportPipeline:
+    """创建媒体导入流水线"""
+    return MediaImportPipeline(manager, progress_callback=progress_callback, **kwargs)
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+媒体库全文检索索引 - 基于SQLite FTS5
+名称、路径、AI标签和场景描述在写入时经jieba分词后存入FTS表。
+分词函数按连接注册，同步触发器因此建为只属于该连接的TEMP触发器，数据库文件中没有依赖这些函数的对象：
+迁移脚本、sqlite3命令行等其他连接照常读写media_items，它们增删的记录在下次启动时补齐，
+修改过的内容可调用 rebuild_search_index() 重建
+"""
+
+import re
+import json
+import sqlite3
+import logging
+from typing import List, Optional
+
+try:
+    import jieba
+    JIEBA_AVAILABLE = True
+except ImportError:
+    JIEBA_AVAILABLE = False
+    jieba = None
+
+logger = logging.getLogger(__name__)
+
+
+# 列权重：名称 > AI标签 > 路径 > 场景描述
+SEARCH_RANK_WEIGHTS = (10.0, 2.0, 5.0, 1.0)
+
+# 旧版本建在数据库文件中的同步触发器，其他连接写入时会因找不到分词函数而失败
+_LEGACY_TRIGGERS = ('media_items_search_insert', 'media_items_search_delete', 'media_items_search_update')
+
+_INDEXED_COLUMNS = '''
+    media_tokenize({row}.name), media_tokenize_path({row}.path),
+    media_tokenize_list({row}.ai_tags), media_tokenize_scenes({row}.scene_analysis)
+'''
+
+_CJK_PATTERN = re.compile(r'[㐀-鿿豈-﫿]')
+_PATH_SPLIT_PATTERN = re.compile(r'[\\/._\-\s]+')
+_WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+_CAMEL_CASE_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+
+
+def _split_word(word: str) -> List[str]:
+    """拆分驼峰和字母数字混合的词，同时保留原词"""
+    parts = _CAMEL_CASE_PATTERN.findall(word)
+    if len(parts) <= 1:
+        return [word.lower()]
+    return [word.lower()] + [part.lower() for part in parts]
+
+
+def tokenize_text(text: Optional[str]) -> str:
+    """将文本切分为以空格分隔的词，中文使用jieba搜索引擎模式分词"""
+    if not text:
+        return ""
+
+    text = str(text)
+    if not _CJK_PATTERN.search(text):
+        return " ".join(token for word in _WORD_PATTERN.findall(text) for token in _split_word(word))
+
+    text = text.lower()
+
+    if JIEBA_AVAILABLE:
+        tokens = jieba.cut_for_search(text)
+    else:
+        # 没有jieba时按单字切分中文
+        tokens = []
+        for word in _WORD_PATTERN.findall(text):
+            if _CJK_PATTERN.search(word):
+                tokens.extend(word)
+            else:
+                tokens.append(word)
+
+    return " ".join(token for token in (t.strip() for t in tokens) if _WORD_PATTERN.match(token))
+
+
+def tokenize_path(path: Optional[str]) -> str:
+    """按路径分隔符切分后分词"""
+    if not path:
+        return ""
+    return " ".join(tokenize_text(part) for part in _PATH_SPLIT_PATTERN.split(path) if part)
+
+
+def tokenize_json_list(value: Optional[str]) -> str:
+    """对JSON字符串列表（如ai_tags）分词"""
+    if not value:
+        return ""
+    try:
+        items = json.loads(value)
+    except (TypeError, ValueError):
+        return tokenize_text(value)
+    return " ".join(tokenize_text(item) for item in items if isinstance(item, str))
+
+
+def tokenize_scenes(value: Optional[str]) -> str:
+    """对场景分析JSON中的描述、标签、物体和情绪分词"""
+    if not value:
+        return ""
+    try:
+        scenes = json.loads(value)
+    except (TypeError, ValueError):
+        return ""
+
+    parts = []
+    for scene in scenes:
+        if not isinstance(scene, dict):
+            continue
+        parts.append(tokenize_text(scene.get('description', '')))
+        for key in ('tags', 'objects', 'emotions'):
+            parts.extend(tokenize_text(item) for item in scene.get(key) or [] if isinstance(item, str))
+
+    return " ".join(part for part in parts if part)
+
+
+def register_search_functions(conn: sqlite3.Connection):
+    """为连接注册分词函数，索引已存在时同时安装该连接的同步触发器"""
+    # INSERT OR REPLACE 删除旧行时需要触发删除触发器，否则索引中会残留旧记录
+    conn.execute('PRAGMA recursive_triggers=ON')
+    conn.create_function('media_tokenize', 1, tokenize_text, deterministic=True)
+    conn.create_function('media_tokenize_path', 1, tokenize_path, deterministic=True)
+    conn.create_function('media_tokenize_list', 1, tokenize_json_list, deterministic=True)
+    conn.create_function('media_tokenize_scenes', 1, tokenize_scenes, deterministic=True)
+    if _search_table_exists(conn):
+        install_search_triggers(conn)
+
+
+def install_search_triggers(conn):
+    """在当前连接上创建TEMP同步触发器，连接关闭时自动消失，不影响其他连接"""
+    indexed_columns = _INDEXED_COLUMNS.format(row='new')
+    conn.execute(f'''
+        CREATE TEMP TRIGGER IF NOT EXISTS media_search_sync_insert AFTER INSERT ON main.media_items BEGIN
+            INSERT INTO media_search (rowid, name, path_tokens, ai_tags, scenes)
+            VALUES (new.rowid, {indexed_columns});
+        END
+    ''')
+    conn.execute('''
+        CREATE TEMP TRIGGER IF NOT EXISTS media_search_sync_delete AFTER DELETE ON main.media_items BEGIN
+            DELETE FROM media_search WHERE rowid = old.rowid;
+        END
+    ''')
+    conn.execute(f'''
+        CREATE TEMP TRIGGER IF NOT EXISTS media_search_sync_update
+        AFTER UPDATE OF name, path, ai_tags, scene_analysis ON main.media_items BEGIN
+            DELETE FROM media_search WHERE rowid = old.rowid;
+            INSERT INTO media_search (rowid, name, path_tokens, ai_tags, scenes)
+            VALUES (new.rowid, {indexed_columns});
+        END
+    ''')
+
+
+def _search_table_exists(conn) -> bool:
+    return conn.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'media_search'"
+    ).fetchone() is not None
+
+
+def fts5_available() -> bool:
+    """检查SQLite是否编译了FTS5"""
+    try:
+        conn = sqlite3.connect(':memory:')
+        conn.execute('CREATE VIRTUAL TABLE fts5_probe USING fts5(content)')
+        conn.close()
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def create_search_index(cursor: sqlite3.Cursor):
+    """创建FTS5索引并安装当前连接的同步触发器
+
+    首次创建时回填已有数据；已存在时补齐其他连接增删的记录。
+    """
+    exists = _search_table_exists(cursor)
+
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS media_search USING fts5(
+            name, path_tokens, ai_tags, scenes,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    ''')
+    for name in _LEGACY_TRIGGERS:
+        cursor.execute(f'DROP TRIGGER IF EXISTS main.{name}')
+    install_search_triggers(cursor)
+
+    if not exists:
+        rebuild_search_index(cursor)
+        logger.info("媒体库全文索引已创建")
+    else:
+        sync_search_index(cursor)
+
+
+def sync_search_index(cursor: sqlite3.Cursor) -> int:
+    """补齐没有同步触发器的连接新增或删除的记录，返回修正的行数"""
+    removed = cursor.execute(
+        'DELETE FROM media_search WHERE rowid NOT IN (SELECT rowid FROM media_items)'
+    ).rowcount
+    added = cursor.execute(f'''
+        INSERT INTO media_search (rowid, name, path_tokens, ai_tags, scenes)
+        SELECT rowid, {_INDEXED_COLUMNS.format(row='media_items')}
+        FROM media_items WHERE rowid NOT IN (SELECT rowid FROM media_search)
+    ''').rowcount
+    if removed or added:
+        logger.info(f"全文索引补齐: 新增 {added} 条, 移除 {removed} 条")
+    return removed + added
+
+
+def rebuild_search_index(cursor: sqlite3.Cursor) -> int:
+    """按media_items重建整个全文索引，返回索引的行数"""
+    cursor.execute('DELETE FROM media_search')
+    return cursor.execute(f'''
+        INSERT INTO media_search (rowid, name, path_tokens, ai_tags, scenes)
+        SELECT rowid, {_INDEXED_COLUMNS.format(row='media_items')} FROM media_items
+    ''').rowcount
+
+
+def _quote_token(token: str, prefix: bool) -> str:
+    return '"' + token.replace('"', '""') + '"' + ('*' if prefix else '')
+
+
+def build_match_query(query: str = "", tags: Optional[List[str]] = None) -> str:
+    """构建FTS5 MATCH表达式
+
+    查询词分词后逐个做前缀匹配，标签限定在ai_tags列精确匹配，各条件之间为AND。
+    """
+    clauses = []
+
+    for token in tokenize_text(query).split():
+        clauses.append(_quote_token(token, prefix=True))
+
+    for tag in tags or []:
+        tag_tokens = tokenize_text(tag).split()
+        if tag_tokens:
+            clauses.append("ai_tags : (" + " ".join(_quote_token(t, prefix=False) for t in tag_tokens) + ")")
+
+    return " AND ".join(clauses)
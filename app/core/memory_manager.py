@@ -6,6 +6,8 @@
 提供智能内存分配、缓存管理和垃圾回收功能
 """
 
+from __future__ import annotations
+
 import os
 import gc
 import psutil
@@ -13,7 +15,7 @@ import logging
 import threading
 import time
 import weakref
-import numpy as np
+import itertools
 from typing import Dict, List, Optional, Any, Callable, Tuple, Union
 from dataclasses import dataclass, field
 from enum import Enum
@@ -22,6 +24,18 @@ from contextlib import contextmanager
 
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 
+from app.utils.lazy_import import lazy_module
+
+# NumPy 在首次分配帧缓冲时才加载
+np = lazy_module("numpy")
+
+try:
+    from multiprocessing import shared_memory
+    SHARED_MEMORY_AVAILABLE = True
+except ImportError:
+    SHARED_MEMORY_AVAILABLE = False
+    shared_memory = None
+
 logger = logging.getLogger(__name__)
 
 
@@ -74,6 +88,193 @@ class MemoryPool:
             self.priority_distribution[priority] = 0
 
 
+class _PooledBuffer:
+    """帧缓冲池内部记录"""
+    __slots__ = ("shape", "ref", "shm")
+
+    def __init__(self, shape: Tuple[int, ...], ref: weakref.ref, shm: Any = None):
+        self.shape = shape
+        self.ref = ref
+        self.shm = shm
+
+
+class FrameBufferPool:
+    """帧缓冲池 - 按 (高, 宽, 通道) 复用预分配的uint8帧缓冲区
+
+    稳态播放时解码、缩放等操作写入租用的缓冲区，归还后放回空闲列表，
+    避免每帧分配大块内存。启用共享内存时缓冲区可按名称在进程间传递。
+    """
+
+    def __init__(self, max_buffers_per_shape: int = 8, max_pooled_bytes: int = 512 * MemoryUnit.MB.value,
+                 use_shared_memory: bool = False):
+        if use_shared_memory and not SHARED_MEMORY_AVAILABLE:
+            logger.warning("当前平台不支持共享内存，帧缓冲池使用普通内存")
+            use_shared_memory = False
+
+        self.max_buffers_per_shape = max_buffers_per_shape
+        self.max_pooled_bytes = max_pooled_bytes
+        self.use_shared_memory = use_shared_memory
+
+        self._free: Dict[Tuple[int, ...], List[np.ndarray]] = defaultdict(list)
+        self._owned: Dict[int, _PooledBuffer] = {}
+        self._pooled_bytes = 0
+        # 弱引用回调可能在持锁期间触发，使用可重入锁
+        self._lock = threading.RLock()
+
+        self.stats = {
+            "allocations": 0,
+            "reuses": 0,
+            "releases": 0,
+            "discarded": 0
+        }
+
+    @staticmethod
+    def frame_shape(height: int, width: int, channels: int = 3) -> Tuple[int, ...]:
+        """帧形状，单通道与OpenCV灰度图一致为二维"""
+        if channels == 1:
+            return (height, width)
+        return (height, width, channels)
+
+    def acquire(self, height: int, width: int, channels: int = 3, zero: bool = False) -> np.ndarray:
+        """租用帧缓冲区，内容未初始化（zero为True时清零）"""
+        return self.acquire_shape(self.frame_shape(height, width, channels), zero)
+
+    def acquire_shape(self, shape: Tuple[int, ...], zero: bool = False) -> np.ndarray:
+        """按任意形状租用缓冲区"""
+        shape = tuple(int(dim) for dim in shape)
+
+        with self._lock:
+            free_list = self._free.get(shape)
+            if free_list:
+                buffer = free_list.pop()
+                self._pooled_bytes -= buffer.nbytes
+                self.stats["reuses"] += 1
+            else:
+                buffer = None
+                self.stats["allocations"] += 1
+
+        if buffer is None:
+            buffer = self._allocate(shape)
+        if zero:
+            buffer.fill(0)
+        return buffer
+
+    def release(self, buffer: Optional[np.ndarray]) -> bool:
+        """归还缓冲区，非本池分配的数组返回False"""
+        if buffer is None:
+            return False
+
+        with self._lock:
+            record = self._owned.get(id(buffer))
+            if record is None or record.ref() is not buffer:
+                return False
+
+            free_list = self._free[record.shape]
+            if any(item is buffer for item in free_list):
+                return True
+
+            self.stats["releases"] += 1
+            if (len(free_list) < self.max_buffers_per_shape and
+                    self._pooled_bytes + buffer.nbytes <= self.max_pooled_bytes):
+                free_list.append(buffer)
+                self._pooled_bytes += buffer.nbytes
+                return True
+
+            # 空闲列表已满，交给垃圾回收
+            del self._owned[id(buffer)]
+            self.stats["discarded"] += 1
+
+        self._close_shared(record)
+        return True
+
+    @contextmanager
+    def lease(self, height: int, width: int, channels: int = 3, zero: bool = False):
+        """租用帧缓冲区的上下文管理器，退出时自动归还"""
+        buffer = self.acquire(height, width, channels, zero)
+        try:
+            yield buffer
+        finally:
+            self.release(buffer)
+
+    def preallocate(self, height: int, width: int, channels: int = 3, count: int = 1):
+        """预先分配指定数量的缓冲区放入空闲列表"""
+        buffers = [self.acquire(height, width, channels) for _ in range(count)]
+        for buffer in buffers:
+            self.release(buffer)
+
+    def shared_memory_name(self, buffer: np.ndarray) -> Optional[str]:
+        """获取缓冲区对应的共享内存名称，供其他进程附加"""
+        with self._lock:
+            record = self._owned.get(id(buffer))
+            if record is None or record.ref() is not buffer or record.shm is None:
+                return None
+            return record.shm.name
+
+    def clear(self):
+        """清空空闲列表，租出中的缓冲区不受影响"""
+        with self._lock:
+            records = []
+            for free_list in self._free.values():
+                for buffer in free_list:
+                    records.append(self._owned.pop(id(buffer)))
+            self._free.clear()
+            self._pooled_bytes = 0
+
+        for record in records:
+            self._close_shared(record)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取缓冲池统计"""
+        with self._lock:
+            free_buffers = sum(len(free_list) for free_list in self._free.values())
+            return {
+                **self.stats,
+                "shapes": len([free_list for free_list in self._free.values() if free_list]),
+                "free_buffers": free_buffers,
+                "leased_buffers": len(self._owned) - free_buffers,
+                "pooled_mb": self._pooled_bytes / MemoryUnit.MB.value,
+                "shared_memory": self.use_shared_memory
+            }
+
+    def _allocate(self, shape: Tuple[int, ...]) -> np.ndarray:
+        shm = None
+        if self.use_shared_memory:
+            nbytes = max(1, int(np.prod(shape)))
+            shm = shared_memory.SharedMemory(create=True, size=nbytes)
+            buffer = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf)
+        else:
+            buffer = np.empty(shape, dtype=np.uint8)
+
+        key = id(buffer)
+        # 租出的缓冲区未归还就被回收时，移除记录并释放共享内存
+        ref = weakref.ref(buffer, lambda _ref, key=key: self._on_collected(key, _ref))
+        with self._lock:
+            self._owned[key] = _PooledBuffer(shape, ref, shm)
+        return buffer
+
+    def _on_collected(self, key: int, ref: weakref.ref):
+        with self._lock:
+            record = self._owned.get(key)
+            if record is None or record.ref is not ref:
+                return
+            del self._owned[key]
+        self._close_shared(record)
+
+    @staticmethod
+    def _close_shared(record: _PooledBuffer):
+        if record.shm is None:
+            return
+        try:
+            record.shm.close()
+        except BufferError:
+            # 仍有数组引用该内存，映射在对象回收时释放
+            pass
+        try:
+            record.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
 class MemoryManager(QObject):
     """内存管理器 - 专门针对视频处理优化"""
 
@@ -90,6 +291,13 @@ class MemoryManager(QObject):
         self.pools: Dict[str, MemoryPool] = {}
         self._create_default_pools()
 
+        # 块ID -> 池名称索引
+        self._block_index: Dict[str, str] = {}
+        self._block_counter = itertools.count()
+
+        # 帧缓冲池
+        self.frame_pool = FrameBufferPool()
+
         # 全局设置
         self.global_memory_limit = 8 * MemoryUnit.GB.value  # 默认8GB
         self.warning_threshold = 0.8  # 80%警告阈值
@@ -200,7 +408,7 @@ class MemoryManager(QObject):
                     return None
 
             # 创建内存块
-            block_id = f"{pool_name}_{int(time.time() * 1000000)}_{len(pool.blocks)}"
+            block_id = f"{pool_name}_{int(time.time() * 1000000)}_{next(self._block_counter)}"
             block = MemoryBlock(
                 id=block_id,
                 size=size,
@@ -214,6 +422,7 @@ class MemoryManager(QObject):
 
             # 添加到池
             pool.blocks[block_id] = block
+            self._block_index[block_id] = pool_name
             pool.used_size += size
             pool.priority_distribution[priority] += 1
 
@@ -245,6 +454,7 @@ class MemoryManager(QObject):
             # 从池中移除
             pool = self.pools[pool_name]
             del pool.blocks[block_id]
+            del self._block_index[block_id]
             pool.used_size -= block.size
             pool.priority_distribution[block.priority] -= 1
 
@@ -263,7 +473,9 @@ class MemoryManager(QObject):
             elif hasattr(block.data, 'release'):
                 block.data.release()
             elif isinstance(block.data, np.ndarray):
-                del block.data
+                # 帧缓冲池分配的数组放回空闲列表
+                self.frame_pool.release(block.data)
+                block.data = None
 
             self.memory_freed.emit(block.size, f"释放块 {block_id}")
             logger.debug(f"内存释放成功: {block_id}, 大小: {block.size / MemoryUnit.MB.value:.2f} MB")
@@ -281,10 +493,10 @@ class MemoryManager(QObject):
 
     def _find_block(self, block_id: str) -> Tuple[Optional[str], Optional[MemoryBlock]]:
         """查找内存块"""
-        for pool_name, pool in self.pools.items():
-            if block_id in pool.blocks:
-                return pool_name, pool.blocks[block_id]
-        return None, None
+        pool_name = self._block_index.get(block_id)
+        if pool_name is None:
+            return None, None
+        return pool_name, self.pools[pool_name].blocks.get(block_id)
 
     def _cleanup_pool(self, pool: MemoryPool, required_size: int) -> bool:
         """清理池空间"""
@@ -456,6 +668,7 @@ class MemoryManager(QObject):
             'total_limit_mb': total_limit / MemoryUnit.MB.value,
             'global_usage_percent': (total_used / total_limit) * 100,
             'pools': pool_stats,
+            'frame_buffer_pool': self.frame_pool.get_stats(),
             'monitoring_enabled': self.monitoring_enabled,
             'auto_cleanup_enabled': self.auto_cleanup_enabled
         }
@@ -483,20 +696,22 @@ class MemoryManager(QObject):
     def create_video_frame_buffer(self, width: int, height: int, channels: int = 3,
                                  frame_count: int = 1) -> Optional[str]:
         """创建视频帧缓冲区"""
-        # 计算所需内存
-        frame_size = width * height * channels * 4  # 假设4字节每像素
-        total_size = frame_size * frame_count
+        # 从帧缓冲池租用，按uint8实际大小计入内存池
+        buffer = self.frame_pool.acquire_shape((frame_count, height, width, channels), zero=True)
 
         # 分配内存
         buffer_id = self.allocate_memory(
             'video_frames',
-            total_size,
-            np.zeros((frame_count, height, width, channels), dtype=np.uint8),
+            buffer.nbytes,
+            buffer,
             priority=MemoryPriority.HIGH,
             description=f"视频帧缓冲区 {width}x{height}x{channels}x{frame_count}",
             tags=['video_frame', 'buffer']
         )
 
+        if buffer_id is None:
+            self.frame_pool.release(buffer)
+
         return buffer_id
 
     def get_video_frame(self, buffer_id: str, frame_index: int = 0) -> Optional[np.ndarray]:
@@ -588,6 +803,8 @@ class MemoryManager(QObject):
                 for block_id in block_ids:
                     self.deallocate_memory(block_id)
 
+            self.frame_pool.clear()
+
             # 清理历史记录
             self.allocation_history.clear()
             self.cleanup_history.clear()
@@ -607,6 +824,11 @@ def get_memory_manager() -> MemoryManager:
     return global_memory_manager
 
 
+def get_frame_buffer_pool() -> FrameBufferPool:
+    """获取全局帧缓冲池"""
+    return global_memory_manager.frame_pool
+
+
 def start_memory_monitoring(interval_ms: int = 5000):
     """开始内存监控"""
     global_memory_manager.start_monitoring(interval_ms)
@@ -447,7 +447,7 @@ class ViewModel(ObservableObject, BaseComponent[T]):
             "viewmodel": self.name,
             "progress": progress,
             "message": message
-        })
+        }, source=self.name)
     
     def set_error(self, error: str):
         """Set error message"""
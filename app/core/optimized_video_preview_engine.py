@@ -28,6 +28,9 @@ from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QProgress
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 
+from .memory_manager import FrameBufferPool, get_frame_buffer_pool
+from .decoder_pool import get_decoder_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -108,8 +111,9 @@ class VideoFrame:
 class SmartFrameCache:
     """智能帧缓存管理器"""
     
-    def __init__(self, max_size_mb: int = 500):
+    def __init__(self, max_size_mb: int = 500, frame_pool: Optional[FrameBufferPool] = None):
         self.max_size_mb = max_size_mb
+        self.frame_pool = frame_pool
         self.cache = OrderedDict()
         self.access_order = deque()
         self.current_size = 0
@@ -128,6 +132,7 @@ class SmartFrameCache:
             "cache_hits": 0,
             "cache_misses": 0,
             "evictions": 0,
+            "shared_evictions": 0,
             "avg_access_time": 0.0,
             "memory_efficiency": 0.0
         }
@@ -177,20 +182,35 @@ class SmartFrameCache:
     
     def _evict_frames(self, required_size: int):
         """智能清理缓存"""
-        evicted = 0
+        frames = []
         while self.current_size > required_size and self.access_order:
             # 使用LRU策略
             oldest_frame = self.access_order.popleft()
             if oldest_frame in self.cache:
-                frame = self.cache.pop(oldest_frame)
-                self.current_size -= frame.data.nbytes
-                evicted += 1
+                frames.append(self.cache.pop(oldest_frame))
+                self.current_size -= frames[-1].data.nbytes
                 self.eviction_count += 1
                 self.stats["evictions"] += 1
         
+        evicted = len(frames)
+        self._release_frames(frames)
         if evicted > 0:
             logger.debug(f"缓存清理: 清理了 {evicted} 帧, 释放 {self.current_size / (1024*1024):.2f}MB")
     
+    def _release_frames(self, frames: List[VideoFrame]):
+        """淘汰的帧缓冲区归还帧缓冲池
+
+        get_frame()、frame_ready 信号和 QImage 转换不复制帧数据，
+        使用方仍持有帧对象、数组或其视图时缓冲区不能复用，交给垃圾回收。
+        """
+        while frames:
+            frame = frames.pop()
+            # 只剩局部变量和 getrefcount 参数引用帧对象，数组只被帧对象引用
+            if self.frame_pool is not None and sys.getrefcount(frame) <= 2 and sys.getrefcount(frame.data) <= 2:
+                self.frame_pool.release(frame.data)
+            else:
+                self.stats["shared_evictions"] += 1
+    
     def _predict_next_frames(self):
         """预测下一帧"""
         if len(self.access_pattern) < 3:
@@ -226,6 +246,7 @@ class SmartFrameCache:
     def clear(self):
         """清空缓存"""
         with self.lock:
+            frames = list(self.cache.values())
             self.cache.clear()
             self.access_order.clear()
             self.current_size = 0
@@ -235,9 +256,11 @@ class SmartFrameCache:
                 "cache_hits": 0,
                 "cache_misses": 0,
                 "evictions": 0,
+                "shared_evictions": 0,
                 "avg_access_time": 0.0,
                 "memory_efficiency": 0.0
             }
+            self._release_frames(frames)
 
 
 class PreviewRenderEngine:
@@ -442,7 +465,8 @@ class OptimizedVideoPreviewEngine(QObject):
         self.height = 0
         
         # 智能缓存
-        self.frame_cache = SmartFrameCache(self.config.max_cache_size)
+        self.frame_pool = get_frame_buffer_pool()
+        self.frame_cache = SmartFrameCache(self.config.max_cache_size, self.frame_pool)
         
         # 渲染引擎
         self.render_engine = PreviewRenderEngine(self.config)
@@ -507,8 +531,13 @@ class OptimizedVideoPreviewEngine(QObject):
             
             self.video_path = video_path
             
-            # 使用OpenCV打开视频
-            self.cap = cv2.VideoCapture(video_path)
+            # 停止上一个视频的预览线程后归还其句柄，再从解码器池租用新句柄
+            if self.cap:
+                self.stop_preview = True
+                if self.preview_thread and self.preview_thread.is_alive():
+                    self.preview_thread.join(timeout=1.0)
+                self.cap.release()
+            self.cap = get_decoder_pool().acquire(video_path)
             if not self.cap.isOpened():
                 self.error_occurred.emit("无法打开视频文件")
                 return False
@@ -654,11 +683,15 @@ class OptimizedVideoPreviewEngine(QObject):
     def _read_frame(self, frame_number: int) -> Optional[VideoFrame]:
         """读取指定帧"""
         try:
-            # 设置帧位置
+            # 设置帧位置（句柄已在该位置时不seek，顺序播放只解码下一帧）
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
             
-            # 读取帧
-            ret, frame_data = self.cap.read()
+            # 解码到帧缓冲池的缓冲区，帧从缓存淘汰时归还
+            buffer = self.frame_pool.acquire(self.height, self.width)
+            ret, frame_data = self.cap.read(buffer)
+            if not ret or frame_data is not buffer:
+                # 实际帧尺寸与容器信息不一致时由OpenCV重新分配
+                self.frame_pool.release(buffer)
             if not ret:
                 return None
             
@@ -897,6 +930,7 @@ class OptimizedVideoPreviewEngine(QObject):
         
         if self.cap:
             self.cap.release()
+            self.cap = None
         
         if self.media_player:
             self.media_player.stop()
@@ -599,10 +599,9 @@ class OptimizedVideoProcessingEngine:
     # 兼容原有API的方法
     def get_video_info(self, file_path: str):
         """获取视频信息（兼容方法）"""
-        # 这里可以复用原有逻辑或调用新的优化方法
-        from .video_processing_engine import VideoProcessingEngine
-        temp_engine = VideoProcessingEngine(self.ffmpeg_path, self.ffprobe_path)
-        return temp_engine.get_video_info(file_path)
+        # 直接使用共享探测缓存，不再为每次调用创建完整的处理引擎
+        from .video_processing_engine import load_video_info
+        return load_video_info(file_path, self.ffprobe_path)
     
     def process_video(self, input_path: str, output_path: str, config):
         """处理视频（兼容方法）"""
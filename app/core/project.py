@@ -17,6 +17,8 @@ from dataclasses import dataclass, asdict, field
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 import logging
 
+from .project_save_engine import get_project_save_engine
+
 
 @dataclass
 class ProjectSettings:
@@ -151,6 +153,7 @@ class Project(QObject):
     loaded = pyqtSignal(str)  # 项目加载
     backup_created = pyqtSignal(str)  # 备份创建
     error_occurred = pyqtSignal(str)  # 错误发生
+    _background_save_finished = pyqtSignal(str, object)  # 后台保存完成（保存线程 -> 界面线程）
 
     def __init__(self, project_info: ProjectInfo = None):
         super().__init__()
@@ -178,6 +181,11 @@ class Project(QObject):
         # 错误恢复信息
         self.crash_recovery_info = {}
 
+        # 增量保存引擎
+        self.save_engine = get_project_save_engine()
+        # 跨线程发射时排队到项目对象所在的界面线程处理
+        self._background_save_finished.connect(self._on_background_save_done)
+
     def create_new(self, name: str, description: str = "", project_dir: str = "") -> bool:
         """创建新项目"""
         try:
@@ -216,8 +224,8 @@ class Project(QObject):
                 self.error_occurred.emit("项目文件不存在")
                 return False
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 读取基础快照并重放增量日志
+            data = self.save_engine.load(file_path)
 
             # 加载项目信息
             self.project_info = ProjectInfo.from_dict(data.get('project_info', {}))
@@ -245,8 +253,12 @@ class Project(QObject):
             self.error_occurred.emit(f"加载项目失败: {str(e)}")
             return False
 
-    def save_to_file(self, file_path: str = None) -> bool:
-        """保存项目到文件"""
+    def save_to_file(self, file_path: str = None, background: bool = False) -> bool:
+        """保存项目到文件
+
+        项目文件及其自动保存文件增量保存，只追加写入发生变化的分段；
+        其他路径（备份、版本副本）写入独立的完整文件。background为True时在后台线程写入。
+        """
         try:
             if not self.project_info:
                 return False
@@ -272,44 +284,79 @@ class Project(QObject):
             self.project_info.duration = total_duration
 
             # 准备保存数据
-            data = {
-                'version': '2.0',
-                'project_info': self.project_info.to_dict(),
-                'videos': self.videos,
-                'audios': self.audios,
-                'subtitles': self.subtitles,
-                'timeline': self.timeline,
-                'effects': self.effects,
-                'transitions': self.transitions,
-                'ai_settings': self.ai_settings,
-                'export_settings': self.export_settings
-            }
+            sections = self.get_sections()
 
-            # 保存到文件
-            with open(save_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-
-            # 更新文件大小
-            if os.path.exists(save_path):
-                self.project_info.file_size = os.path.getsize(save_path)
+            if not self._is_incremental_path(save_path):
+                result = self.save_engine.write_snapshot(save_path, sections)
+                self._on_save_finished(save_path, result.file_size)
+                return True
 
             self.is_modified = False
-            self.saved.emit(save_path)
+            future = self.save_engine.save(save_path, sections, wait=False)
+            if background:
+                future.add_done_callback(lambda done: self._background_save_finished.emit(save_path, done))
+                return True
 
+            result = future.result()
+            self._on_save_finished(save_path, result.file_size)
             return True
 
         except Exception as e:
+            self.is_modified = True
             self.error_occurred.emit(f"保存项目失败: {str(e)}")
             return False
 
     def auto_save(self):
         """自动保存"""
         if self.is_modified and self.project_info.file_path:
-            # 创建自动保存文件
+            # 创建自动保存文件，在后台写入避免阻塞界面
             auto_save_path = self.project_info.file_path.replace('.vecp', '_autosave.vecp')
-            if self.save_to_file(auto_save_path):
+            if self.save_to_file(auto_save_path, background=True):
                 self.project_info.metadata.last_backup = datetime.now().isoformat()
-                self.backup_created.emit(auto_save_path)
+
+    def get_sections(self) -> Dict[str, Any]:
+        """收集项目文件的各个分段"""
+        return {
+            'project_info': self.project_info.to_dict(),
+            'videos': self.videos,
+            'audios': self.audios,
+            'subtitles': self.subtitles,
+            'timeline': self.timeline,
+            'effects': self.effects,
+            'transitions': self.transitions,
+            'ai_settings': self.ai_settings,
+            'export_settings': self.export_settings
+        }
+
+    def _is_incremental_path(self, save_path: str) -> bool:
+        """项目文件和自动保存文件使用增量保存"""
+        project_file = self.project_info.file_path
+        if not project_file:
+            return False
+        candidates = (project_file, project_file.replace('.vecp', '_autosave.vecp'))
+        return os.path.abspath(save_path) in {os.path.abspath(path) for path in candidates}
+
+    def _on_save_finished(self, save_path: str, file_size: int):
+        """保存完成后更新状态"""
+        # 更新文件大小
+        self.project_info.file_size = file_size
+
+        self.is_modified = False
+        self.saved.emit(save_path)
+
+    def _on_background_save_done(self, save_path: str, future):
+        """后台保存完成，在界面线程中更新状态并发射信号"""
+        try:
+            result = future.result()
+        except Exception as e:
+            self.is_modified = True
+            self.error_occurred.emit(f"保存项目失败: {str(e)}")
+            return
+
+        if save_path != self.project_info.file_path:
+            self.backup_created.emit(save_path)
+        self.project_info.file_size = result.file_size
+        self.saved.emit(save_path)
 
     def create_backup(self) -> str:
         """创建项目备份"""
@@ -325,8 +372,8 @@ class Project(QObject):
             timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
             backup_file = os.path.join(backup_dir, f"{self.project_info.name}_{timestamp}.vecp")
 
-            # 复制项目文件
-            shutil.copy2(self.project_info.file_path, backup_file)
+            # 合并项目文件及其增量日志，备份为独立的完整文件
+            self.save_engine.export_snapshot(self.project_info.file_path, backup_file)
 
             # 清理旧备份
             self._cleanup_old_backups(backup_dir)
@@ -392,8 +439,9 @@ class Project(QObject):
                 self.error_occurred.emit("导入文件不存在")
                 return False
 
-            with open(import_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 与打开项目相同，读取基础快照并重放日志，包含尚未合并的增量保存
+            self.save_engine.flush()
+            data = self.save_engine.read_document(import_path)
 
             # 创建新项目
             project_name = os.path.splitext(os.path.basename(import_path))[0]
@@ -470,6 +518,12 @@ class Project(QObject):
         # 停止自动保存
         self.auto_save_timer.stop()
 
+        # 等待后台保存完成
+        try:
+            self.save_engine.flush()
+        except Exception:
+            pass
+
         # 清理临时文件
         for temp_file in self.temp_files:
             try:
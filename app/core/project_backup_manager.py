@@ -3,6 +3,7 @@
 
 """
 项目备份和恢复系统 - 提供专业的项目备份、恢复和同步功能
+增量备份只记录相对上一个备份变化的分段，数据块存放在项目的对象存储中，由清单串成备份链
 """
 
 import json
@@ -10,7 +11,7 @@ import os
 import uuid
 import shutil
 import zipfile
-import hashlib
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union, Tuple
@@ -19,6 +20,13 @@ from PyQt6.QtCore import QObject, pyqtSignal, QTimer
 import logging
 
 from app.core.project import Project
+from app.core.project_object_store import ProjectObjectStore
+from app.core.project_save_engine import get_project_save_engine
+from app.utils.file_fingerprint import get_fingerprint_service
+
+
+MANIFEST_SUFFIX = ".manifest.json"
+MANIFEST_FORMAT = "cineai-incremental-backup"
 
 
 @dataclass
@@ -33,6 +41,9 @@ class BackupConfig:
     cloud_sync_enabled: bool = False
     backup_on_save: bool = True
     backup_on_close: bool = True
+    incremental_enabled: bool = True
+    max_chain_length: int = 10  # 增量链超过该长度时写入完整清单
+    compression_workers: int = 2
     
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -58,6 +69,11 @@ class BackupInfo:
     tags: List[str] = field(default_factory=list)
     is_encrypted: bool = False
     cloud_synced: bool = False
+    parent_id: str = ""  # 增量备份的上一个备份
+    
+    @property
+    def is_incremental(self) -> bool:
+        return self.file_path.endswith(MANIFEST_SUFFIX)
     
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -114,6 +130,10 @@ class ProjectBackupManager(QObject):
         self._schedules: Dict[str, BackupSchedule] = {}
         self._config = BackupConfig()
         
+        # 增量备份的对象存储和压缩进程池
+        self._object_stores: Dict[str, ProjectObjectStore] = {}
+        self._compression_pool: Optional[ProcessPoolExecutor] = None
+        
         # 定时器
         self._auto_backup_timer = QTimer()
         self._auto_backup_timer.timeout.connect(self._check_auto_backup)
@@ -137,19 +157,28 @@ class ProjectBackupManager(QObject):
                 return None
             
             project_id = project.project_info.id
+            backup_id = str(uuid.uuid4())
+            parent_id = ""
+            compression_ratio = 1.0
             
             # 创建备份文件
-            backup_file = self._create_backup_file(project, backup_type)
-            if not backup_file:
-                return None
+            if self._config.incremental_enabled:
+                result = self._create_incremental_backup(project, backup_type, backup_id)
+                if not result:
+                    return None
+                backup_file, parent_id, file_size, compression_ratio = result
+            else:
+                backup_file = self._create_backup_file(project, backup_type)
+                if not backup_file:
+                    return None
+                file_size = os.path.getsize(backup_file)
             
             # 计算文件信息
-            file_size = os.path.getsize(backup_file)
             file_hash = self._calculate_file_hash(backup_file)
             
             # 创建备份信息
             backup_info = BackupInfo(
-                id=str(uuid.uuid4()),
+                id=backup_id,
                 project_id=project_id,
                 project_name=project.project_info.name,
                 backup_type=backup_type,
@@ -157,8 +186,10 @@ class ProjectBackupManager(QObject):
                 file_path=backup_file,
                 file_size=file_size,
                 file_hash=file_hash,
+                compression_ratio=compression_ratio,
                 description=description,
-                tags=tags or []
+                tags=tags or [],
+                parent_id=parent_id
             )
             
             self._backups[backup_info.id] = backup_info
@@ -199,10 +230,20 @@ class ProjectBackupManager(QObject):
             
             # 确定恢复路径
             if not target_path:
-                target_path = backup_info.file_path.replace('.backup', '_restored.vecp')
+                if backup_info.is_incremental:
+                    target_path = backup_info.file_path[:-len(MANIFEST_SUFFIX)] + '_restored.vecp'
+                else:
+                    target_path = backup_info.file_path.replace('.backup', '_restored.vecp')
             
             # 恢复文件
-            if backup_info.file_path.endswith('.zip'):
+            if backup_info.is_incremental:
+                # 沿备份链合并各清单的分段后还原
+                sections, _ = self._resolve_backup_chain(backup_info)
+                store = self._get_object_store(backup_info.project_id)
+                get_project_save_engine().write_snapshot(
+                    target_path, {name: store.load_entry(entry) for name, entry in sections.items()}
+                )
+            elif backup_info.file_path.endswith('.zip'):
                 # 解压备份文件
                 with zipfile.ZipFile(backup_info.file_path, 'r') as zip_ref:
                     zip_ref.extractall(os.path.dirname(target_path))
@@ -228,11 +269,9 @@ class ProjectBackupManager(QObject):
             if not backup_info:
                 return False
             
-            # 删除备份文件
-            if os.path.exists(backup_info.file_path):
-                os.remove(backup_info.file_path)
-            
-            del self._backups[backup_id]
+            self._remove_backup(backup_info)
+            if backup_info.is_incremental:
+                self._collect_backup_garbage(backup_info.project_id)
             
             # 保存备份数据
             self._save_backups()
@@ -248,14 +287,17 @@ class ProjectBackupManager(QObject):
             self.error_occurred.emit(error_msg)
             return False
     
-    def verify_backup(self, backup_id: str) -> bool:
-        """验证备份"""
+    def verify_backup(self, backup_id: str, deep: bool = False) -> bool:
+        """验证备份
+        
+        增量备份默认按清单核对对象是否存在及大小，deep为True时重新读取并校验每个对象的哈希。
+        """
         try:
             backup_info = self._backups.get(backup_id)
             if not backup_info:
                 return False
             
-            is_valid = self._verify_backup(backup_info)
+            is_valid = self._verify_backup(backup_info, deep)
             self.backup_verified.emit(is_valid)
             
             return is_valid
@@ -420,6 +462,169 @@ class ProjectBackupManager(QObject):
             self._logger.error(f"创建备份文件失败: {e}")
             return None
     
+    def _create_incremental_backup(self, project: Project, backup_type: str,
+                                   backup_id: str) -> Optional[Tuple[str, str, int, float]]:
+        """创建增量备份清单，返回 (清单路径, 上一个备份ID, 新增存储大小, 存储比例)
+        
+        分段数据块写入项目的对象存储，已有的数据块直接复用；新数据较多时在进程池中压缩。
+        清单只记录与备份链中最新状态不同的分段。
+        """
+        try:
+            project_id = project.project_info.id
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            
+            backup_project_dir = self.backup_dir / project_id
+            backup_project_dir.mkdir(exist_ok=True)
+            
+            store = self._get_object_store(project_id)
+            stored_before = store.stats["bytes_stored"]
+            entries, logical_size = store.write_entries(project.get_sections(), self._get_compression_pool())
+            
+            # 链过长时从完整清单重新开始，限制恢复时需要读取的清单数量
+            parent = self._get_latest_incremental_backup(project_id)
+            parent_sections: Dict[str, Any] = {}
+            if parent is not None:
+                if len(self._get_backup_chain(parent)) < self._config.max_chain_length:
+                    parent_sections, _ = self._resolve_backup_chain(parent)
+                else:
+                    parent = None
+            
+            changed = {name: entry for name, entry in entries.items() if parent_sections.get(name) != entry}
+            objects = {}
+            for entry in changed.values():
+                for oid in store.entry_objects(entry):
+                    objects[oid] = store.object_size(oid)
+            
+            manifest = {
+                'format': MANIFEST_FORMAT,
+                'version': 1,
+                'backup_id': backup_id,
+                'project_id': project_id,
+                'parent': parent.id if parent else None,
+                'created_at': datetime.now().isoformat(),
+                'logical_size': logical_size,
+                'sections': changed,
+                'objects': objects
+            }
+            
+            manifest_file = backup_project_dir / f"{backup_type}_{timestamp}_{backup_id[:8]}{MANIFEST_SUFFIX}"
+            manifest_size = self._write_manifest(manifest_file, manifest)
+            
+            file_size = store.stats["bytes_stored"] - stored_before + manifest_size
+            compression_ratio = file_size / logical_size if logical_size else 1.0
+            
+            self._logger.debug(f"增量备份: 变化分段 {list(changed)}, 新增 {file_size} 字节")
+            return str(manifest_file), parent.id if parent else "", file_size, compression_ratio
+            
+        except Exception as e:
+            self._logger.error(f"创建增量备份失败: {e}")
+            return None
+    
+    def _get_object_store(self, project_id: str) -> ProjectObjectStore:
+        """获取项目备份的对象存储"""
+        store = self._object_stores.get(project_id)
+        if store is None:
+            store = ProjectObjectStore(self.backup_dir / project_id)
+            self._object_stores[project_id] = store
+        return store
+    
+    def _get_compression_pool(self) -> Optional[ProcessPoolExecutor]:
+        """获取压缩进程池，按需创建"""
+        if self._config.compression_workers <= 0:
+            return None
+        if self._compression_pool is None:
+            self._compression_pool = ProcessPoolExecutor(max_workers=self._config.compression_workers)
+        return self._compression_pool
+    
+    def _get_latest_incremental_backup(self, project_id: str) -> Optional[BackupInfo]:
+        """项目最新的增量备份"""
+        backups = [b for b in self._backups.values()
+                   if b.project_id == project_id and b.is_incremental and os.path.exists(b.file_path)]
+        return max(backups, key=lambda b: b.timestamp) if backups else None
+    
+    def _read_manifest(self, backup_info: BackupInfo) -> Dict[str, Any]:
+        """读取备份清单"""
+        with open(backup_info.file_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != MANIFEST_FORMAT:
+            raise ValueError(f"无效的备份清单: {backup_info.file_path}")
+        return manifest
+    
+    def _write_manifest(self, manifest_file: Path, manifest: Dict[str, Any]) -> int:
+        """原子写入备份清单，返回文件大小"""
+        temp_file = manifest_file.with_name(manifest_file.name + '.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, manifest_file)
+        return os.path.getsize(manifest_file)
+    
+    def _get_backup_chain(self, backup_info: BackupInfo) -> List[BackupInfo]:
+        """从最早的完整清单到指定备份的备份链"""
+        chain = [backup_info]
+        seen = {backup_info.id}
+        while chain[-1].parent_id:
+            parent = self._backups.get(chain[-1].parent_id)
+            if parent is None or parent.id in seen:
+                raise ValueError(f"备份链不完整: {chain[-1].parent_id}")
+            chain.append(parent)
+            seen.add(parent.id)
+        chain.reverse()
+        return chain
+    
+    def _resolve_backup_chain(self, backup_info: BackupInfo) -> Tuple[Dict[str, Any], Dict[str, int]]:
+        """沿备份链合并清单，返回 (分段目录项, 对象大小)"""
+        sections: Dict[str, Any] = {}
+        objects: Dict[str, int] = {}
+        for info in self._get_backup_chain(backup_info):
+            manifest = self._read_manifest(info)
+            sections.update(manifest['sections'])
+            objects.update(manifest['objects'])
+        return sections, objects
+    
+    def _remove_backup(self, backup_info: BackupInfo):
+        """删除备份文件和记录，以该备份为上一个备份的增量备份会合并它的分段"""
+        if backup_info.is_incremental and os.path.exists(backup_info.file_path):
+            children = [b for b in self._backups.values() if b.parent_id == backup_info.id]
+            if children:
+                manifest = self._read_manifest(backup_info)
+                for child in children:
+                    self._rebase_backup(child, manifest, backup_info.parent_id)
+        
+        if os.path.exists(backup_info.file_path):
+            os.remove(backup_info.file_path)
+        
+        self._backups.pop(backup_info.id, None)
+    
+    def _rebase_backup(self, child: BackupInfo, parent_manifest: Dict[str, Any], new_parent_id: str):
+        """把被删除的上一个备份的分段并入子备份清单"""
+        child_manifest = self._read_manifest(child)
+        sections = dict(parent_manifest['sections'])
+        sections.update(child_manifest['sections'])
+        
+        known_objects = dict(parent_manifest['objects'])
+        known_objects.update(child_manifest['objects'])
+        referenced = {oid for entry in sections.values() for oid in ProjectObjectStore.entry_objects(entry)}
+        
+        child_manifest['sections'] = sections
+        child_manifest['objects'] = {oid: size for oid, size in known_objects.items() if oid in referenced}
+        child_manifest['parent'] = new_parent_id or None
+        
+        self._write_manifest(Path(child.file_path), child_manifest)
+        child.parent_id = new_parent_id
+        child.file_hash = self._calculate_file_hash(child.file_path)
+        child.file_size = os.path.getsize(child.file_path)
+    
+    def _collect_backup_garbage(self, project_id: str):
+        """删除项目对象存储中不再被任何清单引用的数据块"""
+        reachable = set()
+        for backup in self._backups.values():
+            if backup.project_id == project_id and backup.is_incremental and os.path.exists(backup.file_path):
+                reachable.update(self._read_manifest(backup)['objects'])
+        
+        removed = self._get_object_store(project_id).gc_objects(reachable)
+        if removed:
+            self._logger.info(f"清理备份数据块: {removed} 个")
+    
     def _create_zip_backup(self, source_file: Path, zip_file: Path):
         """创建ZIP备份"""
         try:
@@ -430,7 +635,7 @@ class ProjectBackupManager(QObject):
             self._logger.error(f"创建ZIP备份失败: {e}")
             raise
     
-    def _verify_backup(self, backup_info: BackupInfo) -> bool:
+    def _verify_backup(self, backup_info: BackupInfo, deep: bool = False) -> bool:
         """验证备份文件"""
         try:
             if not os.path.exists(backup_info.file_path):
@@ -441,6 +646,9 @@ class ProjectBackupManager(QObject):
             if current_hash != backup_info.file_hash:
                 return False
             
+            if backup_info.is_incremental:
+                return self._verify_incremental_backup(backup_info, deep)
+            
             # 如果是ZIP文件，验证文件完整性
             if backup_info.file_path.endswith('.zip'):
                 try:
@@ -455,13 +663,26 @@ class ProjectBackupManager(QObject):
             self._logger.error(f"验证备份失败: {e}")
             return False
     
+    def _verify_incremental_backup(self, backup_info: BackupInfo, deep: bool) -> bool:
+        """按清单验证增量备份：链上每个清单的哈希，以及引用对象的存在性和大小"""
+        for info in self._get_backup_chain(backup_info)[:-1]:
+            if self._calculate_file_hash(info.file_path) != info.file_hash:
+                return False
+        
+        sections, objects = self._resolve_backup_chain(backup_info)
+        store = self._get_object_store(backup_info.project_id)
+        for entry in sections.values():
+            for oid in store.entry_objects(entry):
+                if store.object_size(oid, cached=False) != objects.get(oid):
+                    return False
+                if deep and not store.verify_object(oid):
+                    return False
+        
+        return True
+    
     def _calculate_file_hash(self, file_path: str) -> str:
-        """计算文件哈希值"""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        """计算文件哈希值（按 inode/大小/修改时间 缓存）"""
+        return get_fingerprint_service().full_hash(str(file_path))
     
     def _cleanup_old_backups(self, project_id: str, backup_type: str):
         """清理旧备份"""
@@ -479,8 +700,16 @@ class ProjectBackupManager(QObject):
             
             # 按时间排序并删除超过限制的备份
             backups.sort(key=lambda x: x.timestamp, reverse=True)
-            for backup in backups[max_backups:]:
-                self.delete_backup(backup.id)
+            expired = backups[max_backups:]
+            for backup in expired:
+                self._remove_backup(backup)
+            
+            if expired:
+                if any(backup.is_incremental for backup in expired):
+                    self._collect_backup_garbage(project_id)
+                self._save_backups()
+                for backup in expired:
+                    self.backup_deleted.emit(backup.id)
                 
         except Exception as e:
             self._logger.error(f"清理旧备份失败: {e}")
@@ -677,4 +906,7 @@ class ProjectBackupManager(QObject):
         """清理资源"""
         self._auto_backup_timer.stop()
         self._schedule_timer.stop()
+        if self._compression_pool is not None:
+            self._compression_pool.shutdown(wait=True)
+            self._compression_pool = None
         self._logger.info("备份管理器清理完成")
\ No newline at end of file
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+项目版本对象存储 - 内容寻址、去重的分段快照
+项目分段按元素边界切分为数据块，数据块和目录树按内容哈希存储并压缩，
+提交只引用目录树，未变化的数据块在各版本之间共享
+"""
+
+import os
+import json
+import uuid
+import zlib
+import hashlib
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Executor
+from itertools import repeat
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+
+# 内容定义分块：元素哈希满足掩码时切分，插入删除只影响所在的数据块
+CHUNK_MIN_ITEMS = 8
+CHUNK_MAX_ITEMS = 256
+CHUNK_BOUNDARY_MASK = 0x1f  # 平均约32个元素一块
+
+# 新数据总量超过该值时才把压缩交给执行器，避免小提交的进程间传输开销
+PARALLEL_COMPRESS_MIN_BYTES = 1024 * 1024
+
+_CODEC_ZLIB = b"z"
+_CODEC_ZSTD = b"s"
+
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def _encode(value: Any) -> bytes:
+    return _ENCODER.encode(value).encode("utf-8")
+
+
+def compress_object(data: bytes, level: int) -> bytes:
+    """压缩对象数据并加上编码标记，可在子进程中执行"""
+    if ZSTD_AVAILABLE:
+        return _CODEC_ZSTD + zstandard.ZstdCompressor(level=level).compress(data)
+    return _CODEC_ZLIB + zlib.compress(data, level)
+
+
+def split_chunks(items: List[bytes]) -> List[List[bytes]]:
+    """按元素内容切分数据块"""
+    chunks = []
+    current: List[bytes] = []
+    for item in items:
+        current.append(item)
+        if len(current) >= CHUNK_MAX_ITEMS or (
+                len(current) >= CHUNK_MIN_ITEMS and zlib.crc32(item) & CHUNK_BOUNDARY_MASK == 0):
+            chunks.append(current)
+            current = []
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class ProjectObjectStore:
+    """内容寻址对象存储"""
+
+    def __init__(self, root_dir: Union[str, Path], compress_level: int = 6):
+        self.root_dir = Path(root_dir)
+        self.objects_dir = self.root_dir / "objects"
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.compress_level = compress_level
+
+        # 已知对象及其压缩后的大小
+        self._known: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+        self.stats = {
+            "objects_written": 0,
+            "objects_reused": 0,
+            "bytes_stored": 0,
+            "bytes_logical": 0
+        }
+
+    # 对象读写
+    def put(self, data: bytes) -> str:
+        """存储对象，内容相同的对象只保存一次"""
+        return self.put_many([data])[0]
+
+    def put_many(self, blobs: List[bytes], executor: Optional[Executor] = None) -> List[str]:
+        """批量存储对象，返回对象ID列表
+
+        只有新对象需要压缩；新数据较多且提供了执行器（如进程池）时并行压缩。
+        """
+        oids = [hashlib.blake2b(data, digest_size=20).hexdigest() for data in blobs]
+        self.stats["bytes_logical"] += sum(len(data) for data in blobs)
+
+        pending: Dict[str, bytes] = {}
+        for oid, data in zip(oids, blobs):
+            if oid in pending or self.exists(oid):
+                self.stats["objects_reused"] += 1
+            else:
+                pending[oid] = data
+
+        if not pending:
+            return oids
+
+        new_blobs = list(pending.values())
+        if executor is not None and sum(len(data) for data in new_blobs) >= PARALLEL_COMPRESS_MIN_BYTES:
+            payloads = executor.map(compress_object, new_blobs, repeat(self.compress_level))
+        else:
+            payloads = (compress_object(data, self.compress_level) for data in new_blobs)
+
+        for oid, payload in zip(pending, payloads):
+            self._write_object(oid, payload)
+
+        return oids
+
+    def get(self, oid: str) -> bytes:
+        """读取对象"""
+        with open(self._object_path(oid), "rb") as f:
+            payload = f.read()
+        return self._decompress(payload)
+
+    def exists(self, oid: str) -> bool:
+        return self.object_size(oid) is not None
+
+    def object_size(self, oid: str, cached: bool = True) -> Optional[int]:
+        """对象在磁盘上的大小，对象不存在时返回None；cached为False时重新读取文件状态"""
+        if cached and oid in self._known:
+            return self._known[oid]
+        try:
+            size = self._object_path(oid).stat().st_size
+        except OSError:
+            return None
+        with self._lock:
+            self._known[oid] = size
+        return size
+
+    def verify_object(self, oid: str) -> bool:
+        """读取对象并校验内容哈希"""
+        try:
+            data = self.get(oid)
+        except Exception:
+            return False
+        return hashlib.blake2b(data, digest_size=20).hexdigest() == oid
+
+    # 目录树
+    def write_tree(self, sections: Dict[str, Any], executor: Optional[Executor] = None) -> Tuple[str, int]:
+        """存储项目分段，返回 (目录树ID, 分段原始大小)
+
+        列表分段切分为数据块，其他分段整体存储；只有新内容的数据块会写入磁盘。
+        """
+        tree, size = self.write_entries(sections, executor)
+        return self.put(_encode({"sections": tree})), size
+
+    def write_entries(self, sections: Dict[str, Any],
+                      executor: Optional[Executor] = None) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        """存储项目分段的数据块，返回 ({分段名: 目录项}, 分段原始大小)，不写目录树对象"""
+        layout = []
+        blobs: List[bytes] = []
+        for name, value in sections.items():
+            if isinstance(value, list):
+                items = [_encode(item) for item in value]
+                chunks = [b"[" + b",".join(chunk) + b"]" for chunk in split_chunks(items)]
+                layout.append((name, len(items), len(blobs), len(chunks)))
+                blobs.extend(chunks)
+            else:
+                layout.append((name, None, len(blobs), 1))
+                blobs.append(_encode(value))
+
+        oids = self.put_many(blobs, executor)
+
+        entries = {}
+        for name, count, start, length in layout:
+            if count is None:
+                entries[name] = {"type": "value", "blob": oids[start]}
+            else:
+                entries[name] = {"type": "list", "count": count, "chunks": oids[start:start + length]}
+        return entries, sum(len(data) for data in blobs)
+
+    @staticmethod
+    def entry_objects(entry: Dict[str, Any]) -> List[str]:
+        """目录项引用的对象ID"""
+        if entry["type"] == "list":
+            return list(entry["chunks"])
+        return [entry["blob"]]
+
+    def load_entry(self, entry: Dict[str, Any]) -> Any:
+        """还原目录项对应的分段数据"""
+        if entry["type"] == "list":
+            items = []
+            for chunk_id in entry["chunks"]:
+                items.extend(json.loads(self.get(chunk_id)))
+            return items
+        return json.loads(self.get(entry["blob"]))
+
+    def read_tree(self, tree_id: str) -> Dict[str, Dict[str, Any]]:
+        """读取目录树"""
+        return json.loads(self.get(tree_id))["sections"]
+
+    def checkout(self, tree_id: str, sections: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """还原目录树对应的项目分段"""
+        tree = self.read_tree(tree_id)
+        names = list(sections) if sections is not None else list(tree)
+        result = {}
+        for name in names:
+            entry = tree.get(name)
+            if entry is not None:
+                result[name] = self.load_entry(entry)
+        return result
+
+    def diff_trees(self, old_tree_id: str, new_tree_id: str) -> Dict[str, Dict[str, Any]]:
+        """结构化比较两个目录树
+
+        相同的数据块直接跳过，只解析变化区间内的元素。
+        列表元素带有id时按id匹配统计修改，否则按内容统计新增和删除。
+        """
+        old_tree = self.read_tree(old_tree_id)
+        new_tree = self.read_tree(new_tree_id)
+        diff = {}
+
+        for name in list(old_tree) + [n for n in new_tree if n not in old_tree]:
+            old_entry = old_tree.get(name)
+            new_entry = new_tree.get(name)
+
+            if old_entry is None:
+                diff[name] = {"status": "added"}
+            elif new_entry is None:
+                diff[name] = {"status": "removed"}
+            elif old_entry == new_entry:
+                diff[name] = {"status": "unchanged"}
+            elif old_entry["type"] == "list" and new_entry["type"] == "list":
+                diff[name] = self._diff_list(old_entry, new_entry)
+            else:
+                diff[name] = self._diff_value(old_entry, new_entry)
+
+        return diff
+
+    # 垃圾回收
+    def reachable_objects(self, tree_ids: Iterable[str]) -> Set[str]:
+        """目录树及其引用的全部对象"""
+        reachable = set()
+        for tree_id in tree_ids:
+            if not tree_id or tree_id in reachable or not self.exists(tree_id):
+                continue
+            reachable.add(tree_id)
+            for entry in self.read_tree(tree_id).values():
+                reachable.update(self.entry_objects(entry))
+        return reachable
+
+    def gc(self, tree_ids: Iterable[str]) -> int:
+        """删除不再被任何目录树引用的对象，返回删除数量"""
+        return self.gc_objects(self.reachable_objects(tree_ids))
+
+    def gc_objects(self, reachable: Set[str]) -> int:
+        """删除不在可达集合中的对象，返回删除数量"""
+        removed = 0
+        for path in self.objects_dir.glob("*/*"):
+            oid = path.parent.name + path.name
+            if path.suffix == ".tmp" or oid not in reachable:
+                path.unlink()
+                removed += 1
+                with self._lock:
+                    self._known.pop(oid, None)
+        return removed
+
+    def get_storage_size(self) -> int:
+        """对象存储占用的磁盘大小"""
+        return sum(path.stat().st_size for path in self.objects_dir.glob("*/*"))
+
+    # 内部实现
+    def _object_path(self, oid: str) -> Path:
+        return self.objects_dir / oid[:2] / oid[2:]
+
+    def _write_object(self, oid: str, payload: bytes):
+        path = self._object_path(oid)
+        path.parent.mkdir(exist_ok=True)
+        temp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(temp_path, "wb") as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            self._known[oid] = len(payload)
+        self.stats["objects_written"] += 1
+        self.stats["bytes_stored"] += len(payload)
+
+    @staticmethod
+    def _decompress(payload: bytes) -> bytes:
+        codec, body = payload[:1], payload[1:]
+        if codec == _CODEC_ZSTD:
+            if not ZSTD_AVAILABLE:
+                raise RuntimeError("读取版本对象需要安装 zstandard")
+            return zstandard.ZstdDecompressor().decompress(body)
+        return zlib.decompress(body)
+
+    def _changed_items(self, old_chunks: List[str], new_chunks: List[str]) -> Tuple[list, list]:
+        """去掉首尾相同的数据块，返回变化区间内的新旧元素"""
+        limit = min(len(old_chunks), len(new_chunks))
+        prefix = 0
+        while prefix < limit and old_chunks[prefix] == new_chunks[prefix]:
+            prefix += 1
+        suffix = 0
+        while (suffix < limit - prefix and
+               old_chunks[len(old_chunks) - 1 - suffix] == new_chunks[len(new_chunks) - 1 - suffix]):
+            suffix += 1
+
+        old_items = []
+        for chunk_id in old_chunks[prefix:len(old_chunks) - suffix]:
+            old_items.extend(json.loads(self.get(chunk_id)))
+        new_items = []
+        for chunk_id in new_chunks[prefix:len(new_chunks) - suffix]:
+            new_items.extend(json.loads(self.get(chunk_id)))
+        return old_items, new_items
+
+    def _diff_list(self, old_entry: Dict[str, Any], new_entry: Dict[str, Any]) -> Dict[str, Any]:
+        old_items, new_items = self._changed_items(old_entry["chunks"], new_entry["chunks"])
+        result = {
+            "status": "modified",
+            "old_count": old_entry["count"],
+            "new_count": new_entry["count"],
+            "added": 0,
+            "removed": 0,
+            "modified": 0
+        }
+
+        if all(isinstance(item, dict) and "id" in item for item in old_items + new_items):
+            old_by_id = {str(item["id"]): item for item in old_items}
+            new_by_id = {str(item["id"]): item for item in new_items}
+            result["added"] = len(new_by_id.keys() - old_by_id.keys())
+            result["removed"] = len(old_by_id.keys() - new_by_id.keys())
+            modified_ids = [item_id for item_id in new_by_id.keys() & old_by_id.keys()
+                            if new_by_id[item_id] != old_by_id[item_id]]
+            result["modified"] = len(modified_ids)
+            result["modified_ids"] = sorted(modified_ids)[:100]
+        else:
+            old_counter = Counter(_encode(item) for item in old_items)
+            new_counter = Counter(_encode(item) for item in new_items)
+            result["added"] = sum((new_counter - old_counter).values())
+            result["removed"] = sum((old_counter - new_counter).values())
+
+        return result
+
+    def _diff_value(self, old_entry: Dict[str, Any], new_entry: Dict[str, Any]) -> Dict[str, Any]:
+        old_value = self.load_entry(old_entry)
+        new_value = self.load_entry(new_entry)
+        result = {"status": "modified"}
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            result["added_keys"] = sorted(new_value.keys() - old_value.keys())
+            result["removed_keys"] = sorted(old_value.keys() - new_value.keys())
+            result["modified_keys"] = sorted(key for key in old_value.keys() & new_value.keys()
+                                             if old_value[key] != new_value[key])
+        return result
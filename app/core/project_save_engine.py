@@ -0,0 +1,459 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+项目增量保存引擎 - .vecp 文件的分段日志保存
+项目文件由基础快照和追加写入的日志组成，每次保存只记录发生变化的分段，
+日志增长到一定规模后在后台合并回基础快照（临时文件 + 原子重命名）
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+# 项目文件的分段，顺序即基础快照中的字段顺序
+PROJECT_SECTIONS = (
+    "project_info", "videos", "audios", "subtitles", "timeline",
+    "effects", "transitions", "ai_settings", "export_settings"
+)
+
+JOURNAL_SUFFIX = ".journal"
+
+
+# 紧凑编码（不使用indent，走json的C编码器）
+_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+# 分段的编码形式：列表分段按元素分别编码以便只记录变化的区间，其他分段整体编码
+EncodedSection = Union[bytes, List[bytes]]
+
+
+def _encode(value: Any) -> bytes:
+    return _ENCODER.encode(value).encode("utf-8")
+
+
+def _encode_section(value: Any) -> EncodedSection:
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    return _encode(value)
+
+
+def _section_bytes(encoded: EncodedSection) -> bytes:
+    if isinstance(encoded, list):
+        return b"[" + b",".join(encoded) + b"]"
+    return encoded
+
+
+def _diff_section(old: Optional[EncodedSection], new: EncodedSection) -> Optional[tuple]:
+    """比较分段，返回None（未变化）、("set", 数据) 或 ("splice", 起始, 结束, 新元素)
+
+    列表分段去掉首尾相同的元素后，用一次区间替换表示插入、删除和修改。
+    """
+    if old == new:
+        return None
+    if not isinstance(old, list) or not isinstance(new, list):
+        return ("set", _section_bytes(new))
+
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[len(old) - 1 - suffix] == new[len(new) - 1 - suffix]:
+        suffix += 1
+
+    items = new[prefix:len(new) - suffix]
+    # 变化范围超过一半时直接记录整个分段
+    if len(items) * 2 > len(new):
+        return ("set", _section_bytes(new))
+    return ("splice", prefix, len(old) - suffix, items)
+
+
+def journal_path_for(path: str) -> str:
+    """项目文件对应的日志文件路径"""
+    return path + JOURNAL_SUFFIX
+
+
+@dataclass
+class SaveResult:
+    """保存结果"""
+    path: str
+    incremental: bool
+    sections: List[str] = field(default_factory=list)
+    bytes_written: int = 0
+    file_size: int = 0
+    elapsed_time: float = 0.0
+
+
+@dataclass
+class _FileState:
+    """单个项目文件的保存状态"""
+    save_id: Optional[str] = None
+    version: str = "2.0"
+    sections: Dict[str, EncodedSection] = field(default_factory=dict)
+    journal_seq: int = 0
+    journal_records: int = 0
+    journal_bytes: int = 0
+    base_bytes: int = 0
+    base_signature: Optional[tuple] = None
+
+
+class ProjectSaveEngine:
+    """项目增量保存引擎
+
+    调用线程只负责序列化，与上次实际写入的分段比较及文件写入都在后台线程中串行执行，
+    排队中的保存不会提前进入合并快照。
+    """
+
+    def __init__(self, compact_ratio: float = 0.5, max_journal_records: int = 200):
+        self.compact_ratio = compact_ratio
+        self.max_journal_records = max_journal_records
+
+        self._states: Dict[str, _FileState] = {}
+        self._lock = threading.Lock()
+
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+
+        self.stats = {
+            "saves": 0,
+            "journal_appends": 0,
+            "compactions": 0,
+            "sections_written": 0,
+            "bytes_written": 0
+        }
+
+    # 保存
+    def save(self, path: str, sections: Dict[str, Any], version: str = "2.0",
+             wait: bool = True) -> Union[SaveResult, Future]:
+        """增量保存项目分段，wait为False时返回Future"""
+        path = os.path.abspath(path)
+        # 调用线程上序列化，之后调用方修改项目数据不影响这次保存
+        encoded = {name: _encode_section(sections[name]) for name in PROJECT_SECTIONS if name in sections}
+        return self._submit(self._write_changes, (path, encoded, version), wait)
+
+    def write_snapshot(self, path: str, sections: Dict[str, Any], version: str = "2.0") -> SaveResult:
+        """写入独立的完整项目文件（不带日志），用于备份和版本副本"""
+        start_time = time.perf_counter()
+        path = os.path.abspath(path)
+        encoded = {name: _encode(sections[name]) for name in PROJECT_SECTIONS if name in sections}
+
+        self.flush()
+        written = self._write_base(path, uuid.uuid4().hex, version, encoded)
+        self._discard_journal(path)
+        with self._lock:
+            self._states.pop(path, None)
+
+        return SaveResult(path=path, incremental=False, sections=list(encoded), bytes_written=written,
+                          file_size=written, elapsed_time=time.perf_counter() - start_time)
+
+    def export_snapshot(self, source_path: str, target_path: str) -> SaveResult:
+        """将项目文件（基础快照 + 日志）合并导出为独立的完整文件"""
+        self.flush()
+        data = self.read_document(source_path)
+        version = data.pop("version", "2.0")
+        data.pop("save_id", None)
+        return self.write_snapshot(target_path, data, version)
+
+    def compact(self, path: str, wait: bool = True) -> Union[SaveResult, Future]:
+        """将日志合并回基础快照"""
+        return self._submit(self._compact_task, (os.path.abspath(path),), wait)
+
+    def flush(self):
+        """等待已提交的保存全部完成"""
+        if self._worker is None or not self._worker.is_alive():
+            return
+        self._submit(lambda: None, (), True)
+
+    # 加载
+    def read_document(self, path: str) -> Dict[str, Any]:
+        """读取基础快照并重放日志，返回完整项目数据，不改变保存状态"""
+        data, _, _ = self._read(os.path.abspath(path))
+        return data
+
+    def load(self, path: str) -> Dict[str, Any]:
+        """加载项目文件并记录保存状态，后续保存只写入变化的分段"""
+        path = os.path.abspath(path)
+        self.flush()
+        data, records, journal_bytes = self._read(path)
+
+        save_id = data.get("save_id")
+        if save_id and records == 0:
+            # 日志与基础快照不匹配（例如文件被备份覆盖），直接丢弃
+            self._discard_journal(path)
+            journal_bytes = 0
+        elif records:
+            # 截掉写入中断留下的不完整记录，保证后续追加的记录可以被重放
+            self._truncate_journal(path, journal_bytes)
+
+        state = _FileState(
+            save_id=save_id,
+            version=data.get("version", "2.0"),
+            sections={name: _encode_section(data[name]) for name in PROJECT_SECTIONS if name in data},
+            journal_seq=records,
+            journal_records=records,
+            journal_bytes=journal_bytes,
+            base_bytes=self._base_size(path),
+            base_signature=self._signature(path)
+        )
+        with self._lock:
+            self._states[path] = state
+
+        return data
+
+    def get_file_size(self, path: str) -> int:
+        """项目文件占用的总大小（基础快照 + 日志）"""
+        path = os.path.abspath(path)
+        return self._base_size(path) + self._base_size(journal_path_for(path))
+
+    def forget(self, path: str):
+        """丢弃项目文件的保存状态"""
+        with self._lock:
+            self._states.pop(os.path.abspath(path), None)
+
+    def shutdown(self):
+        """停止后台写线程"""
+        if self._worker is not None:
+            self._queue.put(None)
+            self._worker.join()
+            self._worker = None
+
+    # 后台任务
+    def _write_changes(self, path: str, encoded: Dict[str, EncodedSection], version: str) -> SaveResult:
+        """与上次实际写入的分段比较并写入，只在后台线程中执行"""
+        start_time = time.perf_counter()
+
+        with self._lock:
+            state = self._states.setdefault(path, _FileState())
+            changes = {}
+            for name, data in encoded.items():
+                change = _diff_section(state.sections.get(name), data)
+                if change is not None:
+                    changes[name] = change
+            sections = dict(state.sections)
+            sections.update(encoded)
+            needs_base = (not state.save_id or not os.path.exists(path)
+                          or self._signature(path) != state.base_signature)
+
+        if needs_base:
+            result = self._compact_task(path, sections, version)
+        elif not changes:
+            result = SaveResult(path=path, incremental=True)
+        else:
+            result = self._append_journal(path, state, changes)
+            # 日志写入成功后才更新已写入的状态
+            with self._lock:
+                state.sections = sections
+                state.version = version
+            if (state.journal_records >= self.max_journal_records or
+                    state.journal_bytes > state.base_bytes * self.compact_ratio):
+                compacted = self._compact_task(path)
+                result.bytes_written += compacted.bytes_written
+
+        self.stats["saves"] += 1
+        result.file_size = self.get_file_size(path)
+        result.elapsed_time = time.perf_counter() - start_time
+        return result
+
+    def _append_journal(self, path: str, state: _FileState, changes: Dict[str, tuple]) -> SaveResult:
+        state.journal_seq += 1
+        full_sections = []
+        splices = []
+        for name, change in changes.items():
+            if change[0] == "set":
+                full_sections.append(_encode(name) + b":" + change[1])
+            else:
+                _, start, stop, items = change
+                splices.append(_encode(name) + b":[%d,%d,[" % (start, stop) + b",".join(items) + b"]]")
+
+        record = b"".join((
+            b'{"base":', _encode(state.save_id), b',"seq":', str(state.journal_seq).encode(),
+            b',"sections":{', b",".join(full_sections), b'},"splices":{', b",".join(splices), b"}}\n"
+        ))
+
+        with open(journal_path_for(path), "ab") as f:
+            f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+
+        state.journal_records += 1
+        state.journal_bytes += len(record)
+        self.stats["journal_appends"] += 1
+        self.stats["sections_written"] += len(changes)
+        self.stats["bytes_written"] += len(record)
+
+        return SaveResult(path=path, incremental=True, sections=list(changes), bytes_written=len(record))
+
+    def _compact_task(self, path: str, sections: Optional[Dict[str, EncodedSection]] = None,
+                      version: Optional[str] = None) -> SaveResult:
+        """写入新的基础快照，默认使用上次实际写入的分段"""
+        with self._lock:
+            state = self._states.get(path)
+            if state is None:
+                return SaveResult(path=path, incremental=False)
+            save_id = uuid.uuid4().hex
+            sections = dict(state.sections) if sections is None else sections
+            version = state.version if version is None else version
+
+        written = self._write_base(path, save_id, version, sections)
+        # 新快照使用新的save_id，即使日志删除失败，旧记录也不会被重放
+        self._discard_journal(path)
+
+        with self._lock:
+            state.sections = sections
+            state.version = version
+            state.save_id = save_id
+            state.journal_seq = 0
+            state.journal_records = 0
+            state.journal_bytes = 0
+            state.base_bytes = written
+            state.base_signature = self._signature(path)
+
+        self.stats["compactions"] += 1
+        self.stats["sections_written"] += len(sections)
+        self.stats["bytes_written"] += written
+        logger.debug(f"项目文件已合并: {path}, 大小: {written} 字节")
+
+        return SaveResult(path=path, incremental=False, sections=list(sections), bytes_written=written)
+
+    def _write_base(self, path: str, save_id: str, version: str, sections: Dict[str, EncodedSection]) -> int:
+        parts = [b'{"version":', _encode(version), b',"save_id":', _encode(save_id)]
+        for name in PROJECT_SECTIONS:
+            if name in sections:
+                parts.extend((b",", _encode(name), b":", _section_bytes(sections[name])))
+        parts.append(b"}")
+        content = b"".join(parts)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return len(content)
+
+    def _read(self, path: str) -> tuple:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        save_id = data.get("save_id")
+        journal_path = journal_path_for(path)
+        records = 0
+        valid_bytes = 0
+
+        if save_id and os.path.exists(journal_path):
+            with open(journal_path, "rb") as f:
+                for line in f:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("记录不完整")
+                        record = json.loads(line)
+                    except ValueError:
+                        # 写入中断留下的不完整记录，之后的内容不再可信
+                        logger.warning(f"项目日志存在不完整记录，已忽略: {journal_path}")
+                        break
+                    valid_bytes += len(line)
+                    if record.get("base") != save_id:
+                        continue
+                    data.update(record.get("sections", {}))
+                    for name, (start, stop, items) in record.get("splices", {}).items():
+                        data.setdefault(name, [])[start:stop] = items
+                    records += 1
+
+        return data, records, valid_bytes
+
+    def _truncate_journal(self, path: str, size: int):
+        journal_path = journal_path_for(path)
+        if self._base_size(journal_path) > size:
+            with open(journal_path, "r+b") as f:
+                f.truncate(size)
+
+    def _discard_journal(self, path: str):
+        try:
+            os.remove(journal_path_for(path))
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def _signature(path: str) -> Optional[tuple]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def _base_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _submit(self, task, args: tuple, wait: bool) -> Union[Any, Future]:
+        self._ensure_worker()
+        future: Future = Future()
+        self._queue.put((task, args, future))
+        if wait:
+            return future.result()
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._worker_loop, name="project-save", daemon=True)
+                self._worker.start()
+
+    def _worker_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+
+            task, args, future = item
+            try:
+                future.set_result(task(*args))
+            except Exception as e:
+                logger.error(f"项目保存失败: {e}")
+                if task == self._write_changes:
+                    # 写入失败后状态不可信，下次保存写入完整快照
+                    with self._lock:
+                        state = self._states.get(args[0])
+                        if state is not None:
+                            state.base_signature = None
+                future.set_exception(e)
+
+
+# 全局保存引擎实例
+_global_save_engine: Optional[ProjectSaveEngine] = None
+_global_lock = threading.Lock()
+
+
+def get_project_save_engine() -> ProjectSaveEngine:
+    """获取全局项目保存引擎"""
+    global _global_save_engine
+    if _global_save_engine is None:
+        with _global_lock:
+            if _global_save_engine is None:
+                _global_save_engine = ProjectSaveEngine()
+    return _global_save_engine
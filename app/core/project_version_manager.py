@@ -9,7 +9,6 @@ import json
 import os
 import uuid
 import shutil
-import hashlib
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Union, Tuple
@@ -18,6 +17,9 @@ from PyQt6.QtCore import QObject, pyqtSignal
 import logging
 
 from app.core.project import Project, ProjectInfo
+from app.core.project_object_store import ProjectObjectStore
+from app.core.project_save_engine import get_project_save_engine
+from app.utils.file_fingerprint import get_fingerprint_service
 
 
 @dataclass
@@ -34,6 +36,7 @@ class VersionCommit:
     changes: Dict[str, Any] = field(default_factory=dict)
     tags: List[str] = field(default_factory=list)
     parent_id: Optional[str] = None
+    tree_id: str = ""  # 对象存储中的目录树，旧版本提交为空
     
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
@@ -105,6 +108,9 @@ class ProjectVersionManager(QObject):
         self._branches: Dict[str, VersionBranch] = {}
         self._tags: Dict[str, VersionTag] = {}
         
+        # 每个项目的内容寻址对象存储
+        self._object_stores: Dict[str, ProjectObjectStore] = {}
+        
         # 日志记录
         self._logger = logging.getLogger(__name__)
     
@@ -117,14 +123,8 @@ class ProjectVersionManager(QObject):
             
             project_id = project.project_info.id
             
-            # 保存项目文件
-            commit_file = self._save_project_version(project, version)
-            if not commit_file:
-                return None
-            
-            # 计算文件哈希
-            file_hash = self._calculate_file_hash(commit_file)
-            file_size = os.path.getsize(commit_file)
+            # 项目分段写入对象存储，只有变化的数据块会写入磁盘
+            tree_id, file_size = self._get_object_store(project_id).write_tree(project.get_sections())
             
             # 创建提交记录
             commit = VersionCommit(
@@ -134,9 +134,10 @@ class ProjectVersionManager(QObject):
                 message=message,
                 author=author,
                 timestamp=datetime.now().isoformat(),
-                file_hash=file_hash,
+                file_hash=tree_id,
                 file_size=file_size,
-                changes=changes or {}
+                changes=changes or {},
+                tree_id=tree_id
             )
             
             # 获取当前分支的最新提交作为父提交
@@ -298,7 +299,10 @@ class ProjectVersionManager(QObject):
                 return None
             
             # 查找版本文件
-            version_file = self._get_version_file(project_id, commit_id)
+            if commit.tree_id:
+                version_file = self._checkout_version_file(commit)
+            else:
+                version_file = self._get_version_file(project_id, commit_id)
             if not version_file or not os.path.exists(version_file):
                 self.error_occurred.emit("版本文件不存在")
                 return None
@@ -314,6 +318,18 @@ class ProjectVersionManager(QObject):
             self.error_occurred.emit(error_msg)
             return None
     
+    def checkout_version(self, project_id: str, commit_id: str) -> Optional[Dict[str, Any]]:
+        """读取指定版本的项目数据（不生成文件）"""
+        commit = self._commits.get(commit_id)
+        if not commit or commit.project_id != project_id or not commit.tree_id:
+            return None
+        
+        try:
+            return self._get_object_store(project_id).checkout(commit.tree_id)
+        except Exception as e:
+            self._logger.error(f"读取版本数据失败: {e}")
+            return None
+    
     def get_commit_history(self, project_id: str, branch: str = None, 
                           limit: int = 50) -> List[VersionCommit]:
         """获取提交历史"""
@@ -395,6 +411,11 @@ class ProjectVersionManager(QObject):
                 'changes_summary': self._summarize_changes(commit1.changes, commit2.changes)
             }
             
+            # 逐分段的结构化差异
+            if commit1.tree_id and commit2.tree_id and commit1.project_id == commit2.project_id:
+                store = self._get_object_store(commit1.project_id)
+                diff['structural_diff'] = store.diff_trees(commit1.tree_id, commit2.tree_id)
+            
             return diff
             
         except Exception as e:
@@ -448,23 +469,25 @@ class ProjectVersionManager(QObject):
             self.error_occurred.emit(error_msg)
             return False
     
-    def _save_project_version(self, project: Project, version: str) -> Optional[str]:
-        """保存项目版本"""
-        try:
-            project_dir = self.versions_dir / project.project_info.id
-            project_dir.mkdir(exist_ok=True)
-            
-            version_file = project_dir / f"v{version}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.vecp"
-            
-            # 保存项目
-            if project.save_to_file(str(version_file)):
-                return str(version_file)
-            
-            return None
-            
-        except Exception as e:
-            self._logger.error(f"保存项目版本失败: {e}")
-            return None
+    def _get_object_store(self, project_id: str) -> ProjectObjectStore:
+        """获取项目的对象存储"""
+        store = self._object_stores.get(project_id)
+        if store is None:
+            store = ProjectObjectStore(self.versions_dir / project_id)
+            self._object_stores[project_id] = store
+        return store
+    
+    def _checkout_version_file(self, commit: VersionCommit) -> Optional[str]:
+        """将版本还原为独立的项目文件，同一版本只生成一次"""
+        checkout_dir = self.versions_dir / commit.project_id / "checkouts"
+        checkout_dir.mkdir(parents=True, exist_ok=True)
+        
+        version_file = checkout_dir / f"{commit.id}.vecp"
+        if not version_file.exists():
+            sections = self._get_object_store(commit.project_id).checkout(commit.tree_id)
+            get_project_save_engine().write_snapshot(str(version_file), sections)
+        
+        return str(version_file)
     
     def _get_version_file(self, project_id: str, commit_id: str) -> Optional[str]:
         """获取版本文件路径"""
@@ -490,12 +513,8 @@ class ProjectVersionManager(QObject):
             return None
     
     def _calculate_file_hash(self, file_path: str) -> str:
-        """计算文件哈希值"""
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
+        """计算文件哈希值（按 inode/大小/修改时间 缓存）"""
+        return get_fingerprint_service().full_hash(str(file_path))
     
     def _get_current_branch(self, project_id: str) -> Optional[VersionBranch]:
         """获取当前分支"""
@@ -678,6 +697,39 @@ class ProjectVersionManager(QObject):
                     self._logger.info(f"删除旧版本文件: {file}")
                 except Exception as e:
                     self._logger.error(f"删除版本文件失败 {file}: {e}")
+            
+            # 对象存储中的旧提交：分支和标签指向的提交始终保留
+            store_commits = sorted((c for c in self._commits.values()
+                                    if c.project_id == project_id and c.tree_id),
+                                   key=lambda c: c.timestamp, reverse=True)
+            pinned = {b.commit_id for b in self._branches.values() if b.project_id == project_id}
+            pinned |= {t.commit_id for t in self._tags.values() if t.project_id == project_id}
+            
+            removed_commits = [c for c in store_commits[max_versions:] if c.id not in pinned]
+            if not removed_commits:
+                return
+            
+            # 保留的提交改为指向最近的保留祖先（没有时为空），与删除一起写入提交数据
+            removed_ids = {c.id for c in removed_commits}
+            for commit in self._commits.values():
+                if commit.project_id == project_id and commit.parent_id in removed_ids:
+                    parent_id = commit.parent_id
+                    while parent_id in removed_ids:
+                        parent_id = self._commits[parent_id].parent_id
+                    commit.parent_id = parent_id or None
+            
+            for commit in removed_commits:
+                del self._commits[commit.id]
+                checkout_file = project_dir / "checkouts" / f"{commit.id}.vecp"
+                if checkout_file.exists():
+                    checkout_file.unlink()
+            self._save_version_data(project_id)
+            
+            # 回收不再被引用的数据块
+            live_trees = [c.tree_id for c in self._commits.values()
+                          if c.project_id == project_id and c.tree_id]
+            removed_objects = self._get_object_store(project_id).gc(live_trees)
+            self._logger.info(f"清理旧版本: {len(removed_commits)} 个提交, {removed_objects} 个对象")
                     
         except Exception as e:
             self._logger.error(f"清理旧版本失败: {e}")
\ No newline at end of file
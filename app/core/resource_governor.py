@@ -0,0 +1,341 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+资源准入控制
+每类任务声明 CPU 核数、内存、磁盘吞吐需求（运行后按实测值学习修正），
+只有当前预算有余量时才放行任务；可伸缩的编码任务按实际分到的核数决定 ffmpeg 线程数
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+HISTORY_VERSION = 1
+
+
+@dataclass
+class ResourceCost:
+    """任务资源需求
+
+    cpu 为期望核数；min_cpu 不为 None 时任务可在 min_cpu..cpu 之间按余量缩减（如 ffmpeg 编码）
+    """
+    cpu: float = 1.0
+    memory_mb: float = 256.0
+    io_mbps: float = 0.0
+    min_cpu: Optional[float] = None
+
+    @property
+    def elastic(self) -> bool:
+        return self.min_cpu is not None and self.min_cpu < self.cpu
+
+
+@dataclass
+class ResourceBudget:
+    """可分配的资源总量"""
+    cpu: float
+    memory_mb: float
+    io_mbps: float = 400.0
+
+    @classmethod
+    def from_system(cls, cpu: float = 0.0, memory_limit_mb: float = 0.0,
+                    io_mbps: float = 400.0) -> 'ResourceBudget':
+        """按本机核数和物理内存（留 20% 给系统和界面）生成预算，显式给出的值优先"""
+        total_memory_mb = psutil.virtual_memory().total / (1024 * 1024) * 0.8
+        memory_mb = min(memory_limit_mb, total_memory_mb) if memory_limit_mb > 0 else total_memory_mb
+        return cls(cpu=cpu if cpu > 0 else float(os.cpu_count() or 1), memory_mb=memory_mb, io_mbps=io_mbps)
+
+
+@dataclass
+class ResourceGrant:
+    """已放行任务占用的资源"""
+    task_id: str
+    profile: str
+    cpu: float
+    memory_mb: float
+    io_mbps: float
+    threads: int
+    granted_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class ResourceUsage:
+    """子进程实测资源使用"""
+    cpu_seconds: float = 0.0
+    peak_memory_mb: float = 0.0
+    io_bytes: int = 0
+    wall_seconds: float = 0.0
+    samples: int = 0
+
+    def merge(self, other: 'ResourceUsage'):
+        """合并同一任务中先后执行的子进程"""
+        self.cpu_seconds += other.cpu_seconds
+        self.peak_memory_mb = max(self.peak_memory_mb, other.peak_memory_mb)
+        self.io_bytes += other.io_bytes
+        self.wall_seconds += other.wall_seconds
+        self.samples += other.samples
+
+
+# 各类任务的默认资源需求，键为任务类型值或 metadata["resource_profile"]
+DEFAULT_RESOURCE_PROFILES: Dict[str, ResourceCost] = {
+    "analyze": ResourceCost(cpu=0.25, memory_mb=64, io_mbps=20),
+    "generate_thumbnails": ResourceCost(cpu=0.5, memory_mb=150, io_mbps=40),
+    "extract_frames": ResourceCost(cpu=1.0, memory_mb=300, io_mbps=80),
+    "compress": ResourceCost(cpu=4.0, min_cpu=1.0, memory_mb=1024, io_mbps=60),
+    "convert": ResourceCost(cpu=4.0, min_cpu=1.0, memory_mb=1024, io_mbps=60),
+    "optimize": ResourceCost(cpu=6.0, min_cpu=2.0, memory_mb=1536, io_mbps=60),
+    "resize": ResourceCost(cpu=4.0, min_cpu=1.0, memory_mb=1024, io_mbps=60),
+    "watermark": ResourceCost(cpu=4.0, min_cpu=1.0, memory_mb=1024, io_mbps=60),
+    "stabilize": ResourceCost(cpu=4.0, min_cpu=2.0, memory_mb=2048, io_mbps=60),
+    "color_correct": ResourceCost(cpu=4.0, min_cpu=1.0, memory_mb=1024, io_mbps=60),
+    "denoise": ResourceCost(cpu=6.0, min_cpu=2.0, memory_mb=2048, io_mbps=60),
+    "upscale": ResourceCost(cpu=8.0, min_cpu=2.0, memory_mb=4096, io_mbps=80),
+    "custom": ResourceCost(cpu=1.0, memory_mb=512, io_mbps=40),
+    "render_4k": ResourceCost(cpu=8.0, min_cpu=4.0, memory_mb=6144, io_mbps=150),
+    "ocr": ResourceCost(cpu=2.0, memory_mb=1536, io_mbps=20),
+    "transcribe": ResourceCost(cpu=4.0, memory_mb=3072, io_mbps=10),
+}
+
+
+class ResourceGovernor:
+    """按资源预算放行任务
+
+    try_acquire() 在预算有余量时返回 ResourceGrant，否则返回 None（调用方稍后重试）；
+    机器空闲时总是放行，超出预算的任务被压到预算以内单独运行。
+    某个任务持续被拒超过 starvation_timeout 秒后为它预留放行所需的资源，
+    其他任务只能使用预留之外的余量（机器空闲时也是如此），直到它获得资源。
+    release() 归还资源，附带实测用量时按指数滑动平均学习该类任务的内存、磁盘和 CPU 需求。
+    """
+
+    # 等待记录超过该时间未刷新视为调用方已放弃（任务被取消等）
+    WAITER_STALE_SECONDS = 10.0
+    # 学习到的内存需求留出的余量
+    MEMORY_HEADROOM = 1.25
+
+    def __init__(self, budget: ResourceBudget, profiles: Optional[Dict[str, ResourceCost]] = None,
+                 history_path: Optional[str] = None, learning_rate: float = 0.3, min_samples: int = 2,
+                 starvation_timeout: float = 30.0, pressure_probe: Optional[Callable[[], bool]] = None,
+                 probe_interval: float = 1.0):
+        self.budget = budget
+        self.profiles = dict(DEFAULT_RESOURCE_PROFILES)
+        self.profiles.update(profiles or {})
+        self.history_path = history_path
+        self.learning_rate = learning_rate
+        self.min_samples = min_samples
+        self.starvation_timeout = starvation_timeout
+        self.pressure_probe = pressure_probe
+        self.probe_interval = probe_interval
+
+        self._lock = threading.Lock()
+        self._grants: Dict[str, ResourceGrant] = {}
+        self._used_cpu = 0.0
+        self._used_memory_mb = 0.0
+        self._used_io_mbps = 0.0
+        self._waiting: Dict[str, List[Any]] = {}  # 任务ID -> [首次被拒时间, 最近被拒时间, 放行所需资源]
+        self._history: Dict[str, Dict[str, float]] = {}
+        self._pressure = False
+        self._pressure_checked_at = 0.0
+
+        self.stats = {
+            'granted': 0,
+            'refused': 0,
+            'elastic_reduced': 0,
+            'pressure_refusals': 0,
+            'starvation_holds': 0,
+            'peak_concurrency': 0,
+            'learned_samples': 0
+        }
+
+        if history_path:
+            self._load_history()
+
+    def cost_for(self, profile: str, declared: Optional[ResourceCost] = None) -> ResourceCost:
+        """任务的有效资源需求：显式声明 > 历史学习值 > 默认配置"""
+        if declared is not None:
+            return declared
+        base = self.profiles.get(profile) or self.profiles["custom"]
+        with self._lock:
+            learned = self._history.get(profile)
+            if not learned or learned["samples"] < self.min_samples:
+                return base
+            cpu = base.cpu if base.elastic else max(learned["cpu"], 0.1)
+            return ResourceCost(cpu=cpu, memory_mb=learned["memory_mb"] * self.MEMORY_HEADROOM,
+                                io_mbps=learned["io_mbps"], min_cpu=base.min_cpu)
+
+    def try_acquire(self, task_id: str, profile: str,
+                    cost: Optional[ResourceCost] = None) -> Optional[ResourceGrant]:
+        """预算有余量时占用资源并返回授权，否则返回 None"""
+        cost = self.cost_for(profile, cost)
+        pressure = self._under_pressure()
+        now = time.monotonic()
+        with self._lock:
+            existing = self._grants.get(task_id)
+            if existing is not None:
+                return existing
+
+            cpu = min(cost.cpu, self.budget.cpu)
+            memory_mb = min(cost.memory_mb, self.budget.memory_mb)
+            io_mbps = min(cost.io_mbps, self.budget.io_mbps)
+            min_cpu = min(cost.min_cpu, cpu) if cost.elastic else cpu
+            needed = ResourceCost(cpu=min_cpu, memory_mb=memory_mb, io_mbps=io_mbps)
+
+            starving = self._starving_task(now)
+            reserved = self._waiting[starving][2] if starving is not None and starving != task_id else None
+            if self._grants or reserved is not None:
+                if pressure and self._grants:
+                    self.stats['pressure_refusals'] += 1
+                    return self._refuse(task_id, now, needed)
+                free_cpu = self.budget.cpu - self._used_cpu
+                free_memory_mb = self.budget.memory_mb - self._used_memory_mb
+                free_io_mbps = self.budget.io_mbps - self._used_io_mbps
+                if reserved is not None:
+                    # 饥饿任务的预留不可占用，余量仍可放行其他任务
+                    free_cpu -= reserved.cpu
+                    free_memory_mb -= reserved.memory_mb
+                    free_io_mbps -= reserved.io_mbps
+                if memory_mb > free_memory_mb or io_mbps > free_io_mbps or free_cpu < min_cpu:
+                    if reserved is not None:
+                        self.stats['starvation_holds'] += 1
+                    return self._refuse(task_id, now, needed)
+                if free_cpu < cpu:
+                    cpu = free_cpu
+                    self.stats['elastic_reduced'] += 1
+
+            grant = ResourceGrant(task_id=task_id, profile=profile, cpu=cpu, memory_mb=memory_mb,
+                                  io_mbps=io_mbps, threads=max(1, int(cpu + 0.5)))
+            self._grants[task_id] = grant
+            self._used_cpu += cpu
+            self._used_memory_mb += memory_mb
+            self._used_io_mbps += io_mbps
+            self._waiting.pop(task_id, None)
+            self.stats['granted'] += 1
+            self.stats['peak_concurrency'] = max(self.stats['peak_concurrency'], len(self._grants))
+            return grant
+
+    def release(self, grant: ResourceGrant, usage: Optional[ResourceUsage] = None):
+        """归还资源，有实测用量时更新该类任务的历史需求"""
+        with self._lock:
+            if self._grants.pop(grant.task_id, None) is None:
+                return
+            self._used_cpu = max(self._used_cpu - grant.cpu, 0.0)
+            self._used_memory_mb = max(self._used_memory_mb - grant.memory_mb, 0.0)
+            self._used_io_mbps = max(self._used_io_mbps - grant.io_mbps, 0.0)
+            if usage is not None and usage.samples > 0 and usage.wall_seconds > 0:
+                self._learn(grant.profile, usage)
+
+    def forget(self, task_id: str):
+        """任务不再等待资源（被取消或放弃）"""
+        with self._lock:
+            self._waiting.pop(task_id, None)
+
+    def get_grant(self, task_id: str) -> Optional[ResourceGrant]:
+        with self._lock:
+            return self._grants.get(task_id)
+
+    def get_learned(self, profile: str) -> Optional[Dict[str, float]]:
+        with self._lock:
+            learned = self._history.get(profile)
+            return dict(learned) if learned else None
+
+    def save_history(self):
+        """把学习到的资源需求写入磁盘"""
+        if not self.history_path:
+            return
+        with self._lock:
+            data = {"version": HISTORY_VERSION, "profiles": dict(self._history)}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.history_path)), exist_ok=True)
+            temp_path = f"{self.history_path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(temp_path, self.history_path)
+        except OSError as e:
+            logger.warning(f"保存资源历史失败: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats.update({
+                'active': len(self._grants),
+                'waiting': len(self._waiting),
+                'cpu_used': self._used_cpu,
+                'memory_used_mb': self._used_memory_mb,
+                'io_used_mbps': self._used_io_mbps,
+                'cpu_budget': self.budget.cpu,
+                'memory_budget_mb': self.budget.memory_mb,
+                'io_budget_mbps': self.budget.io_mbps,
+                'learned_profiles': len(self._history)
+            })
+        return stats
+
+    # 内部实现
+    def _refuse(self, task_id: str, now: float, needed: ResourceCost) -> None:
+        self.stats['refused'] += 1
+        waiting = self._waiting.setdefault(task_id, [now, now, needed])
+        waiting[1] = now
+        waiting[2] = needed
+        return None
+
+    def _starving_task(self, now: float) -> Optional[str]:
+        """等待最久且已超过饥饿阈值的任务，过期的等待记录顺带清理"""
+        oldest_id, oldest_since = None, None
+        for task_id, (since, last, _) in list(self._waiting.items()):
+            if now - last > self.WAITER_STALE_SECONDS:
+                del self._waiting[task_id]
+                continue
+            if now - since >= self.starvation_timeout and (oldest_since is None or since < oldest_since):
+                oldest_id, oldest_since = task_id, since
+        return oldest_id
+
+    def _under_pressure(self) -> bool:
+        """外部内存压力探测，结果缓存 probe_interval 秒"""
+        if self.pressure_probe is None:
+            return False
+        now = time.monotonic()
+        if now - self._pressure_checked_at >= self.probe_interval:
+            self._pressure_checked_at = now
+            try:
+                self._pressure = bool(self.pressure_probe())
+            except Exception as e:
+                logger.debug(f"资源压力探测失败: {e}")
+                self._pressure = False
+        return self._pressure
+
+    def _learn(self, profile: str, usage: ResourceUsage):
+        observed = {
+            "cpu": usage.cpu_seconds / usage.wall_seconds,
+            "memory_mb": usage.peak_memory_mb,
+            "io_mbps": usage.io_bytes / (1024 * 1024) / usage.wall_seconds
+        }
+        learned = self._history.get(profile)
+        if learned is None:
+            self._history[profile] = dict(observed, samples=1)
+        else:
+            for key, value in observed.items():
+                learned[key] += self.learning_rate * (value - learned[key])
+            learned["samples"] += 1
+        self.stats['learned_samples'] += 1
+
+    def _load_history(self):
+        try:
+            with open(self.history_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取资源历史失败: {e}")
+            return
+        if data.get("version") != HISTORY_VERSION:
+            return
+        for profile, learned in data.get("profiles", {}).items():
+            if all(key in learned for key in ("cpu", "memory_mb", "io_mbps", "samples")):
+                self._history[profile] = {key: float(learned[key])
+                                          for key in ("cpu", "memory_mb", "io_mbps", "samples")}
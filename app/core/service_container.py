@@ -35,6 +35,7 @@ class ServiceDescriptor:
     instance: Any = None
     factory: Optional[callable] = None
     dependencies: list = None
+    lazy: bool = False  # 延迟单例：build() 时不预创建，首次 get() 时创建
     
     def __post_init__(self):
         if self.dependencies is None:
@@ -86,6 +87,15 @@ class ServiceContainer(QObject):
             interface, implementation, ServiceLifetime.SINGLETON, factory
         )
     
+    def register_lazy_singleton(self, interface, implementation = None,
+                               factory: callable = None) -> 'ServiceContainer':
+        """注册延迟单例服务，首次使用时才创建（非启动关键服务）"""
+        self._register_service(
+            interface, implementation, ServiceLifetime.SINGLETON, factory
+        )
+        self._services[self._get_service_name(interface)].lazy = True
+        return self
+
     def register_transient(self, interface, implementation = None,
                           factory: callable = None) -> 'ServiceContainer':
         """注册瞬态服务"""
@@ -204,6 +214,10 @@ class ServiceContainer(QObject):
         service_name = self._get_service_name(interface)
         return service_name in self._services
     
+    def is_resolved(self, interface) -> bool:
+        """检查单例服务是否已创建"""
+        return self._get_service_name(interface) in self._instances
+
     def build(self) -> 'ServiceContainer':
         """构建容器"""
         with self._service_lock:
@@ -277,6 +291,8 @@ class ServiceContainer(QObject):
         """预创建单例服务"""
         for service_name, descriptor in self._services.items():
             if descriptor.lifetime == ServiceLifetime.SINGLETON and service_name not in self._instances:
+                if descriptor.lazy:
+                    continue
                 try:
                     instance = self._create_instance(descriptor)
                     self._instances[service_name] = instance
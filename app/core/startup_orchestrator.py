@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+启动编排器 - 按依赖关系并行执行启动步骤
+没有依赖关系的后台步骤在线程池中并发执行，必须在GUI线程执行的步骤在调用线程中依次执行，
+每个步骤记录开始时间和耗时，用于跟踪首个窗口出现的时间
+"""
+
+import time
+import logging
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StepStatus(Enum):
+    """步骤状态"""
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+@dataclass
+class StartupStep:
+    """启动步骤"""
+    name: str
+    func: Callable[[], Any]
+    depends_on: Tuple[str, ...] = ()
+    main_thread: bool = False  # 需要在GUI线程中执行（创建QObject、窗口等）
+    critical: bool = True      # 关键步骤失败时中止启动
+    status: StepStatus = StepStatus.PENDING
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    thread_name: str = ""
+    error: Optional[BaseException] = None
+
+    @property
+    def duration(self) -> float:
+        return max(0.0, self.finished_at - self.started_at)
+
+
+@dataclass
+class StartupReport:
+    """启动耗时报告，时间均相对于编排器启动时刻（秒）"""
+    total_time: float = 0.0
+    steps: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    milestones: Dict[str, float] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'total_time': self.total_time,
+            'steps': dict(self.steps),
+            'milestones': dict(self.milestones)
+        }
+
+
+class StartupOrchestrator:
+    """启动编排器"""
+
+    def __init__(self, max_workers: int = 4, idle_callback: Optional[Callable[[], None]] = None,
+                 poll_interval: float = 0.02):
+        self.max_workers = max_workers
+        self.idle_callback = idle_callback  # 等待后台步骤时调用，例如处理GUI事件
+        self.poll_interval = poll_interval
+
+        self._steps: Dict[str, StartupStep] = {}
+        self._milestones: Dict[str, float] = {}
+        self._origin = time.perf_counter()
+
+    def add_step(self, name: str, func: Callable[[], Any], depends_on: Tuple[str, ...] = (),
+                 main_thread: bool = False, critical: bool = True) -> StartupStep:
+        """添加启动步骤"""
+        if name in self._steps:
+            raise ValueError(f"启动步骤重复: {name}")
+        step = StartupStep(name, func, tuple(depends_on), main_thread, critical)
+        self._steps[name] = step
+        return step
+
+    def mark(self, milestone: str) -> float:
+        """记录里程碑（如首个窗口显示），返回相对启动时刻的时间"""
+        elapsed = time.perf_counter() - self._origin
+        self._milestones[milestone] = elapsed
+        return elapsed
+
+    def run(self, on_step_started: Optional[Callable[[StartupStep], None]] = None) -> StartupReport:
+        """执行所有步骤
+
+        on_step_started 在调用线程中、GUI线程步骤执行前调用（用于更新启动画面）。
+        关键步骤失败时抛出其异常；非关键步骤失败时，依赖它的步骤被跳过。
+        """
+        self._validate()
+        pending = dict(self._steps)
+        running: Dict[Future, StartupStep] = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="startup") as executor:
+            try:
+                while pending or running:
+                    self._skip_blocked(pending)
+
+                    ready = [step for step in pending.values() if self._dependencies_done(step)]
+                    for step in ready:
+                        if not step.main_thread:
+                            del pending[step.name]
+                            running[executor.submit(self._execute, step)] = step
+
+                    main_step = next((step for step in ready if step.main_thread), None)
+                    if main_step is not None:
+                        del pending[main_step.name]
+                        if on_step_started:
+                            on_step_started(main_step)
+                        self._execute(main_step)
+                        self._raise_if_critical(main_step)
+                    elif running:
+                        done, _ = wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            self._raise_if_critical(running.pop(future))
+                        if not done and self.idle_callback:
+                            self.idle_callback()
+
+                    for future in [f for f in running if f.done()]:
+                        self._raise_if_critical(running.pop(future))
+            except BaseException:
+                for future in running:
+                    future.cancel()
+                raise
+
+        report = self.get_report()
+        logger.info(f"启动步骤完成，总耗时 {report.total_time:.3f}s")
+        return report
+
+    def get_report(self) -> StartupReport:
+        """返回各步骤的开始时间、耗时、执行线程和状态"""
+        report = StartupReport(milestones=dict(self._milestones))
+        for step in self._steps.values():
+            report.steps[step.name] = {
+                'status': step.status.value,
+                'start': step.started_at - self._origin if step.started_at else None,
+                'duration': step.duration,
+                'thread': step.thread_name,
+                'main_thread': step.main_thread,
+                'error': str(step.error) if step.error else None
+            }
+            if step.finished_at:
+                report.total_time = max(report.total_time, step.finished_at - self._origin)
+        return report
+
+    def get_critical_path(self) -> List[str]:
+        """结束最晚的步骤沿依赖回溯得到的关键路径"""
+        finished = [step for step in self._steps.values() if step.finished_at]
+        if not finished:
+            return []
+        path = []
+        step = max(finished, key=lambda s: s.finished_at)
+        while step is not None:
+            path.append(step.name)
+            dependencies = [self._steps[name] for name in step.depends_on if self._steps[name].finished_at]
+            step = max(dependencies, key=lambda s: s.finished_at) if dependencies else None
+        path.reverse()
+        return path
+
+    # 内部实现
+    def _validate(self):
+        """检查未知依赖和循环依赖"""
+        for step in self._steps.values():
+            for dependency in step.depends_on:
+                if dependency not in self._steps:
+                    raise ValueError(f"启动步骤 {step.name} 依赖未知步骤: {dependency}")
+
+        visiting, visited = set(), set()
+
+        def visit(name: str):
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"启动步骤存在循环依赖: {name}")
+            visiting.add(name)
+            for dependency in self._steps[name].depends_on:
+                visit(dependency)
+            visiting.discard(name)
+            visited.add(name)
+
+        for name in self._steps:
+            visit(name)
+
+    def _dependencies_done(self, step: StartupStep) -> bool:
+        return all(self._steps[name].status is StepStatus.DONE for name in step.depends_on)
+
+    def _skip_blocked(self, pending: Dict[str, StartupStep]):
+        """依赖失败或被跳过的步骤标记为跳过"""
+        changed = True
+        while changed:
+            changed = False
+            for step in list(pending.values()):
+                if any(self._steps[name].status in (StepStatus.FAILED, StepStatus.SKIPPED)
+                       for name in step.depends_on):
+                    step.status = StepStatus.SKIPPED
+                    del pending[step.name]
+                    logger.warning(f"启动步骤已跳过（依赖未完成）: {step.name}")
+                    changed = True
+
+    def _execute(self, step: StartupStep):
+        step.status = StepStatus.RUNNING
+        step.thread_name = threading.current_thread().name
+        step.started_at = time.perf_counter()
+        try:
+            step.func()
+            step.status = StepStatus.DONE
+        except Exception as e:
+            step.status = StepStatus.FAILED
+            step.error = e
+            logger.error(f"启动步骤失败: {step.name} - {e}")
+        finally:
+            step.finished_at = time.perf_counter()
+        logger.debug(f"启动步骤 {step.name}: {step.duration * 1000:.1f}ms ({step.thread_name})")
+
+    @staticmethod
+    def _raise_if_critical(step: StartupStep):
+        if step.status is StepStatus.FAILED and step.critical:
+            raise step.error
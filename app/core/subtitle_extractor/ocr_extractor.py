@@ -12,6 +12,7 @@ import time
 from typing import List, Optional, Tuple, Dict, Any
 from pathlib import Path
 
+from ..decoder_pool import get_decoder_pool
 from .subtitle_models import SubtitleSegment, SubtitleTrack, SubtitleExtractorResult
 
 
@@ -78,7 +79,7 @@ class OCRExtractor:
         
         try:
             # 打开视频文件
-            cap = cv2.VideoCapture(video_path)
+            cap = get_decoder_pool().acquire(video_path)
             if not cap.isOpened():
                 raise ValueError(f"无法打开视频文件: {video_path}")
             
@@ -258,7 +259,7 @@ class OCRExtractor:
             字幕区域坐标 (x, y, width, height)
         """
         try:
-            cap = cv2.VideoCapture(video_path)
+            cap = get_decoder_pool().acquire(video_path)
             if not cap.isOpened():
                 return None
             
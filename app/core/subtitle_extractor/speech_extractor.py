@@ -13,6 +13,7 @@ import subprocess
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 
+from ...utils.probe_cache import get_probe_cache
 from .subtitle_models import SubtitleSegment, SubtitleTrack, SubtitleExtractorResult
 
 
@@ -265,16 +266,7 @@ class SpeechExtractor:
         """
         try:
             # 获取视频时长
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                video_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            duration = float(result.stdout.strip())
+            duration = float(get_probe_cache().probe(video_path)['format']['duration'])
             
             # 根据模型大小估算处理时间
             time_factors = {
@@ -320,7 +312,7 @@ class AdvancedSpeechExtractor(SpeechExtractor):
         
         try:
             # 获取视频时长
-            duration = self._get_video_duration(video_path)
+            duration = float(get_probe_cache().probe(video_path)['format']['duration'])
             
             # 计算分块
             chunks = []
@@ -386,16 +378,8 @@ class AdvancedSpeechExtractor(SpeechExtractor):
     def _get_video_duration(self, video_path: str) -> float:
         """获取视频时长"""
         try:
-            cmd = [
-                'ffprobe',
-                '-v', 'quiet',
-                '-show_entries', 'format=duration',
-                '-of', 'default=noprint_wrappers=1:nokey=1',
-                video_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            return float(result.stdout.strip())
+            data = get_probe_cache().probe(video_path)
+            return float(data['format']['duration'])
         except:
             return 0.0
     
@@ -0,0 +1,504 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+任务依赖图调度器
+每个任务维护未完成依赖计数，依赖全部完成时才进入就绪堆，完成一个任务只需访问它的直接后继；
+失败和取消沿后继传播，就绪任务按关键路径长度（自身及后续链路的估计耗时之和）优先执行，
+使 探测 → 代理 → 分析 → 渲染 → 打包 这样的长链尽早完成
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class TaskGraphError(Exception):
+    """任务图结构错误（重复任务、循环依赖）"""
+    pass
+
+
+class NodeState(Enum):
+    """任务节点状态"""
+    WAITING = "waiting"       # 等待依赖完成
+    READY = "ready"           # 可执行
+    DELAYED = "delayed"       # 重试等待中
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"   # 被取消或上游失败
+
+
+TERMINAL_STATES = (NodeState.COMPLETED, NodeState.FAILED, NodeState.CANCELLED)
+
+
+@dataclass
+class TaskNode:
+    """任务节点"""
+    task_id: str
+    payload: Any = None
+    cost: float = 1.0
+    priority: int = 0
+    dependencies: List[str] = field(default_factory=list)
+    dependents: List[str] = field(default_factory=list)
+    indegree: int = 0                 # 未完成的依赖数
+    rank: float = 0.0                 # 关键路径长度：cost + 后继 rank 的最大值
+    state: NodeState = NodeState.WAITING
+    error: Optional[str] = None
+    placeholder: bool = False         # 被依赖但尚未提交的任务
+    cancel_requested: bool = False    # 运行中被取消，结束后不再调度后继
+    not_before: float = 0.0
+    seq: int = 0
+    version: int = 0
+
+    @property
+    def finished(self) -> bool:
+        return self.state in TERMINAL_STATES
+
+
+class TaskGraph:
+    """线程安全的 DAG 调度器
+
+    add_many() 提交一批任务（依赖可以指向已完成的任务、同批任务或尚未提交的任务），
+    不会再有后续提交时用 cancel_unresolved() 取消仍依赖未提交任务的任务。
+    工作线程用 pop_ready() 取出任务，执行后调用 complete() / fail() / retry()。
+    on_finished(node) 在任务进入终态时调用（包括因上游失败被连带取消的任务），调用时不持有锁。
+    """
+
+    def __init__(self, on_finished: Optional[Callable[[TaskNode], None]] = None):
+        self.on_finished = on_finished
+        self._nodes: Dict[str, TaskNode] = {}
+        self._ready: List[Tuple] = []
+        self._delayed: List[Tuple[float, int, str]] = []
+        self._seq = itertools.count()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._unfinished = 0
+
+        self.stats = {
+            'submitted': 0,
+            'completed': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'retried': 0,
+            'dispatched': 0
+        }
+
+    # 提交
+    def add(self, task_id: str, payload: Any = None, dependencies: Sequence[str] = (),
+            cost: float = 1.0, priority: int = 0) -> TaskNode:
+        """提交单个任务"""
+        return self.add_many([(task_id, payload, dependencies, cost, priority)])[0]
+
+    def add_many(self, specs: Iterable[Tuple[str, Any, Sequence[str], float, int]]) -> List[TaskNode]:
+        """提交一批任务 (task_id, payload, dependencies, cost, priority)
+
+        整批插入后按逆拓扑序一次计算关键路径，开销为 O(任务数 + 依赖数)
+        """
+        specs = [tuple(spec) for spec in specs]
+        cancelled: List[TaskNode] = []
+        with self._condition:
+            if self._closed:
+                raise TaskGraphError("任务图已关闭")
+            self._validate(specs)
+            nodes = [self._insert(*spec) for spec in specs]
+            self._update_ranks(nodes)
+
+            for node in nodes:
+                self.stats['submitted'] += 1
+                if node.state == NodeState.CANCELLED:
+                    # 提交前已随上游一起取消
+                    self.stats['cancelled'] += 1
+                    cancelled.append(node)
+                    continue
+                self._unfinished += 1
+                upstream = self._failed_dependency(node)
+                if upstream is not None:
+                    cancelled.extend(self._cancel_subtree(node, f"依赖任务失败或已取消: {upstream}"))
+                elif node.indegree == 0:
+                    self._push_ready(node)
+            self._condition.notify_all()
+
+        self._notify_finished(cancelled)
+        return nodes
+
+    # 调度
+    ADMISSION_SCAN_LIMIT = 32
+
+    def pop_ready(self, timeout: Optional[float] = None,
+                  admit: Optional[Callable[[TaskNode], bool]] = None) -> Optional[TaskNode]:
+        """取出优先级最高的就绪任务并标记为运行中，超时或关闭时返回 None
+
+        给出 admit 时按优先级顺序检查前 ADMISSION_SCAN_LIMIT 个就绪任务，取第一个被接受的；
+        都不被接受则等待，直到有新任务就绪或调用方 wake()（例如资源释放）
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                if self._closed:
+                    return None
+                self._release_delayed()
+                node = self._pop_valid() if admit is None else self._pop_admitted(admit)
+                if node is not None:
+                    node.state = NodeState.RUNNING
+                    self.stats['dispatched'] += 1
+                    return node
+
+                wait = None if deadline is None else deadline - time.monotonic()
+                if self._delayed:
+                    until_due = self._delayed[0][0] - time.monotonic()
+                    wait = until_due if wait is None else min(wait, until_due)
+                if wait is not None and wait <= 0:
+                    if deadline is not None and time.monotonic() >= deadline:
+                        return None
+                    continue
+                self._condition.wait(wait)
+
+    def release(self, task_id: str):
+        """把运行中的任务放回就绪堆（未执行，例如资源不足时）"""
+        with self._condition:
+            node = self._nodes.get(task_id)
+            if node is None or node.state != NodeState.RUNNING:
+                return
+            self.stats['dispatched'] -= 1
+            self._push_ready(node)
+            self._condition.notify()
+
+    def wake(self):
+        """唤醒等待中的 pop_ready()，重新检查就绪任务能否被接受"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def complete(self, task_id: str) -> List[TaskNode]:
+        """标记任务完成，返回因此就绪的后继任务"""
+        ready = []
+        cancelled: List[TaskNode] = []
+        with self._condition:
+            node = self._nodes.get(task_id)
+            if node is None or node.finished:
+                return ready
+            self._finish(node, NodeState.COMPLETED)
+            for dependent_id in node.dependents:
+                dependent = self._nodes[dependent_id]
+                dependent.indegree -= 1
+                if node.cancel_requested:
+                    # 运行中被取消：结果保留，但后继不再执行
+                    cancelled.extend(self._cancel_subtree(dependent, f"上游任务已取消: {task_id}"))
+                elif dependent.indegree == 0 and dependent.state == NodeState.WAITING:
+                    self._push_ready(dependent)
+                    ready.append(dependent)
+            self._condition.notify_all()
+
+        self._notify_finished([node] + cancelled)
+        return ready
+
+    def fail(self, task_id: str, error: Optional[str] = None) -> List[TaskNode]:
+        """标记任务失败，所有下游任务连带取消，返回被取消的任务"""
+        with self._condition:
+            node = self._nodes.get(task_id)
+            if node is None or node.finished:
+                return []
+            node.error = error
+            self._finish(node, NodeState.FAILED)
+            cancelled = []
+            for dependent_id in node.dependents:
+                cancelled.extend(self._cancel_subtree(self._nodes[dependent_id], f"依赖任务失败: {task_id}"))
+            self._condition.notify_all()
+
+        self._notify_finished([node] + cancelled)
+        return cancelled
+
+    def retry(self, task_id: str, delay: float = 0.0):
+        """运行失败的任务在 delay 秒后重新就绪"""
+        with self._condition:
+            node = self._nodes.get(task_id)
+            if node is None or node.state != NodeState.RUNNING:
+                return
+            if not node.cancel_requested:
+                self.stats['retried'] += 1
+                if delay > 0:
+                    node.state = NodeState.DELAYED
+                    node.not_before = time.monotonic() + delay
+                    heapq.heappush(self._delayed, (node.not_before, next(self._seq), task_id))
+                else:
+                    self._push_ready(node)
+                self._condition.notify_all()
+                return
+
+            # 运行中被取消的任务不再重试
+            node.error = "任务已取消"
+            self._finish(node, NodeState.CANCELLED)
+            self._condition.notify_all()
+
+        self._notify_finished([node])
+
+    def cancel(self, task_id: str, reason: str = "任务已取消") -> List[TaskNode]:
+        """取消任务及其全部下游任务，运行中的任务执行结束后再处理，返回被取消的任务"""
+        with self._condition:
+            node = self._nodes.get(task_id)
+            if node is None or node.finished:
+                return []
+            if node.state == NodeState.RUNNING:
+                node.cancel_requested = True
+                cancelled = []
+                for dependent_id in node.dependents:
+                    cancelled.extend(self._cancel_subtree(self._nodes[dependent_id], f"上游任务已取消: {task_id}"))
+            else:
+                cancelled = self._cancel_subtree(node, reason)
+            self._condition.notify_all()
+
+        self._notify_finished(cancelled)
+        return cancelled
+
+    def cancel_unresolved(self, task_ids: Iterable[str]) -> List[TaskNode]:
+        """取消依赖了尚未提交任务（例如拼错的任务ID）的指定任务及其全部下游任务，返回被取消的任务
+
+        一批任务提交完毕、依赖不会再被补交时调用，否则这些任务会一直等待
+        """
+        cancelled: List[TaskNode] = []
+        with self._condition:
+            for task_id in task_ids:
+                node = self._nodes.get(task_id)
+                if node is None or node.finished or node.placeholder:
+                    continue
+                missing = [d for d in node.dependencies
+                           if self._nodes[d].placeholder and not self._nodes[d].finished]
+                if missing:
+                    logger.warning(f"任务依赖未提交的任务: {task_id} -> {', '.join(missing)}")
+                    cancelled.extend(self._cancel_subtree(node, f"依赖任务未提交: {', '.join(missing)}"))
+            if cancelled:
+                self._condition.notify_all()
+
+        self._notify_finished(cancelled)
+        return cancelled
+
+    # 查询
+    def get(self, task_id: str) -> Optional[TaskNode]:
+        with self._condition:
+            return self._nodes.get(task_id)
+
+    def state(self, task_id: str) -> Optional[NodeState]:
+        with self._condition:
+            node = self._nodes.get(task_id)
+            return node.state if node is not None else None
+
+    def pending_count(self) -> int:
+        """尚未进入终态的任务数"""
+        with self._condition:
+            return self._unfinished
+
+    def ready_count(self) -> int:
+        with self._condition:
+            return sum(1 for node in self._nodes.values() if node.state == NodeState.READY)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已提交任务进入终态"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._unfinished == 0 or self._closed, timeout)
+
+    def close(self):
+        """关闭调度器，唤醒所有等待的工作线程"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._condition:
+            stats = dict(self.stats)
+            stats['pending'] = self._unfinished
+            stats['nodes'] = len(self._nodes)
+            stats['unresolved'] = sum(1 for node in self._nodes.values() if node.placeholder and not node.finished)
+        return stats
+
+    # 内部实现（调用方持有锁）
+    def _validate(self, specs: List[Tuple]):
+        """插入前检查重复任务和循环依赖，出错时任务图保持不变"""
+        batch: Dict[str, Sequence[str]] = {}
+        for task_id, _, dependencies, *_ in specs:
+            existing = self._nodes.get(task_id)
+            if task_id in batch or (existing is not None and not existing.placeholder):
+                raise TaskGraphError(f"任务已存在: {task_id}")
+            if task_id in dependencies:
+                raise TaskGraphError(f"任务不能依赖自身: {task_id}")
+            batch[task_id] = dependencies
+
+        # 同批任务之间的环：拓扑排序无法处理完所有任务
+        pending = {task_id: sum(1 for d in set(deps) if d in batch) for task_id, deps in batch.items()}
+        dependents: Dict[str, List[str]] = {}
+        for task_id, deps in batch.items():
+            for dependency_id in set(deps):
+                if dependency_id in batch:
+                    dependents.setdefault(dependency_id, []).append(task_id)
+        queue = deque(task_id for task_id, count in pending.items() if count == 0)
+        visited = 0
+        while queue:
+            task_id = queue.popleft()
+            visited += 1
+            for dependent_id in dependents.get(task_id, ()):
+                pending[dependent_id] -= 1
+                if pending[dependent_id] == 0:
+                    queue.append(dependent_id)
+        if visited != len(batch):
+            raise TaskGraphError("检测到循环依赖")
+
+        # 经过已有任务的环：只可能闭合在此前被依赖、现在才提交的任务上
+        for task_id in batch:
+            existing = self._nodes.get(task_id)
+            if existing is None or not existing.dependents:
+                continue
+            stack = list(batch[task_id])
+            seen = set()
+            while stack:
+                current = stack.pop()
+                if current == task_id:
+                    raise TaskGraphError(f"检测到循环依赖: {task_id}")
+                if current in seen:
+                    continue
+                seen.add(current)
+                if current in batch:
+                    stack.extend(batch[current])
+                else:
+                    upstream = self._nodes.get(current)
+                    if upstream is not None and not upstream.finished:
+                        stack.extend(upstream.dependencies)
+
+    def _insert(self, task_id: str, payload: Any, dependencies: Sequence[str], cost: float = 1.0,
+                priority: int = 0) -> TaskNode:
+        node = self._nodes.get(task_id)
+        if node is None:
+            node = TaskNode(task_id)
+            self._nodes[task_id] = node
+
+        node.payload = payload
+        node.cost = max(float(cost), 0.0)
+        node.priority = priority
+        node.placeholder = False
+        node.seq = next(self._seq)
+        node.dependencies = list(dict.fromkeys(dependencies))
+
+        for dependency_id in node.dependencies:
+            dependency = self._nodes.get(dependency_id)
+            if dependency is None:
+                dependency = TaskNode(dependency_id, placeholder=True, seq=next(self._seq))
+                self._nodes[dependency_id] = dependency
+            dependency.dependents.append(task_id)
+            if dependency.state != NodeState.COMPLETED:
+                node.indegree += 1
+        return node
+
+    def _update_ranks(self, nodes: List[TaskNode]):
+        """按逆拓扑序计算新节点的关键路径长度，再把增量向已有的上游传播"""
+        batch = {node.task_id: node for node in nodes}
+        pending = {node.task_id: sum(1 for d in node.dependents if d in batch) for node in nodes}
+        queue = deque(node for node in nodes if pending[node.task_id] == 0)
+        while queue:
+            node = queue.popleft()
+            node.rank = node.cost + max((self._nodes[d].rank for d in node.dependents), default=0.0)
+            for dependency_id in node.dependencies:
+                if dependency_id in batch:
+                    pending[dependency_id] -= 1
+                    if pending[dependency_id] == 0:
+                        queue.append(batch[dependency_id])
+
+        # 已有上游的关键路径可能因新后继而变长
+        stack = [(dependency_id, node.rank) for node in nodes
+                 for dependency_id in node.dependencies if dependency_id not in batch]
+        while stack:
+            task_id, downstream_rank = stack.pop()
+            upstream = self._nodes[task_id]
+            rank = upstream.cost + downstream_rank
+            if upstream.finished or rank <= upstream.rank:
+                continue
+            upstream.rank = rank
+            if upstream.state == NodeState.READY:
+                self._push_ready(upstream)
+            stack.extend((dependency_id, rank) for dependency_id in upstream.dependencies)
+
+    def _failed_dependency(self, node: TaskNode) -> Optional[str]:
+        for dependency_id in node.dependencies:
+            if self._nodes[dependency_id].state in (NodeState.FAILED, NodeState.CANCELLED):
+                return dependency_id
+        return None
+
+    def _push_ready(self, node: TaskNode):
+        node.state = NodeState.READY
+        node.version += 1
+        heapq.heappush(self._ready, (-node.priority, -node.rank, node.seq, node.version, node.task_id))
+
+    def _pop_valid(self) -> Optional[TaskNode]:
+        while self._ready:
+            _, _, _, version, task_id = heapq.heappop(self._ready)
+            node = self._nodes[task_id]
+            if node.state == NodeState.READY and node.version == version:
+                return node
+        return None
+
+    def _pop_admitted(self, admit: Callable[[TaskNode], bool]) -> Optional[TaskNode]:
+        skipped = []
+        admitted = None
+        try:
+            while self._ready and len(skipped) < self.ADMISSION_SCAN_LIMIT:
+                entry = heapq.heappop(self._ready)
+                node = self._nodes[entry[4]]
+                if node.state != NodeState.READY or node.version != entry[3]:
+                    continue
+                # 先记入跳过列表，admit() 抛出异常时该任务也会放回就绪堆
+                skipped.append(entry)
+                if admit(node):
+                    skipped.pop()
+                    admitted = node
+                    break
+        finally:
+            for entry in skipped:
+                heapq.heappush(self._ready, entry)
+        return admitted
+
+    def _release_delayed(self):
+        now = time.monotonic()
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, task_id = heapq.heappop(self._delayed)
+            node = self._nodes[task_id]
+            if node.state == NodeState.DELAYED:
+                self._push_ready(node)
+
+    def _finish(self, node: TaskNode, state: NodeState):
+        node.state = state
+        self._unfinished -= 1
+        self.stats[state.value] += 1
+
+    def _cancel_subtree(self, root: TaskNode, reason: str) -> List[TaskNode]:
+        cancelled = []
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            if node.finished:
+                continue
+            if node.state == NodeState.RUNNING:
+                node.cancel_requested = True
+            elif node.placeholder:
+                # 尚未提交的任务：提交时会发现上游已取消
+                node.state = NodeState.CANCELLED
+                node.error = reason
+            else:
+                node.error = reason
+                self._finish(node, NodeState.CANCELLED)
+                cancelled.append(node)
+            stack.extend(self._nodes[dependent_id] for dependent_id in node.dependents)
+        return cancelled
+
+    def _notify_finished(self, nodes: List[TaskNode]):
+        if not self.on_finished:
+            return
+        for node in nodes:
+            try:
+                self.on_finished(node)
+            except Exception as e:
+                logger.error(f"任务结束回调失败: {node.task_id} - {e}")
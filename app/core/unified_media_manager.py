@@ -23,12 +23,31 @@ import sqlite3
 import shutil
 
 from ..utils.thumbnail_generator import ThumbnailGenerator
+from ..utils.file_fingerprint import get_fingerprint_service
 from ..core.video_processing_engine import VideoInfo, VideoProcessingEngine
 from .intelligent_video_processing_engine import AISceneAnalysis, AIEditDecision
+from .media_database import MediaDatabase
+from .media_search_index import (
+    fts5_available, register_search_functions, create_search_index, rebuild_search_index,
+    build_match_query, SEARCH_RANK_WEIGHTS
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _json_default(value: Any) -> Any:
+    """JSON序列化时处理日期和枚举"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"无法序列化类型: {type(value).__name__}")
+
+
+def _to_json(value: Any) -> str:
+    return json.dumps(value, default=_json_default)
+
+
 class MediaType(Enum):
     """媒体类型"""
     VIDEO = "video"
@@ -192,8 +211,13 @@ class UnifiedMediaManager:
         self.thumbnail_generator = ThumbnailGenerator(os.path.join(self.cache_dir, "thumbnails"))
         self.video_engine = VideoProcessingEngine()
 
+        # 数据库访问层（WAL模式，读并发，写入合并为批量事务）
+        self.db = MediaDatabase(self.db_path)
+        self.fts_enabled = fts5_available()
+        if self.fts_enabled:
+            self.db.add_connection_hook(register_search_functions)
+
         # 线程锁
-        self.db_lock = threading.Lock()
         self.scan_lock = threading.Lock()
 
         # 回调函数
@@ -208,71 +232,89 @@ class UnifiedMediaManager:
 
     def _init_database(self):
         """初始化数据库"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+        self.db.submit_write(self._create_schema)
+
+    def _create_schema(self, cursor: sqlite3.Cursor):
+        """创建数据表和索引"""
+        # 创建媒体项表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS media_items (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                path TEXT UNIQUE NOT NULL,
+                type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                storage_location TEXT NOT NULL,
+                thumbnail_path TEXT,
+                preview_path TEXT,
+                metadata TEXT,
+                scene_analysis TEXT,
+                edit_decisions TEXT,
+                ai_tags TEXT,
+                collection_id TEXT,
+                folder_id TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                accessed_at TEXT
+            )
+        ''')
+
+        # 创建媒体集合表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS media_collections (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                description TEXT,
+                parent_id TEXT,
+                items TEXT,
+                tags TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+
+        # 创建媒体文件夹表
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS media_folders (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                path TEXT UNIQUE NOT NULL,
+                parent_id TEXT,
+                storage_location TEXT NOT NULL,
+                auto_scan INTEGER DEFAULT 1,
+                items TEXT,
+                subfolders TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+
+        # 创建文件状态表（用于增量扫描的快速路径）
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS media_file_stats (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                item_id TEXT NOT NULL
+            )
+        ''')
 
-            # 创建媒体项表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS media_items (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    path TEXT UNIQUE NOT NULL,
-                    type TEXT NOT NULL,
-                    status TEXT NOT NULL,
-                    storage_location TEXT NOT NULL,
-                    thumbnail_path TEXT,
-                    preview_path TEXT,
-                    metadata TEXT,
-                    scene_analysis TEXT,
-                    edit_decisions TEXT,
-                    ai_tags TEXT,
-                    collection_id TEXT,
-                    folder_id TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    accessed_at TEXT
-                )
-            ''')
+        # 创建索引
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_type ON media_items(type)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_status ON media_items(status)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_collection ON media_items(collection_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_folder ON media_items(folder_id)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_created ON media_items(created_at)')
 
-            # 创建媒体集合表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS media_collections (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    description TEXT,
-                    parent_id TEXT,
-                    items TEXT,
-                    tags TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-            ''')
+        # 分面筛选索引（筛选后按创建时间排序）
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_type_created ON media_items(type, created_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_collection_created '
+                       'ON media_items(collection_id, created_at)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_folder_created ON media_items(folder_id, created_at)')
 
-            # 创建媒体文件夹表
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS media_folders (
-                    id TEXT PRIMARY KEY,
-                    name TEXT NOT NULL,
-                    path TEXT UNIQUE NOT NULL,
-                    parent_id TEXT,
-                    storage_location TEXT NOT NULL,
-                    auto_scan INTEGER DEFAULT 1,
-                    items TEXT,
-                    subfolders TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-            ''')
-
-            # 创建索引
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_type ON media_items(type)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_status ON media_items(status)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_collection ON media_items(collection_id)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_media_items_folder ON media_items(folder_id)')
-
-            conn.commit()
-            conn.close()
+        # 全文检索索引
+        if self.fts_enabled:
+            create_search_index(cursor)
 
     def import_media_file(self, file_path: str, copy_to_library: bool = False) -> Optional[MediaItem]:
         """导入媒体文件"""
@@ -319,8 +361,8 @@ class UnifiedMediaManager:
                 metadata=metadata
             )
 
-            # 保存到数据库
-            self._save_media_item(media_item)
+            # 保存到数据库（同时记录文件状态，之后的批量导入可跳过未变化的文件）
+            self._save_media_item(media_item, os.stat(file_path))
 
             # 调用回调
             if self.media_added_callback:
@@ -333,14 +375,25 @@ class UnifiedMediaManager:
             logger.error(f"导入媒体文件失败: {file_path}, 错误: {e}")
             return None
 
-    def import_media_batch(self, file_paths: List[str], copy_to_library: bool = False) -> List[MediaItem]:
+    def import_media_batch(self, file_paths: List[str], copy_to_library: bool = False,
+                           progress_callback: Optional[Callable] = None) -> List[MediaItem]:
         """批量导入媒体文件"""
-        imported_items = []
+        if copy_to_library:
+            # 复制到媒体库会改变文件路径，逐个导入
+            imported_items = []
+            for file_path in file_paths:
+                media_item = self.import_media_file(file_path, copy_to_library)
+                if media_item:
+                    imported_items.append(media_item)
+
+            logger.info(f"批量导入完成: {len(imported_items)}/{len(file_paths)} 个文件")
+            return imported_items
 
-        for file_path in file_paths:
-            media_item = self.import_media_file(file_path, copy_to_library)
-            if media_item:
-                imported_items.append(media_item)
+        from .media_import_pipeline import MediaImportPipeline
+
+        pipeline = MediaImportPipeline(self, progress_callback=progress_callback)
+        result = pipeline.import_files(file_paths)
+        imported_items = result.imported + self.get_media_items_by_paths(result.unchanged)
 
         logger.info(f"批量导入完成: {len(imported_items)}/{len(file_paths)} 个文件")
         return imported_items
@@ -348,18 +401,10 @@ class UnifiedMediaManager:
     def get_media_item(self, item_id: str) -> Optional[MediaItem]:
         """获取媒体项"""
         try:
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
-                cursor.execute('SELECT * FROM media_items WHERE id = ?', (item_id,))
-                row = cursor.fetchone()
-
-                conn.close()
-
-                if row:
-                    return self._row_to_media_item(row)
-                return None
+            row = self.db.fetchone('SELECT * FROM media_items WHERE id = ?', (item_id,))
+            if row:
+                return self._row_to_media_item(row)
+            return None
 
         except Exception as e:
             logger.error(f"获取媒体项失败: {item_id}, 错误: {e}")
@@ -370,18 +415,10 @@ class UnifiedMediaManager:
         try:
             file_path = os.path.abspath(file_path)
 
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
-                cursor.execute('SELECT * FROM media_items WHERE path = ?', (file_path,))
-                row = cursor.fetchone()
-
-                conn.close()
-
-                if row:
-                    return self._row_to_media_item(row)
-                return None
+            row = self.db.fetchone('SELECT * FROM media_items WHERE path = ?', (file_path,))
+            if row:
+                return self._row_to_media_item(row)
+            return None
 
         except Exception as e:
             logger.error(f"根据路径获取媒体项失败: {file_path}, 错误: {e}")
@@ -392,50 +429,93 @@ class UnifiedMediaManager:
                         folder_id: Optional[str] = None, limit: int = 100) -> List[MediaItem]:
         """搜索媒体项"""
         try:
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
-                # 构建查询条件
-                conditions = []
-                params = []
-
+            # 分面筛选条件
+            conditions, params = self._facet_conditions(media_type, collection_id, folder_id)
+
+            if self.fts_enabled:
+                match_query = build_match_query(query, tags)
+                if match_query:
+                    # 全文检索，按bm25相关度排序
+                    conditions.insert(0, "media_search MATCH ?")
+                    params.insert(0, match_query)
+                    weights = ", ".join(str(w) for w in SEARCH_RANK_WEIGHTS)
+                    sql = (f"SELECT m.* FROM media_search JOIN media_items AS m ON m.rowid = media_search.rowid "
+                           f"WHERE {' AND '.join(conditions)} "
+                           f"ORDER BY bm25(media_search, {weights}), m.created_at DESC LIMIT ?")
+                    params.append(limit)
+                    return [self._row_to_media_item(row) for row in self.db.fetchall(sql, params)]
+            else:
                 if query:
-                    conditions.append("(name LIKE ? OR path LIKE ? OR ai_tags LIKE ?)")
+                    conditions.append("(m.name LIKE ? OR m.path LIKE ? OR m.ai_tags LIKE ?)")
                     params.extend([f"%{query}%", f"%{query}%", f"%{query}%"])
 
-                if media_type:
-                    conditions.append("type = ?")
-                    params.append(media_type.value)
-
                 if tags:
                     for tag in tags:
-                        conditions.append("ai_tags LIKE ?")
+                        conditions.append("m.ai_tags LIKE ?")
                         params.append(f"%{tag}%")
 
-                if collection_id:
-                    conditions.append("collection_id = ?")
-                    params.append(collection_id)
+            where_clause = " AND ".join(conditions) if conditions else "1=1"
+
+            sql = f"SELECT m.* FROM media_items AS m WHERE {where_clause} ORDER BY m.created_at DESC LIMIT ?"
+            params.append(limit)
 
-                if folder_id:
-                    conditions.append("folder_id = ?")
-                    params.append(folder_id)
+            rows = self.db.fetchall(sql, params)
+            return [self._row_to_media_item(row) for row in rows]
 
-                where_clause = " AND ".join(conditions) if conditions else "1=1"
+        except Exception as e:
+            logger.error(f"搜索媒体项失败: {e}")
+            return []
 
-                sql = f"SELECT * FROM media_items WHERE {where_clause} ORDER BY created_at DESC LIMIT ?"
-                params.append(limit)
+    def get_search_facets(self, query: str = "", tags: List[str] = None) -> Dict[str, Dict[str, int]]:
+        """获取搜索结果按类型、集合和文件夹的分面计数"""
+        facets = {'type': {}, 'collection_id': {}, 'folder_id': {}}
 
-                cursor.execute(sql, params)
-                rows = cursor.fetchall()
+        try:
+            match_query = build_match_query(query, tags) if self.fts_enabled else ""
+            for column in facets:
+                if match_query:
+                    rows = self.db.fetchall(
+                        f"SELECT m.{column}, COUNT(*) FROM media_search "
+                        f"JOIN media_items AS m ON m.rowid = media_search.rowid "
+                        f"WHERE media_search MATCH ? GROUP BY m.{column}", (match_query,))
+                else:
+                    rows = self.db.fetchall(f"SELECT {column}, COUNT(*) FROM media_items GROUP BY {column}")
+                facets[column] = {value: count for value, count in rows if value is not None}
 
-                conn.close()
+        except Exception as e:
+            logger.error(f"获取搜索分面失败: {e}")
 
-                return [self._row_to_media_item(row) for row in rows]
+        return facets
 
+    def rebuild_search_index(self) -> int:
+        """重建全文索引（其他工具直接修改过media_items内容后调用），返回索引的记录数"""
+        if not self.fts_enabled:
+            return 0
+        try:
+            return self.db.submit_write(rebuild_search_index)
         except Exception as e:
-            logger.error(f"搜索媒体项失败: {e}")
-            return []
+            logger.error(f"重建全文索引失败: {e}")
+            return 0
+
+    def _facet_conditions(self, media_type: Optional[MediaType], collection_id: Optional[str],
+                          folder_id: Optional[str]) -> Tuple[List[str], List[Any]]:
+        """构建分面筛选条件"""
+        conditions = []
+        params = []
+
+        if media_type:
+            conditions.append("m.type = ?")
+            params.append(media_type.value)
+
+        if collection_id:
+            conditions.append("m.collection_id = ?")
+            params.append(collection_id)
+
+        if folder_id:
+            conditions.append("m.folder_id = ?")
+            params.append(folder_id)
+
+        return conditions, params
 
     def get_all_media_items(self, media_type: Optional[MediaType] = None) -> List[MediaItem]:
         """获取所有媒体项"""
@@ -446,11 +526,7 @@ class UnifiedMediaManager:
         try:
             media_item.updated_at = datetime.now()
 
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
-                cursor.execute('''
+            self.db.execute_write('''
                     UPDATE media_items SET
                         name = ?, path = ?, type = ?, status = ?, storage_location = ?,
                         thumbnail_path = ?, preview_path = ?, metadata = ?, scene_analysis = ?,
@@ -460,14 +536,11 @@ class UnifiedMediaManager:
                 ''', (
                     media_item.name, media_item.path, media_item.type.value, media_item.status.value,
                     media_item.storage_location.value, media_item.thumbnail_path, media_item.preview_path,
-                    json.dumps(media_item.metadata.__dict__), json.dumps([scene.__dict__ for scene in media_item.scene_analysis]),
-                    json.dumps([decision.__dict__ for decision in media_item.edit_decisions]), json.dumps(media_item.ai_tags),
+                    _to_json(media_item.metadata.__dict__), _to_json([scene.__dict__ for scene in media_item.scene_analysis]),
+                    _to_json([decision.__dict__ for decision in media_item.edit_decisions]), json.dumps(media_item.ai_tags),
                     media_item.collection_id, media_item.folder_id, media_item.updated_at.isoformat(), media_item.id
                 ))
 
-                conn.commit()
-                conn.close()
-
             # 调用回调
             if self.media_updated_callback:
                 self.media_updated_callback(media_item)
@@ -502,13 +575,11 @@ class UnifiedMediaManager:
                     logger.warning(f"删除缩略图失败: {media_item.thumbnail_path}, 错误: {e}")
 
             # 从数据库删除
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
+            def _delete(cursor: sqlite3.Cursor):
                 cursor.execute('DELETE FROM media_items WHERE id = ?', (item_id,))
-                conn.commit()
-                conn.close()
+                cursor.execute('DELETE FROM media_file_stats WHERE item_id = ?', (item_id,))
+
+            self.db.submit_write(_delete)
 
             # 调用回调
             if self.media_removed_callback:
@@ -534,11 +605,7 @@ class UnifiedMediaManager:
                 parent_id=parent_id
             )
 
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
-                cursor.execute('''
+            self.db.execute_write('''
                     INSERT INTO media_collections (id, name, description, parent_id, items, tags, created_at, updated_at)
                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 ''', (
@@ -547,9 +614,6 @@ class UnifiedMediaManager:
                     collection.created_at.isoformat(), collection.updated_at.isoformat()
                 ))
 
-                conn.commit()
-                conn.close()
-
             logger.info(f"媒体集合创建成功: {collection.id}")
             return collection
 
@@ -560,19 +624,13 @@ class UnifiedMediaManager:
     def get_collections(self, parent_id: Optional[str] = None) -> List[MediaCollection]:
         """获取媒体集合"""
         try:
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
-                if parent_id:
-                    cursor.execute('SELECT * FROM media_collections WHERE parent_id = ? ORDER BY name', (parent_id,))
-                else:
-                    cursor.execute('SELECT * FROM media_collections ORDER BY name')
-
-                rows = cursor.fetchall()
-                conn.close()
+            if parent_id:
+                rows = self.db.fetchall('SELECT * FROM media_collections WHERE parent_id = ? ORDER BY name',
+                                        (parent_id,))
+            else:
+                rows = self.db.fetchall('SELECT * FROM media_collections ORDER BY name')
 
-                return [self._row_to_collection(row) for row in rows]
+            return [self._row_to_collection(row) for row in rows]
 
         except Exception as e:
             logger.error(f"获取媒体集合失败: {e}")
@@ -608,7 +666,8 @@ class UnifiedMediaManager:
             return False
 
     def scan_directory(self, directory_path: str, recursive: bool = True,
-                      file_extensions: List[str] = None) -> List[MediaItem]:
+                      file_extensions: List[str] = None,
+                      progress_callback: Optional[Callable] = None) -> List[MediaItem]:
         """扫描目录导入媒体文件"""
         try:
             directory_path = os.path.abspath(directory_path)
@@ -617,79 +676,107 @@ class UnifiedMediaManager:
                 logger.error(f"目录不存在: {directory_path}")
                 return []
 
-            with self.scan_lock:
-                imported_items = []
-
-                # 支持的文件扩展名
-                if not file_extensions:
-                    file_extensions = [
-                        '.mp4', '.avi', '.mov', '.mkv', '.flv', '.wmv', '.webm',  # 视频
-                        '.mp3', '.wav', '.aac', '.flac', '.ogg', '.m4a',       # 音频
-                        '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif',     # 图片
-                        '.pdf', '.doc', '.docx', '.txt'                    # 文档
-                    ]
-
-                # 递归扫描
-                for root, dirs, files in os.walk(directory_path):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-
-                        # 检查文件扩展名
-                        if any(file.lower().endswith(ext) for ext in file_extensions):
-                            media_item = self.import_media_file(file_path)
-                            if media_item:
-                                imported_items.append(media_item)
+            from .media_import_pipeline import MediaImportPipeline
 
-                    # 如果不递归，只扫描当前目录
-                    if not recursive:
-                        break
+            with self.scan_lock:
+                pipeline = MediaImportPipeline(self, progress_callback=progress_callback)
+                result = pipeline.import_directory(directory_path, recursive, file_extensions)
+                imported_items = result.imported + self.get_media_items_by_paths(result.unchanged)
 
-                logger.info(f"目录扫描完成: {directory_path}, 导入 {len(imported_items)} 个文件")
+                logger.info(f"目录扫描完成: {directory_path}, 导入 {len(result.imported)} 个文件, "
+                            f"未变化 {len(result.unchanged)} 个文件")
                 return imported_items
 
         except Exception as e:
             logger.error(f"扫描目录失败: {directory_path}, 错误: {e}")
             return []
 
+    def get_media_items_by_paths(self, file_paths: List[str]) -> List[MediaItem]:
+        """根据路径批量获取媒体项"""
+        if not file_paths:
+            return []
+
+        try:
+            items = []
+
+            # SQLite 默认最多 999 个绑定参数
+            for start in range(0, len(file_paths), 500):
+                chunk = file_paths[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.db.fetchall(f'SELECT * FROM media_items WHERE path IN ({placeholders})', chunk)
+                items.extend(self._row_to_media_item(row) for row in rows)
+
+            return items
+
+        except Exception as e:
+            logger.error(f"批量获取媒体项失败: {e}")
+            return []
+
+    def get_file_stats_index(self) -> Dict[str, Tuple[int, float]]:
+        """获取已导入文件的 (size, mtime) 索引"""
+        try:
+            rows = self.db.fetchall('SELECT path, size, mtime FROM media_file_stats')
+            return {row[0]: (row[1], row[2]) for row in rows}
+
+        except Exception as e:
+            logger.error(f"获取文件状态索引失败: {e}")
+            return {}
+
+    def save_media_items_batch(self, media_items: List[MediaItem],
+                               file_stats: Optional[Dict[str, Tuple[int, float]]] = None):
+        """在一个事务中批量保存媒体项"""
+        file_stats = file_stats or {}
+        item_rows = [self._media_item_to_row(item) for item in media_items]
+        stats_rows = [
+            (item.path, file_stats[item.path][0], file_stats[item.path][1], item.id)
+            for item in media_items if item.path in file_stats
+        ]
+
+        def _write(cursor: sqlite3.Cursor):
+            cursor.executemany('''
+                INSERT OR REPLACE INTO media_items
+                (id, name, path, type, status, storage_location, thumbnail_path, preview_path,
+                 metadata, scene_analysis, edit_decisions, ai_tags, collection_id, folder_id,
+                 created_at, updated_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', item_rows)
+            cursor.executemany(
+                'INSERT OR REPLACE INTO media_file_stats (path, size, mtime, item_id) VALUES (?, ?, ?, ?)',
+                stats_rows
+            )
+
+        self.db.submit_write(_write)
+
     def get_storage_stats(self) -> Dict[str, Any]:
         """获取存储统计信息"""
         try:
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
-                # 总文件数
-                cursor.execute('SELECT COUNT(*) FROM media_items WHERE status = ?', (MediaStatus.AVAILABLE.value,))
-                total_files = cursor.fetchone()[0]
-
-                # 按类型统计
-                type_stats = {}
-                for media_type in MediaType:
-                    cursor.execute('SELECT COUNT(*) FROM media_items WHERE type = ? AND status = ?',
-                                 (media_type.value, MediaStatus.AVAILABLE.value))
-                    count = cursor.fetchone()[0]
-                    if count > 0:
-                        type_stats[media_type.value] = count
-
-                # 总大小
-                cursor.execute('SELECT SUM(metadata->>"$.size_bytes") FROM media_items WHERE status = ?',
-                             (MediaStatus.AVAILABLE.value,))
-                total_size = cursor.fetchone()[0] or 0
-
-                # 集合数量
-                cursor.execute('SELECT COUNT(*) FROM media_collections')
-                collection_count = cursor.fetchone()[0]
-
-                conn.close()
-
-                return {
-                    'total_files': total_files,
-                    'total_size_bytes': total_size,
-                    'total_size_gb': total_size / (1024**3),
-                    'by_type': type_stats,
-                    'collection_count': collection_count,
-                    'cache_size': self._get_cache_size()
-                }
+            available = MediaStatus.AVAILABLE.value
+
+            # 按类型统计（一次分组查询）
+            type_stats = {}
+            total_files = 0
+            for type_value, count in self.db.fetchall(
+                    'SELECT type, COUNT(*) FROM media_items WHERE status = ? GROUP BY type', (available,)):
+                type_stats[type_value] = count
+                total_files += count
+
+            # 总大小
+            row = self.db.fetchone(
+                "SELECT SUM(json_extract(metadata, '$.size_bytes')) FROM media_items WHERE status = ?",
+                (available,))
+            total_size = row[0] or 0
+
+            # 集合数量
+            collection_count = self.db.fetchone('SELECT COUNT(*) FROM media_collections')[0]
+
+            return {
+                'total_files': total_files,
+                'total_size_bytes': total_size,
+                'total_size_gb': total_size / (1024**3),
+                'by_type': type_stats,
+                'collection_count': collection_count,
+                'cache_size': self._get_cache_size()
+            }
 
         except Exception as e:
             logger.error(f"获取存储统计失败: {e}")
@@ -781,9 +868,15 @@ class UnifiedMediaManager:
             logger.error(f"生成缩略图失败: {file_path}, 错误: {e}")
             return None
 
+    def _generate_thumbnail_sync(self, file_path: str, media_type: MediaType) -> Optional[str]:
+        """在当前线程同步生成缩略图，供导入流水线的工作线程使用"""
+        if media_type == MediaType.VIDEO:
+            return self.thumbnail_generator.generate_thumbnail_sync(file_path)
+        return self._generate_thumbnail(file_path, media_type)
+
     def _extract_metadata(self, file_path: str, media_type: MediaType) -> MediaMetadata:
         """提取元数据"""
-        metadata = MediaMetadata()
+        metadata = self._probe_metadata(file_path, media_type)
 
         try:
             file_stat = os.stat(file_path)
@@ -795,6 +888,16 @@ class UnifiedMediaManager:
             # 计算文件哈希
             metadata.file_hash = self._calculate_file_hash(file_path)
 
+        except Exception as e:
+            logger.error(f"提取元数据失败: {file_path}, 错误: {e}")
+
+        return metadata
+
+    def _probe_metadata(self, file_path: str, media_type: MediaType) -> MediaMetadata:
+        """探测媒体流元数据（不包含文件状态和哈希）"""
+        metadata = MediaMetadata()
+
+        try:
             # 根据媒体类型提取特定元数据
             if media_type == MediaType.VIDEO:
                 video_info = self.video_engine.get_video_info(file_path)
@@ -845,17 +948,22 @@ class UnifiedMediaManager:
         return metadata
 
     def _calculate_file_hash(self, file_path: str) -> str:
-        """计算文件哈希"""
+        """计算文件指纹（采样哈希，用于身份识别和去重）"""
         try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, "rb") as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            return get_fingerprint_service().fingerprint(file_path)
         except Exception as e:
             logger.error(f"计算文件哈希失败: {file_path}, 错误: {e}")
             return ""
 
+    def request_full_file_hash(self, item_id: str, callback: Optional[Callable] = None):
+        """在后台计算媒体文件的完整哈希"""
+        media_item = self.get_media_item(item_id)
+        if not media_item:
+            logger.warning(f"媒体项不存在: {item_id}")
+            return None
+
+        return get_fingerprint_service().request_full_hash(media_item.path, callback=callback)
+
     def _get_library_path(self, file_path: str, media_type: MediaType) -> Optional[str]:
         """获取媒体库路径"""
         try:
@@ -878,64 +986,56 @@ class UnifiedMediaManager:
             logger.error(f"获取媒体库路径失败: {e}")
             return None
 
-    def _save_media_item(self, media_item: MediaItem):
-        """保存媒体项到数据库"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
+    def _save_media_item(self, media_item: MediaItem, file_stat: Optional[os.stat_result] = None):
+        """保存媒体项到数据库，提供文件状态时在同一事务中写入文件状态记录"""
+        row = self._media_item_to_row(media_item)
 
+        def _write(cursor: sqlite3.Cursor):
             cursor.execute('''
                 INSERT OR REPLACE INTO media_items
                 (id, name, path, type, status, storage_location, thumbnail_path, preview_path,
                  metadata, scene_analysis, edit_decisions, ai_tags, collection_id, folder_id,
                  created_at, updated_at, accessed_at)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                media_item.id, media_item.name, media_item.path, media_item.type.value, media_item.status.value,
-                media_item.storage_location.value, media_item.thumbnail_path, media_item.preview_path,
-                json.dumps(media_item.metadata.__dict__), json.dumps([scene.__dict__ for scene in media_item.scene_analysis]),
-                json.dumps([decision.__dict__ for decision in media_item.edit_decisions]), json.dumps(media_item.ai_tags),
-                media_item.collection_id, media_item.folder_id, media_item.created_at.isoformat(),
-                media_item.updated_at.isoformat(), media_item.accessed_at.isoformat() if media_item.accessed_at else None
-            ))
-
-            conn.commit()
-            conn.close()
+            ''', row)
+            if file_stat is not None:
+                cursor.execute(
+                    'INSERT OR REPLACE INTO media_file_stats (path, size, mtime, item_id) VALUES (?, ?, ?, ?)',
+                    (media_item.path, file_stat.st_size, file_stat.st_mtime, media_item.id)
+                )
+
+        self.db.submit_write(_write)
+
+    def _media_item_to_row(self, media_item: MediaItem) -> Tuple:
+        """将媒体项转换为数据库行"""
+        return (
+            media_item.id, media_item.name, media_item.path, media_item.type.value, media_item.status.value,
+            media_item.storage_location.value, media_item.thumbnail_path, media_item.preview_path,
+            _to_json(media_item.metadata.__dict__), _to_json([scene.__dict__ for scene in media_item.scene_analysis]),
+            _to_json([decision.__dict__ for decision in media_item.edit_decisions]), json.dumps(media_item.ai_tags),
+            media_item.collection_id, media_item.folder_id, media_item.created_at.isoformat(),
+            media_item.updated_at.isoformat(), media_item.accessed_at.isoformat() if media_item.accessed_at else None
+        )
 
     def _save_collection(self, collection: MediaCollection):
         """保存集合到数据库"""
-        with self.db_lock:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-
-            cursor.execute('''
-                UPDATE media_collections SET
-                    name = ?, description = ?, parent_id = ?, items = ?, tags = ?, updated_at = ?
-                WHERE id = ?
-            ''', (
-                collection.name, collection.description, collection.parent_id,
-                json.dumps(collection.items), json.dumps(collection.tags),
-                collection.updated_at.isoformat(), collection.id
-            ))
-
-            conn.commit()
-            conn.close()
+        self.db.execute_write('''
+            UPDATE media_collections SET
+                name = ?, description = ?, parent_id = ?, items = ?, tags = ?, updated_at = ?
+            WHERE id = ?
+        ''', (
+            collection.name, collection.description, collection.parent_id,
+            json.dumps(collection.items), json.dumps(collection.tags),
+            collection.updated_at.isoformat(), collection.id
+        ))
 
     def _get_collection(self, collection_id: str) -> Optional[MediaCollection]:
         """获取集合"""
         try:
-            with self.db_lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
-                cursor.execute('SELECT * FROM media_collections WHERE id = ?', (collection_id,))
-                row = cursor.fetchone()
-
-                conn.close()
-
-                if row:
-                    return self._row_to_collection(row)
-                return None
+            row = self.db.fetchone('SELECT * FROM media_collections WHERE id = ?', (collection_id,))
+            if row:
+                return self._row_to_collection(row)
+            return None
 
         except Exception as e:
             logger.error(f"获取集合失败: {e}")
@@ -961,6 +1061,10 @@ class UnifiedMediaManager:
         scene_analysis_data = json.loads(row[9]) if row[9] else []
         edit_decisions_data = json.loads(row[10]) if row[10] else []
 
+        for key in ('created_at', 'modified_at', 'accessed_at'):
+            if isinstance(metadata_dict.get(key), str):
+                metadata_dict[key] = datetime.fromisoformat(metadata_dict[key])
+
         metadata = MediaMetadata(**metadata_dict)
         scene_analysis = [AISceneAnalysis(**scene) for scene in scene_analysis_data]
         edit_decisions = [AIEditDecision(**decision) for decision in edit_decisions_data]
@@ -1010,6 +1114,10 @@ class UnifiedMediaManager:
         if hasattr(self, 'video_engine'):
             self.video_engine.cleanup()
 
+        # 关闭数据库连接
+        if hasattr(self, 'db'):
+            self.db.close()
+
         logger.info("统一媒体管理系统资源清理完成")
 
 
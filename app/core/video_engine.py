@@ -5,7 +5,6 @@
 
 import asyncio
 import subprocess
-import json
 import os
 import logging
 import tempfile
@@ -18,6 +17,7 @@ import cv2
 
 from .base import BaseModel
 from .event_system import event_bus, Event, EventType
+from ..utils.probe_cache import get_probe_cache, find_stream, parse_frame_rate
 
 logger = logging.getLogger(__name__)
 
@@ -160,28 +160,14 @@ class VideoEngine:
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
         
-        cmd = [
-            self.ffprobe_path,
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_format",
-            "-show_streams",
-            video_path
-        ]
-        
         try:
-            result = await self._run_command(cmd)
-            data = json.loads(result)
+            # 探测在线程池中执行，缓存命中时不启动ffprobe
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, get_probe_cache().probe, video_path, self.ffprobe_path)
             
             # 解析视频流
-            video_stream = None
-            audio_stream = None
-            
-            for stream in data.get("streams", []):
-                if stream.get("codec_type") == "video":
-                    video_stream = stream
-                elif stream.get("codec_type") == "audio":
-                    audio_stream = stream
+            video_stream = find_stream(data, "video")
+            audio_stream = find_stream(data, "audio")
             
             if not video_stream:
                 raise ValueError("No video stream found")
@@ -189,8 +175,7 @@ class VideoEngine:
             format_info = data.get("format", {})
             
             # 计算FPS
-            fps_str = video_stream.get("r_frame_rate", "30/1")
-            fps = eval(fps_str) if "/" in fps_str else float(fps_str)
+            fps = parse_frame_rate(video_stream.get("r_frame_rate", "30/1"), 30.0)
             
             return VideoInfo(
                 id=f"video_{hash(video_path)}",
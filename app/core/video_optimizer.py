@@ -20,6 +20,8 @@ import threading
 from concurrent.futures import ThreadPoolExecutor
 import psutil
 
+from .decoder_pool import get_decoder_pool
+
 logger = logging.getLogger(__name__)
 
 
@@ -322,7 +324,7 @@ class VideoOptimizer:
         
         try:
             # 获取视频基本信息
-            cap = cv2.VideoCapture(video_path)
+            cap = get_decoder_pool().acquire(video_path)
             if not cap.isOpened():
                 raise ValueError(f"无法打开视频文件: {video_path}")
             
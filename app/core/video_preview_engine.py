@@ -6,6 +6,7 @@
 """
 
 import os
+import sys
 import cv2
 import numpy as np
 import time
@@ -23,6 +24,9 @@ from PyQt6.QtGui import QImage, QPixmap, QPixelFormat
 from PyQt6.QtMultimedia import QMediaPlayer, QAudioOutput
 from PyQt6.QtMultimediaWidgets import QVideoWidget
 
+from .memory_manager import FrameBufferPool, get_frame_buffer_pool
+from .decoder_pool import get_decoder_pool
+
 
 class PreviewMode(Enum):
     """预览模式"""
@@ -88,11 +92,13 @@ class VideoFrame:
 class FrameCache:
     """帧缓存管理器"""
     
-    def __init__(self, max_size_mb: int = 100):
+    def __init__(self, max_size_mb: int = 100, frame_pool: Optional[FrameBufferPool] = None):
         self.max_size_mb = max_size_mb
+        self.frame_pool = frame_pool
         self.cache = {}
         self.access_order = []
         self.current_size = 0
+        self.shared_evictions = 0  # 淘汰时仍被使用方持有、未归还缓冲池的帧数
         self.lock = threading.Lock()
     
     def add_frame(self, frame_number: int, frame: VideoFrame) -> bool:
@@ -124,18 +130,36 @@ class FrameCache:
     
     def _evict_frames(self, required_size: int):
         """清理缓存"""
+        evicted = []
         while self.current_size > required_size and self.access_order:
             oldest_frame = self.access_order.pop(0)
             if oldest_frame in self.cache:
-                frame = self.cache.pop(oldest_frame)
-                self.current_size -= frame.data.nbytes
+                evicted.append(self.cache.pop(oldest_frame))
+                self.current_size -= evicted[-1].data.nbytes
+        self._release_frames(evicted)
+    
+    def _release_frames(self, frames: List[VideoFrame]):
+        """淘汰的帧缓冲区归还帧缓冲池
+
+        get_frame() 和 frame_ready 信号把缓存中的帧直接交给使用方，
+        使用方仍持有帧对象、数组或其视图时缓冲区不能复用，交给垃圾回收。
+        """
+        while frames:
+            frame = frames.pop()
+            # 只剩局部变量和 getrefcount 参数引用帧对象，数组只被帧对象引用
+            if self.frame_pool is not None and sys.getrefcount(frame) <= 2 and sys.getrefcount(frame.data) <= 2:
+                self.frame_pool.release(frame.data)
+            else:
+                self.shared_evictions += 1
     
     def clear(self):
         """清空缓存"""
         with self.lock:
+            frames = list(self.cache.values())
             self.cache.clear()
             self.access_order.clear()
             self.current_size = 0
+            self._release_frames(frames)
 
 
 class VideoPreviewEngine(QObject):
@@ -170,7 +194,8 @@ class VideoPreviewEngine(QObject):
         self.height = 0
         
         # 帧缓存
-        self.frame_cache = FrameCache(self.config.max_cache_size)
+        self.frame_pool = get_frame_buffer_pool()
+        self.frame_cache = FrameCache(self.config.max_cache_size, self.frame_pool)
         
         # 线程池
         self.thread_pool = ThreadPoolExecutor(max_workers=4)
@@ -213,8 +238,13 @@ class VideoPreviewEngine(QObject):
             
             self.video_path = video_path
             
-            # 使用OpenCV打开视频
-            self.cap = cv2.VideoCapture(video_path)
+            # 停止上一个视频的预览线程后归还其句柄，再从解码器池租用新句柄
+            if self.cap:
+                self.stop_preview = True
+                if self.preview_thread and self.preview_thread.is_alive():
+                    self.preview_thread.join(timeout=1.0)
+                self.cap.release()
+            self.cap = get_decoder_pool().acquire(video_path)
             if not self.cap.isOpened():
                 self.error_occurred.emit("无法打开视频文件")
                 return False
@@ -309,11 +339,15 @@ class VideoPreviewEngine(QObject):
     def _read_frame(self, frame_number: int) -> Optional[VideoFrame]:
         """读取指定帧"""
         try:
-            # 设置帧位置
+            # 设置帧位置（句柄已在该位置时不seek，顺序播放只解码下一帧）
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, frame_number)
             
-            # 读取帧
-            ret, frame_data = self.cap.read()
+            # 解码到帧缓冲池的缓冲区，帧从缓存淘汰时归还
+            buffer = self.frame_pool.acquire(self.height, self.width)
+            ret, frame_data = self.cap.read(buffer)
+            if not ret or frame_data is not buffer:
+                # 实际帧尺寸与容器信息不一致时由OpenCV重新分配
+                self.frame_pool.release(buffer)
             if not ret:
                 return None
             
@@ -526,6 +560,7 @@ class VideoPreviewEngine(QObject):
         
         if self.cap:
             self.cap.release()
+            self.cap = None
         
         if self.media_player:
             self.media_player.stop()
@@ -8,13 +8,12 @@
 
 import os
 import sys
-import json
 import time
 import logging
 import threading
 import subprocess
 from typing import Dict, List, Optional, Any, Tuple, Union, Callable
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from enum import Enum
 from pathlib import Path
 import numpy as np
@@ -29,6 +28,8 @@ from .effects_engine import EffectsEngine, EffectType
 from .batch_processor import BatchProcessor, BatchTask, BatchTaskType
 from .video_codec_manager import VideoCodecManager
 from .video_optimizer import VideoOptimizer
+from ..utils.probe_cache import get_probe_cache, find_stream, parse_frame_rate
+from ..effects.transitions import SEGMENT_ENCODE_ARGS, transition_manager
 
 logger = logging.getLogger(__name__)
 
@@ -176,6 +177,41 @@ class TimelineProject:
     modified_at: float = field(default_factory=time.time)
 
 
+def load_video_info(file_path: str, ffprobe_path: str = "ffprobe") -> VideoInfo:
+    """从探测缓存构建视频信息"""
+    data = get_probe_cache().probe(file_path, ffprobe_path)
+    
+    # 解析视频流
+    video_stream = find_stream(data, "video")
+    audio_stream = find_stream(data, "audio")
+    
+    # 创建视频信息对象
+    format_info = data.get("format", {})
+    video_info = VideoInfo(
+        file_path=file_path,
+        duration=float(format_info.get("duration", 0)),
+        size_bytes=int(format_info.get("size", 0)),
+        format=format_info.get("format_name", "")
+    )
+    
+    if video_stream:
+        video_info.width = int(video_stream.get("width", 0))
+        video_info.height = int(video_stream.get("height", 0))
+        video_info.fps = parse_frame_rate(video_stream.get("r_frame_rate", "30/1"), 30.0)
+        video_info.video_codec = video_stream.get("codec_name", "")
+        video_info.bitrate = int(video_stream.get("bit_rate", 0))
+        video_info.metadata = dict(video_stream.get("tags", {}))
+    
+    if audio_stream:
+        video_info.has_audio = True
+        video_info.audio_codec = audio_stream.get("codec_name", "")
+        video_info.audio_channels = int(audio_stream.get("channels", 0))
+        video_info.audio_sample_rate = int(audio_stream.get("sample_rate", 0))
+        video_info.audio_bitrate = int(audio_stream.get("bit_rate", 0))
+    
+    return video_info
+
+
 class VideoProcessingEngine:
     """专业视频处理引擎"""
     
@@ -203,8 +239,7 @@ class VideoProcessingEngine:
         self.completion_callback: Optional[Callable] = None
         self.error_callback: Optional[Callable] = None
         
-        # 缓存和代理
-        self.video_cache: Dict[str, VideoInfo] = {}
+        # 代理文件缓存（视频信息由全局探测缓存提供）
         self.proxy_cache: Dict[str, str] = {}
         
         # 统计信息
@@ -219,67 +254,11 @@ class VideoProcessingEngine:
         logger.info("视频处理引擎初始化完成")
     
     def get_video_info(self, file_path: str) -> VideoInfo:
-        """获取视频信息"""
-        if file_path in self.video_cache:
-            return self.video_cache[file_path]
-        
+        """获取视频信息（ffprobe结果由全局探测缓存共享）"""
         try:
-            # 使用ffprobe获取视频信息
-            cmd = [
-                self.ffprobe_path,
-                "-v", "quiet",
-                "-print_format", "json",
-                "-show_format",
-                "-show_streams",
-                file_path
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
-            if result.returncode != 0:
-                raise Exception(f"获取视频信息失败: {result.stderr}")
-            
-            data = json.loads(result.stdout)
-            
-            # 解析视频流
-            video_stream = None
-            audio_stream = None
-            
-            for stream in data.get("streams", []):
-                if stream.get("codec_type") == "video":
-                    video_stream = stream
-                elif stream.get("codec_type") == "audio":
-                    audio_stream = stream
-            
-            # 创建视频信息对象
-            format_info = data.get("format", {})
-            video_info = VideoInfo(
-                file_path=file_path,
-                duration=float(format_info.get("duration", 0)),
-                size_bytes=int(format_info.get("size", 0)),
-                format=format_info.get("format_name", "")
-            )
-            
-            if video_stream:
-                video_info.width = int(video_stream.get("width", 0))
-                video_info.height = int(video_stream.get("height", 0))
-                video_info.fps = eval(video_stream.get("r_frame_rate", "30/1"))
-                video_info.video_codec = video_stream.get("codec_name", "")
-                video_info.bitrate = int(video_stream.get("bit_rate", 0))
-                video_info.metadata = video_stream.get("tags", {})
-            
-            if audio_stream:
-                video_info.has_audio = True
-                video_info.audio_codec = audio_stream.get("codec_name", "")
-                video_info.audio_channels = int(audio_stream.get("channels", 0))
-                video_info.audio_sample_rate = int(audio_stream.get("sample_rate", 0))
-                video_info.audio_bitrate = int(audio_stream.get("bit_rate", 0))
-            
-            # 缓存结果
-            self.video_cache[file_path] = video_info
-            
-            logger.info(f"获取视频信息: {file_path}")
+            video_info = load_video_info(file_path, self.ffprobe_path)
+            logger.debug(f"获取视频信息: {file_path}")
             return video_info
-            
         except Exception as e:
             logger.error(f"获取视频信息失败: {file_path}, 错误: {e}")
             raise
@@ -437,6 +416,14 @@ class VideoProcessingEngine:
             # 创建临时目录
             temp_dir = tempfile.mkdtemp(prefix="cineai_timeline_")
             
+            # 预先并行探测所有素材，片段处理时直接命中缓存
+            get_probe_cache().probe_many(
+                (clip.file_path
+                 for track in project.video_tracks + project.audio_tracks if track.is_enabled
+                 for clip in track.clips),
+                ffprobe_path=self.ffprobe_path
+            )
+            
             # 处理每个轨道
             processed_tracks = []
             
@@ -488,13 +475,30 @@ class VideoProcessingEngine:
             file_list_path = os.path.join(temp_dir, "file_list.txt")
             
             processed_clips = []
-            
-            for clip in track.clips:
+            head_trim = 0.0
+            pending_transition = None
+            previous_ok = False
+            
+            for index, clip in enumerate(track.clips):
+                # 片段出点处的转场：只渲染重叠窗口，两侧片段各自让出转场时长
+                next_clip = track.clips[index + 1] if index + 1 < len(track.clips) else None
+                transition_output = os.path.join(temp_dir, f"transition_{clip.clip_id}.mp4")
+                tail_trim = self._render_clip_transition(clip, next_clip, transition_output)
+                
                 # 处理单个片段
                 clip_output = os.path.join(temp_dir, f"clip_{clip.clip_id}.mp4")
+                clip_ok = self._process_clip(self._trim_clip(clip, head_trim, tail_trim), clip_output, config)
                 
-                if self._process_clip(clip, clip_output, config):
+                # 转场片段只拼接在两侧片段都处理成功时
+                if pending_transition and previous_ok and clip_ok:
+                    processed_clips.append(pending_transition)
+                elif pending_transition:
+                    logger.warning(f"转场相邻片段处理失败，跳过转场: {pending_transition}")
+                if clip_ok:
                     processed_clips.append(clip_output)
+                pending_transition = transition_output if tail_trim > 0 else None
+                previous_ok = clip_ok
+                head_trim = tail_trim
             
             # 创建文件列表
             with open(file_list_path, 'w') as f:
@@ -522,6 +526,67 @@ class VideoProcessingEngine:
             logger.error(f"处理轨道失败: {e}")
             return False
     
+    def _render_clip_transition(self, clip: TimelineClip, next_clip: Optional[TimelineClip],
+                                output_path: str) -> float:
+        """渲染片段到下一片段的转场，返回转场时长（无转场或渲染失败时为0，即硬切）
+        
+        转场在 clip.transitions 中声明：{"type": 预设名或转场类型, "duration": 秒, "position": "out"}
+        """
+        if next_clip is None:
+            return 0.0
+        
+        transition = next((t for t in clip.transitions if t.get("position", "out") == "out"), None)
+        if not transition or transition.get("type", "cut") == "cut":
+            return 0.0
+        if clip.speed != 1.0 or next_clip.speed != 1.0:
+            logger.warning(f"变速片段暂不支持转场渲染，使用硬切: {clip.clip_id}")
+            return 0.0
+        if not self._segment_streams_match(clip, next_clip):
+            logger.warning(f"转场两侧素材的音视频流不一致，使用硬切: {clip.clip_id} -> {next_clip.clip_id}")
+            return 0.0
+        
+        clip_start, clip_end = self._clip_range(clip)
+        next_start, next_end = self._clip_range(next_clip)
+        # 转场不能超过任一片段的一半
+        duration = min(float(transition.get("duration", 1.0)),
+                       (clip_end - clip_start) / 2, (next_end - next_start) / 2)
+        if duration <= 0:
+            return 0.0
+        
+        if transition_manager.render_transition_sequence(
+                clip.file_path, next_clip.file_path, output_path, transition["type"], duration,
+                from_end=clip_end, to_start=next_start, ffmpeg_path=self.ffmpeg_path):
+            return duration
+        
+        logger.warning(f"转场渲染失败，使用硬切: {clip.clip_id} -> {next_clip.clip_id}")
+        return 0.0
+    
+    def _segment_streams_match(self, clip: TimelineClip, next_clip: TimelineClip) -> bool:
+        """转场片段以流复制拼接在两侧片段之间，要求两段素材的分辨率、帧率和音频布局一致"""
+        try:
+            first = self.get_video_info(clip.file_path)
+            second = self.get_video_info(next_clip.file_path)
+        except Exception:
+            return False
+        if (first.width, first.height) != (second.width, second.height) or abs(first.fps - second.fps) > 0.01:
+            return False
+        if first.has_audio != second.has_audio:
+            return False
+        return not first.has_audio or (first.audio_channels, first.audio_sample_rate) == \
+            (second.audio_channels, second.audio_sample_rate)
+    
+    def _clip_range(self, clip: TimelineClip) -> Tuple[float, float]:
+        """片段在素材中的起止时间"""
+        end_time = clip.end_time if clip.end_time > 0 else self.get_video_info(clip.file_path).duration
+        return clip.start_time, end_time
+    
+    def _trim_clip(self, clip: TimelineClip, head: float, tail: float) -> TimelineClip:
+        """去掉被转场占用的片头/片尾"""
+        if head <= 0 and tail <= 0:
+            return clip
+        start_time, end_time = self._clip_range(clip)
+        return replace(clip, start_time=start_time + head, end_time=end_time - tail)
+    
     def _process_clip(self, clip: TimelineClip, output_path: str, config: ProcessingConfig) -> bool:
         """处理单个片段"""
         try:
@@ -549,6 +614,9 @@ class VideoProcessingEngine:
             if clip.volume != 1.0:
                 cmd.extend(["-filter:a", f"volume={clip.volume}"])
             
+            # 与转场片段使用相同的编码器和像素格式，保证可以流复制拼接
+            cmd.extend(SEGMENT_ENCODE_ARGS)
+            
             # 输出文件
             cmd.extend(["-y", output_path])
             
@@ -798,7 +866,6 @@ class VideoProcessingEngine:
         self.batch_processor.cleanup()
         
         # 清理缓存
-        self.video_cache.clear()
         self.proxy_cache.clear()
         
         logger.info("视频处理引擎资源清理完成")
@@ -17,6 +17,9 @@ from PyQt6.QtCore import QObject, pyqtSignal, QThread
 import tempfile
 import subprocess
 
+from .decoder_pool import get_decoder_pool
+from ..utils.probe_cache import find_stream, get_probe_cache
+
 
 @dataclass
 class VideoInfo:
@@ -75,7 +78,7 @@ class VideoProcessor(QObject):
             self.status_updated.emit("正在分析视频信息...")
 
             # 使用OpenCV获取视频信息
-            cap = cv2.VideoCapture(video_path)
+            cap = get_decoder_pool().acquire(video_path)
 
             if not cap.isOpened():
                 raise Exception(f"无法打开视频文件: {video_path}")
@@ -91,9 +94,7 @@ class VideoProcessor(QObject):
 
             # 使用ffprobe获取音频信息
             try:
-                probe = ffmpeg.probe(video_path)
-                audio_stream = next((stream for stream in probe['streams']
-                                   if stream['codec_type'] == 'audio'), None)
+                audio_stream = find_stream(get_probe_cache().probe(video_path), 'audio')
 
                 audio_channels = int(audio_stream['channels']) if audio_stream else 0
                 audio_sample_rate = int(audio_stream['sample_rate']) if audio_stream else 0
@@ -129,7 +130,7 @@ class VideoProcessor(QObject):
             self.status_updated.emit("正在检测视频场景...")
             scenes = []
 
-            cap = cv2.VideoCapture(video_path)
+            cap = get_decoder_pool().acquire(video_path)
             if not cap.isOpened():
                 raise Exception("无法打开视频文件")
 
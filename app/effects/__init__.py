@@ -0,0 +1,51 @@
+"""
+特效模块
+滤镜、转场、动画和文字特效，导出名称在首次访问时才导入对应子模块
+"""
+
+from app.utils.lazy_import import lazy_attributes
+
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    # 特效系统
+    'EffectType': '.effects_system',
+    'EffectCategory': '.effects_system',
+    'EffectMetadata': '.effects_system',
+    'BaseEffect': '.effects_system',
+    'EffectsManager': '.effects_system',
+    'EffectGraphCompiler': '.effect_graph',
+    'ExecutionPlan': '.effect_graph',
+
+    # 滤镜
+    'FilterType': '.filters',
+    'FilterPreset': '.filters',
+    'FilterManager': '.filters',
+    'filter_manager': '.filters',
+
+    # 转场
+    'TransitionType': '.transitions',
+    'TransitionParameters': '.transitions',
+    'TransitionEngine': '.transitions',
+    'TransitionManager': '.transitions',
+    'transition_manager': '.transitions',
+
+    # 动画
+    'AnimationType': '.animations',
+    'EasingType': '.animations',
+    'AnimationEngine': '.animations',
+    'animation_engine': '.animations',
+
+    # 文字特效
+    'TextEffectType': '.text_effects',
+    'TextStyle': '.text_effects',
+    'TextEffectEngine': '.text_effects',
+    'text_effect_engine': '.text_effects',
+})
+
+__all__ = [
+    'EffectType', 'EffectCategory', 'EffectMetadata', 'BaseEffect', 'EffectsManager',
+    'EffectGraphCompiler', 'ExecutionPlan',
+    'FilterType', 'FilterPreset', 'FilterManager', 'filter_manager',
+    'TransitionType', 'TransitionParameters', 'TransitionEngine', 'TransitionManager', 'transition_manager',
+    'AnimationType', 'EasingType', 'AnimationEngine', 'animation_engine',
+    'TextEffectType', 'TextStyle', 'TextEffectEngine', 'text_effect_engine'
+]
@@ -83,8 +83,51 @@ class MotionPath:
     smoothing: float = 0.0
     speed_profile: List[float] = None
 
+@dataclass
+class CompiledStep:
+    """编译后的图层步骤：连续的几何轨道合成为逐帧 3x3 矩阵，其余轨道保留逐帧参数"""
+    kind: str  # "warp" 或 "track"
+    matrices: Optional[np.ndarray] = None  # (帧数, 3, 3)，源坐标 -> 目标坐标
+    identity: Optional[np.ndarray] = None  # (帧数,) 该帧矩阵为单位矩阵，跳过变换
+    track: Optional[AnimationTrack] = None
+    values: Optional[List[Any]] = None
+
+@dataclass
+class CompiledLayer:
+    """编译后的动画图层，参数按帧预先采样"""
+    layer_name: str
+    fps: float
+    frame_size: Tuple[int, int]  # (宽, 高)
+    duration: float
+    frame_count: int
+    steps: List[CompiledStep]
+    opacity: Optional[np.ndarray] = None  # 所有透明度轨道的乘积，最后一次颜色处理
+    dynamic: bool = False  # 含震动/弹跳等随时间变化的轨道，超出时长后不能钳制
+    signature: Tuple = ()
+    
+    def frame_index(self, current_time: float) -> Optional[int]:
+        """时间对应的帧号，动态图层超出编译时长时返回 None"""
+        index = int(round(current_time * self.fps))
+        if index < 0 or index >= self.frame_count:
+            if self.dynamic:
+                return None
+            index = min(max(index, 0), self.frame_count - 1)
+        return index
+
 class AnimationEngine(QObject):
-    """动画引擎"""
+    """动画引擎
+    
+    图层首次渲染时编译：关键帧轨道按帧向量化采样，位置/缩放/旋转/翻转/震动/弹跳/缩放平移/裁剪
+    合成为一个 3x3 矩阵，每帧只做一次 warpAffine 和至多一次透明度处理。
+    """
+    
+    # 可合成为仿射矩阵的轨道
+    GEOMETRIC_TYPES = {
+        AnimationType.POSITION, AnimationType.SCALE, AnimationType.ROTATION, AnimationType.FLIP,
+        AnimationType.SHAKE, AnimationType.BOUNCE, AnimationType.ZOOM_PAN, AnimationType.CROP
+    }
+    # 参数随时间变化（不由关键帧决定）的轨道
+    DYNAMIC_TYPES = {AnimationType.SHAKE, AnimationType.BOUNCE}
     
     # 信号定义
     animation_progress = pyqtSignal(float)  # 动画进度信号
@@ -99,6 +142,7 @@ class AnimationEngine(QObject):
         self.global_time = 0.0
         self.fps = 30.0
         self.is_playing = False
+        self._compiled_layers: Dict[int, CompiledLayer] = {}
         
         # 初始化内置动画
         self._initialize_builtin_animations()
@@ -287,22 +331,28 @@ class AnimationEngine(QObject):
         """移除动画图层"""
         self.animation_layers = [layer for layer in self.animation_layers 
                                if layer.name != layer_name]
+        active = {id(layer) for layer in self.animation_layers}
+        self._compiled_layers = {key: compiled for key, compiled in self._compiled_layers.items()
+                                 if key in active}
     
     def apply_animation(self, frame: np.ndarray, current_time: float) -> np.ndarray:
         """应用动画到帧"""
-        result = frame.copy()
+        result = frame
         
         for layer in self.animation_layers:
             if not layer.is_visible:
                 continue
             
             # 应用图层动画
-            layer_result = self._apply_layer_animation(result, layer, current_time)
+            layer_result = self._render_layer(result, layer, current_time)
             
             # 混合图层
             if layer.blend_mode == "normal":
                 alpha = layer.opacity
-                result = cv2.addWeighted(result, 1 - alpha, layer_result, alpha, 0)
+                if alpha >= 1.0:
+                    result = layer_result
+                else:
+                    result = cv2.addWeighted(result, 1 - alpha, layer_result, alpha, 0)
             elif layer.blend_mode == "multiply":
                 result = self._blend_multiply(result, layer_result, layer.opacity)
             elif layer.blend_mode == "screen":
@@ -310,11 +360,25 @@ class AnimationEngine(QObject):
             elif layer.blend_mode == "overlay":
                 result = self._blend_overlay(result, layer_result, layer.opacity)
         
-        return result
+        return result.copy() if result is frame else result
+    
+    def _render_layer(self, frame: np.ndarray, layer: AnimationLayer, current_time: float) -> np.ndarray:
+        """使用编译后的图层渲染，超出编译范围的动态图层逐轨道计算"""
+        height, width = frame.shape[:2]
+        compiled = self._compiled_layers.get(id(layer))
+        if (compiled is None or compiled.frame_size != (width, height)
+                or compiled.signature != self._layer_signature(layer)):
+            compiled = self.compile_layer(layer, frame_size=(width, height))
+            self._compiled_layers[id(layer)] = compiled
+        
+        index = compiled.frame_index(current_time)
+        if index is None:
+            return self._apply_layer_animation(frame, layer, current_time)
+        return self.apply_compiled_layer(frame, compiled, index, current_time)
     
     def _apply_layer_animation(self, frame: np.ndarray, layer: AnimationLayer, 
                              current_time: float) -> np.ndarray:
-        """应用图层动画"""
+        """应用图层动画（逐轨道插值和变换）"""
         result = frame.copy()
         
         for track in layer.tracks:
@@ -325,35 +389,301 @@ class AnimationEngine(QObject):
             current_value = self._interpolate_keyframes(track.keyframes, current_time)
             
             # 应用动画
-            if track.type == AnimationType.POSITION:
-                result = self._apply_position_animation(result, current_value)
-            elif track.type == AnimationType.SCALE:
-                result = self._apply_scale_animation(result, current_value)
-            elif track.type == AnimationType.ROTATION:
-                result = self._apply_rotation_animation(result, current_value)
-            elif track.type == AnimationType.OPACITY:
-                result = self._apply_opacity_animation(result, current_value)
-            elif track.type == AnimationType.CROP:
-                result = self._apply_crop_animation(result, current_value)
-            elif track.type == AnimationType.DISTORTION:
-                result = self._apply_distortion_animation(result, current_value)
-            elif track.type == AnimationType.COLOR_SHIFT:
-                result = self._apply_color_shift_animation(result, current_value)
-            elif track.type == AnimationType.SHAKE:
-                result = self._apply_shake_animation(result, current_value)
-            elif track.type == AnimationType.BOUNCE:
-                result = self._apply_bounce_animation(result, current_value)
-            elif track.type == AnimationType.WAVE:
-                result = self._apply_wave_animation(result, current_time)
-            elif track.type == AnimationType.SPIRAL:
-                result = self._apply_spiral_animation(result, current_time)
-            elif track.type == AnimationType.FLIP:
-                result = self._apply_flip_animation(result, current_value)
-            elif track.type == AnimationType.ZOOM_PAN:
-                result = self._apply_zoom_pan_animation(result, current_value)
+            result = self._apply_track(result, track, current_value, current_time)
+        
+        return result
+    
+    def _apply_track(self, result: np.ndarray, track: AnimationTrack, current_value: Any,
+                     current_time: float) -> np.ndarray:
+        """应用单个轨道"""
+        if track.type == AnimationType.POSITION:
+            result = self._apply_position_animation(result, current_value)
+        elif track.type == AnimationType.SCALE:
+            result = self._apply_scale_animation(result, current_value)
+        elif track.type == AnimationType.ROTATION:
+            result = self._apply_rotation_animation(result, current_value)
+        elif track.type == AnimationType.OPACITY:
+            result = self._apply_opacity_animation(result, current_value)
+        elif track.type == AnimationType.CROP:
+            result = self._apply_crop_animation(result, current_value)
+        elif track.type == AnimationType.DISTORTION:
+            result = self._apply_distortion_animation(result, current_value)
+        elif track.type == AnimationType.COLOR_SHIFT:
+            result = self._apply_color_shift_animation(result, current_value)
+        elif track.type == AnimationType.SHAKE:
+            result = self._apply_shake_animation(result, current_value)
+        elif track.type == AnimationType.BOUNCE:
+            result = self._apply_bounce_animation(result, current_value)
+        elif track.type == AnimationType.WAVE:
+            result = self._apply_wave_animation(result, current_time)
+        elif track.type == AnimationType.SPIRAL:
+            result = self._apply_spiral_animation(result, current_time)
+        elif track.type == AnimationType.FLIP:
+            result = self._apply_flip_animation(result, current_value)
+        elif track.type == AnimationType.ZOOM_PAN:
+            result = self._apply_zoom_pan_animation(result, current_value)
+        
+        return result
+    
+    # 图层编译
+    def compile_layer(self, layer: AnimationLayer, duration: Optional[float] = None,
+                      frame_size: Tuple[int, int] = (1920, 1080), fps: Optional[float] = None) -> CompiledLayer:
+        """把图层的关键帧轨道编译为整个片段时长的逐帧参数
+        
+        duration 默认为最后一个关键帧的时间。连续的几何轨道按顺序合成为一个矩阵，
+        透明度轨道合并为最后一次乘法，其余轨道（扭曲、色彩偏移、波浪、螺旋）按原顺序逐帧执行。
+        """
+        fps = fps or self.fps
+        tracks = [track for track in layer.tracks if track.is_active]
+        if duration is None:
+            duration = max((kf.time for track in tracks for kf in track.keyframes), default=0.0)
+        frame_count = int(math.floor(duration * fps + 1e-9)) + 1
+        times = np.arange(frame_count, dtype=np.float64) / fps
+        width, height = frame_size
+        
+        steps: List[CompiledStep] = []
+        matrices = None
+        opacity = None
+        
+        for track in tracks:
+            if track.type in self.GEOMETRIC_TYPES:
+                track_matrices = self._track_matrices(track, times, width, height)
+                matrices = track_matrices if matrices is None else track_matrices @ matrices
+                continue
+            
+            if track.type == AnimationType.OPACITY:
+                values = self._sample_numeric(track.keyframes, times)
+                if values is not None:
+                    opacity = values if opacity is None else opacity * values
+                continue
+            
+            # 非几何轨道：先结束当前的矩阵合成
+            if matrices is not None:
+                steps.append(self._warp_step(matrices))
+                matrices = None
+            values = self._sample_discrete(track.keyframes, times) if track.keyframes else None
+            steps.append(CompiledStep(kind="track", track=track, values=values))
+        
+        if matrices is not None:
+            steps.append(self._warp_step(matrices))
+        if opacity is not None and np.allclose(opacity, 1.0):
+            opacity = None
+        
+        return CompiledLayer(
+            layer_name=layer.name,
+            fps=fps,
+            frame_size=(width, height),
+            duration=duration,
+            frame_count=frame_count,
+            steps=steps,
+            opacity=opacity,
+            dynamic=any(track.type in self.DYNAMIC_TYPES for track in tracks),
+            signature=self._layer_signature(layer)
+        )
+    
+    def apply_compiled_layer(self, frame: np.ndarray, compiled: CompiledLayer, index: int,
+                             current_time: float = 0.0) -> np.ndarray:
+        """渲染编译后图层的第 index 帧"""
+        height, width = frame.shape[:2]
+        result = frame
+        
+        for step in compiled.steps:
+            if step.kind == "warp":
+                if not step.identity[index]:
+                    result = cv2.warpAffine(result, step.matrices[index, :2], (width, height))
+            else:
+                value = step.values[index] if step.values is not None else None
+                result = self._apply_track(result, step.track, value, current_time)
+        
+        if compiled.opacity is not None and compiled.opacity[index] != 1.0:
+            result = cv2.convertScaleAbs(result, alpha=float(compiled.opacity[index]))
+        
+        return result.copy() if result is frame else result
+    
+    @staticmethod
+    def _layer_signature(layer: AnimationLayer) -> Tuple:
+        """图层内容签名，轨道或关键帧变化后重新编译"""
+        return tuple(
+            (track.type, track.is_active,
+             tuple((kf.time, repr(kf.value), kf.easing) for kf in track.keyframes))
+            for track in layer.tracks
+        )
+    
+    @staticmethod
+    def _warp_step(matrices: np.ndarray) -> CompiledStep:
+        identity = np.all(np.abs(matrices - np.eye(3)) < 1e-9, axis=(1, 2))
+        return CompiledStep(kind="warp", matrices=matrices, identity=identity)
+    
+    def _segments(self, keyframes: List[Keyframe], times: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """每帧所在的关键帧区间及区间内的位置（与 _interpolate_keyframes 的区间选择一致）"""
+        key_times = np.array([kf.time for kf in keyframes], dtype=np.float64)
+        if len(keyframes) < 2:
+            return np.zeros(len(times), dtype=np.int64), np.zeros(len(times))
+        
+        segment = np.clip(np.searchsorted(key_times, times, side="left") - 1, 0, len(keyframes) - 2)
+        span = key_times[segment + 1] - key_times[segment]
+        local = np.where(span > 0, (times - key_times[segment]) / np.where(span > 0, span, 1.0), 0.0)
+        return segment, local
+    
+    def _sample_numeric(self, keyframes: List[Keyframe], times: np.ndarray) -> Optional[np.ndarray]:
+        """数值/元组关键帧按帧插值，返回 (帧数,) 或 (帧数, 维数)；其他类型返回 None"""
+        if not keyframes:
+            return None
+        values = [kf.value for kf in keyframes]
+        if all(isinstance(v, (int, float)) for v in values):
+            key_values = np.array(values, dtype=np.float64)
+        elif all(isinstance(v, tuple) for v in values) and len({len(v) for v in values}) == 1:
+            key_values = np.array(values, dtype=np.float64)
+        else:
+            return None
         
+        segment, local = self._segments(keyframes, times)
+        if len(keyframes) < 2:
+            return np.repeat(key_values[:1], len(times), axis=0)
+        
+        eased = local.copy()
+        for easing in {kf.easing for kf in keyframes[:-1]}:
+            mask = np.array([keyframes[i].easing == easing for i in range(len(keyframes) - 1)])[segment]
+            eased[mask] = self._apply_easing_array(local[mask], easing)
+        
+        start, end = key_values[segment], key_values[segment + 1]
+        if key_values.ndim == 2:
+            eased = eased[:, None]
+        result = start + (end - start) * eased
+        
+        # 超出关键帧范围时取边界值
+        result[times <= keyframes[0].time] = key_values[0]
+        result[times > keyframes[-1].time] = key_values[-1]
         return result
     
+    def _sample_discrete(self, keyframes: List[Keyframe], times: np.ndarray) -> List[Any]:
+        """不可插值的关键帧（字典参数等）取所在区间起点的值"""
+        segment, _ = self._segments(keyframes, times)
+        index = segment.copy()
+        index[times <= keyframes[0].time] = 0
+        index[times > keyframes[-1].time] = len(keyframes) - 1
+        return [keyframes[i].value for i in index]
+    
+    def _apply_easing_array(self, t: np.ndarray, easing: EasingType) -> np.ndarray:
+        """缓动函数的向量化版本"""
+        if easing == EasingType.EASE_IN:
+            return t * t
+        elif easing == EasingType.EASE_OUT:
+            return 1.0 - (1.0 - t) * (1.0 - t)
+        elif easing == EasingType.EASE_IN_OUT:
+            return np.where(t < 0.5, 2 * t * t, 1.0 - 2 * (1.0 - t) * (1.0 - t))
+        elif easing == EasingType.BOUNCE:
+            return np.where(t < 0.5, 2 * t * t, 1.0 - np.abs(2 * t - 2) ** 0.5)
+        elif easing == EasingType.ELASTIC:
+            return t * (2 - t) * np.sin(t * math.pi * 4)
+        elif easing == EasingType.BACK:
+            return t * t * (2.7 * t - 1.7)
+        elif easing == EasingType.SINE:
+            return 0.5 * (1 - np.cos(t * math.pi))
+        elif easing == EasingType.CUBIC:
+            return t ** 3
+        elif easing == EasingType.QUARTIC:
+            return t ** 4
+        elif easing == EasingType.QUINTIC:
+            return t ** 5
+        return t
+    
+    def _track_matrices(self, track: AnimationTrack, times: np.ndarray, width: int, height: int) -> np.ndarray:
+        """几何轨道的逐帧 3x3 矩阵（与对应 _apply_*_animation 的变换一致）"""
+        count = len(times)
+        matrices = np.tile(np.eye(3), (count, 1, 1))
+        if not track.keyframes:
+            return matrices
+        
+        if track.type == AnimationType.POSITION:
+            values = self._sample_numeric(track.keyframes, times)
+            if values is not None and values.ndim == 2:
+                matrices[:, 0, 2] = np.trunc(values[:, 0])
+                matrices[:, 1, 2] = np.trunc(values[:, 1])
+        
+        elif track.type == AnimationType.SCALE:
+            values = self._sample_numeric(track.keyframes, times)
+            if values is not None and values.ndim == 1:
+                for axis, size in ((0, width), (1, height)):
+                    new_size = np.trunc(size * values)
+                    ratio = new_size / size
+                    offset = np.where(values > 1.0, -((new_size - size) // 2), (size - new_size) // 2)
+                    scaled = values != 1.0
+                    matrices[scaled, axis, axis] = ratio[scaled]
+                    matrices[scaled, axis, 2] = (0.5 * ratio - 0.5 + offset)[scaled]
+        
+        elif track.type == AnimationType.ROTATION:
+            values = self._sample_numeric(track.keyframes, times)
+            if values is not None and values.ndim == 1:
+                center_x, center_y = width // 2, height // 2
+                radians = np.radians(values)
+                alpha, beta = np.cos(radians), np.sin(radians)
+                matrices[:, 0, 0] = alpha
+                matrices[:, 0, 1] = beta
+                matrices[:, 0, 2] = (1 - alpha) * center_x - beta * center_y
+                matrices[:, 1, 0] = -beta
+                matrices[:, 1, 1] = alpha
+                matrices[:, 1, 2] = beta * center_x + (1 - alpha) * center_y
+        
+        else:
+            # 字典参数的轨道：参数取区间起点的值，逐帧构造矩阵
+            values = self._sample_discrete(track.keyframes, times)
+            for index, (value, current_time) in enumerate(zip(values, times)):
+                if value is not None:
+                    matrices[index] = self._discrete_matrix(track.type, value, current_time, width, height)
+        
+        return matrices
+    
+    def _discrete_matrix(self, track_type: AnimationType, params: Dict[str, Any], current_time: float,
+                         width: int, height: int) -> np.ndarray:
+        """翻转/震动/弹跳/缩放平移/裁剪的单帧矩阵"""
+        matrix = np.eye(3)
+        
+        if track_type == AnimationType.FLIP:
+            if params.get('horizontal', False):
+                matrix = np.array([[-1, 0, width - 1], [0, 1, 0], [0, 0, 1]], dtype=np.float64) @ matrix
+            if params.get('vertical', False):
+                matrix = np.array([[1, 0, 0], [0, -1, height - 1], [0, 0, 1]], dtype=np.float64) @ matrix
+        
+        elif track_type == AnimationType.SHAKE:
+            intensity = params.get('intensity', 5)
+            matrix[0, 2] = np.random.randint(-intensity, intensity)
+            matrix[1, 2] = np.random.randint(-intensity, intensity)
+        
+        elif track_type == AnimationType.BOUNCE:
+            amplitude = params.get('amplitude', 50)
+            frequency = params.get('frequency', 2.0)
+            phase = params.get('phase', 0.0)
+            matrix[1, 2] = int(amplitude * math.sin(frequency * current_time * 2 * math.pi + phase))
+        
+        elif track_type == AnimationType.ZOOM_PAN:
+            scale = params.get('scale', 1.0)
+            if scale != 1.0:
+                pan = (params.get('pan_x', 0.0), params.get('pan_y', 0.0))
+                for axis, size in ((0, width), (1, height)):
+                    new_size = int(size * scale)
+                    ratio = new_size / size
+                    if scale > 1.0:
+                        start = max(0, min(int((new_size - size) // 2 + pan[axis]), new_size - size))
+                        offset = -start
+                    else:
+                        offset = max(0, min(int((size - new_size) // 2 + pan[axis]), size - new_size))
+                    matrix[axis, axis] = ratio
+                    matrix[axis, 2] = 0.5 * ratio - 0.5 + offset
+        
+        elif track_type == AnimationType.CROP:
+            left = max(0, int(params.get('left', 0)))
+            top = max(0, int(params.get('top', 0)))
+            right = min(width, int(params.get('right', width)))
+            bottom = min(height, int(params.get('bottom', height)))
+            if right > left and bottom > top:
+                for axis, size, start, end in ((0, width, left, right), (1, height, top, bottom)):
+                    ratio = size / (end - start)
+                    matrix[axis, axis] = ratio
+                    matrix[axis, 2] = (0.5 - start) * ratio - 0.5
+        
+        return matrix
+    
     def _interpolate_keyframes(self, keyframes: List[Keyframe], current_time: float) -> Any:
         """关键帧插值"""
         if not keyframes:
@@ -401,7 +731,7 @@ class AnimationEngine(QObject):
             if t < 0.5:
                 return 2 * t * t
             else:
-                return 1.0 - math.abs(2 * t - 2) ** 0.5
+                return 1.0 - abs(2 * t - 2) ** 0.5
         elif easing == EasingType.ELASTIC:
             return t * (2 - t) * math.sin(t * math.pi * 4)
         elif easing == EasingType.BACK:
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内置特效
+调色类特效（亮度、对比度、饱和度、曲线、色彩平衡、滤镜预设）封装 FilterManager 的实现，
+空间类特效（高斯模糊、锐化、变换）声明卷积核或仿射矩阵，供执行计划编译器合并
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from .effects_system import (
+    BaseEffect, EffectCategory, EffectMetadata, EffectParameter, EffectType, FilterEffect
+)
+from .filters import ColorGradingFilter, FilterManager, FilterPreset
+
+logger = logging.getLogger(__name__)
+
+_filter_manager: Optional[FilterManager] = None
+
+
+def _get_filter_manager() -> FilterManager:
+    global _filter_manager
+    if _filter_manager is None:
+        _filter_manager = FilterManager()
+    return _filter_manager
+
+
+class BuiltinEffect(FilterEffect):
+    """内置特效基类：参数缺省值取自元数据"""
+
+    def initialize(self) -> bool:
+        self.parameters = {param.name: param.default_value for param in self.metadata.parameters}
+        self.initialized = True
+        return True
+
+    def validate_parameters(self, parameters: Dict[str, Any]) -> bool:
+        definitions = {param.name: param for param in self.metadata.parameters}
+        for name, value in parameters.items():
+            definition = definitions.get(name)
+            if definition is None or not self._validate_parameter_value(definition, value):
+                return False
+        return True
+
+    def param(self, name: str) -> Any:
+        value = self.parameters.get(name)
+        if value is None:
+            for definition in self.metadata.parameters:
+                if definition.name == name:
+                    return definition.default_value
+        return value
+
+
+class BrightnessEffect(BuiltinEffect):
+    """亮度（HSV明度通道）"""
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        return _get_filter_manager()._adjust_brightness(frame, self.param("value"))
+
+    def is_pointwise(self, parameters: Dict[str, Any]) -> bool:
+        return True
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        return parameters.get("value", 0) == 0
+
+
+class ContrastEffect(BuiltinEffect):
+    """对比度"""
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        return _get_filter_manager()._adjust_contrast(frame, self.param("value"))
+
+    def is_pointwise(self, parameters: Dict[str, Any]) -> bool:
+        return True
+
+    def is_separable(self, parameters: Dict[str, Any]) -> bool:
+        return True
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        return parameters.get("value", 0) == 0
+
+
+class SaturationEffect(BuiltinEffect):
+    """饱和度（HSV饱和度通道）"""
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        return _get_filter_manager()._adjust_saturation(frame, self.param("value"))
+
+    def is_pointwise(self, parameters: Dict[str, Any]) -> bool:
+        return True
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        return parameters.get("value", 0) == 0
+
+
+class CurvesEffect(BuiltinEffect):
+    """RGB曲线：主曲线作用于所有通道，之后再应用各通道曲线"""
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        return cv2.LUT(frame, self._lut())
+
+    def _lut(self) -> np.ndarray:
+        channels = []
+        master = self.param("points") or []
+        for name in ("blue", "green", "red"):
+            values = np.arange(256, dtype=np.float32)
+            for curve in (master, self.param(name) or []):
+                if len(curve) >= 2:
+                    values = np.array([ColorGradingFilter._interpolate_curve(curve, v) for v in values],
+                                      dtype=np.float32)
+            channels.append(np.clip(np.round(values), 0, 255).astype(np.uint8))
+        return np.stack(channels, axis=1).reshape(256, 1, 3)
+
+    def is_pointwise(self, parameters: Dict[str, Any]) -> bool:
+        return True
+
+    def is_separable(self, parameters: Dict[str, Any]) -> bool:
+        return True
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        return all(len(parameters.get(name) or []) < 2 for name in ("points", "blue", "green", "red"))
+
+
+class ColorBalanceEffect(BuiltinEffect):
+    """色彩平衡（Lift-Gamma-Gain）"""
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        return ColorGradingFilter.lift_gamma_gain(
+            frame, tuple(self.param("lift")), tuple(self.param("gamma")), tuple(self.param("gain")))
+
+    def is_pointwise(self, parameters: Dict[str, Any]) -> bool:
+        return True
+
+    def is_separable(self, parameters: Dict[str, Any]) -> bool:
+        return True
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        return (tuple(parameters.get("lift", (0, 0, 0))) == (0, 0, 0)
+                and tuple(parameters.get("gamma", (1, 1, 1))) == (1, 1, 1)
+                and tuple(parameters.get("gain", (1, 1, 1))) == (1, 1, 1))
+
+
+class FilterPresetEffect(BuiltinEffect):
+    """FilterManager 滤镜预设"""
+
+    # 与像素位置或随机数有关的预设参数
+    SPATIAL_KEYS = {"vignette_intensity", "grain_intensity", "aged_film_intensity"}
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        preset = self._preset(self.param("preset"))
+        if preset is None:
+            return frame
+        return _get_filter_manager().apply_preset(frame, preset)
+
+    @staticmethod
+    def _preset(name: Any) -> Optional[FilterPreset]:
+        try:
+            return name if isinstance(name, FilterPreset) else FilterPreset(name)
+        except ValueError:
+            return None
+
+    def is_pointwise(self, parameters: Dict[str, Any]) -> bool:
+        preset = self._preset(parameters.get("preset", "original"))
+        if preset is None:
+            return True
+        keys = _get_filter_manager().presets[preset]["parameters"].keys()
+        return not (self.SPATIAL_KEYS & set(keys))
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        preset = self._preset(parameters.get("preset", "original"))
+        return preset is None or preset == FilterPreset.ORIGINAL
+
+
+class GaussianBlurEffect(BuiltinEffect):
+    """高斯模糊"""
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        kernel_x, kernel_y = self.separable_kernel(self.parameters)
+        return cv2.sepFilter2D(frame, -1, kernel_x, kernel_y)
+
+    def separable_kernel(self, parameters: Dict[str, Any]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        radius = int(parameters.get("radius", 0))
+        kernel = cv2.getGaussianKernel(2 * radius + 1, max(radius / 2.0, 0.1))
+        return kernel, kernel
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        return int(parameters.get("radius", 0)) <= 0
+
+
+class SharpenEffect(BuiltinEffect):
+    """锐化（3x3拉普拉斯锐化核）"""
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        return cv2.filter2D(frame, -1, self.kernel(self.param("amount")))
+
+    @staticmethod
+    def kernel(amount: float) -> np.ndarray:
+        return np.array([[0, -amount, 0], [-amount, 1 + 4 * amount, -amount], [0, -amount, 0]],
+                        dtype=np.float32)
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        return float(parameters.get("amount", 0.0)) == 0.0
+
+
+class TransformEffect(BuiltinEffect):
+    """变换：以画面中心缩放、旋转后平移"""
+
+    def apply(self, frame: np.ndarray, time: float) -> np.ndarray:
+        height, width = frame.shape[:2]
+        matrix = self.affine_matrix(self.parameters, (width, height))
+        return cv2.warpAffine(frame, matrix[:2], (width, height))
+
+    def affine_matrix(self, parameters: Dict[str, Any], frame_size: Tuple[int, int]) -> Optional[np.ndarray]:
+        width, height = frame_size
+        matrix = np.eye(3)
+        matrix[:2] = cv2.getRotationMatrix2D((width / 2.0, height / 2.0), parameters.get("rotation", 0.0),
+                                             parameters.get("scale", 1.0))
+        matrix[0, 2] += parameters.get("offset_x", 0.0)
+        matrix[1, 2] += parameters.get("offset_y", 0.0)
+        return matrix
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        return (parameters.get("scale", 1.0) == 1.0 and parameters.get("rotation", 0.0) == 0.0
+                and parameters.get("offset_x", 0.0) == 0.0 and parameters.get("offset_y", 0.0) == 0.0)
+
+
+def _metadata(effect_id: str, name: str, description: str, effect_type: EffectType,
+              parameters: List[EffectParameter]) -> EffectMetadata:
+    return EffectMetadata(
+        id=effect_id,
+        name=name,
+        description=description,
+        effect_type=effect_type,
+        category=EffectCategory.BASIC,
+        parameters=parameters
+    )
+
+
+def builtin_effect_definitions() -> List[Tuple[type, EffectMetadata]]:
+    """内置特效类及其元数据"""
+    def number(name: str, display_name: str, default: Any, minimum: Any, maximum: Any,
+               param_type: str = "float") -> EffectParameter:
+        return EffectParameter(name, display_name, param_type, default, minimum, maximum)
+
+    def value_list(name: str, display_name: str, default: Any) -> EffectParameter:
+        return EffectParameter(name, display_name, "list", default)
+
+    return [
+        (BrightnessEffect, _metadata("brightness", "亮度", "调整画面亮度", EffectType.COLOR,
+                                     [number("value", "亮度", 0, -100, 100, "int")])),
+        (ContrastEffect, _metadata("contrast", "对比度", "调整画面对比度", EffectType.COLOR,
+                                   [number("value", "对比度", 0, -100, 100, "int")])),
+        (SaturationEffect, _metadata("saturation", "饱和度", "调整色彩饱和度", EffectType.COLOR,
+                                     [number("value", "饱和度", 0, -100, 100, "int")])),
+        (CurvesEffect, _metadata("curves", "曲线", "RGB主曲线及各通道曲线", EffectType.COLOR,
+                                 [value_list("points", "主曲线", None), value_list("red", "红色曲线", None),
+                                  value_list("green", "绿色曲线", None), value_list("blue", "蓝色曲线", None)])),
+        (ColorBalanceEffect, _metadata("color_balance", "色彩平衡", "Lift-Gamma-Gain色彩平衡", EffectType.COLOR,
+                                       [value_list("lift", "阴影", (0, 0, 0)), value_list("gamma", "中间调", (1, 1, 1)),
+                                        value_list("gain", "高光", (1, 1, 1))])),
+        (FilterPresetEffect, _metadata("filter_preset", "滤镜预设", "应用滤镜预设", EffectType.FILTER,
+                                       [EffectParameter("preset", "预设", "string", "original")])),
+        (GaussianBlurEffect, _metadata("gaussian_blur", "高斯模糊", "高斯模糊", EffectType.FILTER,
+                                       [number("radius", "半径", 0, 0, 100, "int")])),
+        (SharpenEffect, _metadata("sharpen", "锐化", "锐化画面细节", EffectType.FILTER,
+                                  [number("amount", "强度", 0.0, 0.0, 5.0)])),
+        (TransformEffect, _metadata("transform", "变换", "缩放、旋转和平移画面", EffectType.MOTION,
+                                    [number("scale", "缩放", 1.0, 0.01, 100.0), number("rotation", "旋转", 0.0, -360.0, 360.0),
+                                     number("offset_x", "水平偏移", 0.0, None, None),
+                                     number("offset_y", "垂直偏移", 0.0, None, None)])),
+    ]
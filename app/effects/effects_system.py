@@ -17,8 +17,8 @@ import numpy as np
 from pathlib import Path
 
 from ..ai.interfaces import IAIService
-from ..core.video_processing_engine import OptimizedVideoProcessingEngine
-from ..core.hardware_acceleration import HardwareAcceleration
+from ..core.optimized_video_processing_engine import OptimizedVideoProcessingEngine
+from .effect_graph import EffectGraphCompiler, ExecutionPlan, apply_effect_instance
 
 logger = logging.getLogger(__name__)
 
@@ -180,6 +180,27 @@ class BaseEffect(ABC):
         """获取参数信息"""
         return self.metadata.parameters
 
+    # 执行计划编译信息（见 effect_graph），默认视为不可合并的整帧处理
+    def is_pointwise(self, parameters: Dict[str, Any]) -> bool:
+        """输出像素只取决于同位置输入像素的颜色（与位置、时间、随机数无关）"""
+        return False
+
+    def is_separable(self, parameters: Dict[str, Any]) -> bool:
+        """逐像素且各颜色通道互不影响，可合并为每通道256项查找表"""
+        return False
+
+    def is_identity(self, parameters: Dict[str, Any]) -> bool:
+        """该参数下输出与输入相同，可跳过"""
+        return False
+
+    def separable_kernel(self, parameters: Dict[str, Any]) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """可分离线性滤波的 (水平核, 垂直核)，相邻的可分离滤波合并为一次卷积"""
+        return None
+
+    def affine_matrix(self, parameters: Dict[str, Any], frame_size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """仿射变换的3x3矩阵（源坐标 -> 目标坐标），相邻的变换合并为一次warpAffine"""
+        return None
+
 
 class FilterEffect(BaseEffect):
     """滤镜效果基类"""
@@ -265,14 +286,17 @@ class EffectsManager:
         self.effect_metadata: Dict[str, EffectMetadata] = {}
         self.effect_instances: List[EffectInstance] = []
         self.templates: Dict[str, List[EffectInstance]] = {}
+        self.compiler = EffectGraphCompiler()
 
         self._load_builtin_effects()
         self._load_effect_templates()
 
     def _load_builtin_effects(self):
         """加载内置特效"""
-        # 这里应该加载所有内置特效
         logger.info("加载内置特效...")
+        from .builtin_effects import builtin_effect_definitions
+        for effect_class, metadata in builtin_effect_definitions():
+            self.register_effect(effect_class, metadata)
 
     def _load_effect_templates(self):
         """加载特效模板"""
@@ -339,46 +363,46 @@ class EffectsManager:
         return instance
 
     def apply_effects_to_frame(self, frame: np.ndarray, time: float) -> np.ndarray:
-        """应用所有特效到帧"""
-        result_frame = frame.copy()
+        """应用所有特效到帧（按编译后的执行计划）"""
+        plan = self.get_execution_plan(time, frame.shape, frame.dtype)
+        return plan.execute(frame, time)
 
-        # 按优先级排序特效实例
-        active_instances = [
-            inst for inst in self.effect_instances
-            if inst.enabled and inst.start_time <= time <= inst.end_time
-        ]
+    def get_execution_plan(self, time: float, frame_shape: Tuple[int, ...] = (1080, 1920, 3),
+                           dtype: Any = np.uint8) -> ExecutionPlan:
+        """当前时间生效的特效编译得到的执行计划（特效栈未变化时复用），describe() 返回各步骤耗时"""
+        return self.compiler.compile(self._active_instances(time), self.effects, frame_shape, dtype)
 
-        # 按优先级排序
-        active_instances.sort(
-            key=lambda x: self.effect_metadata.get(x.effect_id, EffectPriority.MEDIUM).priority.value,
-            reverse=True
-        )
+    def apply_effects_unfused(self, frame: np.ndarray, time: float) -> np.ndarray:
+        """逐个特效整帧处理（不经过执行计划，用于对照）"""
+        result_frame = frame.copy()
 
         # 应用特效
-        for instance in active_instances:
+        for instance in self._active_instances(time):
             try:
                 effect = self.effects.get(instance.effect_id)
                 if effect:
-                    # 临时设置特效参数
-                    old_params = effect.parameters.copy()
-                    effect.parameters = instance.parameters.copy()
-
-                    # 应用特效
-                    result_frame = effect.apply(result_frame, time)
-
-                    # 恢复原参数
-                    effect.parameters = old_params
-
-                    # 应用透明度和混合模式
-                    if instance.opacity < 1.0:
-                        alpha = instance.opacity
-                        result_frame = (frame * (1 - alpha) + result_frame * alpha).astype(np.uint8)
+                    result_frame = apply_effect_instance(effect, instance, result_frame, frame, time)
 
             except Exception as e:
                 logger.error(f"应用特效失败 {instance.effect_id}: {e}")
 
         return result_frame
 
+    def _active_instances(self, time: float) -> List[EffectInstance]:
+        """当前时间生效的特效实例，按优先级排序"""
+        active_instances = [
+            inst for inst in self.effect_instances
+            if inst.enabled and inst.start_time <= time <= inst.end_time
+        ]
+
+        # 按优先级排序
+        active_instances.sort(key=self._instance_priority, reverse=True)
+        return active_instances
+
+    def _instance_priority(self, instance: EffectInstance) -> int:
+        metadata = self.effect_metadata.get(instance.effect_id)
+        return (metadata.priority if metadata else EffectPriority.MEDIUM).value
+
     def remove_effect_instance(self, instance: EffectInstance):
         """移除特效实例"""
         if instance in self.effect_instances:
@@ -459,7 +483,7 @@ class EffectsManager:
             logger.error(f"加载特效配置失败: {e}")
             return False
 
-    def get_effect_suggestions(self, frame: np.ndarray,
+    async def get_effect_suggestions(self, frame: np.ndarray,
                               content_type: str = "general") -> List[EffectMetadata]:
         """获取AI特效建议"""
         if not self.ai_service:
@@ -482,8 +506,8 @@ class EffectsManager:
 
     def optimize_effects_order(self) -> None:
         """优化特效应用顺序"""
-        # 基于特效类型和优先级重新排序
-        pass
+        # 相邻特效的合并由执行计划编译器完成，这里只清空过期的计划
+        self.compiler.clear()
 
     def get_system_requirements(self) -> Dict[str, Any]:
         """获取系统要求"""
@@ -551,7 +551,7 @@ class FilterManager:
     def _adjust_brightness(self, frame: np.ndarray, value: int) -> np.ndarray:
         """调整亮度"""
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        hsv[:, :, 2] = np.clip(hsv[:, :, 2] + value, 0, 255)
+        hsv[:, :, 2] = np.clip(hsv[:, :, 2].astype(np.int16) + value, 0, 255)
         return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
     
     def _adjust_contrast(self, frame: np.ndarray, value: int) -> np.ndarray:
@@ -563,7 +563,7 @@ class FilterManager:
     def _adjust_saturation(self, frame: np.ndarray, value: int) -> np.ndarray:
         """调整饱和度"""
         hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        hsv[:, :, 1] = np.clip(hsv[:, :, 1] + value, 0, 255)
+        hsv[:, :, 1] = np.clip(hsv[:, :, 1].astype(np.int16) + value, 0, 255)
         return cv2.cvtColor(hsv, cv2.COLOR_HSV2BGR)
     
     def create_custom_filter(self, name: str, parameters: Dict[str, Any]) -> bool:
@@ -10,10 +10,18 @@ import numpy as np
 from typing import Dict, Any, List, Tuple, Optional
 from enum import Enum
 import math
-from dataclasses import dataclass
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, fields
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import os
 
+from ..utils.font_index import get_font_index, needs_cjk
+
+logger = logging.getLogger(__name__)
+
+
 class TextEffectType(Enum):
     """文字效果类型"""
     BASIC = "basic"
@@ -27,7 +35,7 @@ class TextEffectType(Enum):
     ICE = "ice"
     RAINBOW = "rainbow"
     HOLOGRAPHIC = "holographic"
-    3D = "3d"
+    THREE_D = "3d"
     TYPING = "typing"
     FADE_IN = "fade_in"
     SLIDE_IN = "slide_in"
@@ -106,11 +114,33 @@ class TextLayer:
     is_visible: bool = True
     blend_mode: str = "normal"
 
+@dataclass
+class TextRaster:
+    """裁剪到文字包围盒的渲染结果，偏移相对于文字位置的整数部分"""
+    offset: Tuple[int, int]
+    rgba: np.ndarray             # 直通alpha，用于生成整幅画布
+    premultiplied: np.ndarray    # 预乘alpha的RGB
+    inverse_alpha: np.ndarray    # 255 - alpha，扩展为3通道
+    
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.rgba.shape[1], self.rgba.shape[0]
+
 class TextEffectEngine:
-    """文字效果引擎"""
+    """文字效果引擎
+    
+    文字按（文本、样式、动画后的文本、位置小数部分）缓存为裁剪后的位图，
+    未变化的字幕不再重新绘制；合成时只处理文字所在的矩形区域。
+    """
+    
+    CANVAS_SIZE = (1920, 1080)  # render_text 返回的画布尺寸
     
-    def __init__(self):
+    def __init__(self, raster_cache_size: int = 256):
         self.font_cache = {}
+        self.raster_cache_size = raster_cache_size
+        self._raster_cache: "OrderedDict[Tuple, Optional[TextRaster]]" = OrderedDict()
+        self._raster_lock = threading.Lock()
+        self.raster_stats = {'hits': 0, 'renders': 0}
         self.effect_presets = self._create_effect_presets()
         self.animation_presets = self._create_animation_presets()
         self.text_templates = self._create_text_templates()
@@ -418,38 +448,133 @@ class TextEffectEngine:
     
     def render_text(self, text: str, style: TextStyle, position: Tuple[int, int],
                    animation: TextAnimation = None, current_time: float = 0.0) -> np.ndarray:
-        """渲染文字"""
-        # 创建PIL图像
-        img_size = (1920, 1080)  # 默认尺寸
-        pil_image = Image.new('RGBA', img_size, (0, 0, 0, 0))
-        draw = ImageDraw.Draw(pil_image)
-        
-        # 获取字体
-        font = self._get_font(style)
-        
-        # 计算文字尺寸
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        
-        # 处理多行文本
+        """渲染文字，返回整幅RGBA画布"""
+        width, height = self.CANVAS_SIZE
+        canvas = np.zeros((height, width, 4), dtype=np.uint8)
+        
+        raster = self.render_text_raster(text, style, position, animation, current_time)
+        if raster is not None:
+            region = self._raster_region(raster, position, width, height)
+            if region is not None:
+                (x0, y0, x1, y1), (sx, sy) = region
+                canvas[y0:y1, x0:x1] = raster.rgba[sy:sy + y1 - y0, sx:sx + x1 - x0]
+        
+        return canvas
+    
+    def render_text_raster(self, text: str, style: TextStyle, position: Tuple[float, float],
+                           animation: TextAnimation = None,
+                           current_time: float = 0.0) -> Optional[TextRaster]:
+        """渲染文字位图（带缓存），没有可见像素时返回 None"""
         lines = text.split('\n')
-        line_height = int(text_height * style.line_spacing)
+        if animation:
+            lines = [self._apply_text_animation(line, animation, current_time) for line in lines]
+        
+        # 完整文本和样式决定字体与行高，命中缓存时不再选择字体和排版；
+        # 位置的小数部分影响字形抗锯齿，整数部分只影响合成偏移
+        fraction = (position[0] - math.floor(position[0]), position[1] - math.floor(position[1]))
+        key = (text, tuple(lines), self._style_key(style), fraction)
+        
+        with self._raster_lock:
+            if key in self._raster_cache:
+                self._raster_cache.move_to_end(key)
+                self.raster_stats['hits'] += 1
+                return self._raster_cache[key]
+        
+        # 行高按完整文本计算，动画只改变显示的字符
+        font = self._get_font(style, text)
+        measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        bbox = measure.textbbox((0, 0), text, font=font)
+        line_height = int((bbox[3] - bbox[1]) * style.line_spacing)
+        raster = self._rasterize(lines, line_height, font, style, fraction, measure)
+        
+        with self._raster_lock:
+            self.raster_stats['renders'] += 1
+            self._raster_cache[key] = raster
+            while len(self._raster_cache) > self.raster_cache_size:
+                self._raster_cache.popitem(last=False)
+        return raster
+    
+    def clear_raster_cache(self):
+        """清空文字位图缓存"""
+        with self._raster_lock:
+            self._raster_cache.clear()
+    
+    def _rasterize(self, lines: List[str], line_height: int, font: ImageFont.ImageFont,
+                   style: TextStyle, fraction: Tuple[float, float],
+                   measure: ImageDraw.Draw) -> Optional[TextRaster]:
+        """在刚好容纳文字及阴影、光晕、轮廓的画布上绘制，再裁剪到非透明区域"""
+        boxes = [measure.textbbox((0, i * line_height), line, font=font)
+                 for i, line in enumerate(lines) if line]
+        if not boxes:
+            return None
+        
+        left = min(box[0] for box in boxes)
+        top = min(box[1] for box in boxes)
+        right = max(box[2] for box in boxes)
+        bottom = max(box[3] for box in boxes)
+        margin = (style.outline_width + style.glow_size + 3 * style.shadow_blur + 4
+                  + max(abs(style.shadow_offset[0]), abs(style.shadow_offset[1])))
+        
+        canvas_size = (right - left + 2 * margin + 1, bottom - top + 2 * margin + 1)
+        pil_image = Image.new('RGBA', canvas_size, (0, 0, 0, 0))
+        draw = ImageDraw.Draw(pil_image)
+        origin_x = margin - left
+        origin_y = margin - top
         
-        # 渲染每一行
         for i, line in enumerate(lines):
-            y_offset = i * line_height
-            line_position = (position[0], position[1] + y_offset)
-            
-            # 应用动画
-            if animation:
-                line = self._apply_text_animation(line, animation, current_time)
-            
-            # 渲染文字效果
+            line_position = (origin_x + fraction[0], origin_y + fraction[1] + i * line_height)
             self._render_text_line(draw, line, font, line_position, style)
         
-        # 转换为OpenCV格式
-        return np.array(pil_image)
+        crop = pil_image.getbbox()
+        if crop is None:
+            return None
+        
+        rgba = np.array(pil_image.crop(crop))
+        alpha = rgba[:, :, 3:4]
+        premultiplied = cv2.multiply(rgba[:, :, :3], np.repeat(alpha, 3, axis=2), scale=1 / 255.0)
+        inverse_alpha = np.repeat(255 - alpha, 3, axis=2)
+        return TextRaster(
+            offset=(crop[0] - origin_x, crop[1] - origin_y),
+            rgba=rgba,
+            premultiplied=premultiplied,
+            inverse_alpha=inverse_alpha
+        )
+    
+    @staticmethod
+    def _style_key(style: TextStyle) -> Tuple:
+        """样式的可哈希表示"""
+        def freeze(value):
+            if isinstance(value, (list, tuple)):
+                return tuple(freeze(item) for item in value)
+            return value
+        return tuple(freeze(getattr(style, field.name)) for field in fields(style))
+    
+    @staticmethod
+    def _raster_region(raster: TextRaster, position: Tuple[float, float], width: int,
+                       height: int) -> Optional[Tuple[Tuple[int, int, int, int], Tuple[int, int]]]:
+        """位图落在 width x height 范围内的矩形及其在位图中的起点"""
+        x = math.floor(position[0]) + raster.offset[0]
+        y = math.floor(position[1]) + raster.offset[1]
+        raster_width, raster_height = raster.size
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + raster_width, width), min(y + raster_height, height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1, y1), (x0 - x, y0 - y)
+    
+    def composite_text_raster(self, frame: np.ndarray, raster: TextRaster,
+                              position: Tuple[float, float]) -> np.ndarray:
+        """把位图以预乘alpha合成到帧上，只处理文字所在的矩形区域"""
+        region = self._raster_region(raster, position, frame.shape[1], frame.shape[0])
+        if region is None:
+            return frame
+        
+        (x0, y0, x1, y1), (sx, sy) = region
+        h, w = y1 - y0, x1 - x0
+        roi = frame[y0:y1, x0:x1, :3]
+        background = cv2.multiply(roi, raster.inverse_alpha[sy:sy + h, sx:sx + w], scale=1 / 255.0)
+        frame[y0:y1, x0:x1, :3] = cv2.add(background, raster.premultiplied[sy:sy + h, sx:sx + w])
+        return frame
     
     def _render_text_line(self, draw: ImageDraw.Draw, text: str, font: ImageFont.ImageFont,
                          position: Tuple[int, int], style: TextStyle):
@@ -462,7 +587,7 @@ class TextEffectEngine:
             shadow_y = y + style.shadow_offset[1]
             
             # 创建阴影层
-            shadow_layer = Image.new('RGBA', (2000, 2000), (0, 0, 0, 0))
+            shadow_layer = Image.new('RGBA', draw.im.size, (0, 0, 0, 0))
             shadow_draw = ImageDraw.Draw(shadow_layer)
             shadow_draw.text((shadow_x, shadow_y), text, font=font, fill=style.shadow_color)
             
@@ -480,7 +605,7 @@ class TextEffectEngine:
                 glow_color = (*style.glow_color, alpha)
                 
                 # 创建光晕层
-                glow_layer = Image.new('RGBA', (2000, 2000), (0, 0, 0, 0))
+                glow_layer = Image.new('RGBA', draw.im.size, (0, 0, 0, 0))
                 glow_draw = ImageDraw.Draw(glow_layer)
                 glow_draw.text((x-i, y-i), text, font=font, fill=glow_color)
                 glow_draw.text((x+i, y-i), text, font=font, fill=glow_color)
@@ -581,70 +706,29 @@ class TextEffectEngine:
         
         return text
     
-    def _get_font(self, style: TextStyle) -> ImageFont.ImageFont:
-        """获取字体"""
-        font_key = f"{style.font_family}_{style.font_size}_{style.bold}_{style.italic}"
+    def _get_font(self, style: TextStyle, text: Optional[str] = None) -> ImageFont.ImageFont:
+        """获取字体（文本含中日韩字符时使用包含这些字形的字体）"""
+        cjk = needs_cjk(text)
+        font_key = f"{style.font_family}_{style.font_size}_{style.bold}_{style.italic}_{cjk}"
         
         if font_key in self.font_cache:
             return self.font_cache[font_key]
         
         try:
-            # 尝试加载字体
-            font_path = self._find_font_file(style.font_family)
-            if font_path:
-                font = ImageFont.truetype(font_path, style.font_size)
+            face = get_font_index().resolve(style.font_family, style.bold, style.italic, text if cjk else None)
+            if face:
+                font = ImageFont.truetype(face.path, style.font_size, index=face.index)
             else:
-                # 使用默认字体
+                # 使用默认字体（Pillow 10.0 的默认字体为固定大小的位图字体）
                 font = ImageFont.load_default()
             
-            # 应用样式
-            if style.bold and style.italic:
-                # 这里可以尝试加载粗斜体字体
-                pass
-            elif style.bold:
-                # 这里可以尝试加载粗体字体
-                pass
-            elif style.italic:
-                # 这里可以尝试加载斜体字体
-                pass
-            
             self.font_cache[font_key] = font
             return font
             
         except Exception as e:
-            print(f"加载字体失败: {e}")
+            logger.warning(f"加载字体失败: {style.font_family} - {e}")
             return ImageFont.load_default()
     
-    def _find_font_file(self, font_family: str) -> Optional[str]:
-        """查找字体文件"""
-        # 常见字体路径
-        font_paths = [
-            "/System/Library/Fonts",  # macOS
-            "/usr/share/fonts",       # Linux
-            "C:/Windows/Fonts",       # Windows
-            "./fonts"                 # 本地字体目录
-        ]
-        
-        font_name_map = {
-            "Arial": "Arial.ttf",
-            "Times New Roman": "Times New Roman.ttf",
-            "Helvetica": "Helvetica.ttf",
-            "Georgia": "Georgia.ttf",
-            "Verdana": "Verdana.ttf",
-            "Courier New": "Courier New.ttf",
-            "Impact": "Impact.ttf",
-            "Comic Sans MS": "Comic Sans MS.ttf"
-        }
-        
-        font_filename = font_name_map.get(font_family, font_family + ".ttf")
-        
-        for font_path in font_paths:
-            full_path = os.path.join(font_path, font_filename)
-            if os.path.exists(full_path):
-                return full_path
-        
-        return None
-    
     def create_text_layer(self, text: str, style: TextStyle, position: Tuple[int, int],
                         animation: TextAnimation = None) -> TextLayer:
         """创建文字图层"""
@@ -661,30 +745,18 @@ class TextEffectEngine:
         if not text_layer.is_visible:
             return frame
         
-        # 渲染文字
-        text_image = self.render_text(
+        # 渲染文字（缓存的裁剪位图）
+        raster = self.render_text_raster(
             text_layer.text,
             text_layer.style,
             text_layer.position,
             text_layer.animation,
             current_time
         )
+        if raster is None:
+            return frame
         
-        # 转换为OpenCV格式
-        if text_image.shape[2] == 4:  # RGBA
-            # 分离alpha通道
-            rgb = text_image[:, :, :3]
-            alpha = text_image[:, :, 3] / 255.0
-            
-            # 应用透明度
-            for i in range(3):
-                frame[:, :, i] = frame[:, :, i] * (1 - alpha) + rgb[:, :, i] * alpha
-        else:
-            # 直接叠加
-            mask = np.any(text_image > 0, axis=2)
-            frame[mask] = text_image[mask]
-        
-        return frame
+        return self.composite_text_raster(frame, raster, text_layer.position)
     
     def create_text_template(self, name: str, text_layers: List[TextLayer]) -> bool:
         """创建文字模板"""
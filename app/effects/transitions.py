@@ -9,10 +9,21 @@ import cv2
 import numpy as np
 from typing import Dict, Any, List, Tuple, Optional
 from enum import Enum
+import os
 import math
-from dataclasses import dataclass
+import logging
+import zlib
+import threading
+import subprocess
+from collections import OrderedDict
+from dataclasses import dataclass, replace
 from concurrent.futures import ThreadPoolExecutor
 
+from ..core.decoder_pool import get_decoder_pool
+from ..utils.probe_cache import find_stream, get_probe_cache
+
+logger = logging.getLogger(__name__)
+
 class TransitionType(Enum):
     """转场类型"""
     FADE = "fade"
@@ -56,13 +67,44 @@ class TransitionParameters:
     border_color: Tuple[int, int, int] = (0, 0, 0)  # 边框颜色
     feather_edges: bool = True  # 边缘羽化
     reverse: bool = False  # 反向播放
+    seed: Optional[int] = None  # 溶解噪声种子，不同转场使用不同图案
+
+@dataclass
+class GeometryField:
+    """归一化几何场
+
+    values 为 float32 场，某像素在进度 progress 时属于目标画面当且仅当 values <= progress；
+    ramp 为羽化时每单位场值对应的遮罩变化量（约等于像素尺度 / 羽化宽度）；
+    extent 为场的最大值，羽化斜坡按它展开，保证进度1时整帧都是目标画面。
+    """
+    values: np.ndarray
+    ramp: float
+    extent: float = 1.0
+
+
+# 羽化过渡带宽度（像素），与原高斯模糊 (15, 15) 的过渡宽度相当
+FEATHER_PIXELS = 15.0
+# 溶解羽化：每个像素在这段进度内逐渐显现
+DISSOLVE_SOFTNESS = 0.1
+
 
 class TransitionEngine:
-    """转场引擎"""
+    """转场引擎
+
+    形状类转场（圆形、星形、心形、中心擦除、线性擦除）和溶解的遮罩由按 (场类型, 分辨率)
+    缓存的归一化几何场/噪声场生成：每帧只需对缓存的场做一次阈值或线性斜坡，
+    再用一次 uint8 融合完成混合。
+    """
     
-    def __init__(self):
+    def __init__(self, field_cache_size: int = 8):
         self.transition_registry = {}
+        self.field_cache_size = field_cache_size
+        self._field_cache: "OrderedDict[Tuple[str, int, int, Optional[int]], GeometryField]" = OrderedDict()
+        self._field_lock = threading.Lock()
+        self.field_stats = {'hits': 0, 'builds': 0}
+        self.field_builders = {}
         self._initialize_transitions()
+        self._initialize_field_builders()
     
     def _initialize_transitions(self):
         """初始化转场效果"""
@@ -85,6 +127,17 @@ class TransitionEngine:
         self.transition_registry[TransitionType.DOOR] = self._door_transition
         self.transition_registry[TransitionType.SHUTTER] = self._shutter_transition
     
+    def _initialize_field_builders(self):
+        """初始化几何场构建函数"""
+        self.field_builders["radial"] = self._build_radial_field
+        self.field_builders["star"] = self._build_star_field
+        self.field_builders["heart"] = self._build_heart_field
+        self.field_builders["noise"] = self._build_noise_field
+        self.field_builders["ramp_x"] = lambda h, w: self._build_linear_field(h, w, 1, False)
+        self.field_builders["ramp_x_reverse"] = lambda h, w: self._build_linear_field(h, w, 1, True)
+        self.field_builders["ramp_y"] = lambda h, w: self._build_linear_field(h, w, 0, False)
+        self.field_builders["ramp_y_reverse"] = lambda h, w: self._build_linear_field(h, w, 0, True)
+    
     def apply_transition(self, from_frame: np.ndarray, to_frame: np.ndarray,
                         transition_type: TransitionType, progress: float,
                         parameters: TransitionParameters = None) -> np.ndarray:
@@ -171,38 +224,10 @@ class TransitionEngine:
     def _wipe_transition(self, from_frame: np.ndarray, to_frame: np.ndarray,
                         progress: float, parameters: TransitionParameters) -> np.ndarray:
         """擦除转场"""
-        height, width = from_frame.shape[:2]
-        result = np.zeros_like(from_frame)
-        
-        # 创建擦除遮罩
-        mask = np.zeros((height, width), dtype=np.float32)
-        
-        if parameters.direction == TransitionDirection.LEFT_TO_RIGHT:
-            mask[:, :int(width * progress)] = 1.0
-        elif parameters.direction == TransitionDirection.RIGHT_TO_LEFT:
-            mask[:, int(width * (1 - progress)):] = 1.0
-        elif parameters.direction == TransitionDirection.TOP_TO_BOTTOM:
-            mask[:int(height * progress), :] = 1.0
-        elif parameters.direction == TransitionDirection.BOTTOM_TO_TOP:
-            mask[int(height * (1 - progress)):, :] = 1.0
-        elif parameters.direction == TransitionDirection.CENTER_OUT:
-            center_x, center_y = width // 2, height // 2
-            max_radius = math.sqrt(center_x**2 + center_y**2)
-            current_radius = max_radius * progress
-            
-            Y, X = np.ogrid[:height, :width]
-            distance = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
-            mask = (distance <= current_radius).astype(np.float32)
-        
-        # 应用羽化
-        if parameters.feather_edges:
-            mask = cv2.GaussianBlur(mask, (15, 15), 5)
-        
-        # 混合画面
-        for i in range(3):
-            result[:, :, i] = from_frame[:, :, i] * (1 - mask) + to_frame[:, :, i] * mask
-        
-        return result.astype(np.uint8)
+        field_name = self._WIPE_FIELDS.get(parameters.direction)
+        if field_name is None:
+            return from_frame.copy()
+        return self._field_transition(from_frame, to_frame, progress, parameters, field_name)
     
     def _zoom_transition(self, from_frame: np.ndarray, to_frame: np.ndarray,
                         progress: float, parameters: TransitionParameters) -> np.ndarray:
@@ -303,115 +328,32 @@ class TransitionEngine:
     def _dissolve_transition(self, from_frame: np.ndarray, to_frame: np.ndarray,
                            progress: float, parameters: TransitionParameters) -> np.ndarray:
         """溶解转场"""
-        height, width = from_frame.shape[:2]
-        
-        # 创建噪声遮罩
-        noise = np.random.random((height, width))
-        threshold = progress
+        field = self.get_field("noise", *from_frame.shape[:2], seed=parameters.seed)
         
-        mask = (noise < threshold).astype(np.float32)
-        
-        # 应用羽化
         if parameters.feather_edges:
-            mask = cv2.GaussianBlur(mask, (5, 5), 2)
-        
-        # 混合画面
-        result = np.zeros_like(from_frame)
-        for i in range(3):
-            result[:, :, i] = from_frame[:, :, i] * (1 - mask) + to_frame[:, :, i] * mask
-        
-        return result.astype(np.uint8)
+            # 像素在 DISSOLVE_SOFTNESS 的进度区间内渐显；进度0/1时分别完全为源/目标画面
+            scale = 255.0 / DISSOLVE_SOFTNESS
+            mask = cv2.addWeighted(field.values, -scale, field.values, 0,
+                                   scale * progress * (1 + DISSOLVE_SOFTNESS), dtype=cv2.CV_8U)
+            return self._blend(from_frame, to_frame, mask)
+        
+        mask = cv2.compare(field.values, float(progress), cv2.CMP_LT)
+        return self._composite(from_frame, to_frame, mask)
     
     def _circle_transition(self, from_frame: np.ndarray, to_frame: np.ndarray,
                           progress: float, parameters: TransitionParameters) -> np.ndarray:
         """圆形转场"""
-        height, width = from_frame.shape[:2]
-        center_x, center_y = width // 2, height // 2
-        
-        # 创建圆形遮罩
-        mask = np.zeros((height, width), dtype=np.float32)
-        max_radius = math.sqrt(center_x**2 + center_y**2)
-        current_radius = max_radius * progress
-        
-        Y, X = np.ogrid[:height, :width]
-        distance = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
-        mask = (distance <= current_radius).astype(np.float32)
-        
-        # 应用羽化
-        if parameters.feather_edges:
-            mask = cv2.GaussianBlur(mask, (15, 15), 5)
-        
-        # 混合画面
-        result = np.zeros_like(from_frame)
-        for i in range(3):
-            result[:, :, i] = from_frame[:, :, i] * (1 - mask) + to_frame[:, :, i] * mask
-        
-        return result.astype(np.uint8)
+        return self._field_transition(from_frame, to_frame, progress, parameters, "radial")
     
     def _star_transition(self, from_frame: np.ndarray, to_frame: np.ndarray,
                         progress: float, parameters: TransitionParameters) -> np.ndarray:
         """星形转场"""
-        height, width = from_frame.shape[:2]
-        center_x, center_y = width // 2, height // 2
-        
-        # 创建星形遮罩
-        mask = np.zeros((height, width), dtype=np.float32)
-        max_radius = math.sqrt(center_x**2 + center_y**2)
-        current_radius = max_radius * progress
-        
-        Y, X = np.ogrid[:height, :width]
-        distance = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
-        
-        # 计算角度
-        angle = np.arctan2(Y - center_y, X - center_x)
-        
-        # 创建星形效果
-        star_points = 5
-        star_factor = (np.cos(star_points * angle) + 1) / 2
-        effective_radius = current_radius * (0.5 + 0.5 * star_factor)
-        
-        mask = (distance <= effective_radius).astype(np.float32)
-        
-        # 应用羽化
-        if parameters.feather_edges:
-            mask = cv2.GaussianBlur(mask, (15, 15), 5)
-        
-        # 混合画面
-        result = np.zeros_like(from_frame)
-        for i in range(3):
-            result[:, :, i] = from_frame[:, :, i] * (1 - mask) + to_frame[:, :, i] * mask
-        
-        return result.astype(np.uint8)
+        return self._field_transition(from_frame, to_frame, progress, parameters, "star")
     
     def _heart_transition(self, from_frame: np.ndarray, to_frame: np.ndarray,
                          progress: float, parameters: TransitionParameters) -> np.ndarray:
         """心形转场"""
-        height, width = from_frame.shape[:2]
-        center_x, center_y = width // 2, height // 2
-        
-        # 创建心形遮罩
-        mask = np.zeros((height, width), dtype=np.float32)
-        scale = min(width, height) / 4
-        current_scale = scale * progress
-        
-        Y, X = np.ogrid[:height, :width]
-        x = (X - center_x) / current_scale
-        y = (Y - center_y) / current_scale
-        
-        # 心形方程
-        heart_equation = (x**2 + y**2 - 1)**3 - x**2 * y**3
-        mask = (heart_equation <= 0).astype(np.float32)
-        
-        # 应用羽化
-        if parameters.feather_edges:
-            mask = cv2.GaussianBlur(mask, (15, 15), 5)
-        
-        # 混合画面
-        result = np.zeros_like(from_frame)
-        for i in range(3):
-            result[:, :, i] = from_frame[:, :, i] * (1 - mask) + to_frame[:, :, i] * mask
-        
-        return result.astype(np.uint8)
+        return self._field_transition(from_frame, to_frame, progress, parameters, "heart")
     
     def _glitch_transition(self, from_frame: np.ndarray, to_frame: np.ndarray,
                           progress: float, parameters: TransitionParameters) -> np.ndarray:
@@ -579,6 +521,240 @@ class TransitionEngine:
                 result[y_start:y_end, :] = from_frame[y_start:y_end, :]
         
         return result
+    
+    # 几何场缓存
+    _WIPE_FIELDS = {
+        TransitionDirection.LEFT_TO_RIGHT: "ramp_x",
+        TransitionDirection.RIGHT_TO_LEFT: "ramp_x_reverse",
+        TransitionDirection.TOP_TO_BOTTOM: "ramp_y",
+        TransitionDirection.BOTTOM_TO_TOP: "ramp_y_reverse",
+        TransitionDirection.CENTER_OUT: "radial",
+    }
+    
+    _TRANSITION_FIELDS = {
+        TransitionType.CIRCLE: "radial",
+        TransitionType.STAR: "star",
+        TransitionType.HEART: "heart",
+        TransitionType.DISSOLVE: "noise",
+    }
+    
+    def prepare_transition(self, transition_type: TransitionType, height: int, width: int,
+                           parameters: TransitionParameters = None):
+        """预先计算转场需要的几何场（如渲染开始前调用），避免首帧卡顿"""
+        if transition_type == TransitionType.WIPE:
+            direction = (parameters or TransitionParameters()).direction
+            field_name = self._WIPE_FIELDS.get(direction)
+        else:
+            field_name = self._TRANSITION_FIELDS.get(transition_type)
+        if field_name:
+            seed = parameters.seed if parameters is not None and field_name == "noise" else None
+            self.get_field(field_name, height, width, seed=seed)
+    
+    def get_field(self, name: str, height: int, width: int, seed: Optional[int] = None) -> GeometryField:
+        """获取 (场类型, 分辨率, 种子) 的几何场，首次使用时计算并缓存（LRU）
+
+        seed 只对噪声场有意义：不同种子生成不同的溶解图案。
+        """
+        key = (name, height, width, seed)
+        with self._field_lock:
+            field = self._field_cache.get(key)
+            if field is not None:
+                self._field_cache.move_to_end(key)
+                self.field_stats['hits'] += 1
+                return field
+        
+        # 在锁外计算：4K 分辨率下心形场需要数百毫秒
+        builder = self.field_builders[name]
+        field = builder(height, width) if seed is None else builder(height, width, seed)
+        with self._field_lock:
+            self._field_cache[key] = field
+            self._field_cache.move_to_end(key)
+            self.field_stats['builds'] += 1
+            while len(self._field_cache) > self.field_cache_size:
+                self._field_cache.popitem(last=False)
+        return field
+    
+    def clear_field_cache(self):
+        """清空几何场缓存"""
+        with self._field_lock:
+            self._field_cache.clear()
+    
+    def _field_transition(self, from_frame: np.ndarray, to_frame: np.ndarray, progress: float,
+                          parameters: TransitionParameters, field_name: str) -> np.ndarray:
+        """按几何场生成遮罩并混合：羽化时为线性斜坡，否则为阈值"""
+        height, width = from_frame.shape[:2]
+        field = self.get_field(field_name, height, width)
+        
+        if parameters.feather_edges:
+            # 斜坡宽度 1 / ramp，起点随进度从 0 移到 extent + 宽度：进度0时遮罩全为0，进度1时全为255
+            scale = 255.0 * field.ramp
+            mask = cv2.addWeighted(field.values, -scale, field.values, 0,
+                                   scale * progress * (field.extent + 1.0 / field.ramp), dtype=cv2.CV_8U)
+            return self._blend(from_frame, to_frame, self._full_mask(mask, height, width))
+        
+        mask = cv2.compare(field.values, float(progress), cv2.CMP_LE)
+        return self._composite(from_frame, to_frame, self._full_mask(mask, height, width))
+    
+    @staticmethod
+    def _full_mask(mask: np.ndarray, height: int, width: int) -> np.ndarray:
+        """线性场只存一行/一列，展开为整帧遮罩"""
+        if mask.shape != (height, width):
+            mask = np.ascontiguousarray(np.broadcast_to(mask, (height, width)))
+        return mask
+    
+    @staticmethod
+    def _expand_mask(mask: np.ndarray, frame: np.ndarray) -> np.ndarray:
+        channels = 1 if frame.ndim == 2 else frame.shape[2]
+        if channels == 1:
+            return mask.reshape(frame.shape)
+        if channels == 3:
+            return cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
+        return cv2.merge([mask] * channels)
+    
+    @staticmethod
+    def _composite(from_frame: np.ndarray, to_frame: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """二值遮罩：遮罩内取目标画面"""
+        result = from_frame.copy()
+        cv2.copyTo(to_frame, mask, result)
+        return result
+    
+    def _blend(self, from_frame: np.ndarray, to_frame: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        """uint8 遮罩（0-255）融合：from * (1 - m) + to * m，全程 uint8 运算"""
+        scale = 1.0 / 255.0
+        inverse = self._expand_mask(cv2.bitwise_not(mask), from_frame)
+        mask = self._expand_mask(mask, from_frame)
+        result = cv2.multiply(from_frame, inverse, scale=scale)
+        cv2.multiply(to_frame, mask, dst=mask, scale=scale)
+        return cv2.add(result, mask, dst=result)
+    
+    @staticmethod
+    def _center_grid(height: int, width: int) -> Tuple[np.ndarray, np.ndarray, float]:
+        """以画面中心为原点的坐标网格和中心到角点的距离"""
+        center_x, center_y = width // 2, height // 2
+        Y, X = np.ogrid[:height, :width]
+        dx = (X - center_x).astype(np.float32)
+        dy = (Y - center_y).astype(np.float32)
+        max_radius = max(math.sqrt(center_x**2 + center_y**2), 1.0)
+        return dx, dy, max_radius
+    
+    @classmethod
+    def _build_radial_field(cls, height: int, width: int) -> GeometryField:
+        """圆形：到中心的距离 / 最大半径"""
+        dx, dy, max_radius = cls._center_grid(height, width)
+        values = np.hypot(dx, dy) / np.float32(max_radius)
+        return GeometryField(values.astype(np.float32), max_radius / FEATHER_PIXELS)
+    
+    @classmethod
+    def _build_star_field(cls, height: int, width: int) -> GeometryField:
+        """五角星：距离 / (最大半径 * 角度调制)"""
+        dx, dy, max_radius = cls._center_grid(height, width)
+        distance = np.hypot(dx, dy)
+        angle = np.arctan2(dy, dx)
+        
+        star_points = 5
+        star_factor = (np.cos(star_points * angle) + 1) / 2
+        values = distance / (np.float32(max_radius) * (0.5 + 0.5 * star_factor))
+        return GeometryField(values.astype(np.float32), max_radius / FEATHER_PIXELS, float(values.max()))
+    
+    @classmethod
+    def _build_heart_field(cls, height: int, width: int) -> GeometryField:
+        """心形：(x²+y²-1)³ - x²y³ <= 0 在缩放 progress 后包含该像素的最小 progress
+        
+        心形对中心是星形区域，沿每个方向只有一个边界半径 r(θ)，
+        因此场值 = 像素半径 / r(θ)。r(θ) 先在角度表上二分求解再插值。
+        """
+        dx, dy, _ = cls._center_grid(height, width)
+        scale = max(min(width, height) / 4, 1e-6)
+        
+        # 沿方向 θ：((r²-1)³) / r⁵ = cos²θ·sin³θ，左侧关于 r 单调递增
+        angles = np.linspace(-math.pi, math.pi, 4097)
+        target = np.cos(angles)**2 * np.sin(angles)**3
+        low = np.full_like(angles, 0.05)
+        high = np.full_like(angles, 4.0)
+        for _ in range(60):
+            mid = (low + high) / 2
+            below = (mid**2 - 1)**3 / mid**5 <= target
+            low = np.where(below, mid, low)
+            high = np.where(below, high, mid)
+        boundary = (low + high) / 2
+        
+        radius = np.hypot(dx, dy) / np.float32(scale)
+        angle = np.arctan2(dy, dx)
+        values = radius / np.interp(angle, angles, boundary).astype(np.float32)
+        return GeometryField(values.astype(np.float32), scale / FEATHER_PIXELS, float(values.max()))
+    
+    @staticmethod
+    def _build_noise_field(height: int, width: int, seed: Optional[int] = None) -> GeometryField:
+        """溶解噪声：每个像素的显现进度，整个转场保持同一噪声图案"""
+        values = np.random.default_rng(seed).random((height, width), dtype=np.float32)
+        return GeometryField(values, 1.0 / DISSOLVE_SOFTNESS)
+    
+    @staticmethod
+    def _build_linear_field(height: int, width: int, axis: int, reverse: bool) -> GeometryField:
+        """线性擦除：第 i 行/列在 progress >= (i + 1) / n 时被擦除（只存一行/一列）"""
+        size = width if axis == 1 else height
+        index = np.arange(size, dtype=np.float32)
+        values = (size - index) / size if reverse else (index + 1) / size
+        shape = (1, size) if axis == 1 else (size, 1)
+        return GeometryField(values.astype(np.float32).reshape(shape), size / FEATHER_PIXELS)
+
+# 转场片段与两侧片段共用的编码参数，流复制拼接要求编码器和像素格式一致
+SEGMENT_ENCODE_ARGS = ("-c:v", "libx264", "-pix_fmt", "yuv420p", "-c:a", "aac")
+
+
+class FFmpegFrameWriter:
+    """通过管道把 BGR 帧送入 ffmpeg 编码，接口与 cv2.VideoWriter 兼容
+
+    audio_inputs 为 [(文件, 起始秒, 时长)]：两段音频时交叉淡化，一段时直接截取，
+    使转场片段与两侧流复制的片段拥有相同的音视频流布局。
+    """
+    
+    def __init__(self, output_path: str, width: int, height: int, fps: float,
+                 ffmpeg_path: str = "ffmpeg",
+                 audio_inputs: Optional[List[Tuple[str, float, float]]] = None):
+        self.output_path = output_path
+        self.returncode: Optional[int] = None
+        
+        cmd = [
+            ffmpeg_path, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}", "-r", f"{fps:.6g}",
+            "-i", "-"
+        ]
+        for path, start, duration in audio_inputs or []:
+            cmd.extend(["-ss", f"{start:.6f}", "-t", f"{duration:.6f}", "-i", path])
+        
+        cmd.extend(["-map", "0:v"])
+        if audio_inputs and len(audio_inputs) == 2:
+            duration = min(audio_inputs[0][2], audio_inputs[1][2])
+            cmd.extend(["-filter_complex", f"[1:a][2:a]acrossfade=d={duration:.6f}[a]", "-map", "[a]"])
+        elif audio_inputs:
+            cmd.extend(["-map", "1:a"])
+        
+        cmd.extend(SEGMENT_ENCODE_ARGS)
+        cmd.append(output_path)
+        
+        try:
+            self._process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+        except OSError as e:
+            logger.error(f"启动ffmpeg失败: {e}")
+            self._process = None
+    
+    def isOpened(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+    
+    def write(self, frame: np.ndarray):
+        self._process.stdin.write(np.ascontiguousarray(frame).tobytes())
+    
+    def release(self) -> bool:
+        """结束编码，返回是否成功"""
+        if self._process is None:
+            return False
+        _, stderr = self._process.communicate()
+        self.returncode = self._process.returncode
+        if self.returncode != 0:
+            logger.error(f"转场片段编码失败: {self.output_path} - {stderr.decode(errors='ignore').strip()}")
+        return self.returncode == 0
 
 class TransitionManager:
     """转场管理器"""
@@ -672,13 +848,18 @@ class TransitionManager:
     def apply_preset(self, from_frame: np.ndarray, to_frame: np.ndarray,
                     preset_name: str, progress: float) -> np.ndarray:
         """应用转场预设"""
-        if preset_name not in self.transition_presets:
-            return self.engine.apply_transition(from_frame, to_frame, TransitionType.FADE, progress)
-        
-        preset = self.transition_presets[preset_name]
-        return self.engine.apply_transition(
-            from_frame, to_frame, preset["type"], progress, preset["parameters"]
-        )
+        transition_type, parameters = self.resolve_preset(preset_name)
+        return self.engine.apply_transition(from_frame, to_frame, transition_type, progress, parameters)
+    
+    def resolve_preset(self, preset_name: str) -> Tuple[TransitionType, TransitionParameters]:
+        """预设名或转场类型值（如 "circle"）对应的转场，未知名称使用淡入淡出"""
+        preset = self.transition_presets.get(preset_name)
+        if preset is not None:
+            return preset["type"], preset["parameters"]
+        try:
+            return TransitionType(preset_name), TransitionParameters()
+        except ValueError:
+            return TransitionType.FADE, TransitionParameters()
     
     def get_preset_list(self) -> List[Dict[str, Any]]:
         """获取转场预设列表"""
@@ -694,15 +875,117 @@ class TransitionManager:
     
     def render_transition_sequence(self, from_video: str, to_video: str,
                                   output_path: str, preset_name: str,
-                                  duration: float = 1.0) -> bool:
-        """渲染转场序列"""
+                                  duration: float = 1.0, from_end: Optional[float] = None,
+                                  to_start: float = 0.0, ffmpeg_path: str = "ffmpeg",
+                                  writer: Any = None) -> bool:
+        """渲染转场序列
+        
+        只解码两段素材的重叠窗口：出场素材 [from_end - duration, from_end) 与入场素材
+        [to_start, to_start + duration)。两路解码器同步顺序读取（各自只在起点定位一次），
+        逐帧应用转场后写出一个短片段，导出时拼接在两侧流复制的片段之间，只有转场帧被重新编码。
+        
+        from_end 默认为出场素材结尾；输出帧率和分辨率与出场素材一致。
+        writer 为 cv2.VideoWriter 兼容对象，默认通过 ffmpeg 编码 H.264 并交叉淡化两段音频。
+        """
+        transition_type, parameters = self.resolve_preset(preset_name)
+        if parameters.seed is None:
+            # 每处转场使用各自的溶解图案，同一转场重新渲染时图案不变
+            identity = f"{os.path.abspath(from_video)}|{os.path.abspath(to_video)}|{from_end}|{to_start}"
+            parameters = replace(parameters, seed=zlib.crc32(identity.encode("utf-8")))
+        pool = get_decoder_pool()
+        outgoing = pool.acquire(from_video)
+        incoming = pool.acquire(to_video)
+        
         try:
-            # 这里实现完整的视频转场渲染
-            # 需要处理视频读取、转场应用、写入等
-            return True
+            if not outgoing.isOpened() or not incoming.isOpened():
+                raise IOError(f"无法打开转场素材: {from_video} / {to_video}")
+            
+            fps = outgoing.fps or 30.0
+            incoming_fps = incoming.fps or fps
+            if from_end is None:
+                from_end = outgoing.frame_count / fps
+            from_start = max(0.0, from_end - duration)
+            frame_count = int(round((from_end - from_start) * fps))
+            if frame_count <= 0:
+                raise ValueError(f"转场时长无效: {duration}")
+            
+            first_outgoing = int(round(from_start * fps))
+            first_incoming = int(round(to_start * incoming_fps))
+            outgoing.seek(first_outgoing)
+            incoming.seek(first_incoming)
+            
+            from_frame = to_frame = None
+            frames_written = 0
+            for index in range(frame_count):
+                # 按输出时间换算两路素材的帧号，只向前顺序读取
+                from_frame = self._read_frame(outgoing, first_outgoing + index, from_frame)
+                to_frame = self._read_frame(incoming, first_incoming + int(index * incoming_fps / fps), to_frame)
+                if from_frame is None or to_frame is None:
+                    break
+                
+                height, width = from_frame.shape[:2]
+                if writer is None:
+                    audio_inputs = self._transition_audio(from_video, from_start, to_video, to_start,
+                                                          frame_count / fps)
+                    writer = FFmpegFrameWriter(output_path, width, height, fps, ffmpeg_path, audio_inputs)
+                    if not writer.isOpened():
+                        raise IOError(f"无法创建转场片段: {output_path}")
+                if index == 0:
+                    self.engine.prepare_transition(transition_type, height, width, parameters)
+                
+                if to_frame.shape != from_frame.shape:
+                    to_frame = cv2.resize(to_frame, (width, height))
+                progress = (index + 1) / (frame_count + 1)
+                writer.write(self.engine.apply_transition(from_frame, to_frame, transition_type,
+                                                          progress, parameters))
+                frames_written += 1
+            
+            if frames_written < frame_count:
+                logger.warning(f"转场素材帧数不足: {frames_written}/{frame_count}")
+            
+            success = frames_written > 0
+            if writer is not None:
+                success = writer.release() is not False and success
+            if not success and isinstance(writer, FFmpegFrameWriter) and os.path.exists(output_path):
+                os.remove(output_path)
+            return success
         except Exception as e:
-            print(f"转场渲染失败: {e}")
+            logger.error(f"转场渲染失败: {e}")
+            if writer is not None:
+                writer.release()
+                if isinstance(writer, FFmpegFrameWriter) and os.path.exists(output_path):
+                    os.remove(output_path)
             return False
+        finally:
+            outgoing.release()
+            incoming.release()
+    
+    @staticmethod
+    def _read_frame(handle, frame_index: int, previous: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """顺序读取到 frame_index：跳过的帧只 grab 不解码，帧号未前进时复用上一帧"""
+        while handle.position < frame_index:
+            if not handle.grab():
+                return None
+        if handle.position > frame_index:
+            return previous
+        ret, frame = handle.read()
+        return frame if ret else None
+    
+    @staticmethod
+    def _transition_audio(from_video: str, from_start: float, to_video: str, to_start: float,
+                          duration: float) -> List[Tuple[str, float, float]]:
+        """有音频的素材的重叠窗口
+
+        只有一段素材有音频时，转场片段无法同时与两侧片段的流布局一致，抛出 ValueError（退化为硬切）
+        """
+        inputs = []
+        for path, start in ((from_video, from_start), (to_video, to_start)):
+            data = get_probe_cache().try_probe(path)
+            if data and find_stream(data, "audio"):
+                inputs.append((path, start, duration))
+        if len(inputs) == 1:
+            raise ValueError(f"转场两侧素材的音频流不一致: {from_video} / {to_video}")
+        return inputs
 
 # 全局转场管理器实例
 transition_manager = TransitionManager()
\ No newline at end of file
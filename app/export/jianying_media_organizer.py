@@ -7,8 +7,6 @@
 
 import os
 import json
-import shutil
-import hashlib
 import logging
 from typing import Dict, List, Optional, Any, Tuple
 from dataclasses import dataclass
@@ -16,6 +14,9 @@ from pathlib import Path
 from datetime import datetime
 
 from .jianying_project_parser import JianYingProject, JianYingTrack, JianYingClip
+from ..utils.file_fingerprint import get_fingerprint_service
+from ..utils.probe_cache import find_stream, get_probe_cache, parse_frame_rate
+from ..utils.media_packaging import place_file, place_files
 
 
 @dataclass
@@ -31,7 +32,8 @@ class MediaFile:
     resolution: Tuple[int, int] = (0, 0)
     frame_rate: float = 0
     audio_channels: int = 0
-    checksum: str = ""
+    checksum: str = ""       # 采样指纹，用于识别重复素材
+    full_checksum: str = ""  # 完整MD5，用于复制后校验
     created_at: str = ""
     modified_at: str = ""
 
@@ -63,6 +65,11 @@ class JianYingMediaOrganizer:
         
         # 媒体文件数据库
         self.media_database = {}
+        
+        # 文件放置设置：同一文件系统时使用reflink/硬链接，否则并行复制
+        self.use_links = True
+        self.copy_workers = 4
+        self.last_organize_stats: Dict[str, Any] = {}
     
     def organize_media_files(self, project: JianYingProject, output_dir: str) -> List[str]:
         """
@@ -87,13 +94,45 @@ class JianYingMediaOrganizer:
             # 收集所有媒体文件
             media_files = self._collect_media_files(project)
             
-            # 复制和组织文件
+            # 先确定目标路径，再并行放置文件（同一文件系统时使用reflink/硬链接）
+            targets = {}
+            used_targets = set()
+            for media_file in media_files:
+                target_path = self._get_target_path(media_file, output_dir)
+                if target_path:
+                    # 同名文件在同一秒内生成相同的目标名，追加序号避免互相覆盖
+                    stem, ext = os.path.splitext(target_path)
+                    suffix = 1
+                    while target_path in used_targets:
+                        target_path = f"{stem}_{suffix}{ext}"
+                        suffix += 1
+                    used_targets.add(target_path)
+                    targets[media_file.id] = target_path
+            
+            placed, stats = place_files(
+                [(media_file.original_path, targets[media_file.id])
+                 for media_file in media_files if media_file.id in targets],
+                allow_link=self.use_links,
+                max_workers=self.copy_workers
+            )
+            self.last_organize_stats = stats.to_dict()
+            self.logger.info(f"媒体文件放置完成: {stats.files} 个文件, 耗时 {stats.elapsed_time:.2f}s, "
+                             f"写入 {stats.bytes_written} 字节, 链接 {stats.bytes_linked} 字节")
+            
+            # 完整哈希不阻塞放置：已缓存的直接记录，其余在后台计算，校验时按需补全
+            fingerprint_service = get_fingerprint_service()
+            for media_file in media_files:
+                if targets.get(media_file.id) in placed:
+                    media_file.full_checksum = fingerprint_service.get_cached_full_hash(media_file.original_path) or ""
+                    if not media_file.full_checksum:
+                        fingerprint_service.request_full_hash(media_file.original_path)
+            
+            # 组织文件
             for media_file in media_files:
                 try:
-                    # 复制文件
-                    dest_path = self._copy_media_file(media_file, output_dir)
+                    dest_path = targets.get(media_file.id)
                     
-                    if dest_path:
+                    if dest_path and dest_path in placed:
                         organized_files.append(dest_path)
                         
                         # 生成缩略图
@@ -111,6 +150,7 @@ class JianYingMediaOrganizer:
                             'frame_rate': media_file.frame_rate,
                             'audio_channels': media_file.audio_channels,
                             'checksum': media_file.checksum,
+                            'full_checksum': media_file.full_checksum,
                             'thumbnail_path': self._get_relative_path(thumbnail_path, output_dir) if thumbnail_path else None,
                             'created_at': media_file.created_at,
                             'modified_at': media_file.modified_at
@@ -136,7 +176,14 @@ class JianYingMediaOrganizer:
         """收集项目中的所有媒体文件"""
         media_files = []
         processed_paths = set()
-        
+
+        # 预先并行探测音视频素材，逐个创建媒体文件时直接命中缓存
+        get_probe_cache().probe_many(
+            clip.source_path
+            for track in project.tracks for clip in track.clips
+            if clip.type in ('video', 'audio') and os.path.exists(clip.source_path)
+        )
+
         for track in project.tracks:
             for clip in track.clips:
                 source_path = clip.source_path
@@ -210,14 +257,25 @@ class JianYingMediaOrganizer:
         
         try:
             if file_type in ['video', 'audio']:
-                # 这里可以使用 ffmpeg 或其他库获取媒体属性
-                # 暂时返回默认值
+                # ffprobe结果由全局探测缓存共享，探测失败时使用默认值
                 properties.update({
-                    'duration': 0,
                     'resolution': (1920, 1080) if file_type == 'video' else (0, 0),
                     'frame_rate': 30.0 if file_type == 'video' else 0,
                     'audio_channels': 2 if file_type == 'audio' else 0
                 })
+                
+                data = get_probe_cache().try_probe(file_path)
+                if data:
+                    properties['duration'] = float(data.get('format', {}).get('duration', 0) or 0)
+                    
+                    video_stream = find_stream(data, 'video')
+                    if video_stream:
+                        properties['resolution'] = (int(video_stream.get('width', 0)),
+                                                    int(video_stream.get('height', 0)))
+                        properties['frame_rate'] = parse_frame_rate(video_stream.get('r_frame_rate'), 30.0)
+                    
+                    audio_stream = find_stream(data, 'audio')
+                    properties['audio_channels'] = int(audio_stream.get('channels', 0)) if audio_stream else 0
             
         except Exception as e:
             self.logger.error(f"获取媒体属性失败: {file_path}, 错误: {e}")
@@ -225,17 +283,34 @@ class JianYingMediaOrganizer:
         return properties
     
     def _calculate_checksum(self, file_path: str) -> str:
-        """计算文件校验和"""
+        """计算文件校验和（采样指纹）"""
         try:
-            hash_md5 = hashlib.md5()
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
-                    hash_md5.update(chunk)
-            return hash_md5.hexdigest()
+            return get_fingerprint_service().fingerprint(file_path)
         except Exception as e:
             self.logger.error(f"计算校验和失败: {file_path}, 错误: {e}")
             return ""
     
+    def _calculate_full_checksum(self, file_path: str) -> str:
+        """计算完整文件MD5"""
+        try:
+            return get_fingerprint_service().full_hash(file_path)
+        except Exception as e:
+            self.logger.error(f"计算完整校验和失败: {file_path}, 错误: {e}")
+            return ""
+    
+    def _source_full_checksum(self, info: Dict[str, Any]) -> str:
+        """按原始素材补算缺失的完整哈希（组织后在后台计算过的直接命中缓存）
+
+        原始素材缺失或采样指纹已变化时返回空字符串
+        """
+        source_path = info.get('original_path')
+        if not source_path or not os.path.isfile(source_path):
+            return ""
+        if os.path.getsize(source_path) != info['file_size'] or \
+                self._calculate_checksum(source_path) != info.get('checksum'):
+            return ""
+        return self._calculate_full_checksum(source_path)
+    
     def _generate_file_id(self, file_path: str) -> str:
         """生成文件ID"""
         import uuid
@@ -261,8 +336,8 @@ class JianYingMediaOrganizer:
             self.logger.error(f"创建目录结构失败: {e}")
             raise
     
-    def _copy_media_file(self, media_file: MediaFile, output_dir: str) -> Optional[str]:
-        """复制媒体文件"""
+    def _get_target_path(self, media_file: MediaFile, output_dir: str) -> Optional[str]:
+        """确定媒体文件的目标路径"""
         try:
             # 确定目标目录
             if media_file.file_type == 'video':
@@ -278,17 +353,27 @@ class JianYingMediaOrganizer:
             
             # 按日期组织
             date_dir = target_dir / datetime.now().strftime('%Y-%m-%d')
-            date_dir.mkdir(exist_ok=True)
+            date_dir.mkdir(parents=True, exist_ok=True)
             
             # 生成目标文件名
             target_name = self._generate_target_filename(media_file)
-            target_path = date_dir / target_name
+            return str(date_dir / target_name)
+            
+        except Exception as e:
+            self.logger.error(f"确定媒体文件目标路径失败: {media_file.original_path}, 错误: {e}")
+            return None
+    
+    def _copy_media_file(self, media_file: MediaFile, output_dir: str) -> Optional[str]:
+        """复制媒体文件"""
+        try:
+            target_path = self._get_target_path(media_file, output_dir)
+            if not target_path:
+                return None
             
-            # 复制文件
-            shutil.copy2(media_file.original_path, target_path)
+            place_file(media_file.original_path, target_path, allow_link=self.use_links)
             
             self.logger.info(f"媒体文件复制成功: {media_file.original_path} -> {target_path}")
-            return str(target_path)
+            return target_path
             
         except Exception as e:
             self.logger.error(f"复制媒体文件失败: {media_file.original_path}, 错误: {e}")
@@ -411,6 +496,7 @@ class JianYingMediaOrganizer:
             validation_result['total_files'] = len(media_info)
             
             # 验证每个文件
+            completed_checksums = 0
             for file_id, info in media_info.items():
                 file_path = Path(output_dir) / info['relative_path']
                 
@@ -426,9 +512,20 @@ class JianYingMediaOrganizer:
                     validation_result['issues'].append(f'文件大小不匹配: {info["file_name"]}')
                     continue
                 
-                # 检查校验和
-                current_checksum = self._calculate_checksum(str(file_path))
-                if current_checksum != info['checksum']:
+                # 检查完整哈希：采样指纹只覆盖头、中、尾数据块，不能发现其余位置的损坏。
+                # 旧版数据库的 checksum 本身就是完整MD5；组织时未算完的完整哈希按原始素材补全，
+                # 原始素材不可用时退回比较采样指纹
+                expected = info.get('full_checksum') or info.get('checksum', '')
+                if ':' in expected:
+                    full_checksum = self._source_full_checksum(info)
+                    if full_checksum:
+                        info['full_checksum'] = expected = full_checksum
+                        completed_checksums += 1
+                if expected and ':' not in expected:
+                    current_checksum = self._calculate_full_checksum(str(file_path))
+                else:
+                    current_checksum = self._calculate_checksum(str(file_path))
+                if current_checksum != expected:
                     validation_result['corrupted_files'] += 1
                     validation_result['issues'].append(f'文件校验和不匹配: {info["file_name"]}')
                     continue
@@ -437,6 +534,10 @@ class JianYingMediaOrganizer:
             
             validation_result['invalid_files'] = validation_result['total_files'] - validation_result['valid_files']
             
+            # 记录补全的完整哈希，之后的校验不再依赖原始素材
+            if completed_checksums:
+                self._save_media_database(media_info, output_dir)
+            
         except Exception as e:
             validation_result['issues'].append(f'验证过程出错: {e}')
         
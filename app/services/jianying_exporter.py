@@ -4,11 +4,8 @@
 """
 
 import json
-import zipfile
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Tuple, Union
 from pathlib import Path
-import tempfile
-import shutil
 from datetime import datetime
 import uuid
 
@@ -16,6 +13,7 @@ from app.core.base import BaseComponent
 from app.core.events import Event, EventType
 from app.core.utils import LoggerMixin
 from app.services.jianying_parser import JianyingDraft, MediaTrack
+from app.utils.media_packaging import StreamingZipPackager
 
 
 class JianyingExporter(BaseComponent, LoggerMixin):
@@ -24,6 +22,7 @@ class JianyingExporter(BaseComponent, LoggerMixin):
     def __init__(self):
         super().__init__()
         self.supported_formats = ['jianying', 'capcut', 'draft']
+        self.last_export_stats: Dict[str, Any] = {}
         self.logger.info("剪映格式导出器初始化完成")
 
     def export_to_jianying(self, project_data: Dict[str, Any], output_path: Union[str, Path], 
@@ -101,6 +100,17 @@ class JianyingExporter(BaseComponent, LoggerMixin):
         """导出为JSON格式"""
         self.logger.info("导出为JSON格式")
         
+        jianying_data = self._build_draft_data(draft)
+        
+        # 写入JSON文件
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(jianying_data, f, indent=2, ensure_ascii=False)
+        
+        self.logger.info(f"JSON导出完成: {output_path}")
+        return str(output_path)
+
+    def _build_draft_data(self, draft: JianyingDraft) -> Dict[str, Any]:
+        """构建剪映草稿数据"""
         # 转换为剪映JSON格式
         jianying_data = {
             'version': draft.version,
@@ -131,73 +141,66 @@ class JianyingExporter(BaseComponent, LoggerMixin):
             }
             jianying_data['tracks'].append(track_data)
         
-        # 写入JSON文件
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(jianying_data, f, indent=2, ensure_ascii=False)
-        
-        self.logger.info(f"JSON导出完成: {output_path}")
-        return str(output_path)
+        return jianying_data
 
     def _export_as_zip(self, draft: JianyingDraft, output_path: Path) -> str:
-        """导出为ZIP格式（剪映专业版）"""
+        """导出为ZIP格式（剪映专业版）
+
+        媒体文件直接从源路径流式写入归档并使用ZIP_STORED，只有JSON使用deflate压缩，
+        不再经过临时目录复制。
+        """
         self.logger.info("导出为ZIP格式")
         
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            
-            # 创建项目文件结构
-            project_dir = temp_path / 'project'
-            project_dir.mkdir(parents=True)
+        # 收集媒体文件并更新轨道中的源路径
+        media_entries = self._collect_media_entries(draft)
+        
+        with StreamingZipPackager(output_path) as packager:
+            for source_path, arcname in media_entries:
+                packager.add_file(source_path, arcname)
             
             # 创建主草稿文件
-            draft_file = project_dir / 'draft.json'
-            self._export_as_json(draft, draft_file)
-            
-            # 创建媒体文件目录
-            media_dir = project_dir / 'media'
-            media_dir.mkdir()
-            
-            # 复制媒体文件（如果存在）
-            self._copy_media_files(draft, media_dir)
+            packager.add_text('project/draft.json',
+                              json.dumps(self._build_draft_data(draft), indent=2, ensure_ascii=False))
             
             # 创建项目配置文件
-            config_file = project_dir / 'config.json'
-            self._create_config_file(draft, config_file)
-            
-            # 创建ZIP文件
-            with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                for file_path in project_dir.rglob('*'):
-                    if file_path.is_file():
-                        arcname = file_path.relative_to(temp_path)
-                        zipf.write(file_path, arcname)
+            packager.add_text('project/config.json',
+                              json.dumps(self._build_config_data(draft), indent=2, ensure_ascii=False))
+        
+        self.last_export_stats = packager.stats.to_dict()
+        self.last_export_stats['archive_size'] = output_path.stat().st_size
         
-        self.logger.info(f"ZIP导出完成: {output_path}")
+        self.logger.info(f"ZIP导出完成: {output_path}, 耗时 {packager.stats.elapsed_time:.2f}s, "
+                         f"写入 {packager.stats.bytes_written} 字节")
         return str(output_path)
 
-    def _copy_media_files(self, draft: JianyingDraft, media_dir: Path):
-        """复制媒体文件到项目目录"""
-        self.logger.info("复制媒体文件")
-        
-        copied_files = set()
+    def _collect_media_entries(self, draft: JianyingDraft) -> List[Tuple[Path, str]]:
+        """收集需要打包的媒体文件，返回 (源路径, 归档路径) 列表"""
+        entries = []
+        packed_files = {}
         
         for track in draft.tracks:
             source_path = Path(track.source_path)
             if source_path.exists() and source_path.is_file():
-                # 生成唯一文件名
-                file_name = f"{track.id}_{source_path.name}"
-                dest_path = media_dir / file_name
+                # 生成唯一文件名，同一源文件只打包一次
+                file_name = packed_files.get(source_path)
+                if file_name is None:
+                    file_name = f"{track.id}_{source_path.name}"
+                    packed_files[source_path] = file_name
+                    entries.append((source_path, f"project/media/{file_name}"))
                 
-                # 避免重复复制
-                if file_name not in copied_files:
-                    shutil.copy2(source_path, dest_path)
-                    copied_files.add(file_name)
-                    
-                    # 更新轨道中的源路径
-                    track.source_path = f"media/{file_name}"
+                # 更新轨道中的源路径
+                track.source_path = f"media/{file_name}"
+        
+        return entries
 
     def _create_config_file(self, draft: JianyingDraft, config_path: Path):
         """创建项目配置文件"""
-        config_data = {
+        with open(config_path, 'w', encoding='utf-8') as f:
+            json.dump(self._build_config_data(draft), f, indent=2, ensure_ascii=False)
+
+    def _build_config_data(self, draft: JianyingDraft) -> Dict[str, Any]:
+        """构建项目配置数据"""
+        return {
             'project_version': '2.0',
             'app_version': '剪映专业版',
             'created_at': draft.created_at.isoformat(),
@@ -214,9 +217,6 @@ class JianyingExporter(BaseComponent, LoggerMixin):
             'transitions': [],
             'templates': []
         }
-        
-        with open(config_path, 'w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=2, ensure_ascii=False)
 
     def create_template(self, project_data: Dict[str, Any], template_name: str, 
                        template_path: Union[str, Path]) -> str:
@@ -27,6 +27,7 @@ try:
 except ImportError:
     PYTTSX3_AVAILABLE = False
 
+from ..utils.probe_cache import get_probe_cache
 from ..core.base import BaseComponent, ComponentConfig, ComponentState
 from ..config.settings import Settings
 from ..ai.commentary_generator import CommentarySegment, CommentaryScript
@@ -483,14 +484,9 @@ class TTSManager(BaseComponent[Dict[str, Any]]):
     async def _get_audio_duration(self, audio_path: str) -> float:
         """Get audio duration from file"""
         try:
-            # This is a simplified implementation
-            # In a full implementation, you would use a proper audio library
-            import subprocess
-            result = subprocess.run(
-                ["ffprobe", "-i", audio_path, "-show_entries", "format=duration", "-v", "quiet", "-of", "csv=p=0"],
-                capture_output=True, text=True
-            )
-            return float(result.stdout.strip())
+            loop = asyncio.get_running_loop()
+            data = await loop.run_in_executor(None, get_probe_cache().probe, audio_path)
+            return float(data["format"]["duration"])
         except Exception:
             # Fallback estimation
             return 0.0
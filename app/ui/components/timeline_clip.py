@@ -26,7 +26,7 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import (
     Qt, QSize, QRect, QPoint, QMimeData, pyqtSignal, 
     QTimer, QPropertyAnimation, QEasingCurve, QThread, pyqtSlot,
-    QPointF, QRectF, QParallelAnimationGroup, QSequentialAnimationGroup
+    QPointF, QRectF, QLineF, QParallelAnimationGroup, QSequentialAnimationGroup
 )
 from PyQt6.QtGui import (
     QPainter, QColor, QBrush, QPen, QFont, 
@@ -36,6 +36,9 @@ from PyQt6.QtGui import (
     QFontMetrics, QPolygonF, QBrush
 )
 
+from app.utils.thumbnail_generator import get_thumbnail_generator
+from app.utils.waveform_cache import get_waveform_cache
+
 
 class ClipType(Enum):
     """片段类型"""
@@ -188,6 +191,8 @@ class TimelineClip(QWidget):
     keyframe_added = pyqtSignal(object, int, float)  # 关键帧添加 (clip, time, value)
     keyframe_removed = pyqtSignal(object, int)       # 关键帧移除 (clip, time)
     keyframe_moved = pyqtSignal(object, int, float)  # 关键帧移动 (clip, time, value)
+    waveform_changed = pyqtSignal()                  # 波形提取进度或结果更新（可跨线程发射）
+    filmstrip_changed = pyqtSignal(object)           # 胶片条生成完成（可跨线程发射）
     
     def __init__(self, clip_data: Union[Dict, ClipData], parent=None):
         super().__init__(parent)
@@ -223,6 +228,12 @@ class TimelineClip(QWidget):
         self.handles = {}
         self.thumbnail = None
         self.waveform = None
+        self.show_waveform = True
+        self.show_filmstrip = True
+        self._filmstrip_request = None
+        self._filmstrip_params = None
+        self._filmstrip_pixmap = None
+        self._filmstrip = None
         
         # 设置对象属性
         self.setObjectName(f"timeline_clip_{self.clip_data.clip_id}")
@@ -243,6 +254,10 @@ class TimelineClip(QWidget):
         
         # 加载关键帧
         self._load_keyframes()
+        
+        # 后台波形提取通过排队信号回到界面线程重绘
+        self.waveform_changed.connect(self.update)
+        self.filmstrip_changed.connect(self._on_filmstrip_ready)
     
     def _setup_ui(self):
         """设置UI"""
@@ -333,27 +348,125 @@ class TimelineClip(QWidget):
         }
         return colors.get(self.clip_data.clip_type, QColor(150, 150, 150))
     
+    # 胶片条：每 FILMSTRIP_INTERVAL 秒源素材一张缩略图
+    FILMSTRIP_INTERVAL = 2.0
+    FILMSTRIP_MAX_TILES = 120
+    FILMSTRIP_TILE_SIZE = (96, 54)
+
+    def _filmstrip_range(self) -> Tuple[float, float, int]:
+        start = self.clip_data.source_start / 1000
+        end = start + (self.duration / 1000) * self.clip_data.speed
+        count = int(min(max((end - start) / self.FILMSTRIP_INTERVAL, 1), self.FILMSTRIP_MAX_TILES))
+        return round(start, 3), round(end, 3), count
+
+    def _draw_filmstrip(self, painter: QPainter, rect: QRect):
+        """绘制视频胶片条（一张雪碧图，只绘制可见的缩略图）"""
+        if not self.show_filmstrip or self.clip_data.clip_type != ClipType.VIDEO or not self.clip_data.file_path:
+            return
+
+        params = self._filmstrip_range()
+        if params != self._filmstrip_params:
+            # 修剪或变速后重新请求
+            self._cancel_filmstrip()
+            self._filmstrip_params = params
+            self._filmstrip = None
+            self._filmstrip_pixmap = None
+            start, end, count = params
+            try:
+                self._filmstrip_request = get_thumbnail_generator().request_filmstrip(
+                    self.clip_data.file_path, count, self.FILMSTRIP_TILE_SIZE, start, end,
+                    callback=lambda path, filmstrip: self.filmstrip_changed.emit(filmstrip))
+            except OSError:
+                self._filmstrip_request = None
+            return
+
+        if self._filmstrip_pixmap is None:
+            return
+
+        visible = self.visibleRegion().boundingRect().intersected(rect)
+        count = len(self._filmstrip.timestamps)
+        tile_width = rect.width() / count
+        first = max(int((visible.left() - rect.left()) / tile_width), 0)
+        last = min(int((visible.right() - rect.left()) / tile_width) + 1, count)
+
+        painter.save()
+        painter.setOpacity(0.5)
+        for index in range(first, last):
+            x, y, width, height = self._filmstrip.tile_rect(index)
+            target = QRectF(rect.left() + index * tile_width, rect.top(), tile_width, rect.height())
+            painter.drawPixmap(target, self._filmstrip_pixmap, QRectF(x, y, width, height))
+        painter.restore()
+
+    def _on_filmstrip_ready(self, filmstrip):
+        """胶片条生成完成（界面线程）"""
+        self._filmstrip_request = None
+        if filmstrip is None:
+            return
+        pixmap = QPixmap(filmstrip.sheet_path)
+        if pixmap.isNull():
+            return
+        self._filmstrip = filmstrip
+        self._filmstrip_pixmap = pixmap
+        self.update()
+
+    def _cancel_filmstrip(self):
+        if self._filmstrip_request is not None and not self._filmstrip_request.done():
+            get_thumbnail_generator().cancel(self._filmstrip_request)
+        self._filmstrip_request = None
+
+    def hideEvent(self, event):
+        """片段隐藏（滚出视图或被移除）时取消未完成的胶片条请求"""
+        if self._filmstrip_request is not None and not self._filmstrip_request.done():
+            self._cancel_filmstrip()
+            self._filmstrip_params = None
+        super().hideEvent(event)
+    
     def _draw_waveform(self, painter: QPainter, rect: QRect):
-        """绘制音频波形"""
-        if self.clip_data.clip_type != ClipType.AUDIO:
+        """绘制音频波形（峰值来自波形缓存，只绘制可见列）"""
+        if not self.show_waveform or self.clip_data.clip_type not in (ClipType.AUDIO, ClipType.VIDEO):
             return
-        
-        # 简单的波形绘制
+        if not self.clip_data.file_path or self.duration <= 0 or rect.width() <= 0:
+            return
+
+        # 只处理可见区域，长片段在滚动视图中的开销与可见像素数成正比
+        visible = self.visibleRegion().boundingRect().intersected(rect)
+        if visible.isEmpty():
+            return
+
+        cache = get_waveform_cache()
+        seconds_per_pixel = (self.duration / 1000) * self.clip_data.speed / rect.width()
+        source_start = self.clip_data.source_start / 1000
+        start = source_start + (visible.left() - rect.left()) * seconds_per_pixel
+        end = start + visible.width() * seconds_per_pixel
+
+        peaks = cache.get_peaks(self.clip_data.file_path, start, end, visible.width(),
+                                progress=self._on_waveform_progress,
+                                callback=self._on_waveform_ready)
+        if peaks is None:
+            progress = cache.get_progress(self.clip_data.file_path)
+            if progress is not None:
+                # 提取中：底部绘制进度条
+                painter.fillRect(rect.left(), rect.bottom() - 2, int(rect.width() * progress), 2,
+                                 QColor(100, 255, 100, 160))
+            return
+
+        center_y = rect.top() + rect.height() / 2
+        half_height = rect.height() * 0.45 * self.clip_data.volume
+        half_height = min(half_height, rect.height() / 2)
+        lines = [
+            QLineF(x, center_y - high * half_height, x, center_y - low * half_height)
+            for x, (low, high) in zip(range(visible.left(), visible.right() + 1), peaks.tolist())
+        ]
         painter.setPen(QPen(QColor(100, 255, 100), 1))
-        
-        # 生成模拟波形数据
-        width = rect.width()
-        height = rect.height()
-        center_y = height // 2
-        
-        # 绘制波形
-        for x in range(0, width, 2):
-            # 模拟波形数据
-            amplitude = height * 0.3 * (0.5 + 0.5 * (x % 20) / 20)
-            y1 = center_y - amplitude
-            y2 = center_y + amplitude
-            
-            painter.drawLine(x, y1, x, y2)
+        painter.drawLines(lines)
+
+    def _on_waveform_progress(self, file_path: str, progress: float):
+        """波形提取进度（工作线程中调用）"""
+        self.waveform_changed.emit()
+
+    def _on_waveform_ready(self, file_path: str, pyramid):
+        """波形提取完成（工作线程中调用）"""
+        self.waveform_changed.emit()
     
     def _draw_keyframes(self, painter: QPainter, rect: QRect):
         """绘制关键帧"""
@@ -554,6 +667,9 @@ class TimelineClip(QWidget):
         painter.setPen(QPen(border_color, 1))
         painter.drawRoundedRect(rect, 4, 4)
         
+        # 绘制胶片条
+        self._draw_filmstrip(painter, rect)
+        
         # 绘制效果
         self._draw_effects(painter, rect)
         
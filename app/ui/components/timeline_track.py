@@ -385,6 +385,10 @@ class TimelineTrack(QWidget):
     def _on_settings_changed(self, settings: dict):
         """设置变化事件"""
         self.settings.__dict__.update(settings)
+        if 'show_waveform' in settings:
+            for clip in self.clips:
+                clip.show_waveform = self.settings.show_waveform
+                clip.update()
         self.track_settings_changed.emit(settings)
         self.update()
     
@@ -395,6 +399,7 @@ class TimelineTrack(QWidget):
         
         # 创建片段
         clip = TimelineClip(clip_data, self)
+        clip.show_waveform = self.settings.show_waveform
         
         # 设置位置
         clip.start_time = position
@@ -525,8 +530,7 @@ class TimelineTrack(QWidget):
         
         # 更新所有片段的宽度
         for clip in self.clips:
-            width = int((clip.duration / 1000) * self.pixels_per_second)
-            clip.setFixedWidth(max(50, width))
+            clip.update_scale(pixels_per_second)
         
         # 重新布局
         self._relayout_clips()
@@ -3,10 +3,11 @@
 
 import os
 import subprocess
-import json
 import logging
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
 
+from .probe_cache import ProbeError, find_stream, get_probe_cache, parse_frame_rate
+
 # 设置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("FFmpegUtils")
@@ -47,27 +48,9 @@ class FFmpegInfoWorker(QThread):
             
     def extract_info(self):
         """提取视频信息"""
-        ffprobe_cmd = [
-            "ffprobe",
-            "-v", "quiet",
-            "-print_format", "json",
-            "-show_format",
-            "-show_streams",
-            self.file_path
-        ]
-        
         try:
-            # 执行ffprobe命令
-            result = subprocess.run(
-                ffprobe_cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                check=True
-            )
-            
-            # 解析JSON输出
-            data = json.loads(result.stdout)
+            # ffprobe结果由全局探测缓存共享
+            data = get_probe_cache().probe(self.file_path)
             
             # 提取有用的信息
             info = {}
@@ -79,34 +62,23 @@ class FFmpegInfoWorker(QThread):
                 info["size"] = int(format_info.get("size", 0))
                 info["bit_rate"] = int(format_info.get("bit_rate", 0))
             
-            # 流信息
-            if "streams" in data:
-                # 查找视频流
-                for stream in data["streams"]:
-                    if stream["codec_type"] == "video":
-                        info["width"] = stream.get("width", 0)
-                        info["height"] = stream.get("height", 0)
-                        
-                        # 帧率
-                        fps_str = stream.get("avg_frame_rate", "0/1")
-                        if "/" in fps_str:
-                            num, den = map(int, fps_str.split("/"))
-                            info["fps"] = round(num / max(den, 1), 2)
-                        else:
-                            info["fps"] = float(fps_str)
-                        
-                        # 编解码器
-                        info["codec"] = stream.get("codec_name", "unknown")
-                        break
+            # 查找视频流
+            video_stream = find_stream(data, "video")
+            if video_stream:
+                info["width"] = video_stream.get("width", 0)
+                info["height"] = video_stream.get("height", 0)
+                
+                # 帧率
+                info["fps"] = round(parse_frame_rate(video_stream.get("avg_frame_rate", "0/1")), 2)
+                
+                # 编解码器
+                info["codec"] = video_stream.get("codec_name", "unknown")
             
             return info
             
-        except subprocess.CalledProcessError as e:
+        except ProbeError as e:
             logger.error(f"FFprobe执行错误: {e}")
             return None
-        except json.JSONDecodeError as e:
-            logger.error(f"JSON解析错误: {e}")
-            return None
         except Exception as e:
             logger.error(f"提取视频信息错误: {e}")
             return None
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+文件指纹服务 - 用于媒体身份识别和去重
+采样指纹只读取文件头、中、尾三个数据块，完整哈希在后台按需计算
+"""
+
+import os
+import mmap
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Hashable, Optional, Tuple
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+    xxhash = None
+
+logger = logging.getLogger(__name__)
+
+
+SAMPLE_BLOCK_SIZE = 64 * 1024          # 采样块大小
+FULL_HASH_BUFFER_SIZE = 8 * 1024 * 1024  # 完整哈希读缓冲大小
+MMAP_THRESHOLD = 64 * 1024 * 1024       # 超过该大小使用mmap读取
+
+
+def _new_fast_hasher():
+    """创建快速哈希对象（优先xxhash，否则使用blake2b）"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh3_128()
+    return hashlib.blake2b(digest_size=16)
+
+
+FINGERPRINT_ALGORITHM = "xxh3" if XXHASH_AVAILABLE else "b2"
+
+
+class FileFingerprintService:
+    """文件指纹服务"""
+
+    def __init__(self, block_size: int = SAMPLE_BLOCK_SIZE, max_cache_entries: int = 100000,
+                 background_workers: int = 2):
+        self.block_size = block_size
+        self.max_cache_entries = max_cache_entries
+
+        # 缓存键为 (设备, inode, 大小, 修改时间)，文件改动后自动失效
+        self._fingerprints: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._full_hashes: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+
+        self._executor = ThreadPoolExecutor(max_workers=background_workers,
+                                            thread_name_prefix="fingerprint")
+
+        self.stats = {
+            "fingerprint_hits": 0,
+            "fingerprint_misses": 0,
+            "full_hash_hits": 0,
+            "full_hash_misses": 0,
+            "bytes_read": 0
+        }
+
+    def fingerprint(self, file_path: str) -> str:
+        """计算采样指纹：大小 + 头/中/尾数据块的快速哈希"""
+        st = os.stat(file_path)
+        key = self._cache_key(file_path, st)
+
+        cached = self._cache_get(self._fingerprints, key)
+        if cached is not None:
+            self.stats["fingerprint_hits"] += 1
+            return cached
+
+        self.stats["fingerprint_misses"] += 1
+        size = st.st_size
+        hasher = _new_fast_hasher()
+        hasher.update(size.to_bytes(8, "little"))
+
+        with open(file_path, "rb") as f:
+            if size <= self.block_size * 3:
+                data = f.read()
+                hasher.update(data)
+                self.stats["bytes_read"] += len(data)
+            else:
+                for offset in (0, (size - self.block_size) // 2, size - self.block_size):
+                    f.seek(offset)
+                    data = f.read(self.block_size)
+                    hasher.update(data)
+                    self.stats["bytes_read"] += len(data)
+
+        value = f"{FINGERPRINT_ALGORITHM}:{size:x}:{hasher.hexdigest()}"
+        self._cache_put(self._fingerprints, key, value)
+        return value
+
+    def full_hash(self, file_path: str, algorithm: str = "md5") -> str:
+        """同步计算完整文件哈希（大缓冲区/mmap读取）"""
+        st = os.stat(file_path)
+        key = self._cache_key(file_path, st) + (algorithm,)
+
+        cached = self._cache_get(self._full_hashes, key)
+        if cached is not None:
+            self.stats["full_hash_hits"] += 1
+            return cached
+
+        self.stats["full_hash_misses"] += 1
+        hasher = hashlib.new(algorithm)
+
+        with open(file_path, "rb") as f:
+            if st.st_size >= MMAP_THRESHOLD:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    for offset in range(0, st.st_size, FULL_HASH_BUFFER_SIZE):
+                        hasher.update(mapped[offset:offset + FULL_HASH_BUFFER_SIZE])
+            else:
+                buffer = bytearray(FULL_HASH_BUFFER_SIZE)
+                view = memoryview(buffer)
+                while True:
+                    count = f.readinto(buffer)
+                    if not count:
+                        break
+                    hasher.update(view[:count])
+
+        self.stats["bytes_read"] += st.st_size
+        value = hasher.hexdigest()
+        self._cache_put(self._full_hashes, key, value)
+        return value
+
+    def request_full_hash(self, file_path: str, algorithm: str = "md5",
+                          callback: Optional[Callable[[str, str], None]] = None) -> Future:
+        """在后台计算完整哈希，同一文件的重复请求共享同一个任务"""
+        pending_key = (os.path.abspath(file_path), algorithm)
+
+        with self._lock:
+            future = self._pending.get(pending_key)
+            if future is None:
+                future = self._executor.submit(self.full_hash, file_path, algorithm)
+                self._pending[pending_key] = future
+                future.add_done_callback(lambda _: self._pending_done(pending_key))
+
+        if callback:
+            def _notify(done: Future):
+                try:
+                    callback(file_path, done.result())
+                except Exception as e:
+                    logger.error(f"后台计算文件哈希失败: {file_path}, 错误: {e}")
+            future.add_done_callback(_notify)
+
+        return future
+
+    def get_cached_full_hash(self, file_path: str, algorithm: str = "md5") -> Optional[str]:
+        """获取已缓存的完整哈希，不触发计算"""
+        try:
+            key = self._cache_key(file_path, os.stat(file_path)) + (algorithm,)
+        except OSError:
+            return None
+        return self._cache_get(self._full_hashes, key)
+
+    def clear_cache(self):
+        """清空指纹缓存"""
+        with self._lock:
+            self._fingerprints.clear()
+            self._full_hashes.clear()
+
+    def shutdown(self):
+        """停止后台任务"""
+        self._executor.shutdown(wait=False)
+
+    def _pending_done(self, pending_key: Tuple):
+        with self._lock:
+            self._pending.pop(pending_key, None)
+
+    def _cache_key(self, file_path: str, st: os.stat_result) -> Tuple[Hashable, ...]:
+        # 部分文件系统不提供inode，此时退化为按路径缓存
+        identity = (st.st_dev, st.st_ino) if st.st_ino else (os.path.abspath(file_path),)
+        return identity + (st.st_size, st.st_mtime_ns)
+
+    def _cache_get(self, cache: OrderedDict, key: Tuple) -> Optional[str]:
+        with self._lock:
+            value = cache.get(key)
+            if value is not None:
+                cache.move_to_end(key)
+            return value
+
+    def _cache_put(self, cache: OrderedDict, key: Tuple, value: str):
+        with self._lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_cache_entries:
+                cache.popitem(last=False)
+
+
+# 全局指纹服务实例
+_global_fingerprint_service: Optional[FileFingerprintService] = None
+_global_lock = threading.Lock()
+
+
+def get_fingerprint_service() -> FileFingerprintService:
+    """获取全局文件指纹服务"""
+    global _global_fingerprint_service
+    if _global_fingerprint_service is None:
+        with _global_lock:
+            if _global_fingerprint_service is None:
+                _global_fingerprint_service = FileFingerprintService()
+    return _global_fingerprint_service
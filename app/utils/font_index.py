@@ -0,0 +1,448 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+字体索引 - 扫描系统和项目字体目录并按字体族解析字体文件
+字体族、样式、字重从字体文件本身读取，索引持久化到磁盘，
+目录修改时间变化时才重新扫描该目录树（未变化的文件沿用之前的解析结果）；
+查询按 (字体族, 粗体, 斜体, 是否需要中日韩字形) 缓存，并提供西文替代字体和中日韩回退链
+"""
+
+import os
+import re
+import sys
+import json
+import logging
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from PIL import ImageFont
+
+try:
+    from fontTools.ttLib import TTFont
+    FONTTOOLS_AVAILABLE = True
+except ImportError:
+    FONTTOOLS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".CineAIStudio", "font_index.json")
+FONT_EXTENSIONS = {".ttf", ".otf", ".ttc", ".otc"}
+MAX_COLLECTION_FACES = 64
+
+# 样式名中的字重关键字（按匹配优先级排列）
+WEIGHT_KEYWORDS = [
+    ("extralight", 200), ("ultralight", 200), ("semibold", 600), ("demibold", 600),
+    ("extrabold", 800), ("ultrabold", 800), ("thin", 100), ("hairline", 100),
+    ("light", 300), ("medium", 500), ("bold", 700), ("heavy", 900), ("black", 900),
+]
+
+# 常用西文字体在其他系统上的度量兼容替代
+FAMILY_FALLBACKS = {
+    "arial": ["Liberation Sans", "Arimo", "Helvetica", "DejaVu Sans"],
+    "helvetica": ["Helvetica Neue", "Arial", "Liberation Sans", "DejaVu Sans"],
+    "timesnewroman": ["Times", "Liberation Serif", "Tinos", "DejaVu Serif"],
+    "georgia": ["Gelasio", "DejaVu Serif"],
+    "verdana": ["DejaVu Sans"],
+    "couriernew": ["Courier", "Liberation Mono", "Cousine", "DejaVu Sans Mono"],
+    "impact": ["Anton", "DejaVu Sans"],
+    "comicsansms": ["Comic Neue", "DejaVu Sans"],
+}
+
+# 中文字体名与字体文件中英文族名的对应
+FAMILY_ALIASES = {
+    "微软雅黑": "Microsoft YaHei",
+    "黑体": "SimHei",
+    "宋体": "SimSun",
+    "楷体": "KaiTi",
+    "仿宋": "FangSong",
+    "苹方": "PingFang SC",
+    "思源黑体": "Source Han Sans SC",
+    "思源宋体": "Source Han Serif SC",
+}
+
+# 文本包含中日韩字符而所选字体不支持时的回退链
+CJK_FALLBACKS = [
+    "PingFang SC", "Microsoft YaHei", "Hiragino Sans GB", "Noto Sans CJK SC", "Noto Sans SC",
+    "Source Han Sans SC", "Source Han Sans CN", "WenQuanYi Micro Hei", "WenQuanYi Zen Hei",
+    "SimHei", "Droid Sans Fallback",
+]
+
+DEFAULT_FALLBACKS = ["DejaVu Sans", "Liberation Sans", "Arial", "Helvetica", "Noto Sans", "Segoe UI"]
+
+CJK_PATTERN = re.compile("[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+
+
+@dataclass
+class FontFace:
+    """字体文件中的一个字形集合（.ttc 等集合文件包含多个）"""
+    path: str
+    index: int
+    family: str
+    style: str
+    weight: int = 400
+    italic: bool = False
+    cjk: bool = False
+    names: List[str] = field(default_factory=list)  # 其他语言的族名
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FontFace":
+        return cls(**data)
+
+
+def normalize_family(name: str) -> str:
+    """族名归一化：忽略大小写、空格、连字符和下划线"""
+    return re.sub(r"[\s\-_]+", "", name).lower()
+
+
+def needs_cjk(text: Optional[str]) -> bool:
+    """文本是否包含中日韩字符"""
+    return bool(text) and CJK_PATTERN.search(text) is not None
+
+
+def default_font_directories() -> List[str]:
+    """当前平台的系统字体目录和项目字体目录"""
+    home = os.path.expanduser("~")
+    if sys.platform == "darwin":
+        directories = ["/System/Library/Fonts", "/Library/Fonts", os.path.join(home, "Library", "Fonts")]
+    elif sys.platform.startswith("win"):
+        directories = [os.path.join(os.environ.get("WINDIR", "C:/Windows"), "Fonts")]
+        local_app_data = os.environ.get("LOCALAPPDATA")
+        if local_app_data:
+            directories.append(os.path.join(local_app_data, "Microsoft", "Windows", "Fonts"))
+    else:
+        directories = ["/usr/share/fonts", "/usr/local/share/fonts",
+                       os.path.join(home, ".fonts"), os.path.join(home, ".local", "share", "fonts")]
+    directories.append(os.path.join(home, ".CineAIStudio", "fonts"))
+    directories.append(os.path.abspath("./fonts"))
+    return directories
+
+
+def style_weight(style: str) -> int:
+    """从样式名推断字重"""
+    style = normalize_family(style)
+    for keyword, weight in WEIGHT_KEYWORDS:
+        if keyword in style:
+            return weight
+    return 400
+
+
+def read_font_faces(path: str) -> List[FontFace]:
+    """读取字体文件中所有字形集合的族名、样式、字重和中日韩覆盖"""
+    faces = []
+    for index in range(MAX_COLLECTION_FACES):
+        try:
+            font = ImageFont.truetype(path, 16, index=index)
+        except (OSError, ValueError):
+            break
+
+        family, style = font.getname()
+        if not family:
+            continue
+        style = style or "Regular"
+        face = FontFace(
+            path=path,
+            index=index,
+            family=family,
+            style=style,
+            weight=style_weight(style),
+            italic=any(word in style.lower() for word in ("italic", "oblique")),
+            cjk=_renders_cjk(font)
+        )
+        if FONTTOOLS_AVAILABLE:
+            _read_font_tables(face)
+        faces.append(face)
+
+        if os.path.splitext(path)[1].lower() not in (".ttc", ".otc"):
+            break
+    return faces
+
+
+def _renders_cjk(font: ImageFont.FreeTypeFont) -> bool:
+    """字体是否包含常用汉字（与缺字符号的位图比较）"""
+    try:
+        missing = font.getmask("\ue000").tobytes()
+        return all(font.getmask(char).tobytes() not in (b"", missing) for char in "中国字")
+    except Exception:
+        return False
+
+
+def _read_font_tables(face: FontFace):
+    """用 fontTools 读取 OS/2 字重、斜体标志、字符映射和各语言族名"""
+    try:
+        font = TTFont(face.path, fontNumber=face.index, lazy=True)
+        try:
+            os2 = font["OS/2"] if "OS/2" in font else None
+            if os2 is not None:
+                face.weight = int(os2.usWeightClass) or face.weight
+                face.italic = face.italic or bool(os2.fsSelection & 1)
+            cmap = font.getBestCmap() or {}
+            face.cjk = all(ord(char) in cmap for char in "中国字")
+            names = {record.toUnicode() for record in font["name"].names if record.nameID in (1, 16)}
+            face.names = sorted(name for name in names if name and name != face.family)
+        finally:
+            font.close()
+    except Exception as e:
+        logger.debug(f"读取字体表失败: {face.path} - {e}")
+
+
+class FontIndex:
+    """字体索引
+
+    加载持久化索引并只重新扫描修改时间变化的目录树；应用启动时调用 load_in_background()
+    在后台线程中完成，否则在首次查询时加载。扫描在单独的加载锁下进行，不阻塞已缓存的查询。
+    resolve() 的结果按 (族名, 粗体, 斜体, 需要中日韩) 缓存，重复查询不访问文件系统。
+    """
+
+    def __init__(self, directories: Optional[Iterable[str]] = None,
+                 index_path: Optional[str] = DEFAULT_INDEX_PATH):
+        self.directories = [os.path.abspath(d) for d in (directories or default_font_directories())]
+        self.index_path = index_path
+
+        self._faces: List[FontFace] = []
+        self._families: Dict[str, List[FontFace]] = {}
+        self._resolved: Dict[Tuple[str, bool, bool, bool], Optional[FontFace]] = {}
+        self._roots: Dict[str, Dict[str, Any]] = {}
+        self._loaded = False
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._load_thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'scanned_roots': 0,
+            'reused_roots': 0,
+            'parsed_files': 0,
+            'lookups': 0,
+            'lookup_hits': 0
+        }
+
+    def resolve(self, family: str, bold: bool = False, italic: bool = False,
+                text: Optional[str] = None) -> Optional[FontFace]:
+        """返回最匹配的字体
+
+        依次尝试请求的字体族、其替代字体、（文本含中日韩字符时）中日韩回退链和默认字体；
+        文本含中日韩字符时跳过不包含这些字形的字体。没有任何可用字体时返回 None。
+        """
+        key = (normalize_family(family or ""), bool(bold), bool(italic), needs_cjk(text))
+        with self._lock:
+            self.stats['lookups'] += 1
+            if key in self._resolved:
+                self.stats['lookup_hits'] += 1
+                return self._resolved[key]
+
+        self.load()
+        with self._lock:
+            if key not in self._resolved:
+                self._resolved[key] = self._resolve(family or "", bold, italic, key[3])
+            return self._resolved[key]
+
+    def families(self) -> List[str]:
+        """索引中的所有字体族名"""
+        self.load()
+        with self._lock:
+            return sorted({face.family for face in self._faces})
+
+    def faces(self, family: str) -> List[FontFace]:
+        """字体族中的所有字形集合"""
+        self.load()
+        with self._lock:
+            return list(self._families.get(normalize_family(family), []))
+
+    def load(self):
+        """加载索引（已加载时立即返回，后台加载进行中时等待其完成）"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+
+    def load_in_background(self) -> Optional[threading.Thread]:
+        """在后台线程中加载索引，避免首次渲染文字时扫描字体目录"""
+        with self._lock:
+            if self._loaded or self._load_thread is not None:
+                return None
+            self._load_thread = threading.Thread(target=self._background_load, name="font-index-load",
+                                                 daemon=True)
+        self._load_thread.start()
+        return self._load_thread
+
+    def refresh(self):
+        """重新检查字体目录（新安装字体后调用），扫描期间查询继续使用旧索引"""
+        with self._load_lock:
+            self._load()
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['faces'] = len(self._faces)
+            stats['families'] = len({face.family for face in self._faces})
+        return stats
+
+    # 查询
+    def _resolve(self, family: str, bold: bool, italic: bool, cjk: bool) -> Optional[FontFace]:
+        name = FAMILY_ALIASES.get(family.strip(), family)
+        candidates = [name] + FAMILY_FALLBACKS.get(normalize_family(name), [])
+        if cjk:
+            candidates += CJK_FALLBACKS
+        candidates += DEFAULT_FALLBACKS
+
+        for candidate in candidates:
+            face = self._best_face(self._families.get(normalize_family(candidate), []), bold, italic, cjk)
+            if face is not None:
+                return face
+
+        # 回退链中的字体都未安装：任意包含中日韩字形的字体，其次任意字体
+        if cjk:
+            face = self._best_face(self._faces, bold, italic, True)
+            if face is not None:
+                return face
+        return self._best_face(self._faces, bold, italic, False)
+
+    @staticmethod
+    def _best_face(faces: List[FontFace], bold: bool, italic: bool, cjk: bool) -> Optional[FontFace]:
+        target = 700 if bold else 400
+        candidates = [face for face in faces if face.cjk or not cjk]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda face: (
+            face.italic != italic, abs(face.weight - target), face.path, face.index))
+
+    # 索引构建
+    def _background_load(self):
+        try:
+            self.load()
+        except Exception as e:
+            logger.warning(f"后台加载字体索引失败: {e}")
+
+    def _load(self):
+        """扫描字体目录并替换查询表（调用方持有加载锁，扫描期间不持有查询锁）"""
+        stored = self._read_index() if not self._roots else self._roots
+        roots = {}
+        for root in self.directories:
+            if not os.path.isdir(root):
+                continue
+            previous = stored.get(root)
+            if previous is not None and self._unchanged(previous.get("dirs", {})):
+                roots[root] = previous
+                self._count('reused_roots')
+            else:
+                roots[root] = self._scan_root(root, (previous or {}).get("files", {}))
+                self._count('scanned_roots')
+
+        faces, families = self._build_lookup(roots)
+        with self._lock:
+            changed = roots != stored
+            self._roots = roots
+            self._faces = faces
+            self._families = families
+            self._resolved.clear()
+            self._loaded = True
+
+        if changed:
+            self._write_index()
+        logger.debug(f"字体索引: {len(faces)} 个字体, {len(roots)} 个目录")
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _unchanged(dirs: Dict[str, int]) -> bool:
+        """目录树中所有目录的修改时间未变化（新增或删除文件会改变所在目录的修改时间）"""
+        for directory, mtime_ns in dirs.items():
+            try:
+                if os.stat(directory).st_mtime_ns != mtime_ns:
+                    return False
+            except OSError:
+                return False
+        return bool(dirs)
+
+    def _scan_root(self, root: str, previous_files: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """扫描目录树，大小和修改时间未变的文件沿用之前的解析结果"""
+        dirs: Dict[str, int] = {}
+        files: Dict[str, Dict[str, Any]] = {}
+        for directory, _, filenames in os.walk(root, followlinks=True):
+            try:
+                dirs[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                continue
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() not in FONT_EXTENSIONS:
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entry = previous_files.get(path)
+                if entry is None or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+                    entry = {
+                        "size": st.st_size,
+                        "mtime_ns": st.st_mtime_ns,
+                        "faces": [asdict(face) for face in read_font_faces(path)]
+                    }
+                    self._count('parsed_files')
+                files[path] = entry
+        return {"dirs": dirs, "files": files}
+
+    def _build_lookup(self, roots: Dict[str, Dict[str, Any]]
+                      ) -> Tuple[List[FontFace], Dict[str, List[FontFace]]]:
+        all_faces: List[FontFace] = []
+        families: Dict[str, List[FontFace]] = {}
+        for root in self.directories:
+            files = roots.get(root, {}).get("files", {})
+            for path in sorted(files):
+                for data in files[path]["faces"]:
+                    face = FontFace.from_dict(data)
+                    all_faces.append(face)
+                    for name in [face.family] + face.names + [os.path.splitext(os.path.basename(path))[0]]:
+                        faces = families.setdefault(normalize_family(name), [])
+                        if face not in faces:
+                            faces.append(face)
+        return all_faces, families
+
+    # 持久化
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return {}
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取字体索引失败: {self.index_path} - {e}")
+            return {}
+        if data.get("version") != INDEX_VERSION or data.get("fonttools") != FONTTOOLS_AVAILABLE:
+            return {}
+        return data.get("roots", {})
+
+    def _write_index(self):
+        if not self.index_path:
+            return
+        try:
+            directory = os.path.dirname(self.index_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "fonttools": FONTTOOLS_AVAILABLE, "roots": self._roots},
+                          f, ensure_ascii=False)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"保存字体索引失败: {self.index_path} - {e}")
+
+
+# 全局字体索引实例
+_global_font_index: Optional[FontIndex] = None
+_global_lock = threading.Lock()
+
+
+def get_font_index() -> FontIndex:
+    """获取全局字体索引"""
+    global _global_font_index
+    if _global_font_index is None:
+        with _global_lock:
+            if _global_font_index is None:
+                _global_font_index = FontIndex()
+    return _global_font_index
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+延迟导入工具 - 模块在首次使用时才加载
+lazy_module 用于第三方重量级依赖（numpy、cv2、aiohttp等），
+lazy_attributes 为包提供模块级 __getattr__（PEP 562），导出名称在首次访问时才导入对应子模块
+"""
+
+import sys
+import importlib
+import importlib.util
+import types
+from typing import Callable, Dict, Iterable, List, Tuple
+
+__all__ = ["LazyModule", "lazy_module", "lazy_attributes"]
+
+
+class LazyModule(types.ModuleType):
+    """模块代理，首次访问属性时导入真实模块"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_module"] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__["_lazy_module"]
+        if module is None:
+            # importlib 的模块锁保证并发导入只执行一次
+            module = importlib.import_module(self.__name__)
+            # 复制属性后常用属性直接命中，不再经过 __getattr__
+            self.__dict__.update(
+                (key, value) for key, value in module.__dict__.items()
+                if key not in ("__name__", "__dict__")
+            )
+            self.__dict__["_lazy_module"] = module
+        return module
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.__dict__["_lazy_module"] is not None
+
+    def __getattr__(self, name: str):
+        return getattr(self._load(), name)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self.is_loaded else "not loaded"
+        return f"<lazy module '{self.__name__}' ({state})>"
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """返回延迟加载的模块
+
+    已导入的模块直接返回；未安装的模块立即抛出 ImportError，
+    因此 ``try: X = lazy_module("x") except ImportError`` 与普通导入的可选依赖写法一致。
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    if importlib.util.find_spec(name) is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    return LazyModule(name)
+
+
+def lazy_attributes(package: str, attributes: Dict[str, str],
+                    optional: Iterable[str] = ()) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    """生成包的 __getattr__ 和 __dir__
+
+    attributes 映射导出名称到 ``"子模块:属性"``（子模块可用相对路径，如 ``".video_engine:VideoEngine"``），
+    省略 ``:属性`` 时属性名与导出名称相同。optional 中的名称导入失败时返回 None。
+    解析后的值写回包的命名空间，之后的访问不再经过 __getattr__。
+    """
+    optional = frozenset(optional)
+
+    def __getattr__(name: str):
+        target = attributes.get(name)
+        if target is None:
+            raise AttributeError(f"module '{package}' has no attribute '{name}'")
+
+        module_name, _, attribute = target.partition(":")
+        try:
+            value = getattr(importlib.import_module(module_name, package), attribute or name)
+        except ImportError:
+            if name not in optional:
+                raise
+            value = None
+        return sys.modules[package].__dict__.setdefault(name, value)
+
+    def __dir__() -> List[str]:
+        return sorted(set(sys.modules[package].__dict__) | set(attributes))
+
+    return __getattr__, __dir__
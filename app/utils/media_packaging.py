@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+媒体打包工具 - 导出时避免不必要的数据复制
+ZIP打包时媒体文件直接流式写入（不压缩），目录导出优先使用reflink/硬链接
+"""
+
+import os
+import sys
+import time
+import shutil
+import uuid
+import logging
+import zipfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+
+# 已压缩的媒体格式，再次deflate只会浪费CPU
+STORED_EXTENSIONS = {
+    '.mp4', '.mov', '.m4v', '.mkv', '.avi', '.wmv', '.flv', '.webm', '.3gp',
+    '.mp3', '.aac', '.m4a', '.ogg', '.flac', '.wma', '.opus',
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic',
+    '.zip', '.7z', '.gz'
+}
+
+# Linux FICLONE ioctl
+_FICLONE = 0x40049409
+
+
+class PlacementMethod:
+    """文件放置方式"""
+    REFLINK = "reflink"
+    HARDLINK = "hardlink"
+    COPY = "copy"
+    STORED = "stored"
+    DEFLATED = "deflated"
+
+
+@dataclass
+class PackagingStats:
+    """打包统计"""
+    files: int = 0
+    bytes_written: int = 0
+    bytes_linked: int = 0
+    elapsed_time: float = 0.0
+    methods: Dict[str, int] = field(default_factory=dict)
+
+    def record(self, method: str, size: int):
+        self.files += 1
+        self.methods[method] = self.methods.get(method, 0) + 1
+        if method in (PlacementMethod.REFLINK, PlacementMethod.HARDLINK):
+            self.bytes_linked += size
+        else:
+            self.bytes_written += size
+
+    def to_dict(self) -> Dict[str, Union[int, float, Dict[str, int]]]:
+        return {
+            'files': self.files,
+            'bytes_written': self.bytes_written,
+            'bytes_linked': self.bytes_linked,
+            'elapsed_time': self.elapsed_time,
+            'methods': dict(self.methods)
+        }
+
+
+def _temp_path(destination: str) -> str:
+    """目标目录下的临时文件名，放置完成后再原子替换到目标位置"""
+    directory, name = os.path.split(destination)
+    return os.path.join(directory, f".{name}.{uuid.uuid4().hex[:12]}.part")
+
+
+def _try_reflink(source: str, destination: str) -> bool:
+    """尝试写时复制克隆（btrfs/xfs/APFS），destination 必须是尚不存在的新文件"""
+    if sys.platform.startswith('linux'):
+        try:
+            import fcntl
+        except ImportError:
+            return False
+
+        created = False
+        try:
+            with open(source, 'rb') as src, open(destination, 'xb') as dst:
+                created = True
+                fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+            shutil.copystat(source, destination)
+            return True
+        except OSError:
+            if created and os.path.exists(destination):
+                os.remove(destination)
+            return False
+
+    return False
+
+
+def place_file(source: str, destination: str, allow_link: bool = True) -> str:
+    """将文件放到目标位置，同一文件系统时使用reflink或硬链接，否则复制
+
+    先在目标目录中生成临时文件再 os.replace 到目标位置，从不以写方式打开已存在的目标文件，
+    目标恰好是源文件的硬链接时也不会截断源文件。返回实际使用的放置方式。
+    """
+    os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+
+    try:
+        if os.path.samefile(source, destination):
+            # 上次放置的硬链接，已经就位
+            return PlacementMethod.HARDLINK
+    except OSError:
+        pass
+
+    temp_path = _temp_path(destination)
+    try:
+        method = None
+        if allow_link:
+            try:
+                same_device = os.stat(source).st_dev == os.stat(os.path.dirname(destination) or '.').st_dev
+            except OSError:
+                same_device = False
+
+            if same_device:
+                if _try_reflink(source, temp_path):
+                    method = PlacementMethod.REFLINK
+                else:
+                    try:
+                        os.link(source, temp_path)
+                        method = PlacementMethod.HARDLINK
+                    except OSError:
+                        pass
+
+        if method is None:
+            # shutil.copy2 在支持的平台上使用 sendfile/fcopyfile 内核复制
+            shutil.copy2(source, temp_path)
+            method = PlacementMethod.COPY
+
+        os.replace(temp_path, destination)
+        return method
+    finally:
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+
+
+def place_files(pairs: List[Tuple[str, str]], allow_link: bool = True,
+                max_workers: int = 4) -> Tuple[Dict[str, str], PackagingStats]:
+    """并行放置多个文件，返回 {目标路径: 放置方式} 和统计信息，失败的文件不在结果中"""
+    stats = PackagingStats()
+    results: Dict[str, str] = {}
+    stats_lock = threading.Lock()
+    start_time = time.perf_counter()
+
+    def _place(pair: Tuple[str, str]):
+        source, destination = pair
+        try:
+            method = place_file(source, destination, allow_link)
+        except OSError as e:
+            logger.error(f"放置媒体文件失败: {source} -> {destination}, 错误: {e}")
+            return
+        size = os.path.getsize(source)
+        with stats_lock:
+            results[destination] = method
+            stats.record(method, size)
+
+    if len(pairs) <= 1 or max_workers <= 1:
+        for pair in pairs:
+            _place(pair)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="media-place") as executor:
+            list(executor.map(_place, pairs))
+
+    stats.elapsed_time = time.perf_counter() - start_time
+    return results, stats
+
+
+class StreamingZipPackager:
+    """流式ZIP打包器：媒体文件不经过临时目录直接写入，仅对文本数据压缩"""
+
+    def __init__(self, output_path: Union[str, os.PathLike]):
+        self.output_path = str(output_path)
+        self.stats = PackagingStats()
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._start_time = 0.0
+
+    def __enter__(self) -> "StreamingZipPackager":
+        self._start_time = time.perf_counter()
+        self._zip = zipfile.ZipFile(self.output_path, 'w', allowZip64=True)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._zip.close()
+        self._zip = None
+        self.stats.elapsed_time = time.perf_counter() - self._start_time
+        return False
+
+    def add_file(self, source_path: Union[str, os.PathLike], arcname: str):
+        """添加文件，已压缩的媒体格式使用ZIP_STORED"""
+        source_path = str(source_path)
+        ext = os.path.splitext(source_path)[1].lower()
+        if ext in STORED_EXTENSIONS:
+            self._zip.write(source_path, arcname, compress_type=zipfile.ZIP_STORED)
+            method = PlacementMethod.STORED
+        else:
+            self._zip.write(source_path, arcname, compress_type=zipfile.ZIP_DEFLATED)
+            method = PlacementMethod.DEFLATED
+        self.stats.record(method, os.path.getsize(source_path))
+
+    def add_text(self, arcname: str, text: str):
+        """添加文本数据（JSON等），使用deflate压缩"""
+        data = text.encode('utf-8')
+        self._zip.writestr(arcname, data, compress_type=zipfile.ZIP_DEFLATED)
+        self.stats.record(PlacementMethod.DEFLATED, len(data))
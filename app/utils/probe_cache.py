@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+媒体探测缓存 - 共享的 ffprobe 结果缓存
+按 (路径, 大小, 修改时间) 缓存 ffprobe 的 JSON 输出：内存LRU命中直接返回，
+未命中时查询持久化的 SQLite 缓存，仍未命中才启动 ffprobe；文件变化后自动重新探测。
+批量探测在进程池中并行执行，导出时间线上重复使用的素材只探测一次
+"""
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ProbeData = Dict[str, Any]
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".CineAIStudio", "probe_cache.db")
+
+
+class ProbeError(Exception):
+    """ffprobe 探测失败"""
+    pass
+
+
+def run_ffprobe(ffprobe_path: str, file_path: str, timeout: float = 30) -> ProbeData:
+    """执行 ffprobe 并返回解析后的JSON（模块级函数，可在进程池中执行）"""
+    cmd = [
+        ffprobe_path,
+        "-v", "quiet",
+        "-print_format", "json",
+        "-show_format",
+        "-show_streams",
+        file_path
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+    except (OSError, subprocess.SubprocessError) as e:
+        raise ProbeError(f"执行ffprobe失败: {file_path} - {e}") from e
+
+    if result.returncode != 0:
+        raise ProbeError(f"获取媒体信息失败: {file_path} - {result.stderr.strip()}")
+    try:
+        return json.loads(result.stdout)
+    except json.JSONDecodeError as e:
+        raise ProbeError(f"解析ffprobe输出失败: {file_path} - {e}") from e
+
+
+def parse_frame_rate(value: Any, default: float = 0.0) -> float:
+    """解析 ffprobe 的帧率字段（如 "30000/1001"），无效值返回 default"""
+    try:
+        if isinstance(value, str) and "/" in value:
+            num, den = value.split("/", 1)
+            den = float(den)
+            return float(num) / den if den else default
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def find_stream(data: ProbeData, codec_type: str) -> Optional[Dict[str, Any]]:
+    """返回第一个指定类型（video/audio/subtitle）的流"""
+    for stream in data.get("streams", []):
+        if stream.get("codec_type") == codec_type:
+            return stream
+    return None
+
+
+class ProbeCache:
+    """ffprobe 结果缓存
+
+    返回的字典在缓存中共享，调用方只读不改。探测失败抛出 ProbeError，失败结果不缓存。
+    """
+
+    def __init__(self, db_path: Optional[str] = DEFAULT_DB_PATH, max_entries: int = 1024,
+                 ffprobe_path: str = "ffprobe",
+                 runner: Optional[Callable[[str, str], ProbeData]] = None):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ffprobe_path = ffprobe_path
+        self._runner = runner or run_ffprobe
+
+        self._memory: "OrderedDict[Tuple, ProbeData]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'probes': 0,
+            'errors': 0
+        }
+
+        if db_path:
+            self._open_db(db_path)
+
+    def probe(self, file_path: str, ffprobe_path: Optional[str] = None) -> ProbeData:
+        """返回文件的 ffprobe 结果（format + streams）"""
+        key = self._cache_key(file_path)
+        data = self._lookup(key)
+        if data is not None:
+            return data
+
+        data = self._run(ffprobe_path or self.ffprobe_path, key[0])
+        self._store(key, data)
+        return data
+
+    def try_probe(self, file_path: str, ffprobe_path: Optional[str] = None) -> Optional[ProbeData]:
+        """同 probe()，失败时记录日志并返回 None"""
+        try:
+            return self.probe(file_path, ffprobe_path)
+        except (ProbeError, OSError) as e:
+            logger.warning(f"媒体探测失败: {e}")
+            return None
+
+    def probe_many(self, file_paths: Iterable[str], max_workers: Optional[int] = None,
+                   executor: Optional[Executor] = None, use_processes: bool = True,
+                   ffprobe_path: Optional[str] = None) -> Dict[str, Optional[ProbeData]]:
+        """批量探测，返回 {路径: 结果}，失败的文件结果为 None
+
+        重复路径只探测一次；缓存未命中的文件在进程池中并行执行 ffprobe
+        （自定义 runner 不可序列化时传入 use_processes=False 改用线程池）。
+        """
+        results: Dict[str, Optional[ProbeData]] = {}
+        misses: Dict[Tuple, List[str]] = {}
+
+        for file_path in file_paths:
+            if file_path in results:
+                continue
+            try:
+                key = self._cache_key(file_path)
+            except OSError as e:
+                logger.warning(f"媒体探测失败: {file_path} - {e}")
+                results[file_path] = None
+                continue
+            data = self._lookup(key)
+            results[file_path] = data
+            if data is None:
+                misses.setdefault(key, []).append(file_path)
+
+        if not misses:
+            return results
+
+        own_executor = executor is None
+        if own_executor:
+            workers = max_workers or min(len(misses), os.cpu_count() or 4)
+            pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            executor = pool_class(max_workers=workers)
+
+        try:
+            futures = {
+                key: executor.submit(self._runner, ffprobe_path or self.ffprobe_path, key[0])
+                for key in misses
+            }
+            for key, future in futures.items():
+                try:
+                    data = future.result()
+                except Exception as e:
+                    with self._lock:
+                        self.stats['errors'] += 1
+                    logger.warning(f"媒体探测失败: {e}")
+                    continue
+                with self._lock:
+                    self.stats['probes'] += 1
+                self._store(key, data)
+                for file_path in misses[key]:
+                    results[file_path] = data
+        finally:
+            if own_executor:
+                executor.shutdown(wait=True)
+
+        return results
+
+    def invalidate(self, file_path: str):
+        """移除文件的缓存结果"""
+        path = os.path.abspath(os.fspath(file_path))
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == path]:
+                del self._memory[key]
+        self._db_execute("DELETE FROM probes WHERE path = ?", (path,))
+
+    def clear(self):
+        """清空内存和持久化缓存"""
+        with self._lock:
+            self._memory.clear()
+        self._db_execute("DELETE FROM probes")
+
+    def close(self):
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+        return stats
+
+    # 内部实现
+    @staticmethod
+    def _cache_key(file_path: str) -> Tuple[str, int, int]:
+        path = os.path.abspath(os.fspath(file_path))
+        st = os.stat(path)
+        return path, st.st_size, st.st_mtime_ns
+
+    def _run(self, ffprobe_path: str, path: str) -> ProbeData:
+        try:
+            data = self._runner(ffprobe_path, path)
+        except Exception:
+            with self._lock:
+                self.stats['errors'] += 1
+            raise
+        with self._lock:
+            self.stats['probes'] += 1
+        return data
+
+    def _lookup(self, key: Tuple) -> Optional[ProbeData]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                return data
+
+        row = self._db_fetch(key)
+        if row is None:
+            return None
+        try:
+            data = json.loads(row)
+        except json.JSONDecodeError:
+            return None
+
+        with self._lock:
+            self.stats['disk_hits'] += 1
+        self._remember(key, data)
+        return data
+
+    def _store(self, key: Tuple, data: ProbeData):
+        self._remember(key, data)
+        self._db_execute(
+            "INSERT OR REPLACE INTO probes (path, size, mtime_ns, data) VALUES (?, ?, ?, ?)",
+            (key[0], key[1], key[2], json.dumps(data))
+        )
+
+    def _remember(self, key: Tuple, data: ProbeData):
+        with self._lock:
+            self._memory[key] = data
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # 持久化缓存
+    def _open_db(self, db_path: str):
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS probes (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    data TEXT NOT NULL
+                )
+            """)
+            self._db.commit()
+        except sqlite3.Error as e:
+            # 持久化缓存不可用时只使用内存缓存
+            logger.warning(f"探测缓存数据库不可用: {db_path} - {e}")
+            self._db = None
+
+    def _db_fetch(self, key: Tuple) -> Optional[str]:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT data FROM probes WHERE path = ? AND size = ? AND mtime_ns = ?", key
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.debug(f"读取探测缓存失败: {e}")
+                return None
+        return row[0] if row else None
+
+    def _db_execute(self, sql: str, params: Tuple = ()):
+        with self._db_lock:
+            if self._db is None:
+                return
+            try:
+                self._db.execute(sql, params)
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"写入探测缓存失败: {e}")
+
+
+# 全局探测缓存实例
+_global_probe_cache: Optional[ProbeCache] = None
+_global_lock = threading.Lock()
+
+
+def get_probe_cache() -> ProbeCache:
+    """获取全局媒体探测缓存"""
+    global _global_probe_cache
+    if _global_probe_cache is None:
+        with _global_lock:
+            if _global_probe_cache is None:
+                _global_probe_cache = ProbeCache()
+    return _global_probe_cache
@@ -1,199 +1,145 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+"""
+视频缩略图生成器
+请求在有上限的线程池中执行，缓存按 (路径, 大小, 修改时间, 时间点, 尺寸档位) 确定文件名，
+查找无需遍历缓存目录，重启后仍然命中；相同请求共享同一个任务，滚出可见区域的请求可以取消。
+胶片条模式在一次顺序解码中生成时间线上的多张缩略图，拼成一张雪碧图保存
+"""
+
 import os
-import uuid
-import subprocess
+import json
+import hashlib
+import logging
 import tempfile
-from pathlib import Path
-import cv2
-import numpy as np
-from PyQt6.QtCore import QObject, pyqtSignal, QThread
-
-
-class ThumbnailGenerationWorker(QThread):
-    """缩略图生成工作线程"""
-
-    # 自定义信号
-    thumbnail_generated = pyqtSignal(str, str)  # 参数: 视频路径, 缩略图路径
-    error_occurred = pyqtSignal(str, str)  # 参数: 视频路径, 错误信息
-    progress_updated = pyqtSignal(int)  # 进度更新信号
-
-    def __init__(self, video_path, output_path, time_pos=None, size=(320, 180)):
-        """
-        初始化缩略图生成工作线程
-
-        参数:
-            video_path: 视频文件路径
-            output_path: 输出缩略图路径
-            time_pos: 截取时间点(秒)，None则自动选取合适的帧
-            size: 缩略图尺寸 (宽, 高)
-        """
-        super().__init__()
-        self.video_path = video_path
-        self.output_path = output_path
-        self.time_pos = time_pos
-        self.size = size
-        self.stopped = False
-
-    def run(self):
-        """线程执行函数"""
-        try:
-            # 确保输出目录存在
-            os.makedirs(os.path.dirname(self.output_path), exist_ok=True)
-
-            # 生成缩略图
-            if self.time_pos is not None:
-                # 使用指定时间点生成缩略图
-                success = self._generate_at_position()
-            else:
-                # 自动选择合适的帧生成缩略图
-                success = self._generate_auto_frame()
-
-            if success:
-                self.thumbnail_generated.emit(self.video_path, self.output_path)
-            else:
-                self.error_occurred.emit(self.video_path, "缩略图生成失败")
-
-        except Exception as e:
-            self.error_occurred.emit(self.video_path, str(e))
-
-    def stop(self):
-        """停止线程"""
-        self.stopped = True
-
-    def _generate_at_position(self):
-        """在指定时间点生成缩略图"""
-        try:
-            # 使用OpenCV提取视频帧
-            cap = cv2.VideoCapture(self.video_path)
-
-            # 检查视频是否成功打开
-            if not cap.isOpened():
-                raise Exception("无法打开视频文件")
-
-            # 获取视频帧率和总帧数
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-            # 计算指定时间的帧位置
-            frame_pos = int(self.time_pos * fps)
-
-            # 确保帧位置不超出范围
-            frame_pos = min(frame_pos, total_frames - 1)
-            frame_pos = max(0, frame_pos)
-
-            # 设置读取位置
-            cap.set(cv2.CAP_PROP_POS_FRAMES, frame_pos)
-
-            # 读取指定位置的帧
-            ret, frame = cap.read()
-
-            # 释放视频对象
-            cap.release()
-
-            if ret:
-                # 调整大小
-                frame = cv2.resize(frame, self.size)
-
-                # 保存缩略图
-                cv2.imwrite(self.output_path, frame)
-                return True
-            else:
-                return False
-
-        except Exception as e:
-            print(f"缩略图生成错误: {e}")
-            return False
-
-    def _generate_auto_frame(self):
-        """自动选择合适的帧生成缩略图"""
-        try:
-            # 使用OpenCV提取视频帧
-            cap = cv2.VideoCapture(self.video_path)
-
-            # 检查视频是否成功打开
-            if not cap.isOpened():
-                raise Exception("无法打开视频文件")
-
-            # 获取视频总帧数
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-
-            # 如果是短视频，取前30%位置的帧
-            # 否则在10%-30%范围内寻找有代表性的帧
-            if total_frames <= 150:  # 约5秒@30fps
-                target_pos = int(total_frames * 0.3)
-                cap.set(cv2.CAP_PROP_POS_FRAMES, target_pos)
-                ret, frame = cap.read()
-
-                if ret:
-                    # 调整大小
-                    frame = cv2.resize(frame, self.size)
-                    # 保存缩略图
-                    cv2.imwrite(self.output_path, frame)
-                    cap.release()
-                    return True
-            else:
-                # 在10%-30%范围取多个样本，找到最有代表性的帧
-                # 这里用直方图差异作为选择标准
-                start_pos = int(total_frames * 0.1)
-                end_pos = int(total_frames * 0.3)
-
-                # 每隔一定间隔采样
-                sample_interval = (end_pos - start_pos) // 10
-                sample_frames = []
-
-                # 采样视频帧
-                for i in range(10):
-                    # 更新进度
-                    self.progress_updated.emit(i * 10)
-
-                    if self.stopped:
-                        break
-
-                    pos = start_pos + i * sample_interval
-                    cap.set(cv2.CAP_PROP_POS_FRAMES, pos)
-                    ret, frame = cap.read()
-
-                    if ret:
-                        sample_frames.append(frame)
-
-                cap.release()
-
-                if not sample_frames:
-                    return False
-
-                # 选择最有代表性的帧（这里简单选择中间的帧，可以扩展为更智能的选择）
-                best_frame = sample_frames[len(sample_frames) // 2]
-
-                # 调整大小
-                best_frame = cv2.resize(best_frame, self.size)
-
-                # 保存缩略图
-                cv2.imwrite(self.output_path, best_frame)
-                return True
-
-            return False
+import threading
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from app.core.decoder_pool import get_decoder_pool
+from app.utils.lazy_import import lazy_module
+
+# OpenCV/NumPy 在首次生成缩略图时才加载
+cv2 = lazy_module("cv2")
+np = lazy_module("numpy")
+
+logger = logging.getLogger(__name__)
+
+# 尺寸档位宽度：请求尺寸向上取整到档位，相近尺寸的请求共享同一份缓存
+SIZE_CLASS_WIDTHS = (96, 160, 320, 640, 1280)
+SPRITE_MAX_COLUMNS = 10
+SHORT_VIDEO_FRAMES = 150  # 约5秒@30fps
+
+
+class ThumbnailCancelled(Exception):
+    """缩略图请求已取消"""
+    pass
+
+
+def size_class(size: Tuple[int, int]) -> Tuple[int, int]:
+    """把请求尺寸映射到尺寸档位（保持宽高比）"""
+    width, height = int(size[0]), int(size[1])
+    for class_width in SIZE_CLASS_WIDTHS:
+        if class_width >= width:
+            return class_width, max(1, int(round(height * class_width / float(width))))
+    return width, height
+
+
+@dataclass(frozen=True)
+class ThumbnailKey:
+    """缩略图缓存键，文件变化后键随之变化"""
+    path: str
+    file_size: int
+    mtime_ns: int
+    timestamp: Any          # 秒（保留毫秒），None 表示自动选帧；胶片条为 ("strip", 起点, 终点, 张数)
+    size: Tuple[int, int]   # 尺寸档位
+
+    @classmethod
+    def create(cls, video_path: str, timestamp: Any, size: Tuple[int, int]) -> "ThumbnailKey":
+        path = os.path.abspath(os.fspath(video_path))
+        st = os.stat(path)
+        return cls(path, st.st_size, st.st_mtime_ns, timestamp, size_class(size))
+
+    @property
+    def digest(self) -> str:
+        text = json.dumps([self.path, self.file_size, self.mtime_ns, self.timestamp, list(self.size)])
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class Filmstrip:
+    """胶片条雪碧图：按行优先排列的等大缩略图"""
+    video_path: str
+    sheet_path: str
+    timestamps: List[float]
+    tile_size: Tuple[int, int]
+    columns: int
+
+    def tile_rect(self, index: int) -> Tuple[int, int, int, int]:
+        """第 index 张缩略图在雪碧图中的 (x, y, 宽, 高)"""
+        width, height = self.tile_size
+        row, column = divmod(index, self.columns)
+        return column * width, row * height, width, height
+
+    def tile_at(self, time_pos: float) -> int:
+        """离时间点最近的缩略图序号"""
+        if not self.timestamps:
+            return 0
+        return min(range(len(self.timestamps)), key=lambda i: abs(self.timestamps[i] - time_pos))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "timestamps": self.timestamps,
+            "tile_size": list(self.tile_size),
+            "columns": self.columns
+        }
+
+
+@dataclass
+class ThumbnailRequest:
+    """缩略图请求句柄
+
+    相同缓存键的请求共享同一个任务；每个请求者各自 cancel()，
+    所有请求者都取消后排队中的任务直接丢弃，执行中的胶片条在下一帧前停止
+    """
+    key: ThumbnailKey
+    future: Future
+    owners: int = 0
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def done(self) -> bool:
+        return self.future.done()
 
-        except Exception as e:
-            print(f"缩略图自动生成错误: {e}")
-            return False
+    def result(self, timeout: Optional[float] = None) -> Any:
+        """缩略图路径或 Filmstrip，失败或取消时抛出异常"""
+        return self.future.result(timeout)
 
 
 class ThumbnailGenerator(QObject):
     """视频缩略图生成器类"""
 
-    # 自定义信号
+    # 自定义信号（在工作线程中发射，跨线程连接自动排队）
     thumbnail_ready = pyqtSignal(str, str)  # 参数: 视频路径, 缩略图路径
     thumbnail_error = pyqtSignal(str, str)  # 参数: 视频路径, 错误信息
+    filmstrip_ready = pyqtSignal(str, object)  # 参数: 视频路径, Filmstrip
     batch_completed = pyqtSignal()  # 批量生成完成信号
 
-    def __init__(self, cache_dir=None):
+    def __init__(self, cache_dir=None, max_workers: Optional[int] = None, decoder_pool=None):
         """
         初始化缩略图生成器
 
         参数:
             cache_dir: 缩略图缓存目录，不指定则使用系统临时目录
+            max_workers: 工作线程数上限，默认 min(4, CPU核数)
+            decoder_pool: 解码器池，默认使用全局解码器池
         """
         super().__init__()
 
@@ -206,12 +152,49 @@ class ThumbnailGenerator(QObject):
         # 确保缓存目录存在
         os.makedirs(self.cache_dir, exist_ok=True)
 
-        # 保存当前工作线程
-        self.workers = []
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._decoder_pool = decoder_pool
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="thumbnail")
+        self._requests: Dict[ThumbnailKey, ThumbnailRequest] = {}
+        self._lock = threading.Lock()
+
+        # 缓存索引：启动时读取一次目录，之后由生成和清理维护；命中时确认文件仍存在
+        self._index = set(name for name in os.listdir(self.cache_dir)
+                          if os.path.isfile(os.path.join(self.cache_dir, name)))
+
+        self.stats = {
+            "cache_hits": 0,
+            "generated": 0,
+            "filmstrips": 0,
+            "deduplicated": 0,
+            "cancelled": 0,
+            "errors": 0,
+            "frames_decoded": 0,
+            "stale_entries": 0
+        }
+
+    # 单张缩略图
+    def request_thumbnail(self, video_path, time_pos=None, size=(320, 180),
+                          callback: Optional[Callable[[str, Optional[str]], None]] = None) -> ThumbnailRequest:
+        """
+        在线程池中生成缩略图，已缓存时立即完成
+
+        参数:
+            video_path: 视频文件路径
+            time_pos: 截取时间点(秒)，None则自动选取合适的帧
+            size: 缩略图尺寸 (宽, 高)
+            callback: 完成回调 (视频路径, 缩略图路径)，失败或取消时路径为 None
+
+        返回:
+            ThumbnailRequest，可用 cancel() 取消
+        """
+        timestamp = None if time_pos is None else round(float(time_pos), 3)
+        key = ThumbnailKey.create(video_path, timestamp, size)
+        return self._submit(key, f"{key.digest}.jpg", self._render_thumbnail, callback)
 
     def generate_thumbnail(self, video_path, time_pos=None, size=(320, 180)):
         """
-        生成单个视频的缩略图
+        异步生成单个视频的缩略图，完成后发射 thumbnail_ready
 
         参数:
             video_path: 视频文件路径
@@ -219,36 +202,159 @@ class ThumbnailGenerator(QObject):
             size: 缩略图尺寸 (宽, 高)
 
         返回:
-            缩略图路径
+            缩略图路径（生成完成后文件才存在）
         """
-        # 生成唯一的缩略图文件名
-        thumbnail_name = f"{uuid.uuid4().hex}.jpg"
-        thumbnail_path = os.path.join(self.cache_dir, thumbnail_name)
-
-        # 创建并启动工作线程
-        worker = ThumbnailGenerationWorker(video_path, thumbnail_path, time_pos, size)
-        worker.thumbnail_generated.connect(self.thumbnail_ready)
-        worker.error_occurred.connect(self.thumbnail_error)
+        try:
+            request = self.request_thumbnail(video_path, time_pos, size)
+        except OSError as e:
+            self.thumbnail_error.emit(video_path, str(e))
+            return None
+        return self._cache_path(f"{request.key.digest}.jpg")
 
-        # 保存并启动线程
-        self.workers.append(worker)
-        worker.start()
+    def generate_thumbnail_sync(self, video_path, time_pos=None, size=(320, 180)):
+        """
+        同步生成缩略图，已缓存或正在生成时复用（供导入流水线的工作线程使用）
 
-        return thumbnail_path
+        返回:
+            缩略图路径，失败返回None
+        """
+        timestamp = None if time_pos is None else round(float(time_pos), 3)
+        try:
+            key = ThumbnailKey.create(video_path, timestamp, size)
+        except OSError as e:
+            logger.warning(f"缩略图生成错误: {e}")
+            return None
+
+        file_name = f"{key.digest}.jpg"
+        if self._lookup(file_name):
+            return self._cache_path(file_name)
+
+        with self._lock:
+            request = self._requests.get(key)
+            if request is not None:
+                request.owners += 1
+                self.stats["deduplicated"] += 1
+        if request is not None:
+            try:
+                return request.result()
+            except (Exception, CancelledError):
+                return None
+            finally:
+                with self._lock:
+                    request.owners -= 1
+
+        # 在调用线程中生成，避免工作线程等待线程池造成死锁
+        try:
+            return self._render_thumbnail(key, file_name, threading.Event())
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+            logger.warning(f"缩略图生成错误: {video_path} - {e}")
+            return None
 
     def generate_thumbnails_batch(self, video_paths, time_pos=None, size=(320, 180)):
-        """批量生成缩略图"""
+        """批量生成缩略图，全部完成后发射 batch_completed"""
+        requests = []
         for video_path in video_paths:
-            self.generate_thumbnail(video_path, time_pos, size)
+            try:
+                requests.append(self.request_thumbnail(video_path, time_pos, size))
+            except OSError as e:
+                self.thumbnail_error.emit(video_path, str(e))
+
+        remaining = [len(requests)]
+        lock = threading.Lock()
+
+        def _finished(_):
+            with lock:
+                remaining[0] -= 1
+                done = remaining[0] == 0
+            if done:
+                self.batch_completed.emit()
+
+        if not requests:
+            self.batch_completed.emit()
+        for request in requests:
+            request.future.add_done_callback(_finished)
+        return requests
+
+    def get_cached_thumbnail(self, video_path, time_pos=None, size=(320, 180)):
+        """获取已缓存的缩略图路径（如果存在），只查询索引"""
+        timestamp = None if time_pos is None else round(float(time_pos), 3)
+        try:
+            key = ThumbnailKey.create(video_path, timestamp, size)
+        except OSError:
+            return None
+        file_name = f"{key.digest}.jpg"
+        return self._cache_path(file_name) if self._lookup(file_name) else None
+
+    # 胶片条
+    def request_filmstrip(self, video_path, count: int = 20, size=(160, 90), start: float = 0.0,
+                          end: Optional[float] = None,
+                          callback: Optional[Callable[[str, Optional[Filmstrip]], None]] = None
+                          ) -> ThumbnailRequest:
+        """
+        在一次顺序解码中生成 [start, end) 区间内均匀分布的 count 张缩略图，拼成雪碧图
+
+        参数:
+            count: 缩略图数量（每张取所在区间的中点）
+            end: 区间终点(秒)，None 表示视频结尾
+            callback: 完成回调 (视频路径, Filmstrip)，失败或取消时为 None
+        """
+        timestamp = ("strip", round(float(start), 3), None if end is None else round(float(end), 3), int(count))
+        key = ThumbnailKey.create(video_path, timestamp, size)
+        return self._submit(key, f"{key.digest}.json", self._render_filmstrip, callback)
+
+    def generate_filmstrip_sync(self, video_path, count: int = 20, size=(160, 90), start: float = 0.0,
+                                end: Optional[float] = None) -> Optional[Filmstrip]:
+        """同步生成胶片条，失败返回None"""
+        try:
+            return self.request_filmstrip(video_path, count, size, start, end).result()
+        except (Exception, CancelledError) as e:
+            logger.warning(f"胶片条生成错误: {video_path} - {e}")
+            return None
+
+    def get_cached_filmstrip(self, video_path, count: int = 20, size=(160, 90), start: float = 0.0,
+                             end: Optional[float] = None) -> Optional[Filmstrip]:
+        """获取已缓存的胶片条（如果存在）"""
+        timestamp = ("strip", round(float(start), 3), None if end is None else round(float(end), 3), int(count))
+        try:
+            key = ThumbnailKey.create(video_path, timestamp, size)
+        except OSError:
+            return None
+        return self._load_filmstrip(key)
+
+    # 任务管理
+    def cancel(self, request: ThumbnailRequest) -> bool:
+        """
+        取消一个请求者的请求；共享同一任务的请求者全部取消后才真正停止
+
+        返回:
+            任务是否已停止
+        """
+        with self._lock:
+            if request.future.done():
+                return False
+            request.owners -= 1
+            if request.owners > 0:
+                return False
+            request.cancel_event.set()
+            self._requests.pop(request.key, None)
+            self.stats["cancelled"] += 1
+
+        # 排队中的任务直接取消；执行中的任务在下一次检查点停止
+        request.future.cancel()
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self._requests)
+            stats["cached_files"] = len(self._index)
+        return stats
 
     def clear_cache(self):
         """清除缩略图缓存"""
-        # 停止所有工作线程
-        for worker in self.workers:
-            worker.stop()
-            worker.wait()
-
-        self.workers = []
+        self.stop_all()
 
         # 清空缓存目录
         try:
@@ -256,28 +362,256 @@ class ThumbnailGenerator(QObject):
                 file_path = os.path.join(self.cache_dir, file)
                 if os.path.isfile(file_path):
                     os.unlink(file_path)
+            with self._lock:
+                self._index.clear()
             return True
         except Exception as e:
-            print(f"清除缓存错误: {e}")
+            logger.error(f"清除缓存错误: {e}")
             return False
 
-    def get_cached_thumbnail(self, video_path):
-        """获取已缓存的缩略图路径（如果存在）"""
-        # 构建视频文件的哈希值作为标识
-        import hashlib
-        video_hash = hashlib.md5(video_path.encode()).hexdigest()
+    def stop_all(self):
+        """取消所有未完成的缩略图生成任务"""
+        with self._lock:
+            requests = list(self._requests.values())
+            self._requests.clear()
+        for request in requests:
+            request.cancel_event.set()
+            request.future.cancel()
+
+    def shutdown(self):
+        """停止线程池"""
+        self.stop_all()
+        self._executor.shutdown(wait=False)
+
+    # 内部实现
+    def _cache_path(self, file_name: str) -> str:
+        return os.path.join(self.cache_dir, file_name)
+
+    def _lookup(self, file_name: str) -> bool:
+        hit = self._indexed(file_name)
+        if hit:
+            with self._lock:
+                self.stats["cache_hits"] += 1
+        return hit
+
+    def _indexed(self, file_name: str) -> bool:
+        """文件在索引中且仍然存在；缓存文件被外部删除时移除索引项"""
+        with self._lock:
+            if file_name not in self._index:
+                return False
+        if os.path.isfile(self._cache_path(file_name)):
+            return True
+        with self._lock:
+            if file_name in self._index:
+                self._index.discard(file_name)
+                self.stats["stale_entries"] += 1
+        return False
+
+    def _submit(self, key: ThumbnailKey, file_name: str, render: Callable, callback: Optional[Callable]
+                ) -> ThumbnailRequest:
+        cached = self._cached_result(key, file_name) if self._lookup(file_name) else None
+
+        created = False
+        with self._lock:
+            request = self._requests.get(key) if cached is None else None
+            if request is not None:
+                request.owners += 1
+                self.stats["deduplicated"] += 1
+            else:
+                request = ThumbnailRequest(key, Future(), owners=1)
+                if cached is None:
+                    self._requests[key] = request
+                    created = True
+
+        if callback:
+            request.future.add_done_callback(lambda done: callback(key.path, self._result_or_none(done)))
+
+        if cached is not None:
+            request.future.set_result(cached)
+            self._emit_ready(key, cached)
+        elif created:
+            self._executor.submit(self._run, request, file_name, render)
+        return request
+
+    def _cached_result(self, key: ThumbnailKey, file_name: str) -> Any:
+        if file_name.endswith(".json"):
+            return self._load_filmstrip(key)
+        return self._cache_path(file_name)
+
+    def _run(self, request: ThumbnailRequest, file_name: str, render: Callable):
+        future = request.future
+        if request.cancelled or not future.set_running_or_notify_cancel():
+            return
+        key = request.key
+        try:
+            # 提交前的查找与上一个同键任务完成之间存在时间窗，执行前再查一次索引
+            result = self._cached_result(key, file_name) if self._indexed(file_name) else None
+            if result is None:
+                result = render(key, file_name, request.cancel_event)
+        except ThumbnailCancelled as e:
+            future.set_exception(CancelledError(str(e)))
+            return
+        except Exception as e:
+            with self._lock:
+                self.stats["errors"] += 1
+                self._requests.pop(key, None)
+            logger.warning(f"缩略图生成错误: {key.path} - {e}")
+            future.set_exception(e)
+            self.thumbnail_error.emit(key.path, str(e))
+            return
+
+        with self._lock:
+            self._requests.pop(key, None)
+        future.set_result(result)
+        self._emit_ready(key, result)
+
+    def _emit_ready(self, key: ThumbnailKey, result: Any):
+        if isinstance(result, Filmstrip):
+            self.filmstrip_ready.emit(key.path, result)
+        else:
+            self.thumbnail_ready.emit(key.path, result)
+
+    @staticmethod
+    def _result_or_none(future: Future) -> Any:
+        if future.cancelled():
+            return None
+        try:
+            return future.result()
+        except (Exception, CancelledError):
+            return None
+
+    def _open_decoder(self, path: str, frame_index: int = 0):
+        pool = self._decoder_pool or get_decoder_pool()
+        cap = pool.acquire(path, frame_index)
+        if not cap.isOpened():
+            cap.release()
+            raise IOError(f"无法打开视频文件: {path}")
+        return cap
+
+    def _read_frame(self, cap, frame_index: int):
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+        ret, frame = cap.read()
+        with self._lock:
+            self.stats["frames_decoded"] += 1
+        return frame if ret else None
+
+    def _write_image(self, file_name: str, image) -> str:
+        """先写临时文件再替换，避免读到写了一半的缩略图"""
+        path = self._cache_path(file_name)
+        root, ext = os.path.splitext(path)
+        temp_path = f"{root}.{threading.get_ident()}.tmp{ext}"
+        if not cv2.imwrite(temp_path, image):
+            raise IOError(f"写入缩略图失败: {path}")
+        os.replace(temp_path, path)
+        with self._lock:
+            self._index.add(file_name)
+        return path
+
+    def _render_thumbnail(self, key: ThumbnailKey, file_name: str, cancel_event: threading.Event) -> str:
+        cap = self._open_decoder(key.path)
+        try:
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            if key.timestamp is not None:
+                # 使用指定时间点
+                fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+                frame_pos = int(key.timestamp * fps)
+            elif total_frames <= SHORT_VIDEO_FRAMES:
+                # 短视频取30%位置的帧
+                frame_pos = int(total_frames * 0.3)
+            else:
+                # 长视频取10%-30%采样区间中间（20%位置）的帧
+                frame_pos = int(total_frames * 0.2)
+            frame_pos = max(0, min(frame_pos, total_frames - 1))
+
+            if cancel_event.is_set():
+                raise ThumbnailCancelled(key.path)
+            frame = self._read_frame(cap, frame_pos)
+        finally:
+            cap.release()
 
-        # 检查是否存在已缓存的缩略图
-        for file in os.listdir(self.cache_dir):
-            if file.startswith(video_hash):
-                return os.path.join(self.cache_dir, file)
+        if frame is None:
+            raise IOError(f"读取视频帧失败: {key.path}")
+        path = self._write_image(file_name, cv2.resize(frame, key.size, interpolation=cv2.INTER_AREA))
+        with self._lock:
+            self.stats["generated"] += 1
+        return path
 
-        return None
+    def _render_filmstrip(self, key: ThumbnailKey, file_name: str, cancel_event: threading.Event) -> Filmstrip:
+        _, start, end, count = key.timestamp
+        count = max(1, count)
+        width, height = key.size
 
-    def stop_all(self):
-        """停止所有缩略图生成任务"""
-        for worker in self.workers:
-            worker.stop()
-            worker.wait()
+        cap = self._open_decoder(key.path)
+        try:
+            fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            duration = total_frames / fps
+            end = duration if end is None else min(end, duration)
+            step = max(end - start, 0.0) / count
+            timestamps = [start + step * (i + 0.5) for i in range(count)]
+
+            columns = min(count, SPRITE_MAX_COLUMNS)
+            rows = (count + columns - 1) // columns
+            sheet = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+
+            # 帧号单调递增：同一个解码器从前往后读，间隔小时只跳帧不seek
+            previous = None
+            for index, time_pos in enumerate(timestamps):
+                if cancel_event.is_set():
+                    raise ThumbnailCancelled(key.path)
+                frame_index = max(0, min(int(time_pos * fps), total_frames - 1))
+                if frame_index != previous:
+                    frame = self._read_frame(cap, frame_index)
+                    if frame is not None:
+                        tile = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+                    previous = frame_index
+                if frame is not None:
+                    row, column = divmod(index, columns)
+                    sheet[row * height:(row + 1) * height, column * width:(column + 1) * width] = tile
+        finally:
+            cap.release()
 
-        self.workers = []
+        base = file_name[:-len(".json")]
+        sheet_path = self._write_image(f"{base}.jpg", sheet)
+        filmstrip = Filmstrip(key.path, sheet_path, timestamps, (width, height), columns)
+
+        # 元数据写在雪碧图之后，存在即表示胶片条完整
+        meta_path = self._cache_path(file_name)
+        temp_path = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(filmstrip.to_dict(), f)
+        os.replace(temp_path, meta_path)
+        with self._lock:
+            self._index.add(file_name)
+            self.stats["filmstrips"] += 1
+        return filmstrip
+
+    def _load_filmstrip(self, key: ThumbnailKey) -> Optional[Filmstrip]:
+        file_name = f"{key.digest}.json"
+        sheet_name = f"{key.digest}.jpg"
+        if not self._indexed(file_name) or not self._indexed(sheet_name):
+            return None
+        try:
+            with open(self._cache_path(file_name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return Filmstrip(key.path, self._cache_path(sheet_name), list(data["timestamps"]),
+                             tuple(data["tile_size"]), int(data["columns"]))
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"读取胶片条缓存失败: {file_name} - {e}")
+            return None
+
+
+# 全局缩略图生成器实例
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".CineAIStudio", "thumbnails")
+_global_thumbnail_generator: Optional[ThumbnailGenerator] = None
+_global_lock = threading.Lock()
+
+
+def get_thumbnail_generator() -> ThumbnailGenerator:
+    """获取全局缩略图生成器（缓存目录持久化在用户目录下）"""
+    global _global_thumbnail_generator
+    if _global_thumbnail_generator is None:
+        with _global_lock:
+            if _global_thumbnail_generator is None:
+                _global_thumbnail_generator = ThumbnailGenerator(DEFAULT_CACHE_DIR)
+    return _global_thumbnail_generator
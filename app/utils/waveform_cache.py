@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+音频波形缓存 - 时间线波形的多分辨率峰值金字塔
+每个媒体文件的音频只经 ffmpeg 解码一次，生成逐级减半的 min/max 峰值金字塔，
+按文件指纹持久化到磁盘。时间线绘制时按缩放级别选取最接近的层级切片，
+开销只与可见像素数有关，滚动、缩放重绘不会触发解码
+"""
+
+import os
+import time
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .file_fingerprint import get_fingerprint_service
+from .probe_cache import get_probe_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".CineAIStudio", "waveforms")
+DEFAULT_SAMPLE_RATE = 8000      # 解码采样率（单声道）
+DEFAULT_BASE_BUCKET = 64        # 第0层每个峰值覆盖的采样数
+PYRAMID_VERSION = 1
+DECODE_CHUNK_BYTES = 256 * 1024
+
+PcmDecoder = Callable[[str, int], Iterable[np.ndarray]]
+ProgressCallback = Callable[[str, float], None]
+
+
+class WaveformError(Exception):
+    """波形提取失败"""
+    pass
+
+
+def ffmpeg_pcm_chunks(file_path: str, sample_rate: int = DEFAULT_SAMPLE_RATE,
+                      ffmpeg_path: str = "ffmpeg") -> Iterator[np.ndarray]:
+    """通过 ffmpeg 管道流式解码为单声道 int16 PCM 数据块"""
+    cmd = [
+        ffmpeg_path, "-v", "error", "-nostdin",
+        "-i", file_path,
+        "-vn", "-sn", "-dn",
+        "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "-acodec", "pcm_s16le", "pipe:1"
+    ]
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise WaveformError(f"执行ffmpeg失败: {file_path} - {e}") from e
+
+    pending = b""
+    try:
+        while True:
+            data = process.stdout.read(DECODE_CHUNK_BYTES)
+            if not data:
+                break
+            data = pending + data
+            usable = len(data) - len(data) % 2
+            pending = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype="<i2")
+    finally:
+        process.stdout.close()
+        stderr = process.stderr.read().decode("utf-8", errors="replace")
+        process.stderr.close()
+        returncode = process.wait()
+
+    if returncode != 0:
+        raise WaveformError(f"解码音频失败: {file_path} - {stderr.strip()}")
+
+
+def reduce_peaks(peaks: np.ndarray) -> np.ndarray:
+    """把 (N, 2) 的 min/max 峰值两两合并为下一层"""
+    count = len(peaks)
+    if count % 2:
+        peaks = np.concatenate([peaks, peaks[-1:]])
+    pairs = peaks.reshape(-1, 2, 2)
+    return np.stack([pairs[:, :, 0].min(axis=1), pairs[:, :, 1].max(axis=1)], axis=1)
+
+
+@dataclass
+class WaveformPyramid:
+    """min/max 峰值金字塔
+
+    levels[k] 为 (N_k, 2) 的 int16 数组，每行 [min, max]，覆盖 base_bucket * 2^k 个采样
+    """
+    sample_rate: int
+    base_bucket: int
+    sample_count: int
+    levels: List[np.ndarray] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.sample_count / float(self.sample_rate)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(level.nbytes for level in self.levels)
+
+    def bucket_seconds(self, level: int) -> float:
+        return self.base_bucket * (1 << level) / float(self.sample_rate)
+
+    def choose_level(self, seconds_per_pixel: float) -> int:
+        """选择每个峰值不超过一个像素宽度的最粗层级"""
+        level = 0
+        while level + 1 < len(self.levels) and self.bucket_seconds(level + 1) <= seconds_per_pixel:
+            level += 1
+        return level
+
+    def peaks(self, start: float, end: float, pixels: int) -> np.ndarray:
+        """返回 [start, end) 秒区间按 pixels 列归并的峰值，(pixels, 2) float32，范围 [-1, 1]
+
+        所选层级每个像素最多覆盖 4 个峰值，开销与 pixels 成正比，与媒体时长无关
+        """
+        pixels = max(int(pixels), 0)
+        result = np.zeros((pixels, 2), dtype=np.float32)
+        if pixels == 0 or end <= start or not self.levels:
+            return result
+
+        level = self.choose_level((end - start) / pixels)
+        data = self.levels[level]
+        bucket = self.bucket_seconds(level)
+
+        # 列边界换算为峰值索引，容差避免浮点误差把恰好对齐的边界多算一个峰值
+        edges = (start + (end - start) * np.arange(pixels + 1, dtype=np.float64) / pixels) / bucket
+        first = np.floor(edges[:-1] + 1e-6).astype(np.int64)
+        last = np.maximum(np.ceil(edges[1:] - 1e-6).astype(np.int64), first + 1)
+        valid = (first < len(data)) & (last > 0)
+        if not valid.any():
+            return result
+
+        first = np.clip(first, 0, len(data) - 1)
+        last = np.clip(last, 1, len(data))
+        span = int((last - first).max())
+        # 每列最多 span 个峰值（span 很小），用固定宽度的索引窗口一次完成归并
+        index = first[:, None] + np.arange(span)[None, :]
+        inside = index < last[:, None]
+        index = np.minimum(index, len(data) - 1)
+        window = data[index]
+        lows = np.where(inside, window[:, :, 0], np.int16(32767)).min(axis=1)
+        highs = np.where(inside, window[:, :, 1], np.int16(-32768)).max(axis=1)
+
+        result[valid, 0] = lows[valid] / 32768.0
+        result[valid, 1] = highs[valid] / 32768.0
+        return result
+
+    @classmethod
+    def from_level0(cls, level0: np.ndarray, sample_rate: int, base_bucket: int,
+                    sample_count: int) -> "WaveformPyramid":
+        levels = [np.ascontiguousarray(level0, dtype=np.int16)]
+        while len(levels[-1]) > 1:
+            levels.append(reduce_peaks(levels[-1]))
+        return cls(sample_rate, base_bucket, sample_count, levels)
+
+    def save(self, path: str):
+        """保存为 .npz（先写临时文件再原子替换）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        header = np.array([PYRAMID_VERSION, self.sample_rate, self.base_bucket, self.sample_count],
+                          dtype=np.int64)
+        arrays = {f"level_{index}": level for index, level in enumerate(self.levels)}
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            np.savez(f, header=header, **arrays)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["WaveformPyramid"]:
+        """读取金字塔文件，版本不符或损坏时返回 None"""
+        try:
+            with np.load(path) as data:
+                header = data["header"]
+                if int(header[0]) != PYRAMID_VERSION:
+                    return None
+                count = sum(1 for name in data.files if name.startswith("level_"))
+                levels = [data[f"level_{index}"] for index in range(count)]
+        except (OSError, ValueError, KeyError) as e:
+            logger.debug(f"读取波形缓存失败: {path} - {e}")
+            return None
+        return cls(int(header[1]), int(header[2]), int(header[3]), levels)
+
+
+class _PeakAccumulator:
+    """把流式 PCM 数据块累积为第0层峰值"""
+
+    def __init__(self, base_bucket: int):
+        self.base_bucket = base_bucket
+        self.sample_count = 0
+        self._pending = np.zeros(0, dtype=np.int16)
+        self._chunks: List[np.ndarray] = []
+
+    def feed(self, samples: np.ndarray):
+        samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+        self.sample_count += len(samples)
+        if len(self._pending):
+            samples = np.concatenate([self._pending, samples])
+        usable = len(samples) - len(samples) % self.base_bucket
+        if usable:
+            buckets = samples[:usable].reshape(-1, self.base_bucket)
+            self._chunks.append(np.stack([buckets.min(axis=1), buckets.max(axis=1)], axis=1))
+        self._pending = samples[usable:].copy()
+
+    def finish(self) -> np.ndarray:
+        if len(self._pending):
+            self._chunks.append(np.array([[self._pending.min(), self._pending.max()]], dtype=np.int16))
+            self._pending = np.zeros(0, dtype=np.int16)
+        if not self._chunks:
+            return np.zeros((0, 2), dtype=np.int16)
+        return np.concatenate(self._chunks)
+
+
+class WaveformCache:
+    """波形峰值缓存
+
+    get_peaks() 只查询内存中的金字塔，从不阻塞：未就绪时返回 None 并在后台提取。
+    后台任务按文件指纹查找磁盘缓存，未命中才解码；同一文件的并发请求共享一个任务，
+    同一进度回调和完成回调只登记一次，提取失败的文件（如没有音轨）在文件变化前不再重试。
+    绘制路径上的查询复用最近一次 stat 得到的缓存键，每 KEY_REFRESH_SECONDS 秒才重新检查文件是否变化。
+    """
+
+    KEY_REFRESH_SECONDS = 5.0
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 sample_rate: int = DEFAULT_SAMPLE_RATE, base_bucket: int = DEFAULT_BASE_BUCKET,
+                 max_memory_entries: int = 32, max_workers: int = 2,
+                 decoder: Optional[PcmDecoder] = None,
+                 duration_provider: Optional[Callable[[str], Optional[float]]] = None,
+                 ffmpeg_path: str = "ffmpeg"):
+        self.cache_dir = cache_dir
+        self.sample_rate = sample_rate
+        self.base_bucket = base_bucket
+        self.max_memory_entries = max_memory_entries
+        self.ffmpeg_path = ffmpeg_path
+        self._decoder = decoder or (lambda path, rate: ffmpeg_pcm_chunks(path, rate, self.ffmpeg_path))
+        self._duration_provider = duration_provider or self._probe_duration
+
+        self._memory: "OrderedDict[Tuple, WaveformPyramid]" = OrderedDict()
+        self._pending: Dict[Tuple, Future] = {}
+        self._progress: Dict[Tuple, float] = {}
+        self._listeners: Dict[Tuple, List[ProgressCallback]] = {}
+        self._callbacks: Dict[Tuple, List[Callable]] = {}
+        self._keys: Dict[str, Tuple[Tuple, float]] = {}  # 绝对路径 -> (缓存键, 检查时间)
+        self._failed: Dict[Tuple, str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="waveform")
+
+        self.stats = {
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'decodes': 0,
+            'errors': 0,
+            'slices': 0
+        }
+
+    def get_peaks(self, file_path: str, start: float, end: float, pixels: int,
+                  progress: Optional[ProgressCallback] = None,
+                  callback: Optional[Callable[[str, Optional[WaveformPyramid]], None]] = None
+                  ) -> Optional[np.ndarray]:
+        """返回 [start, end) 秒区间的 (pixels, 2) 峰值；金字塔未就绪时返回 None 并在后台提取"""
+        try:
+            key = self._lookup_key(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            pyramid = self._memory.get(key)
+            if pyramid is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+                self.stats['slices'] += 1
+            failed = key in self._failed
+        if pyramid is None:
+            if not failed:
+                self._request(key, file_path, progress, callback)
+            return None
+        return pyramid.peaks(start, end, pixels)
+
+    def get_pyramid(self, file_path: str) -> Optional[WaveformPyramid]:
+        """只查询内存缓存"""
+        try:
+            key = self._lookup_key(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            pyramid = self._memory.get(key)
+            if pyramid is not None:
+                self._memory.move_to_end(key)
+                self.stats['memory_hits'] += 1
+            return pyramid
+
+    def get_progress(self, file_path: str) -> Optional[float]:
+        """后台提取进度（0~1），没有进行中的任务时返回 None"""
+        try:
+            key = self._lookup_key(file_path)
+        except OSError:
+            return None
+        with self._lock:
+            return self._progress.get(key)
+
+    def get_error(self, file_path: str) -> Optional[str]:
+        """提取失败原因，未失败时返回 None"""
+        try:
+            key = self._lookup_key(file_path)
+        except OSError as e:
+            return str(e)
+        with self._lock:
+            return self._failed.get(key)
+
+    def request(self, file_path: str, progress: Optional[ProgressCallback] = None,
+                callback: Optional[Callable[[str, Optional[WaveformPyramid]], None]] = None) -> Future:
+        """在后台加载或提取波形金字塔，同一文件的重复请求共享同一个任务
+
+        progress(path, fraction) 在工作线程中调用；callback(path, pyramid) 在完成时调用，失败时 pyramid 为 None。
+        每次请求都重新检查文件是否变化。
+        """
+        return self._request(self._lookup_key(file_path, refresh=True), file_path, progress, callback)
+
+    def _request(self, key: Tuple, file_path: str, progress: Optional[ProgressCallback] = None,
+                 callback: Optional[Callable[[str, Optional[WaveformPyramid]], None]] = None) -> Future:
+        with self._lock:
+            future = self._pending.get(key)
+            if future is None:
+                pyramid = self._memory.get(key)
+                future = Future()
+                if pyramid is not None:
+                    future.set_result(pyramid)
+                else:
+                    self._pending[key] = future
+                    self._progress[key] = 0.0
+                    self._executor.submit(self._extract_task, key, future)
+            if key in self._pending:
+                # 进行中的任务对同一回调只登记一次，重绘时反复请求不会累积监听者
+                listeners = self._listeners.setdefault(key, [])
+                if progress and progress not in listeners:
+                    listeners.append(progress)
+                callbacks = self._callbacks.setdefault(key, [])
+                if callback in callbacks:
+                    callback = None
+                elif callback:
+                    callbacks.append(callback)
+
+        if callback:
+            def _notify(done: Future):
+                try:
+                    callback(file_path, done.result())
+                except Exception as e:
+                    logger.debug(f"提取波形失败: {file_path} - {e}")
+                    callback(file_path, None)
+            future.add_done_callback(_notify)
+        return future
+
+    def load_or_extract(self, file_path: str,
+                        progress: Optional[ProgressCallback] = None) -> WaveformPyramid:
+        """同步获取波形金字塔（磁盘缓存未命中时解码）"""
+        return self.request(file_path, progress).result()
+
+    def invalidate(self, file_path: str):
+        """移除文件的内存缓存和失败记录"""
+        path = os.path.abspath(os.fspath(file_path))
+        with self._lock:
+            self._keys.pop(path, None)
+            for cache in (self._memory, self._failed):
+                for key in [key for key in cache if key[0] == path]:
+                    del cache[key]
+
+    def clear(self):
+        """清空内存缓存（磁盘缓存保留）"""
+        with self._lock:
+            self._memory.clear()
+            self._failed.clear()
+            self._keys.clear()
+
+    def shutdown(self):
+        """停止后台任务"""
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['pending'] = len(self._pending)
+        return stats
+
+    # 内部实现
+    @staticmethod
+    def _cache_key(file_path: str) -> Tuple[str, int, int]:
+        path = os.path.abspath(os.fspath(file_path))
+        st = os.stat(path)
+        return path, st.st_size, st.st_mtime_ns
+
+    def _lookup_key(self, file_path: str, refresh: bool = False) -> Tuple[str, int, int]:
+        """返回缓存键，最近检查过的文件不再 stat"""
+        path = os.path.abspath(os.fspath(file_path))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._keys.get(path)
+        if entry is not None and not refresh and now - entry[1] < self.KEY_REFRESH_SECONDS:
+            return entry[0]
+        try:
+            key = self._cache_key(path)
+        except OSError:
+            with self._lock:
+                self._keys.pop(path, None)
+            raise
+        with self._lock:
+            self._keys[path] = (key, now)
+        return key
+
+    def _disk_path(self, fingerprint: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        name = fingerprint.replace(":", "_")
+        return os.path.join(self.cache_dir, f"{name}_{self.sample_rate}_{self.base_bucket}.npz")
+
+    def _report(self, key: Tuple, fraction: float):
+        with self._lock:
+            self._progress[key] = fraction
+            listeners = list(self._listeners.get(key, ()))
+        for listener in listeners:
+            try:
+                listener(key[0], fraction)
+            except Exception as e:
+                logger.debug(f"波形进度回调失败: {e}")
+
+    def _extract_task(self, key: Tuple, future: Future):
+        try:
+            pyramid = self._load_or_extract(key)
+        except Exception as e:
+            with self._lock:
+                self.stats['errors'] += 1
+                self._failed[key] = str(e)
+                self._finish(key)
+            logger.warning(f"提取音频波形失败: {e}")
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._memory[key] = pyramid
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+            self._finish(key)
+        future.set_result(pyramid)
+
+    def _finish(self, key: Tuple):
+        # 调用方持有 self._lock
+        self._pending.pop(key, None)
+        self._progress.pop(key, None)
+        self._listeners.pop(key, None)
+        self._callbacks.pop(key, None)
+
+    def _load_or_extract(self, key: Tuple) -> WaveformPyramid:
+        path = key[0]
+        disk_path = self._disk_path(get_fingerprint_service().fingerprint(path))
+        if disk_path and os.path.exists(disk_path):
+            pyramid = WaveformPyramid.load(disk_path)
+            if pyramid is not None:
+                with self._lock:
+                    self.stats['disk_hits'] += 1
+                self._report(key, 1.0)
+                return pyramid
+
+        pyramid = self._decode(key)
+        if disk_path:
+            try:
+                pyramid.save(disk_path)
+            except OSError as e:
+                logger.warning(f"保存波形缓存失败: {disk_path} - {e}")
+        return pyramid
+
+    def _decode(self, key: Tuple) -> WaveformPyramid:
+        path = key[0]
+        duration = self._duration_provider(path)
+        expected = duration * self.sample_rate if duration else 0
+        accumulator = _PeakAccumulator(self.base_bucket)
+        reported = 0.0
+
+        for chunk in self._decoder(path, self.sample_rate):
+            accumulator.feed(chunk)
+            if expected:
+                fraction = min(accumulator.sample_count / expected, 0.99)
+                # 进度按 1% 节流，避免回调过于频繁
+                if fraction - reported >= 0.01:
+                    reported = fraction
+                    self._report(key, fraction)
+
+        if accumulator.sample_count == 0:
+            raise WaveformError(f"文件没有可解码的音频: {path}")
+
+        with self._lock:
+            self.stats['decodes'] += 1
+        pyramid = WaveformPyramid.from_level0(accumulator.finish(), self.sample_rate,
+                                              self.base_bucket, accumulator.sample_count)
+        self._report(key, 1.0)
+        return pyramid
+
+    @staticmethod
+    def _probe_duration(file_path: str) -> Optional[float]:
+        data = get_probe_cache().try_probe(file_path)
+        if not data:
+            return None
+        try:
+            return float(data.get("format", {}).get("duration", 0)) or None
+        except (TypeError, ValueError):
+            return None
+
+
+# 全局波形缓存实例
+_global_waveform_cache: Optional[WaveformCache] = None
+_global_lock = threading.Lock()
+
+
+def get_waveform_cache() -> WaveformCache:
+    """获取全局音频波形缓存"""
+    global _global_waveform_cache
+    if _global_waveform_cache is None:
+        with _global_lock:
+            if _global_waveform_cache is None:
+                _global_waveform_cache = WaveformCache()
+    return _global_waveform_cache
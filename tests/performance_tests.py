@@ -8,6 +8,7 @@
 import os
 import sys
 import time
+import subprocess
 import psutil
 import threading
 import gc
@@ -24,9 +25,37 @@ from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import QTimer, QThreadPool, QRunnable
 
 from app.core.performance_optimizer import get_enhanced_performance_optimizer
-from app.core.memory_manager import get_memory_manager
+from app.core.memory_manager import get_memory_manager, MemoryManager, FrameBufferPool
 from app.core.service_container import ServiceContainer
 from app.config.settings_manager import SettingsManager
+from app.utils.file_fingerprint import FileFingerprintService
+from app.export.jianying_media_organizer import JianYingMediaOrganizer
+from app.export.jianying_project_parser import JianYingClip, JianYingProject, JianYingTrack
+from app.core.media_database import MediaDatabase
+from app.core.media_search_index import (
+    SEARCH_RANK_WEIGHTS, build_match_query, create_search_index, rebuild_search_index, register_search_functions
+)
+from app.core.project_save_engine import ProjectSaveEngine, journal_path_for
+from app.core.project_object_store import ProjectObjectStore
+from app.core.project_version_manager import ProjectVersionManager
+from app.core.project import Project
+from app.core.project_backup_manager import ProjectBackupManager
+from app.core.events import EventSystem, EventPriority
+from app.core.async_event_bus import AsyncEventBus, TopicConfig, OverflowPolicy, get_async_event_bus
+from app.core.startup_orchestrator import StartupOrchestrator
+from app.core.decoder_pool import DecoderPool, get_decoder_pool
+from app.utils.probe_cache import ProbeCache, ProbeError
+from app.effects.transitions import TransitionEngine, TransitionManager, TransitionParameters, TransitionType
+from app.effects.animations import AnimationEngine, AnimationLayer, AnimationTrack, AnimationType, EasingType, Keyframe
+from app.effects.text_effects import TextAnimation, TextAnimationType, TextEffectEngine, TextLayer, TextStyle
+from app.utils.font_index import FontIndex, INDEX_VERSION, FONTTOOLS_AVAILABLE
+from app.effects.effects_system import EffectsManager
+from app.utils.waveform_cache import WaveformCache
+from app.utils.thumbnail_generator import ThumbnailGenerator
+from app.core.task_graph import NodeState, TaskGraph
+from app.utils.media_packaging import PlacementMethod, place_file, place_files
+from app.core.batch_processor import BatchConfig, BatchProcessor, BatchStatus, BatchTask, BatchTaskType
+from app.core.resource_governor import ResourceBudget, ResourceCost, ResourceGovernor, ResourceUsage
 
 
 class PerformanceTestRunner:
@@ -543,6 +572,3067 @@ class MemoryLeakTest(unittest.TestCase):
         print(f"GUI组件内存增长: {memory_growth:.2f}MB")
 
 
+class FileFingerprintPerformanceTest(unittest.TestCase):
+    """文件指纹性能测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.file_path = os.path.join(self.temp_dir, "large_media.bin")
+        with open(self.file_path, "wb") as f:
+            for _ in range(64):
+                f.write(os.urandom(1024 * 1024))
+        self.service = FileFingerprintService()
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        self.service.shutdown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_01_sampled_fingerprint_reads_only_samples(self):
+        """测试采样指纹只读取采样块"""
+        result, execution_time = self.runner.measure_execution_time(self.service.fingerprint, self.file_path)
+
+        self.assertLessEqual(self.service.stats["bytes_read"], self.service.block_size * 3)
+        self.assertEqual(self.service.fingerprint(self.file_path), result)
+        self.assertEqual(self.service.stats["fingerprint_hits"], 1)
+
+        print(f"采样指纹性能: {execution_time * 1000:.2f}ms")
+
+    def test_02_fingerprint_matches_copy_and_detects_change(self):
+        """测试副本指纹一致、修改后指纹变化"""
+        import shutil
+        copy_path = self.file_path + ".copy"
+        shutil.copyfile(self.file_path, copy_path)
+        self.assertEqual(self.service.fingerprint(self.file_path), self.service.fingerprint(copy_path))
+
+        with open(copy_path, "r+b") as f:
+            f.write(b"changed")
+        self.assertNotEqual(self.service.fingerprint(self.file_path), self.service.fingerprint(copy_path))
+
+    def test_03_background_full_hash(self):
+        """测试后台完整哈希与缓存"""
+        import hashlib
+        with open(self.file_path, "rb") as f:
+            expected = hashlib.md5(f.read()).hexdigest()
+
+        future = self.service.request_full_hash(self.file_path)
+        self.assertEqual(future.result(timeout=30), expected)
+        self.assertEqual(self.service.get_cached_full_hash(self.file_path), expected)
+
+    def test_04_organizer_validates_with_full_hash(self):
+        """测试素材组织后用完整哈希校验：采样块之外的损坏也能发现"""
+        import json
+        import shutil
+        source_path = os.path.join(self.temp_dir, "clip.mp4")
+        with open(source_path, "wb") as f:
+            f.write(os.urandom(1024 * 1024))
+        project = JianYingProject("p1", "测试项目", "1.0", "", "", 1.0, {"width": 1920, "height": 1080}, 30.0,
+                                  [JianYingTrack("t1", "video", [JianYingClip("c1", "video", source_path, 0, 1, 1)])])
+        output_dir = os.path.join(self.temp_dir, "output")
+        organizer = JianYingMediaOrganizer()
+        organizer.use_links = False
+
+        organized = organizer.organize_media_files(project, output_dir)
+        self.assertEqual(len(organized), 1)
+        self.assertEqual(organizer.validate_media_files(output_dir)['valid_files'], 1)
+
+        # 在采样块之外写入损坏：大小和采样指纹都不变
+        with open(organized[0], "r+b") as f:
+            f.seek(200 * 1024)
+            f.write(b"\0" * 16)
+        self.assertEqual(organizer._calculate_checksum(organized[0]), organizer._calculate_checksum(source_path))
+        result = organizer.validate_media_files(output_dir)
+        self.assertEqual((result['valid_files'], result['corrupted_files']), (0, 1))
+
+        # 旧版数据库只有完整MD5的 checksum 字段
+        db_file = os.path.join(output_dir, "media_database.json")
+        with open(db_file, "r", encoding="utf-8") as f:
+            media_info = json.load(f)
+        for info in media_info.values():
+            info['checksum'] = info.pop('full_checksum')
+        with open(db_file, "w", encoding="utf-8") as f:
+            json.dump(media_info, f)
+        self.assertEqual(organizer.validate_media_files(output_dir)['corrupted_files'], 1)
+        shutil.copyfile(source_path, organized[0])
+        self.assertEqual(organizer.validate_media_files(output_dir)['valid_files'], 1)
+
+    def test_05_organizer_does_not_wait_for_full_hash(self):
+        """测试组织素材不等待完整哈希，校验时按原始素材补全并写回数据库"""
+        import json
+        source_path = os.path.join(self.temp_dir, "slow_clip.mp4")
+        with open(source_path, "wb") as f:
+            f.write(os.urandom(1024 * 1024))
+        project = JianYingProject("p2", "测试项目", "1.0", "", "", 1.0, {"width": 1920, "height": 1080}, 30.0,
+                                  [JianYingTrack("t1", "video", [JianYingClip("c1", "video", source_path, 0, 1, 1)])])
+        output_dir = os.path.join(self.temp_dir, "output_slow")
+        organizer = JianYingMediaOrganizer()
+        organizer.use_links = False
+        full_hash = FileFingerprintService.full_hash
+
+        def slow_full_hash(service, file_path, algorithm="md5"):
+            time.sleep(1.0)
+            return full_hash(service, file_path, algorithm)
+
+        with patch.object(FileFingerprintService, "full_hash", slow_full_hash):
+            organized, organize_time = self.runner.measure_execution_time(
+                organizer.organize_media_files, project, output_dir)
+        self.assertEqual(len(organized), 1)
+        self.assertLess(organize_time, 0.8)
+
+        db_file = os.path.join(output_dir, "media_database.json")
+        with open(db_file, "r", encoding="utf-8") as f:
+            self.assertEqual([info['full_checksum'] for info in json.load(f).values()], [""])
+        self.assertEqual(organizer.validate_media_files(output_dir)['valid_files'], 1)
+        with open(db_file, "r", encoding="utf-8") as f:
+            recorded = [info['full_checksum'] for info in json.load(f).values()]
+        self.assertEqual(recorded, [self.service.full_hash(source_path)])
+
+        # 补全后不再依赖原始素材
+        os.remove(source_path)
+        with open(organized[0], "r+b") as f:
+            f.seek(200 * 1024)
+            f.write(b"\0" * 16)
+        self.assertEqual(organizer.validate_media_files(output_dir)['corrupted_files'], 1)
+        print(f"组织1MB素材（完整哈希耗时1s）: {organize_time * 1000:.1f}ms")
+
+
+class MediaDatabasePerformanceTest(unittest.TestCase):
+    """媒体库数据库访问层性能测试（10万条记录）"""
+
+    ITEM_COUNT = 100000
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "media.db")
+        self.db = MediaDatabase(self.db_path)
+        self.db.execute_write('''
+            CREATE TABLE media_items (
+                id TEXT PRIMARY KEY, name TEXT NOT NULL, path TEXT UNIQUE NOT NULL,
+                type TEXT NOT NULL, metadata TEXT, created_at TEXT NOT NULL
+            )
+        ''')
+        self.db.execute_write('CREATE INDEX idx_media_items_type ON media_items(type)')
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        self.db.close()
+        shutil.rmtree(self.temp_dir)
+
+    def _populate(self):
+        rows = [
+            (f"id_{i}", f"clip_{i}.mp4", f"/footage/day{i % 30}/clip_{i}.mp4",
+             ("video", "audio", "image")[i % 3], "{}", f"2024-01-01T00:00:{i % 60:02d}")
+            for i in range(self.ITEM_COUNT)
+        ]
+        self.db.executemany_write(
+            'INSERT INTO media_items (id, name, path, type, metadata, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+    def test_01_bulk_insert_performance(self):
+        """测试批量写入10万条记录"""
+        result, execution_time = self.runner.measure_execution_time(self._populate)
+
+        count = self.db.fetchone('SELECT COUNT(*) FROM media_items')[0]
+        self.assertEqual(count, self.ITEM_COUNT)
+        self.assertLess(execution_time, 10.0)
+
+        print(f"批量写入{self.ITEM_COUNT}条: {execution_time:.3f}s")
+
+    def test_02_pooled_reads_vs_connect_per_call(self):
+        """测试复用连接与每次新建连接的点查询性能"""
+        import sqlite3
+        self._populate()
+        ids = [f"id_{i}" for i in range(0, self.ITEM_COUNT, 50)]
+
+        def pooled_reads():
+            for item_id in ids:
+                self.assertIsNotNone(self.db.fetchone('SELECT * FROM media_items WHERE id = ?', (item_id,)))
+
+        def connect_per_call_reads():
+            for item_id in ids:
+                conn = sqlite3.connect(self.db_path)
+                conn.execute('SELECT * FROM media_items WHERE id = ?', (item_id,)).fetchone()
+                conn.close()
+
+        _, pooled_time = self.runner.measure_execution_time(pooled_reads)
+        _, legacy_time = self.runner.measure_execution_time(connect_per_call_reads)
+
+        self.assertLess(pooled_time, legacy_time)
+
+        print(f"点查询{len(ids)}次: 复用连接 {pooled_time:.3f}s, 每次新建连接 {legacy_time:.3f}s")
+
+    def test_03_concurrent_reads_during_writes(self):
+        """测试写入期间的并发读取与写入合并"""
+        self._populate()
+        write_count = 2000
+
+        def writer(offset):
+            for i in range(offset, offset + write_count // 4):
+                self.db.execute_write('UPDATE media_items SET metadata = ? WHERE id = ?', ('{"rated": 1}', f"id_{i}"))
+
+        def reader():
+            for _ in range(200):
+                rows = self.db.fetchall('SELECT id FROM media_items WHERE type = ? LIMIT 100', ("video",))
+                self.assertEqual(len(rows), 100)
+
+        def concurrent_access():
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                futures = [executor.submit(writer, i * write_count // 4) for i in range(4)]
+                futures += [executor.submit(reader) for _ in range(4)]
+                for future in futures:
+                    future.result()
+
+        result, execution_time = self.runner.measure_execution_time(concurrent_access)
+
+        updated = self.db.fetchone("SELECT COUNT(*) FROM media_items WHERE metadata = ?", ('{"rated": 1}',))[0]
+        self.assertEqual(updated, write_count)
+        self.assertGreater(self.db.stats["max_batch_size"], 1)
+
+        print(f"并发读写: {execution_time:.3f}s, 写事务 {self.db.stats['write_batches']} 次, "
+              f"最大合并 {self.db.stats['max_batch_size']} 条")
+
+    def test_04_wal_and_connection_pragmas(self):
+        """测试WAL模式持久生效，池化连接设置忙等待和同步级别"""
+        import sqlite3
+        self.assertEqual(self.db.fetchone('PRAGMA journal_mode')[0], 'wal')
+        self.assertEqual(self.db.fetchone('PRAGMA synchronous')[0], 1)  # NORMAL
+        self.assertEqual(self.db.fetchone('PRAGMA busy_timeout')[0], 30000)
+        self.assertEqual(self.db.fetchone('PRAGMA foreign_keys')[0], 1)
+
+        external = sqlite3.connect(self.db_path)
+        self.addCleanup(external.close)
+        self.assertEqual(external.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+
+    def setup_search_index(self):
+        self.db.execute_write('ALTER TABLE media_items ADD COLUMN ai_tags TEXT')
+        self.db.execute_write('ALTER TABLE media_items ADD COLUMN scene_analysis TEXT')
+        self.db.add_connection_hook(register_search_functions)
+        self.db.submit_write(create_search_index)
+
+    def search(self, query, tags=None):
+        weights = ", ".join(str(w) for w in SEARCH_RANK_WEIGHTS)
+        rows = self.db.fetchall(
+            f"SELECT m.id FROM media_search JOIN media_items AS m ON m.rowid = media_search.rowid "
+            f"WHERE media_search MATCH ? ORDER BY bm25(media_search, {weights})",
+            (build_match_query(query, tags),))
+        return [row[0] for row in rows]
+
+    def test_05_fts_search_and_external_writers(self):
+        """测试全文检索排序、其他连接写入不受分词函数影响、索引补齐和重建"""
+        import json
+        import sqlite3
+        self.setup_search_index()
+        insert = ('INSERT INTO media_items (id, name, path, type, metadata, created_at, ai_tags) '
+                  'VALUES (?, ?, ?, ?, ?, ?, ?)')
+        self.db.executemany_write(insert, [
+            ("beach", "SunsetBeach.mp4", "/footage/trip/SunsetBeach.mp4", "video", "{}", "2024-01-01",
+             json.dumps(["海滩", "日落"])),
+            ("city", "city_night.mp4", "/footage/sunset/city_night.mp4", "video", "{}", "2024-01-02",
+             json.dumps(["城市"])),
+        ])
+
+        # 名称命中排在路径命中之前；驼峰拆分、中文标签都可检索
+        self.assertEqual(self.search("sunset"), ["beach", "city"])
+        self.assertEqual(self.search("beach"), ["beach"])
+        self.assertEqual(self.search("", tags=["海滩"]), ["beach"])
+        self.db.execute_write("UPDATE media_items SET name = ? WHERE id = ?", ("harbor.mp4", "city"))
+        self.assertEqual(self.search("harbor"), ["city"])
+
+        # 其他连接（没有注册分词函数）照常写入
+        external = sqlite3.connect(self.db_path)
+        self.addCleanup(external.close)
+        external.execute(insert, ("forest", "forest_walk.mp4", "/footage/forest_walk.mp4", "video", "{}",
+                                  "2024-01-03", "[]"))
+        external.execute("DELETE FROM media_items WHERE id = 'city'")
+        external.commit()
+        self.assertEqual(self.search("forest"), [])
+
+        # 下次启动时补齐其他连接增删的记录
+        self.db.submit_write(create_search_index)
+        self.assertEqual(self.search("forest"), ["forest"])
+        self.assertEqual(self.search("harbor"), [])
+
+        # 其他连接修改内容后重建索引
+        external.execute("UPDATE media_items SET name = 'meadow.mp4' WHERE id = 'forest'")
+        external.commit()
+        self.assertEqual(self.db.submit_write(rebuild_search_index), 2)
+        self.assertEqual(self.search("meadow"), ["forest"])
+        self.assertEqual(self.db.fetchone("SELECT COUNT(*) FROM media_search")[0], 2)
+        triggers = external.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0]
+        self.assertEqual(triggers, 0)
+
+    def test_06_thread_connections_closed_on_exit(self):
+        """测试短生命周期线程的读连接在线程结束时关闭"""
+        self._populate()
+        ready = threading.Event()
+        release = threading.Event()
+        counts = []
+
+        def long_lived_reader():
+            counts.append(self.db.fetchone('SELECT COUNT(*) FROM media_items')[0])
+            ready.set()
+            release.wait(10)
+            counts.append(self.db.fetchone('SELECT COUNT(*) FROM media_items')[0])
+
+        keeper = threading.Thread(target=long_lived_reader)
+        keeper.start()
+        self.assertTrue(ready.wait(10))
+        baseline = len(self.db._connections)  # 写线程和仍在运行的读线程
+
+        for _ in range(4):
+            workers = [threading.Thread(target=self.db.fetchone, args=('SELECT * FROM media_items WHERE id = ?',
+                                                                        (f"id_{i}",)))
+                       for i in range(25)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+        gc.collect()
+
+        self.assertEqual(self.db.stats["connections_closed"], 100)
+        self.assertEqual(len(self.db._connections), baseline)
+        release.set()
+        keeper.join(10)
+        gc.collect()
+        self.assertEqual(counts, [self.ITEM_COUNT, self.ITEM_COUNT])
+        self.assertEqual(len(self.db._connections), baseline - 1)
+
+
+class MediaImportPipelinePerformanceTest(unittest.TestCase):
+    """媒体导入流水线测试"""
+
+    FILE_COUNT = 200
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for index in range(self.FILE_COUNT):
+            path = os.path.join(self.temp_dir, f"clip_{index:03d}.mp4")
+            with open(path, "wb") as f:
+                f.write(b"x" * index)
+            self.paths.append(path)
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_01_bounded_window_partial_failure_and_order(self):
+        """测试在途文件数有上限、部分文件失败时其余文件按发现顺序导入"""
+        try:
+            from app.core.media_import_pipeline import MediaImportPipeline
+            from app.core.unified_media_manager import MediaMetadata, MediaType
+        except ImportError as e:
+            self.skipTest(f"媒体管理器依赖不可用: {e}")
+
+        lock = threading.Lock()
+        finished = {}
+        peak = {"active": 0}
+
+        def track(path):
+            with lock:
+                finished.setdefault(path, 0)
+                active = sum(1 for count in finished.values() if count < 3)
+                peak["active"] = max(peak["active"], active)
+
+        def done(path):
+            with lock:
+                finished[path] += 1
+
+        class FakeManager:
+            media_added_callback = None
+            saved = []
+
+            def _detect_media_type(self, path):
+                return MediaType.VIDEO
+
+            def get_file_stats_index(self):
+                return {}
+
+            def get_media_items_by_paths(self, paths):
+                return []
+
+            def _calculate_file_hash(self, path):
+                track(path)
+                try:
+                    if path.endswith(("3.mp4", "7.mp4")):
+                        raise IOError("读取失败")
+                    time.sleep(0.001)
+                    return os.path.basename(path)
+                finally:
+                    done(path)
+
+            def _probe_metadata(self, path, media_type):
+                track(path)
+                try:
+                    if path.endswith("5.mp4"):
+                        raise ValueError("探测失败")
+                    return MediaMetadata()
+                finally:
+                    done(path)
+
+            def _generate_thumbnail_sync(self, path, media_type):
+                track(path)
+                try:
+                    if path.endswith("1.mp4"):
+                        raise RuntimeError("缩略图失败")  # 不影响导入
+                    return None
+                finally:
+                    done(path)
+
+            def save_media_items_batch(self, items, stats):
+                self.saved.append((items, stats))
+
+        manager = FakeManager()
+        pipeline = MediaImportPipeline(manager, hash_workers=2, probe_workers=2, thumbnail_workers=1,
+                                       max_in_flight=4)
+        result, execution_time = self.runner.measure_execution_time(pipeline.import_files, self.paths)
+
+        expected_failed = [path for path in self.paths if path.endswith(("3.mp4", "5.mp4", "7.mp4"))]
+        self.assertEqual(result.failed, expected_failed)
+        self.assertEqual([item.path for item in result.imported],
+                         [path for path in self.paths if path not in set(expected_failed)])
+        self.assertEqual(len(manager.saved), 1)
+        self.assertEqual(result.imported[0].metadata.file_hash, "clip_000.mp4")
+        self.assertLessEqual(peak["active"], 4)
+
+        print(f"导入 {self.FILE_COUNT} 个文件: {execution_time:.3f}s, 失败 {len(result.failed)}, "
+              f"在途峰值 {peak['active']}")
+
+    def test_02_keeps_library_data_without_file_stats(self):
+        """测试没有文件状态记录的已入库文件重新导入时保留组织信息和AI数据，逐个导入会记录文件状态"""
+        try:
+            from app.core.media_import_pipeline import MediaImportPipeline
+            from app.core.unified_media_manager import MediaMetadata, UnifiedMediaManager
+        except ImportError as e:
+            self.skipTest(f"媒体管理器依赖不可用: {e}")
+
+        manager = UnifiedMediaManager(os.path.join(self.temp_dir, "media.db"), os.path.join(self.temp_dir, "cache"))
+        self.addCleanup(manager.db.close)
+        stub_stages = [
+            patch.object(manager, "_generate_thumbnail", return_value=None),
+            patch.object(manager, "_generate_thumbnail_sync", return_value=None),
+            patch.object(manager, "_extract_metadata", side_effect=lambda path, media_type: MediaMetadata()),
+            patch.object(manager, "_probe_metadata", side_effect=lambda path, media_type: MediaMetadata()),
+        ]
+        for stub in stub_stages:
+            stub.start()
+            self.addCleanup(stub.stop)
+
+        single = manager.import_media_file(self.paths[0])
+        self.assertIn(single.path, manager.get_file_stats_index())
+
+        # 升级前的媒体库：媒体项存在，没有文件状态记录
+        legacy = manager.import_media_file(self.paths[1])
+        manager.db.execute_write('DELETE FROM media_file_stats WHERE path = ?', (legacy.path,))
+        legacy.ai_tags = ["海边", "日落"]
+        legacy.collection_id = "collection-1"
+        legacy.metadata.rating = 4
+        manager._save_media_item(legacy)
+
+        result = MediaImportPipeline(manager).import_files(self.paths[:3])
+
+        self.assertEqual(result.unchanged, [single.path])
+        imported = {item.path: item for item in result.imported}
+        self.assertEqual(set(imported), {legacy.path, self.paths[2]})
+        reloaded = manager.get_media_item_by_path(legacy.path)
+        self.assertEqual(reloaded.id, legacy.id)
+        self.assertEqual(reloaded.ai_tags, ["海边", "日落"])
+        self.assertEqual((reloaded.collection_id, reloaded.metadata.rating), ("collection-1", 4))
+        self.assertEqual(set(manager.get_file_stats_index()), set(self.paths[:3]))
+
+
+class FrameBufferPoolPerformanceTest(unittest.TestCase):
+    """帧缓冲池性能测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        self.runner = PerformanceTestRunner()
+        self.pool = FrameBufferPool(max_buffers_per_shape=4)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.pool.clear()
+
+    def test_01_steady_state_reuses_buffers(self):
+        """测试稳态租用不再分配新缓冲区"""
+        def playback_loop():
+            for _ in range(300):
+                with self.pool.lease(1080, 1920) as frame:
+                    frame[0, 0] = 1
+
+        result, execution_time = self.runner.measure_execution_time(playback_loop)
+
+        self.assertEqual(self.pool.stats["allocations"], 1)
+        self.assertEqual(self.pool.stats["reuses"], 299)
+
+        print(f"帧缓冲池租用 300 帧: {execution_time * 1000:.2f}ms")
+
+    def test_02_release_rejects_foreign_arrays(self):
+        """测试只接收本池分配的缓冲区"""
+        import numpy as np
+        frame = self.pool.acquire(240, 320, 1)
+        self.assertEqual(frame.shape, (240, 320))
+        self.assertFalse(self.pool.release(np.empty((240, 320), dtype=np.uint8)))
+        self.assertFalse(self.pool.release(frame[:10]))
+        self.assertTrue(self.pool.release(frame))
+        self.assertEqual(self.pool.get_stats()["free_buffers"], 1)
+
+    def test_03_video_frame_buffer_size_and_lookup(self):
+        """测试视频帧缓冲区按实际字节计入内存池并可直接查找"""
+        memory_manager = MemoryManager()
+        buffer_id = memory_manager.create_video_frame_buffer(1920, 1080)
+
+        self.assertEqual(memory_manager.pools['video_frames'].used_size, 1920 * 1080 * 3)
+        self.assertEqual(memory_manager.get_video_frame(buffer_id).shape, (1080, 1920, 3))
+        self.assertTrue(memory_manager.deallocate_memory(buffer_id))
+        self.assertIsNone(memory_manager.access_memory(buffer_id))
+        self.assertEqual(memory_manager.frame_pool.get_stats()["free_buffers"], 1)
+
+    def test_04_frame_cache_keeps_buffers_in_use(self):
+        """测试帧缓存淘汰时不回收仍被使用方持有的缓冲区"""
+        try:
+            from app.core.video_preview_engine import FrameCache, VideoFrame
+        except ImportError as e:
+            self.skipTest(f"预览引擎依赖不可用: {e}")
+
+        cache = FrameCache(max_size_mb=1, frame_pool=self.pool)
+        for index in range(20):
+            data = self.pool.acquire(480, 640)
+            data.fill(index)
+            cache.add_frame(index, VideoFrame(index / 30, index, data, 640, 480))
+            if index == 0:
+                held_frame = cache.get_frame(0)
+            elif index == 1:
+                held_view = cache.get_frame(1).data[:10]
+        del data
+        cache.clear()
+
+        # 使用方持有的帧内容没有被后续解码覆盖
+        self.assertTrue((held_frame.data == 0).all())
+        self.assertTrue((held_view == 1).all())
+        self.assertEqual(cache.shared_evictions, 2)
+        self.assertEqual(self.pool.stats["releases"], 18)
+
+    def test_05_smart_frame_cache_keeps_buffers_in_use(self):
+        """测试优化预览引擎的帧缓存淘汰时不回收仍被使用方持有的缓冲区"""
+        try:
+            from app.core.optimized_video_preview_engine import SmartFrameCache, VideoFrame
+        except ImportError as e:
+            self.skipTest(f"预览引擎依赖不可用: {e}")
+
+        cache = SmartFrameCache(max_size_mb=1, frame_pool=self.pool)
+        for index in range(20):
+            data = self.pool.acquire(480, 640)
+            data.fill(index)
+            cache.add_frame(index, VideoFrame(index / 30, index, data, 640, 480))
+            if index == 0:
+                held_frame = cache.get_frame(0)
+            elif index == 1:
+                held_buffer = memoryview(cache.get_frame(1).data)  # 与 QImage 包装帧数据的方式相同
+        del data
+        evicted_shared = cache.get_stats()["shared_evictions"]
+        cache.clear()
+
+        for _ in range(20):
+            self.pool.acquire(480, 640).fill(255)
+        self.assertTrue((held_frame.data == 0).all())
+        self.assertEqual(held_buffer[0, 0, 0], 1)
+        self.assertEqual(evicted_shared, 2)
+        self.assertEqual(self.pool.stats["releases"], 18)
+
+
+class ProjectSaveEnginePerformanceTest(unittest.TestCase):
+    """项目增量保存性能测试"""
+
+    CLIP_COUNT = 5000
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.project_file = os.path.join(self.temp_dir, "large.vecp")
+        self.engine = ProjectSaveEngine()
+        self.sections = {
+            'project_info': {'name': 'large', 'modified_at': ''},
+            'timeline': [{'id': i, 'start': i * 2.0, 'duration': 2.0, 'ai_tags': ['场景', 'tag']}
+                         for i in range(self.CLIP_COUNT)],
+            'subtitles': [{'start': i * 1.5, 'text': f'字幕 {i}'} for i in range(self.CLIP_COUNT)]
+        }
+        self.engine.save(self.project_file, self.sections)
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        self.engine.shutdown()
+        shutil.rmtree(self.temp_dir)
+
+    def test_01_incremental_save_writes_only_changes(self):
+        """测试小改动只追加少量日志"""
+        base_size = os.path.getsize(self.project_file)
+        self.sections['timeline'][100]['start'] = -1.0
+        self.sections['subtitles'].insert(10, {'start': 0.0, 'text': '新字幕'})
+
+        result, execution_time = self.runner.measure_execution_time(
+            self.engine.save, self.project_file, self.sections)
+
+        self.assertTrue(result.incremental)
+        self.assertLess(result.bytes_written, base_size / 100)
+        self.assertEqual(set(result.sections), {'timeline', 'subtitles'})
+
+        print(f"增量保存: {execution_time * 1000:.2f}ms, 写入 {result.bytes_written} 字节 "
+              f"(完整文件 {base_size} 字节)")
+
+    def test_02_load_replays_journal(self):
+        """测试加载时重放日志并忽略不完整记录"""
+        for i in range(20):
+            self.sections['timeline'][i]['duration'] = 3.0
+            self.engine.save(self.project_file, self.sections)
+        del self.sections['subtitles'][-5:]
+        self.engine.save(self.project_file, self.sections)
+
+        with open(journal_path_for(self.project_file), 'ab') as f:
+            f.write(b'{"base":"interrupted')
+
+        data, execution_time = self.runner.measure_execution_time(self.engine.load, self.project_file)
+
+        self.assertEqual(data['timeline'], self.sections['timeline'])
+        self.assertEqual(data['subtitles'], self.sections['subtitles'])
+
+        print(f"加载并重放日志: {execution_time * 1000:.2f}ms")
+
+    def test_03_compaction(self):
+        """测试日志增长后合并为新的基础快照"""
+        self.engine.max_journal_records = 10
+        for i in range(25):
+            self.sections['timeline'][i]['start'] = float(-i)
+            self.engine.save(self.project_file, self.sections)
+
+        import json
+        self.assertGreaterEqual(self.engine.stats['compactions'], 3)
+        with open(self.project_file, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        self.assertEqual(base['timeline'][:20], self.sections['timeline'][:20])
+        self.assertEqual(self.engine.read_document(self.project_file)['timeline'], self.sections['timeline'])
+
+    def test_04_queued_saves_and_compaction(self):
+        """测试排队中的保存不会提前进入合并快照（合并后日志不会重复重放）"""
+        path = os.path.join(self.temp_dir, "queued.vecp")
+        sections = {'timeline': [{'id': i} for i in range(100)]}
+        self.engine.save(path, sections)
+        self.engine.max_journal_records = 2
+        self.engine.compact_ratio = 100
+        sections['timeline'][0] = {'id': 0, 'edited': True}
+        self.engine.save(path, sections)
+
+        # 阻塞保存线程，让两次保存同时排队
+        gate = threading.Event()
+        self.engine._submit(gate.wait, (), False)
+        futures = []
+        for item_id in (100, 101):
+            sections['timeline'].append({'id': item_id})
+            futures.append(self.engine.save(path, sections, wait=False))
+        gate.set()
+        for future in futures:
+            future.result(timeout=10)
+
+        self.assertGreaterEqual(self.engine.stats['compactions'], 1)
+        timeline = self.engine.read_document(path)['timeline']
+        self.assertEqual([item['id'] for item in timeline], list(range(102)))
+        self.assertEqual(self.engine.load(path)['timeline'], sections['timeline'])
+
+    def test_05_background_save_signals_on_gui_thread(self):
+        """测试项目后台保存完成后在界面线程中更新状态和发射信号"""
+        app = QApplication.instance() or QApplication([])
+        project = Project()
+        project.create_new("background", project_dir=os.path.join(self.temp_dir, "project"))
+        project.timeline = [{'id': i} for i in range(1000)]
+        project.save_to_file()
+
+        saved_threads = []
+        project.saved.connect(lambda path: saved_threads.append(threading.current_thread()))
+        project.timeline[0]['start'] = 1.0
+        # 阻塞保存线程，保证保存在后台线程中完成
+        gate = threading.Event()
+        project.save_engine._submit(gate.wait, (), False)
+        self.assertTrue(project.save_to_file(background=True))
+        project.project_info.file_size = -1
+        gate.set()
+        project.save_engine.flush()
+        # 保存已在后台完成，但项目状态要等界面线程处理事件时才更新
+        self.assertEqual(project.project_info.file_size, -1)
+
+        deadline = time.time() + 10
+        while not saved_threads and time.time() < deadline:
+            app.processEvents()
+            time.sleep(0.01)
+        project.cleanup()
+        self.assertEqual(saved_threads, [threading.main_thread()])
+        self.assertGreater(project.project_info.file_size, 0)
+        self.assertFalse(project.is_modified)
+
+    def test_06_import_project_replays_journal(self):
+        """测试导入项目时重放增量保存日志"""
+        app = QApplication.instance() or QApplication([])
+        source = Project()
+        source.create_new("source", project_dir=os.path.join(self.temp_dir, "source"))
+        source.timeline = [{'id': i, 'start': i * 2.0, 'duration': 2.0} for i in range(self.CLIP_COUNT)]
+        with patch.object(source.save_engine, "compact_ratio", 100):
+            source.save_to_file()
+            source.timeline[0]['start'] = 5.0
+            source.timeline.append({'id': self.CLIP_COUNT})
+            source.save_to_file()
+        self.assertGreater(os.path.getsize(journal_path_for(source.project_info.file_path)), 0)
+
+        imported = Project()
+        with patch.object(Project, "_get_default_project_dir",
+                          lambda project, name: os.path.join(self.temp_dir, "imported", name)):
+            self.assertTrue(imported.import_project(source.project_info.file_path))
+        self.assertEqual(imported.timeline, source.timeline)
+        source.cleanup()
+        imported.cleanup()
+
+
+class ProjectObjectStorePerformanceTest(unittest.TestCase):
+    """项目版本对象存储性能测试"""
+
+    COMMIT_COUNT = 100
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = ProjectObjectStore(self.temp_dir)
+        self.sections = {
+            'project_info': {'name': 'versions'},
+            'timeline': [{'id': i, 'start': i * 2.0, 'effects': ['fade'], 'ai_tags': ['场景', f'tag{i % 9}']}
+                         for i in range(3000)],
+            'subtitles': [{'start': i * 1.5, 'text': f'字幕 {i}'} for i in range(2000)]
+        }
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_01_commits_share_unchanged_chunks(self):
+        """测试多次提交只存储变化的数据块"""
+        import json
+        snapshot_size = len(json.dumps(self.sections, indent=2, ensure_ascii=False).encode('utf-8'))
+
+        def commit_many():
+            tree_ids = []
+            for n in range(self.COMMIT_COUNT):
+                self.sections['timeline'][(n * 37) % 3000]['start'] = -float(n)
+                if n % 10 == 0:
+                    self.sections['subtitles'].insert(n, {'start': 0.0, 'text': f'插入 {n}'})
+                tree_ids.append(self.store.write_tree(self.sections)[0])
+            return tree_ids
+
+        tree_ids, execution_time = self.runner.measure_execution_time(commit_many)
+
+        storage_size = self.store.get_storage_size()
+        self.assertLess(storage_size * 10, snapshot_size * self.COMMIT_COUNT)
+        self.assertEqual(self.store.checkout(tree_ids[-1]), self.sections)
+
+        print(f"{self.COMMIT_COUNT} 次提交: {execution_time:.3f}s, 存储 {storage_size / 1024 / 1024:.2f}MB "
+              f"(完整快照 {snapshot_size * self.COMMIT_COUNT / 1024 / 1024:.2f}MB)")
+
+    def test_02_structural_diff(self):
+        """测试结构化差异"""
+        old_tree, _ = self.store.write_tree(self.sections)
+        self.sections['timeline'][10]['start'] = 99.0
+        self.sections['timeline'].append({'id': 'new', 'start': 0.0})
+        del self.sections['subtitles'][5]
+        new_tree, _ = self.store.write_tree(self.sections)
+
+        diff = self.store.diff_trees(old_tree, new_tree)
+
+        self.assertEqual(diff['project_info']['status'], 'unchanged')
+        self.assertEqual((diff['timeline']['added'], diff['timeline']['modified']), (1, 1))
+        self.assertEqual(diff['timeline']['modified_ids'], ['10'])
+        self.assertEqual((diff['subtitles']['added'], diff['subtitles']['removed']), (0, 1))
+
+    def test_03_gc_removes_unreferenced_objects(self):
+        """测试回收不再引用的对象"""
+        first_tree, _ = self.store.write_tree(self.sections)
+        self.sections['timeline'] = self.sections['timeline'][::-1]
+        second_tree, _ = self.store.write_tree(self.sections)
+
+        removed = self.store.gc([second_tree])
+
+        self.assertGreater(removed, 0)
+        self.assertEqual(self.store.checkout(second_tree), self.sections)
+
+    def test_04_cleanup_reparents_surviving_commits(self):
+        """测试清理旧提交后保留的提交指向最近的保留祖先"""
+        import json
+        QApplication.instance() or QApplication([])
+        manager = ProjectVersionManager(os.path.join(self.temp_dir, "versions"))
+        project = Project()
+        project.create_new("versions", project_dir=os.path.join(self.temp_dir, "project"))
+        try:
+            project_id = project.project_info.id
+            commits = []
+            for n in range(6):
+                project.timeline = [{'id': i, 'start': float(i + n)} for i in range(50)]
+                commit = manager.create_commit(project, f"1.{n}", f"提交 {n}")
+                commit.timestamp = f"2024-01-01T00:00:0{n}"
+                commits.append(commit)
+            manager.create_tag(project_id, "v1.1", commits[1].id)
+
+            manager.cleanup_old_versions(project_id, max_versions=2)
+
+            history = manager.get_commit_history(project_id, branch="main")
+            self.assertEqual([c.id for c in history], [commits[5].id, commits[4].id, commits[1].id])
+            self.assertIsNone(commits[1].parent_id)
+
+            with open(os.path.join(self.temp_dir, "versions", project_id, "commits.json"), encoding="utf-8") as f:
+                stored = json.load(f)
+            self.assertEqual(set(stored), {commits[1].id, commits[4].id, commits[5].id})
+            self.assertEqual(stored[commits[4].id]['parent_id'], commits[1].id)
+            for data in stored.values():
+                self.assertIn(data['parent_id'], set(stored) | {None})
+        finally:
+            project.cleanup()
+
+
+class ProjectBackupPerformanceTest(unittest.TestCase):
+    """项目增量备份性能测试"""
+
+    BACKUP_COUNT = 10
+
+    @classmethod
+    def setUpClass(cls):
+        """项目使用QTimer，需要应用实例"""
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = ProjectBackupManager(os.path.join(self.temp_dir, "backups"))
+        self.project = Project()
+        self.project.create_new("backup", project_dir=os.path.join(self.temp_dir, "project"))
+        self.project.timeline = [{'id': i, 'start': i * 2.0, 'ai_tags': ['场景', f'tag{i % 9}']}
+                                 for i in range(5000)]
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        self.manager.cleanup()
+        self.project.cleanup()
+        shutil.rmtree(self.temp_dir)
+
+    def test_01_incremental_backups(self):
+        """测试增量备份只存储变化的数据"""
+        full_backup = self.manager.create_backup(self.project)
+
+        def backup_edits():
+            backups = []
+            for n in range(self.BACKUP_COUNT):
+                self.project.timeline[n * 97]['start'] = -1.0
+                backups.append(self.manager.create_backup(self.project))
+            return backups
+
+        backups, execution_time = self.runner.measure_execution_time(backup_edits)
+
+        incremental_size = max(backup.file_size for backup in backups)
+        self.assertLess(incremental_size * 3, full_backup.file_size)
+        self.assertEqual(backups[0].parent_id, full_backup.id)
+
+        print(f"{self.BACKUP_COUNT} 次增量备份: {execution_time:.3f}s, "
+              f"完整 {full_backup.file_size / 1024:.1f}KB, 增量 {incremental_size / 1024:.1f}KB")
+
+    def test_02_verify_and_restore_chain(self):
+        """测试按清单验证并沿备份链恢复"""
+        backups = []
+        for n in range(4):
+            self.project.timeline[n]['start'] = -float(n)
+            backups.append(self.manager.create_backup(self.project))
+
+        self.assertTrue(self.manager.delete_backup(backups[2].id))
+
+        _, verify_time = self.runner.measure_execution_time(self.manager.verify_backup, backups[3].id)
+        self.assertTrue(self.manager.verify_backup(backups[3].id, deep=True))
+
+        target = os.path.join(self.temp_dir, "restored.vecp")
+        self.assertTrue(self.manager.restore_backup(backups[3].id, target))
+        restored = Project()
+        self.assertTrue(restored.load_from_file(target))
+        self.assertEqual(restored.timeline, self.project.timeline)
+
+        print(f"清单验证: {verify_time * 1000:.2f}ms")
+
+
+class EventSystemPerformanceTest(unittest.TestCase):
+    """事件系统高吞吐分发性能测试"""
+
+    EVENT_COUNT = 50000
+
+    def setUp(self):
+        """设置测试环境"""
+        self.runner = PerformanceTestRunner()
+        self.event_system = EventSystem(high_throughput=True)
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.event_system.stop()
+
+    def test_01_inline_dispatch_throughput(self):
+        """测试内联分发吞吐量和处理顺序"""
+        received = []
+        self.event_system.register_handler("clip_added", lambda e: received.append(("normal", e.data)))
+        self.event_system.register_handler("clip_added", lambda e: received.append(("high", e.data)),
+                                           priority=EventPriority.HIGH)
+
+        def emit_events():
+            for i in range(self.EVENT_COUNT):
+                self.event_system.emit("clip_added", i)
+
+        _, execution_time = self.runner.measure_execution_time(emit_events)
+
+        stats = self.event_system.get_stats()
+        self.assertEqual(len(received), self.EVENT_COUNT * 2)
+        self.assertEqual(received[:2], [("high", 0), ("normal", 0)])
+        self.assertEqual(stats["history_size"], 1000)
+        self.assertEqual(stats["handlers_inline"], self.EVENT_COUNT * 2)
+
+        print(f"分发 {self.EVENT_COUNT} 个事件: {execution_time:.3f}s, "
+              f"平均发送延迟 {stats['emit_latency_avg'] * 1e6:.1f}μs")
+
+    def test_02_progress_coalescing(self):
+        """测试进度事件合并，只保证最新值送达"""
+        received = []
+        self.event_system.register_handler("render_progress", lambda e: received.append(e.data))
+
+        for i in range(self.EVENT_COUNT):
+            self.event_system.emit("render_progress", i, source="renderer")
+        self.event_system.flush_coalesced()
+
+        stats = self.event_system.get_stats()
+        self.assertLess(len(received), 100)
+        self.assertEqual(received[-1], self.EVENT_COUNT - 1)
+        self.assertEqual(stats["events_coalesced"] + len(received), self.EVENT_COUNT)
+
+        print(f"进度事件 {self.EVENT_COUNT} 个, 实际送达 {len(received)} 个")
+
+
+class AsyncEventBusPerformanceTest(unittest.TestCase):
+    """统一异步事件总线背压测试"""
+
+    EVENT_COUNT = 2000
+
+    def setUp(self):
+        """设置测试环境"""
+        self.runner = PerformanceTestRunner()
+        self.bus = AsyncEventBus(TopicConfig(max_queue_size=50))
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.bus.stop(wait=False)
+
+    def test_01_bounded_queue_drops_oldest(self):
+        """测试慢处理函数下队列有界且保持顺序"""
+        received = []
+
+        def slow_handler(event):
+            time.sleep(0.0002)
+            received.append(event)
+
+        self.bus.subscribe("import_item", slow_handler)
+
+        def publish_events():
+            for i in range(self.EVENT_COUNT):
+                self.bus.publish_nowait("import_item", i)
+
+        _, execution_time = self.runner.measure_execution_time(publish_events)
+        self.assertTrue(self.bus.wait_idle(10))
+
+        metrics = self.bus.get_metrics()["topics"]["import_item"]
+        self.assertLessEqual(metrics["max_queue_depth"], 50)
+        self.assertEqual(received, sorted(received))
+        self.assertEqual(received[-1], self.EVENT_COUNT - 1)
+        self.assertEqual(metrics["delivered"] + metrics["dropped"], self.EVENT_COUNT)
+
+        print(f"发布 {self.EVENT_COUNT} 个事件: {execution_time:.3f}s, 处理 {metrics['delivered']}, "
+              f"丢弃 {metrics['dropped']}, 平均延迟 {metrics['lag_avg'] * 1000:.2f}ms")
+
+    def test_02_coalesce_and_block_policies(self):
+        """测试进度合并和阻塞背压"""
+        self.bus.configure_topic("render_progress", overflow=OverflowPolicy.COALESCE,
+                                 coalesce_key=lambda event: event[0])
+        self.bus.configure_topic("clip_rendered", max_queue_size=5, overflow=OverflowPolicy.BLOCK)
+
+        progress = {}
+        rendered = []
+
+        def progress_handler(event):
+            time.sleep(0.001)
+            progress[event[0]] = event[1]
+
+        self.bus.subscribe("render_progress", progress_handler)
+        self.bus.subscribe("clip_rendered", lambda event: (time.sleep(0.0002), rendered.append(event)))
+
+        def publish_events():
+            for i in range(self.EVENT_COUNT):
+                self.bus.publish_nowait("render_progress", ("job-a" if i % 2 else "job-b", i))
+                self.bus.publish_nowait("clip_rendered", i)
+
+        # 阻塞背压只作用于工作线程，GUI主线程发布不会等待
+        publisher = threading.Thread(target=publish_events)
+        publisher.start()
+        publisher.join(30)
+        self.assertFalse(publisher.is_alive())
+        self.assertTrue(self.bus.wait_idle(10))
+
+        metrics = self.bus.get_metrics()["topics"]
+        self.assertEqual(progress, {"job-a": self.EVENT_COUNT - 1, "job-b": self.EVENT_COUNT - 2})
+        self.assertGreater(metrics["render_progress"]["coalesced"], 0)
+        self.assertEqual(rendered, list(range(self.EVENT_COUNT)))
+        self.assertLessEqual(metrics["clip_rendered"]["max_queue_depth"], 5)
+
+        print(f"进度事件合并 {metrics['render_progress']['coalesced']} 个, "
+              f"阻塞主题处理耗时 {metrics['clip_rendered']['handler_time_avg'] * 1000:.3f}ms/个")
+
+    def test_03_gui_and_handler_publishers_never_block(self):
+        """测试GUI主线程和处理函数向已满的阻塞主题发布时不会等待"""
+        self.assertIs(get_async_event_bus().default_config.overflow, OverflowPolicy.DROP_OLDEST)
+
+        self.bus.configure_topic("slow", max_queue_size=5, overflow=OverflowPolicy.BLOCK)
+        release = threading.Event()
+        handled = []
+
+        def slow_handler(event):
+            release.wait(5)
+            handled.append(event)
+
+        self.bus.subscribe("slow", slow_handler)
+
+        start_time = time.perf_counter()
+        for i in range(50):
+            self.bus.publish_nowait("slow", i)
+        gui_time = time.perf_counter() - start_time
+        self.assertLess(gui_time, 1.0)
+        release.set()
+        self.assertTrue(self.bus.wait_idle(10))
+        self.assertEqual(handled, list(range(50)))
+
+        # 执行器中的处理函数向自己已满的主题回发事件
+        self.bus.configure_topic("echo", max_queue_size=2, overflow=OverflowPolicy.BLOCK)
+        echoed = []
+
+        def echo_handler(event):
+            echoed.append(event)
+            if event < 20:
+                for _ in range(3):
+                    self.bus.publish_nowait("echo", event + 10)
+
+        self.bus.subscribe("echo", echo_handler)
+        publisher = threading.Thread(target=lambda: [self.bus.publish_nowait("echo", i) for i in range(3)])
+        publisher.start()
+        publisher.join(10)
+        self.assertFalse(publisher.is_alive())
+        self.assertTrue(self.bus.wait_idle(10))
+        self.assertEqual(len(echoed), 3 + 9 + 27)
+
+        print(f"GUI线程发布50个事件到已满阻塞主题: {gui_time * 1000:.2f}ms, 处理函数回发 {len(echoed)} 个事件")
+
+    def test_04_event_system_on_shared_lossy_bus(self):
+        """测试事件系统挂在丢弃旧事件的共享总线上时线程池处理函数不丢事件"""
+        self.assertIs(self.bus.default_config.overflow, OverflowPolicy.DROP_OLDEST)
+        event_system = EventSystem(bus=self.bus)
+        handled = []
+
+        def slow_handler(event):
+            time.sleep(0.0005)
+            handled.append(event.data)
+
+        event_system.register_handler("clip_added", slow_handler, inline=False)
+        try:
+            publisher = threading.Thread(
+                target=lambda: [event_system.emit("clip_added", i) for i in range(500)]
+            )
+            publisher.start()
+            publisher.join(30)
+            self.assertFalse(publisher.is_alive())
+            self.assertTrue(self.bus.wait_idle(30))
+        finally:
+            event_system.stop()
+
+        self.assertEqual(handled, list(range(500)))
+        self.assertEqual(self.bus.get_metrics()["topics"]["clip_added"]["dropped"], 0)
+
+
+class StartupOrchestratorPerformanceTest(unittest.TestCase):
+    """启动编排器测试"""
+
+    STEP_TIME = 0.05
+
+    def setUp(self):
+        """设置测试环境"""
+        self.runner = PerformanceTestRunner()
+        ServiceContainer.reset()
+
+    def tearDown(self):
+        """清理测试环境"""
+        ServiceContainer.reset()
+
+    def test_01_parallel_steps_and_timings(self):
+        """测试独立步骤并行执行且依赖顺序正确"""
+        orchestrator = StartupOrchestrator(max_workers=4)
+        order = []
+        main_thread = threading.current_thread().name
+
+        def make_step(name):
+            def step():
+                time.sleep(self.STEP_TIME)
+                order.append(name)
+            return step
+
+        for name in ("load_a", "load_b", "load_c"):
+            orchestrator.add_step(name, make_step(name))
+        orchestrator.add_step("app", make_step("app"), main_thread=True)
+        orchestrator.add_step("window", make_step("window"),
+                              ("app", "load_a", "load_b", "load_c"), main_thread=True)
+
+        report, execution_time = self.runner.measure_execution_time(orchestrator.run)
+        orchestrator.mark("first_window")
+
+        # 串行需要 5 个步骤时间，并行后关键路径只有 2 个
+        self.assertLess(execution_time, self.STEP_TIME * 4)
+        self.assertEqual(order[-1], "window")
+        self.assertEqual(report.steps["window"]["thread"], main_thread)
+        self.assertNotEqual(report.steps["load_a"]["thread"], main_thread)
+        self.assertTrue(all(step["status"] == "done" for step in report.steps.values()))
+        self.assertIn("first_window", orchestrator.get_report().milestones)
+
+        print(f"5个启动步骤并行执行: {execution_time:.3f}s (串行约 {self.STEP_TIME * 5:.3f}s), "
+              f"关键路径: {' -> '.join(orchestrator.get_critical_path())}")
+
+    def test_02_failures_and_lazy_singletons(self):
+        """测试非关键步骤失败、关键步骤失败和延迟单例"""
+        orchestrator = StartupOrchestrator()
+        orchestrator.add_step("optional", lambda: 1 / 0, critical=False)
+        orchestrator.add_step("after_optional", lambda: None, ("optional",))
+        orchestrator.add_step("ok", lambda: None, main_thread=True)
+        report = orchestrator.run()
+        self.assertEqual(report.steps["optional"]["status"], "failed")
+        self.assertEqual(report.steps["after_optional"]["status"], "skipped")
+        self.assertEqual(report.steps["ok"]["status"], "done")
+
+        orchestrator = StartupOrchestrator()
+        orchestrator.add_step("required", lambda: 1 / 0, main_thread=True)
+        with self.assertRaises(ZeroDivisionError):
+            orchestrator.run()
+
+        orchestrator = StartupOrchestrator()
+        orchestrator.add_step("a", lambda: None, ("b",))
+        orchestrator.add_step("b", lambda: None, ("a",))
+        with self.assertRaises(ValueError):
+            orchestrator.run()
+
+        container = ServiceContainer()
+        created = []
+        container.register_lazy_singleton('lazy_engine', factory=lambda c: created.append(1) or object())
+        container.register_singleton('eager_service', factory=lambda c: object())
+        container.build()
+        self.assertFalse(container.is_resolved('lazy_engine'))
+        self.assertTrue(container.is_resolved('eager_service'))
+
+        engine, execution_time = self.runner.measure_execution_time(container.get, 'lazy_engine')
+        self.assertIs(container.get('lazy_engine'), engine)
+        self.assertEqual(len(created), 1)
+
+        print(f"延迟单例首次创建: {execution_time * 1000:.3f}ms")
+
+
+class ImportTimePerformanceTest(unittest.TestCase):
+    """启动导入耗时回归测试（python -X importtime）"""
+
+    ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    LAUNCHER_MODULE = "app.application_launcher"
+    LAUNCHER_IMPORT_BUDGET_MS = 400
+    # 启动器冷导入时不应加载的重量级依赖
+    DEFERRED_MODULES = ("numpy", "cv2", "aiohttp", "librosa", "scenedetect", "moviepy", "app.ai.ai_service")
+
+    def import_profile(self, statement: str) -> Dict[str, int]:
+        """在新进程中执行导入，返回 {模块名: 累计耗时(us)}"""
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            cwd=self.ROOT_DIR, capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+
+        profile = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            _, cumulative, module = line[len("import time:"):].split("|")
+            profile[module.strip()] = int(cumulative)
+        return profile
+
+    def test_01_launcher_cold_import_budget(self):
+        """测试启动器冷导入耗时在预算内且不加载重量级依赖"""
+        # 第一次运行可能包含字节码编译，取多次中的最小值
+        profiles = [self.import_profile(f"import {self.LAUNCHER_MODULE}") for _ in range(3)]
+        import_ms = min(profile[self.LAUNCHER_MODULE] for profile in profiles) / 1000
+
+        loaded = [name for name in self.DEFERRED_MODULES if name in profiles[-1]]
+        self.assertEqual(loaded, [], f"启动器冷导入加载了延迟依赖: {loaded}")
+        self.assertLess(import_ms, self.LAUNCHER_IMPORT_BUDGET_MS)
+
+        print(f"启动器冷导入: {import_ms:.1f}ms (预算 {self.LAUNCHER_IMPORT_BUDGET_MS}ms), "
+              f"共加载 {len(profiles[-1])} 个模块")
+
+    def loaded_modules(self, statement: str) -> List[str]:
+        """在新进程中执行语句，返回已加载的模块名"""
+        result = subprocess.run(
+            [sys.executable, "-c", f"{statement}\nimport sys\nprint('\\n'.join(sys.modules))"],
+            cwd=self.ROOT_DIR, capture_output=True, text=True, timeout=120
+        )
+        self.assertEqual(result.returncode, 0, result.stderr[-2000:])
+        return result.stdout.splitlines()
+
+    def test_02_lazy_package_exports(self):
+        """测试包导出在首次访问时才加载子模块"""
+        modules = self.loaded_modules("import app.ai, app.core, app.effects")
+        self.assertNotIn("app.ai.ai_service", modules)
+        self.assertNotIn("app.core.video_engine", modules)
+        self.assertNotIn("app.effects.filters", modules)
+
+        modules = self.loaded_modules("from app.ai import create_ai_service")
+        self.assertIn("app.ai.ai_service", modules)
+        self.assertNotIn("aiohttp", modules)
+
+
+class DecoderPoolPerformanceTest(unittest.TestCase):
+    """解码器池测试"""
+
+    FRAME_COUNT = 120
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        import cv2
+        import numpy as np
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.video_paths = []
+        for name in ("a.avi", "b.avi", "c.avi"):
+            path = os.path.join(self.temp_dir, name)
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (160, 120))
+            for i in range(self.FRAME_COUNT):
+                writer.write(np.full((120, 160, 3), i * 2, dtype=np.uint8))
+            writer.release()
+            self.video_paths.append(path)
+        self.pool = DecoderPool(max_open=2)
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        self.pool.close_all()
+        shutil.rmtree(self.temp_dir)
+
+    def test_01_sequential_requests_reuse_handle(self):
+        """测试顺序请求复用同一解码器且不seek"""
+        import cv2
+        path = self.video_paths[0]
+
+        def pooled_reads():
+            for i in range(self.FRAME_COUNT):
+                with self.pool.open(path, i) as cap:
+                    ret, frame = cap.read()
+                    self.assertTrue(ret)
+                    self.assertLessEqual(abs(int(frame[0, 0, 0]) - i * 2), 4)
+
+        def fresh_reads():
+            for i in range(self.FRAME_COUNT):
+                cap = cv2.VideoCapture(path)
+                cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+                cap.read()
+                cap.release()
+
+        _, pooled_time = self.runner.measure_execution_time(pooled_reads)
+        _, fresh_time = self.runner.measure_execution_time(fresh_reads)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["opens"], 1)
+        self.assertEqual(stats["seeks"], 0)
+        self.assertEqual(stats["reuses"], self.FRAME_COUNT - 1)
+        self.assertLess(pooled_time, fresh_time)
+
+        print(f"顺序读取 {self.FRAME_COUNT} 帧: 池化 {pooled_time:.3f}s, 每次打开 {fresh_time:.3f}s")
+
+    def test_02_routing_and_lru_eviction(self):
+        """测试按位置分配句柄和LRU淘汰"""
+        path = self.video_paths[0]
+        head = self.pool.acquire(path, 0)
+        tail = self.pool.acquire(path, 100)
+        self.assertIsNot(head, tail)
+        head.release()
+        tail.release()
+
+        # 请求离 tail 位置近的帧时复用 tail，不需要seek
+        seeks = self.pool.stats.seeks
+        with self.pool.open(path, 105) as cap:
+            self.assertIs(cap, tail)
+            self.assertEqual(cap.get(1), 105)
+        self.assertEqual(self.pool.stats.seeks, seeks)
+
+        # 打开其他文件时超出上限，淘汰最久未用的句柄
+        for other in self.video_paths[1:]:
+            with self.pool.open(other):
+                pass
+        self.assertLessEqual(self.pool.open_count(), 2)
+        self.assertGreater(self.pool.stats.evictions, 0)
+
+        # 使用中的句柄在文件失效后归还时关闭，不再分配
+        leased = self.pool.acquire(path)
+        self.pool.invalidate(path)
+        leased.release()
+        self.assertTrue(leased.closed)
+        with self.pool.open(path) as cap:
+            self.assertIsNot(cap, leased)
+            self.assertTrue(cap.isOpened())
+
+    def test_03_replaced_files_idle_timeout_and_leaks(self):
+        """测试文件被替换后不复用旧句柄、空闲超时关闭、未归还的句柄随回收关闭"""
+        import gc
+        released = []
+
+        class FakeCapture:
+            def __init__(self, path):
+                self.path = path
+
+            def isOpened(self):
+                return True
+
+            def get(self, prop_id):
+                return 0.0
+
+            def set(self, prop_id, value):
+                return True
+
+            def release(self):
+                released.append(self)
+
+        pool = DecoderPool(max_open=4, opener=FakeCapture, idle_timeout=0.2)
+        self.addCleanup(pool.close_all)
+        path = self.video_paths[0]
+        first = pool.acquire(path)
+        first.release()
+
+        # 文件被替换（大小和修改时间变化），旧句柄关闭而不是复用
+        with open(path, "ab") as f:
+            f.write(b"replaced")
+        second = pool.acquire(path)
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        second.release()
+
+        # 空闲超时后后台关闭句柄
+        deadline = time.time() + 3
+        while not second.closed and time.time() < deadline:
+            time.sleep(0.05)
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.get_stats()["idle"], 0)
+
+        # 未归还的句柄被回收时关闭解码器
+        leaked = pool.acquire(path)
+        capture = leaked._capture
+        del leaked
+        gc.collect()
+        self.assertIn(capture, released)
+        self.assertEqual(pool.open_count(), 0)
+
+
+class ProbeCachePerformanceTest(unittest.TestCase):
+    """媒体探测缓存测试"""
+
+    FAKE_FFPROBE = (
+        "import json, os, sys, time\n"
+        "time.sleep(0.05)\n"
+        "path = sys.argv[-1]\n"
+        "if not path.endswith('.mp4'):\n"
+        "    sys.exit(1)\n"
+        "size = os.path.getsize(path)\n"
+        "print(json.dumps({'format': {'duration': str(size / 10), 'size': str(size)},\n"
+        "                  'streams': [{'codec_type': 'video', 'width': 1920, 'height': 1080,\n"
+        "                               'r_frame_rate': '30000/1001'}]}))\n"
+    )
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, "probe_cache.db")
+
+        # 用Python脚本模拟ffprobe，耗时与真实探测同一量级
+        self.ffprobe_path = os.path.join(self.temp_dir, "ffprobe")
+        with open(self.ffprobe_path, "w") as f:
+            f.write(f"#!{sys.executable}\n" + self.FAKE_FFPROBE)
+        os.chmod(self.ffprobe_path, 0o755)
+
+        self.media_paths = []
+        for i in range(4):
+            path = os.path.join(self.temp_dir, f"clip_{i}.mp4")
+            with open(path, "wb") as f:
+                f.write(b"\0" * (100 * (i + 1)))
+            self.media_paths.append(path)
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def test_01_timeline_probes_each_file_once(self):
+        """测试时间线重复引用的素材只探测一次，持久化缓存跨实例命中"""
+        timeline = [self.media_paths[i % len(self.media_paths)] for i in range(50)]
+
+        cache = ProbeCache(self.db_path, ffprobe_path=self.ffprobe_path)
+        results, cold_time = self.runner.measure_execution_time(cache.probe_many, timeline)
+        self.assertEqual(cache.get_stats()["probes"], len(self.media_paths))
+        self.assertEqual(results[self.media_paths[1]]["format"]["size"], "200")
+
+        # 导出时逐片段查询全部命中内存缓存
+        _, clip_time = self.runner.measure_execution_time(lambda: [cache.probe(path) for path in timeline])
+        self.assertEqual(cache.get_stats()["probes"], len(self.media_paths))
+        cache.close()
+
+        # 新实例（如重启后）从持久化缓存读取，不再启动ffprobe
+        reopened = ProbeCache(self.db_path, ffprobe_path=self.ffprobe_path)
+        _, warm_time = self.runner.measure_execution_time(reopened.probe_many, timeline)
+        stats = reopened.get_stats()
+        reopened.close()
+        self.assertEqual(stats["probes"], 0)
+        self.assertEqual(stats["disk_hits"], len(self.media_paths))
+        self.assertLess(warm_time, cold_time)
+
+        print(f"探测 {len(timeline)} 个片段: 冷启动 {cold_time:.3f}s, "
+              f"逐片段查询 {clip_time:.4f}s, 持久化命中 {warm_time:.4f}s")
+
+    def test_02_changed_and_failed_files(self):
+        """测试文件变化后重新探测，探测失败不缓存"""
+        cache = ProbeCache(self.db_path, ffprobe_path=self.ffprobe_path)
+        path = self.media_paths[0]
+        self.assertEqual(cache.probe(path)["format"]["size"], "100")
+
+        with open(path, "ab") as f:
+            f.write(b"\0" * 50)
+        self.assertEqual(cache.probe(path)["format"]["size"], "150")
+        self.assertEqual(cache.get_stats()["probes"], 2)
+
+        bad_path = os.path.join(self.temp_dir, "broken.mov")
+        with open(bad_path, "wb") as f:
+            f.write(b"\0")
+        with self.assertRaises(ProbeError):
+            cache.probe(bad_path)
+        self.assertIsNone(cache.try_probe(bad_path))
+
+        missing_path = os.path.join(self.temp_dir, "missing.mp4")
+        results = cache.probe_many([path, bad_path, missing_path], use_processes=False)
+        self.assertEqual(results[path]["format"]["size"], "150")
+        self.assertIsNone(results[bad_path])
+        self.assertIsNone(results[missing_path])
+        self.assertEqual(cache.get_stats()["errors"], 3)
+        cache.close()
+
+
+class TransitionEnginePerformanceTest(unittest.TestCase):
+    """转场引擎测试"""
+
+    SHAPES = (TransitionType.CIRCLE, TransitionType.STAR, TransitionType.HEART, TransitionType.DISSOLVE)
+
+    def setUp(self):
+        """设置测试环境"""
+        self.runner = PerformanceTestRunner()
+        self.engine = TransitionEngine()
+
+    @staticmethod
+    def legacy_mask(transition_type, height, width, progress):
+        """逐帧重新计算遮罩的原实现"""
+        import math
+        import numpy as np
+        center_x, center_y = width // 2, height // 2
+        max_radius = math.sqrt(center_x**2 + center_y**2)
+        Y, X = np.ogrid[:height, :width]
+
+        if transition_type == TransitionType.DISSOLVE:
+            return (np.random.random((height, width)) < progress).astype(np.float32)
+        if transition_type == TransitionType.HEART:
+            scale = min(width, height) / 4 * progress
+            x = (X - center_x) / scale
+            y = (Y - center_y) / scale
+            return ((x**2 + y**2 - 1)**3 - x**2 * y**3 <= 0).astype(np.float32)
+
+        distance = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
+        radius = max_radius * progress
+        if transition_type == TransitionType.STAR:
+            angle = np.arctan2(Y - center_y, X - center_x)
+            radius = radius * (0.5 + 0.5 * (np.cos(5 * angle) + 1) / 2)
+        return (distance <= radius).astype(np.float32)
+
+    def legacy_transition(self, from_frame, to_frame, transition_type, progress):
+        """原实现：逐帧计算遮罩、高斯羽化、逐通道float64混合"""
+        import cv2
+        import numpy as np
+        height, width = from_frame.shape[:2]
+        mask = self.legacy_mask(transition_type, height, width, progress)
+        kernel = (5, 5) if transition_type == TransitionType.DISSOLVE else (15, 15)
+        mask = cv2.GaussianBlur(mask, kernel, 2 if kernel == (5, 5) else 5)
+        result = np.zeros_like(from_frame)
+        for i in range(3):
+            result[:, :, i] = from_frame[:, :, i] * (1 - mask) + to_frame[:, :, i] * mask
+        return result.astype(np.uint8)
+
+    def test_01_cached_fields_speedup(self):
+        """测试1080p/4K下缓存几何场的转场至少快5倍"""
+        import numpy as np
+        progresses = (0.25, 0.5, 0.75)
+        for height, width in ((1080, 1920), (2160, 3840)):
+            from_frame = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+            to_frame = np.random.randint(0, 256, (height, width, 3), dtype=np.uint8)
+            for transition_type in self.SHAPES:
+                self.engine.prepare_transition(transition_type, height, width)
+
+            def cached():
+                for transition_type in self.SHAPES:
+                    for progress in progresses:
+                        self.engine.apply_transition(from_frame, to_frame, transition_type, progress)
+
+            def legacy():
+                for transition_type in self.SHAPES:
+                    for progress in progresses:
+                        self.legacy_transition(from_frame, to_frame, transition_type, progress)
+
+            _, cached_time = self.runner.measure_execution_time(cached)
+            _, legacy_time = self.runner.measure_execution_time(legacy)
+            speedup = legacy_time / cached_time
+            self.assertGreaterEqual(speedup, 5.0)
+
+            frames = len(self.SHAPES) * len(progresses)
+            print(f"{width}x{height} 转场 {frames} 帧: 缓存场 {cached_time:.3f}s, "
+                  f"逐帧计算 {legacy_time:.3f}s, 加速 {speedup:.1f}x")
+
+        # 每种场每个分辨率只计算一次
+        self.assertEqual(self.engine.field_stats["builds"], 2 * len(self.SHAPES))
+
+    def test_02_masks_match_and_cache_eviction(self):
+        """测试阈值遮罩与原实现一致，几何场缓存按LRU淘汰"""
+        import numpy as np
+        height, width = 360, 640
+        from_frame = np.zeros((height, width, 3), dtype=np.uint8)
+        to_frame = np.full((height, width, 3), 255, dtype=np.uint8)
+        parameters = TransitionParameters(feather_edges=False)
+
+        for transition_type in (TransitionType.CIRCLE, TransitionType.STAR, TransitionType.HEART):
+            for progress in (0.1, 0.4, 0.9):
+                result = self.engine.apply_transition(from_frame, to_frame, transition_type, progress, parameters)
+                expected = self.legacy_mask(transition_type, height, width, progress) > 0
+                mismatch = np.mean((result[:, :, 0] > 0) != expected)
+                self.assertLess(mismatch, 0.001, f"{transition_type.value} @ {progress}")
+
+        # 溶解在整个转场中使用同一噪声图案：已显现的像素不会再消失
+        previous = None
+        for progress in (0.2, 0.5, 0.8):
+            result = self.engine.apply_transition(from_frame, to_frame, TransitionType.DISSOLVE, progress, parameters)
+            revealed = result[:, :, 0] > 0
+            self.assertAlmostEqual(revealed.mean(), progress, delta=0.02)
+            if previous is not None:
+                self.assertTrue(np.all(revealed[previous]))
+            previous = revealed
+
+        small = TransitionEngine(field_cache_size=2)
+        for size in ((90, 160), (180, 320), (360, 640)):
+            small.get_field("radial", *size)
+        small.get_field("radial", 360, 640)
+        self.assertEqual(small.field_stats, {"hits": 1, "builds": 3})
+        small.get_field("radial", 90, 160)
+        self.assertEqual(small.field_stats["builds"], 4)
+
+    def test_03_feathered_endpoints_and_dissolve_seeds(self):
+        """测试羽化转场进度0/1时分别完全为源/目标画面，溶解图案按种子区分"""
+        import numpy as np
+        height, width = 180, 320
+        from_frame = np.zeros((height, width, 3), dtype=np.uint8)
+        to_frame = np.full((height, width, 3), 255, dtype=np.uint8)
+        parameters = TransitionParameters()
+
+        for transition_type in self.SHAPES + (TransitionType.WIPE,):
+            start = self.engine.apply_transition(from_frame, to_frame, transition_type, 0.0, parameters)
+            end = self.engine.apply_transition(from_frame, to_frame, transition_type, 1.0, parameters)
+            self.assertEqual(int(start.max()), 0, transition_type.value)
+            self.assertEqual(int(end.min()), 255, transition_type.value)
+
+        def revealed(seed):
+            parameters = TransitionParameters(feather_edges=False, seed=seed)
+            result = self.engine.apply_transition(from_frame, to_frame, TransitionType.DISSOLVE, 0.5, parameters)
+            return result[:, :, 0] > 0
+
+        self.assertTrue(np.array_equal(revealed(1), revealed(1)))
+        self.assertGreater(np.mean(revealed(1) != revealed(2)), 0.3)
+
+
+class TransitionRenderPerformanceTest(unittest.TestCase):
+    """转场序列渲染测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = TransitionManager()
+        self.outgoing = self.write_clip("outgoing.avi", 25, (160, 120), 250, lambda i: 0)
+        self.incoming = self.write_clip("incoming.avi", 25, (160, 120), 250, lambda i: 250)
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        get_decoder_pool().close_all()
+        shutil.rmtree(self.temp_dir)
+
+    def write_clip(self, name, fps, size, frame_count, value):
+        import cv2
+        import numpy as np
+        path = os.path.join(self.temp_dir, name)
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+        for i in range(frame_count):
+            writer.write(np.full((size[1], size[0], 3), value(i), dtype=np.uint8))
+        writer.release()
+        return path
+
+    def read_frames(self, path):
+        import cv2
+        cap = cv2.VideoCapture(path)
+        frames = []
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+
+    def test_01_streams_overlap_window_sequentially(self):
+        """测试只解码重叠窗口，两路解码器顺序读取无逐帧seek"""
+        import cv2
+        output = os.path.join(self.temp_dir, "transition.avi")
+        writer = cv2.VideoWriter(output, cv2.VideoWriter_fourcc(*"MJPG"), 25, (160, 120))
+
+        pool = get_decoder_pool()
+        before = pool.get_stats()
+        ok, render_time = self.runner.measure_execution_time(
+            self.manager.render_transition_sequence, self.outgoing, self.incoming, output,
+            "smooth_fade", 1.0, None, 2.0, "ffmpeg", writer)
+        after = pool.get_stats()
+
+        self.assertTrue(ok)
+        frames = self.read_frames(output)
+        self.assertEqual(len(frames), 25)
+        means = [float(frame.mean()) for frame in frames]
+        self.assertEqual(means, sorted(means))
+        self.assertLess(means[0], 60)
+        self.assertGreater(means[-1], 190)
+
+        # 出场素材定位到结尾前1秒、入场素材定位到2秒处各一次，其余均为顺序读取
+        self.assertLessEqual(after["seeks"] - before["seeks"], 2)
+        self.assertEqual(after["in_use"], 0)
+
+        print(f"渲染 {len(frames)} 帧转场片段: {render_time:.3f}s")
+
+    def test_02_mismatched_sources_and_fallbacks(self):
+        """测试帧率/分辨率不同的素材、转场名称解析和编码失败"""
+        import cv2
+        incoming = self.write_clip("incoming_50fps.avi", 50, (320, 240), 100, lambda i: 100 + i)
+        output = os.path.join(self.temp_dir, "transition.avi")
+        writer = cv2.VideoWriter(output, cv2.VideoWriter_fourcc(*"MJPG"), 25, (160, 120))
+
+        self.assertTrue(self.manager.render_transition_sequence(
+            self.outgoing, incoming, output, "circle", 0.4, writer=writer))
+        frames = self.read_frames(output)
+        self.assertEqual(len(frames), 10)
+        self.assertEqual(frames[0].shape, (120, 160, 3))
+
+        self.assertEqual(self.manager.resolve_preset("romantic_heart")[0], TransitionType.HEART)
+        self.assertEqual(self.manager.resolve_preset("circle")[0], TransitionType.CIRCLE)
+        self.assertEqual(self.manager.resolve_preset("unknown")[0], TransitionType.FADE)
+
+        # 编码器不可用时返回失败且不留下残缺文件，导出时退化为硬切
+        output = os.path.join(self.temp_dir, "transition.mp4")
+        self.assertFalse(self.manager.render_transition_sequence(
+            self.outgoing, self.incoming, output, "smooth_fade", 0.5,
+            ffmpeg_path=os.path.join(self.temp_dir, "missing-ffmpeg")))
+        self.assertFalse(os.path.exists(output))
+        self.assertEqual(get_decoder_pool().get_stats()["in_use"], 0)
+
+    def test_03_track_splices_transitions_only_between_matching_clips(self):
+        """测试转场片段只拼接在两侧片段都处理成功且流布局一致时，编码参数与片段一致"""
+        from app.core.video_processing_engine import (
+            ProcessingConfig, TimelineClip, TimelineTrack, VideoInfo, VideoProcessingEngine
+        )
+        from app.effects.transitions import SEGMENT_ENCODE_ARGS, transition_manager
+        engine = VideoProcessingEngine()
+        self.addCleanup(engine.thread_pool.shutdown, wait=False)
+        infos = {path: VideoInfo(path, duration=10.0, width=160, height=120, fps=25.0, has_audio=True,
+                                 audio_channels=2, audio_sample_rate=48000) for path in ("a.mp4", "b.mp4", "c.mp4")}
+        infos["silent.mp4"] = VideoInfo("silent.mp4", duration=10.0, width=160, height=120, fps=25.0)
+        fade = [{"type": "smooth_fade", "duration": 1.0}]
+        failed = {"b"}
+        lists = []
+        rendered = []
+
+        def run(cmd, **kwargs):
+            with open(cmd[cmd.index("-i") + 1]) as f:
+                lists.append([os.path.basename(line.strip()[6:-1]) for line in f])
+            return Mock(returncode=0)
+
+        def render(from_video, to_video, *args, **kwargs):
+            rendered.append((from_video, to_video))
+            return True
+
+        with patch.object(engine, "get_video_info", side_effect=lambda path: infos[path]), \
+                patch.object(engine, "_process_clip", side_effect=lambda clip, *args: clip.clip_id not in failed), \
+                patch.object(transition_manager, "render_transition_sequence", side_effect=render), \
+                patch("app.core.video_processing_engine.subprocess.run", side_effect=run):
+            track = TimelineTrack("v1", clips=[TimelineClip("a", "a.mp4", transitions=fade),
+                                               TimelineClip("b", "b.mp4", transitions=fade),
+                                               TimelineClip("c", "c.mp4", transitions=fade),
+                                               TimelineClip("s", "silent.mp4")])
+            self.assertTrue(engine._process_track(track, os.path.join(self.temp_dir, "track.mp4"),
+                                                  ProcessingConfig()))
+            failed.clear()
+            track = TimelineTrack("v2", clips=[TimelineClip("a", "a.mp4", transitions=fade),
+                                               TimelineClip("b", "b.mp4")])
+            self.assertTrue(engine._process_track(track, os.path.join(self.temp_dir, "track.mp4"),
+                                                  ProcessingConfig()))
+
+        # 片段b处理失败时两侧转场都跳过；有音频与无音频素材之间硬切，不渲染转场
+        self.assertEqual(lists, [["clip_a.mp4", "clip_c.mp4", "clip_s.mp4"],
+                                 ["clip_a.mp4", "transition_a.mp4", "clip_b.mp4"]])
+        self.assertEqual(rendered, [("a.mp4", "b.mp4"), ("b.mp4", "c.mp4"), ("a.mp4", "b.mp4")])
+
+        commands = []
+        with patch.object(engine, "get_video_info", side_effect=lambda path: infos[path]), \
+                patch("app.core.video_processing_engine.subprocess.run",
+                      side_effect=lambda cmd, **kwargs: commands.append(cmd) or Mock(returncode=0)):
+            engine._process_clip(TimelineClip("a", "a.mp4", 1.0, 4.0), os.path.join(self.temp_dir, "a.mp4"),
+                                 ProcessingConfig())
+        self.assertEqual(commands[0][-len(SEGMENT_ENCODE_ARGS) - 2:-2], list(SEGMENT_ENCODE_ARGS))
+
+        # 直接调用时只有一段素材有音频同样失败，不写出流布局不一致的片段
+        probes = {self.outgoing: {"streams": [{"codec_type": "audio"}]}}
+        probe_cache = Mock(try_probe=lambda path: probes.get(path))
+        output = os.path.join(self.temp_dir, "one_sided.mp4")
+        with patch("app.effects.transitions.get_probe_cache", return_value=probe_cache):
+            self.assertFalse(self.manager.render_transition_sequence(
+                self.outgoing, self.incoming, output, "smooth_fade", 0.5))
+        self.assertFalse(os.path.exists(output))
+
+
+class AnimationEnginePerformanceTest(unittest.TestCase):
+    """动画引擎测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        import cv2
+        import numpy as np
+        self.runner = PerformanceTestRunner()
+        self.engine = AnimationEngine()
+        noise = np.random.RandomState(0).randint(0, 256, (720, 1280, 3), dtype=np.uint8)
+        self.frame = cv2.GaussianBlur(noise, (0, 0), 3)
+
+    @staticmethod
+    def track(animation_type, *keyframes):
+        return AnimationTrack(animation_type.value, animation_type, list(keyframes), "frame", animation_type.value)
+
+    @staticmethod
+    def psnr(a, b):
+        import numpy as np
+        mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+        return 100.0 if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+    def test_01_compiled_layer_throughput(self):
+        """测试编译后的多轨道图层每帧一次变换，比逐轨道处理更快且画面一致"""
+        layer = AnimationLayer("multi", [
+            self.track(AnimationType.POSITION, Keyframe(0.0, (0, 0)), Keyframe(2.0, (60, -30), EasingType.EASE_IN_OUT)),
+            self.track(AnimationType.SCALE, Keyframe(0.0, 1.0), Keyframe(2.0, 1.3)),
+            self.track(AnimationType.ROTATION, Keyframe(0.0, 0.0), Keyframe(2.0, 15.0)),
+            self.track(AnimationType.ZOOM_PAN, Keyframe(0.0, {'scale': 1.1, 'pan_x': 20, 'pan_y': 10})),
+            self.track(AnimationType.OPACITY, Keyframe(0.0, 1.0), Keyframe(2.0, 0.6))
+        ])
+        self.engine.add_animation_layer(layer)
+        times = [i / self.engine.fps for i in range(60)]
+
+        compiled = self.engine.compile_layer(layer, frame_size=(1280, 720))
+        self.assertEqual(compiled.frame_count, 61)
+        self.assertEqual([step.kind for step in compiled.steps], ["warp"])
+
+        def run_compiled():
+            for t in times:
+                self.engine.apply_animation(self.frame, t)
+
+        def run_chain():
+            for t in times:
+                self.engine._apply_layer_animation(self.frame, layer, t)
+
+        run_compiled()
+        _, compiled_time = self.runner.measure_execution_time(run_compiled)
+        _, chain_time = self.runner.measure_execution_time(run_chain)
+        self.assertLess(compiled_time, chain_time)
+
+        # 中心区域与逐轨道结果一致（边缘差异来自逐轨道处理的中间裁剪）
+        for t in (0.5, 1.0, 2.0):
+            compiled_frame = self.engine.apply_animation(self.frame, t)
+            chain_frame = self.engine._apply_layer_animation(self.frame, layer, t)
+            self.assertGreater(self.psnr(compiled_frame[180:540, 320:960], chain_frame[180:540, 320:960]), 35)
+
+        print(f"60帧动画: 编译后 {compiled_time:.3f}s, 逐轨道 {chain_time:.3f}s, "
+              f"加速 {chain_time / compiled_time:.1f}x")
+
+    def test_02_single_resample_fidelity_and_recompile(self):
+        """测试相互抵消的变换只重采样一次，修改关键帧后重新编译"""
+        layer = AnimationLayer("cancel", [
+            self.track(AnimationType.ROTATION, Keyframe(0.0, 30.0), Keyframe(1.0, 30.0)),
+            self.track(AnimationType.SCALE, Keyframe(0.0, 1.5), Keyframe(1.0, 1.5)),
+            self.track(AnimationType.ROTATION, Keyframe(0.0, -30.0), Keyframe(1.0, -30.0)),
+            self.track(AnimationType.SCALE, Keyframe(0.0, 1 / 1.5), Keyframe(1.0, 1 / 1.5))
+        ])
+        self.engine.add_animation_layer(layer)
+
+        compiled_frame = self.engine.apply_animation(self.frame, 0.5)
+        chain_frame = self.engine._apply_layer_animation(self.frame, layer, 0.5)
+        center = (slice(180, 540), slice(320, 960))
+        compiled_psnr = self.psnr(compiled_frame[center], self.frame[center])
+        chain_psnr = self.psnr(chain_frame[center], self.frame[center])
+        self.assertGreater(compiled_psnr, 35)
+        self.assertGreater(compiled_psnr, chain_psnr)
+
+        # 关键帧变化后缓存失效
+        layer.tracks[0].keyframes[1].value = 90.0
+        self.engine.apply_animation(self.frame, 0.5)
+        compiled = self.engine._compiled_layers[id(layer)]
+        self.assertEqual(compiled.signature, self.engine._layer_signature(layer))
+        self.engine.remove_animation_layer("cancel")
+        self.assertNotIn(id(layer), self.engine._compiled_layers)
+
+        print(f"抵消变换PSNR: 编译后 {compiled_psnr:.1f}dB, 逐轨道 {chain_psnr:.1f}dB")
+
+
+class TextRasterCachePerformanceTest(unittest.TestCase):
+    """文字位图缓存测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        import numpy as np
+        self.runner = PerformanceTestRunner()
+        self.engine = TextEffectEngine()
+        self.frame = np.random.RandomState(0).randint(0, 256, (1080, 1920, 3), dtype=np.uint8)
+
+    def legacy_apply(self, frame, text_layer):
+        """原实现：整幅画布逐通道float64混合"""
+        text_image = self.engine.render_text(text_layer.text, text_layer.style, text_layer.position)
+        alpha = text_image[:, :, 3] / 255.0
+        for i in range(3):
+            frame[:, :, i] = frame[:, :, i] * (1 - alpha) + text_image[:, :, i] * alpha
+        return frame
+
+    def test_01_static_subtitle_cost_follows_text_area(self):
+        """测试不变的字幕只绘制一次，合成只处理文字区域"""
+        layer = TextLayer("这是一行不变的字幕 Subtitle", TextStyle(outline_width=2, shadow_blur=1), (400, 950))
+
+        expected = self.legacy_apply(self.frame.copy(), layer)
+        actual = self.engine.apply_text_effect(self.frame.copy(), layer)
+        import numpy as np
+        self.assertLessEqual(int(np.abs(expected.astype(np.int16) - actual).max()), 1)
+
+        frames = [self.frame.copy() for _ in range(100)]
+
+        def cached():
+            for frame in frames:
+                self.engine.apply_text_effect(frame, layer)
+
+        def legacy():
+            for frame in frames[:10]:
+                self.legacy_apply(frame, layer)
+
+        _, cached_time = self.runner.measure_execution_time(cached)
+        _, legacy_time = self.runner.measure_execution_time(legacy)
+        legacy_time *= 10
+
+        raster = self.engine.render_text_raster(layer.text, layer.style, layer.position)
+        self.assertLess(raster.size[0] * raster.size[1], 1920 * 1080 // 10)
+        self.assertEqual(self.engine.raster_stats['renders'], 1)
+        self.assertGreater(legacy_time / cached_time, 5)
+
+        print(f"100帧字幕: 缓存 {cached_time:.3f}s, 原实现(估算) {legacy_time:.3f}s, "
+              f"加速 {legacy_time / cached_time:.1f}x")
+
+    def test_02_cache_keys_and_clipping(self):
+        """测试动画阶段和样式变化时重新绘制，超出画面的文字被裁剪"""
+        import numpy as np
+        animation = TextAnimation(TextAnimationType.TYPING, parameters={'speed': 0.1})
+        layer = TextLayer("Typing", TextStyle(), (100, 100), animation=animation)
+
+        widths = []
+        for t in (0.15, 0.25, 0.25, 0.55):
+            widths.append(self.engine.render_text_raster(
+                layer.text, layer.style, layer.position, animation, t).size[0])
+        self.assertEqual(self.engine.raster_stats, {'hits': 1, 'renders': 3})
+        self.assertLess(widths[0], widths[1])
+        self.assertLess(widths[1], widths[3])
+        self.assertIsNone(self.engine.render_text_raster(layer.text, layer.style, layer.position, animation, 0.0))
+
+        # 样式变化后重新绘制；位置的整数部分变化不需要重新绘制
+        self.engine.render_text_raster("Typing", TextStyle(font_color=(255, 0, 0)), (100, 100))
+        self.engine.render_text_raster("Typing", TextStyle(font_color=(255, 0, 0)), (300, 500))
+        self.assertEqual(self.engine.raster_stats['renders'], 5)
+
+        # 超出画面和非1080p画面
+        small = np.zeros((360, 640, 3), dtype=np.uint8)
+        self.engine.apply_text_effect(small, TextLayer("Edge", TextStyle(), (600, 330)))
+        self.assertGreater(int(small.sum()), 0)
+        self.engine.apply_text_effect(small, TextLayer("Outside", TextStyle(), (-500, -500)))
+        self.engine.clear_raster_cache()
+        canvas = self.engine.render_text("Edge", TextStyle(), (1880, 1040))
+        self.assertEqual(canvas.shape, (1080, 1920, 4))
+        self.assertGreater(int(canvas[:, :, 3].sum()), 0)
+
+    def test_03_cache_hits_skip_font_and_layout(self):
+        """测试命中位图缓存时不再选择字体、检测中日韩字符和排版"""
+        layer = TextLayer("缓存命中的字幕 Cached", TextStyle(outline_width=2), (400, 950))
+        raster = self.engine.render_text_raster(layer.text, layer.style, layer.position)
+
+        with patch.object(self.engine, "_get_font", side_effect=AssertionError("命中缓存时不应选择字体")), \
+                patch("app.effects.text_effects.ImageDraw.Draw", side_effect=AssertionError("命中缓存时不应排版")):
+            hits, hit_time = self.runner.measure_execution_time(
+                lambda: [self.engine.render_text_raster(layer.text, layer.style, (400 + i, 950))
+                         for i in range(1000)])
+        self.assertTrue(all(hit is raster for hit in hits))
+        self.assertEqual(self.engine.raster_stats, {'hits': 1000, 'renders': 1})
+
+        # 可见文字相同但完整文本不同（字体和行高按完整文本确定）时分别绘制
+        animation = TextAnimation(TextAnimationType.TYPING, parameters={'speed': 0.1})
+        self.engine.render_text_raster("Typing", TextStyle(), (100, 100), animation, 0.25)
+        self.engine.render_text_raster("Ty字幕", TextStyle(), (100, 100), animation, 0.25)
+        self.assertEqual(self.engine.raster_stats['renders'], 3)
+
+        print(f"1000次缓存命中: {hit_time * 1000:.2f}ms")
+
+
+class FontIndexPerformanceTest(unittest.TestCase):
+    """字体索引测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.font_dir = os.path.join(self.temp_dir, "fonts")
+        self.index_path = os.path.join(self.temp_dir, "font_index.json")
+        os.makedirs(self.font_dir)
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def find_system_fonts(self):
+        import glob
+        fonts = sorted(glob.glob("/usr/share/fonts/**/DejaVuSans*.ttf", recursive=True))
+        fonts += sorted(glob.glob("C:/Windows/Fonts/arial*.ttf")) + sorted(glob.glob("/Library/Fonts/Arial*.ttf"))
+        if len(fonts) < 2:
+            self.skipTest("没有可用于测试的系统字体")
+        return fonts
+
+    def test_01_persistent_index_and_cached_lookups(self):
+        """测试索引持久化、目录修改后只解析新文件、重复查询不访问文件系统"""
+        import shutil
+        fonts = self.find_system_fonts()
+        for path in fonts[:-1]:
+            shutil.copy(path, self.font_dir)
+
+        index = FontIndex([self.font_dir], self.index_path)
+        _, build_time = self.runner.measure_execution_time(index.families)
+        self.assertEqual(index.get_stats()['parsed_files'], len(fonts) - 1)
+
+        reloaded = FontIndex([self.font_dir], self.index_path)
+        _, load_time = self.runner.measure_execution_time(reloaded.families)
+        self.assertEqual(reloaded.get_stats()['parsed_files'], 0)
+        self.assertEqual(reloaded.get_stats()['reused_roots'], 1)
+        self.assertEqual(reloaded.families(), index.families())
+
+        # 新增字体文件：只解析新文件
+        shutil.copy(fonts[-1], self.font_dir)
+        os.utime(self.font_dir, ns=(0, os.stat(self.font_dir).st_mtime_ns + 10 ** 9))
+        rescanned = FontIndex([self.font_dir], self.index_path)
+        rescanned.families()
+        self.assertEqual(rescanned.get_stats()['parsed_files'], 1)
+
+        family = rescanned.families()[0]
+        regular = rescanned.resolve(family)
+        bold = rescanned.resolve(family, bold=True)
+        self.assertIsNotNone(regular)
+        if any(face.weight >= 700 for face in rescanned.faces(family)):
+            self.assertGreaterEqual(bold.weight, 700)
+        self.assertLess(regular.weight, 700)
+
+        def lookups():
+            for _ in range(10000):
+                rescanned.resolve(family, bold=True)
+
+        _, lookup_time = self.runner.measure_execution_time(lookups)
+        self.assertGreaterEqual(rescanned.get_stats()['lookup_hits'], 10000)
+
+        print(f"字体索引: 构建 {build_time:.3f}s, 从磁盘加载 {load_time:.4f}s, 10000次查询 {lookup_time:.4f}s")
+
+    def test_02_family_resolution_and_cjk_fallback(self):
+        """测试粗体/斜体匹配、西文替代字体、中文族名和中日韩回退链"""
+        import json
+
+        def face(name, family, style="Regular", weight=400, italic=False, cjk=False):
+            return {"path": os.path.join(self.font_dir, name), "index": 0, "family": family, "style": style,
+                    "weight": weight, "italic": italic, "cjk": cjk, "names": []}
+
+        faces = [
+            face("LiberationSans-Regular.ttf", "Liberation Sans"),
+            face("LiberationSans-Bold.ttf", "Liberation Sans", "Bold", 700),
+            face("LiberationSans-Italic.ttf", "Liberation Sans", "Italic", italic=True),
+            face("LiberationSans-BoldItalic.ttf", "Liberation Sans", "Bold Italic", 700, True),
+            face("DejaVuSans.ttf", "DejaVu Sans"),
+            face("NotoSansCJK-Regular.ttc", "Noto Sans CJK SC", cjk=True),
+            face("NotoSansCJK-Bold.ttc", "Noto Sans CJK SC", "Bold", 700, cjk=True),
+        ]
+        stored = {
+            "version": INDEX_VERSION,
+            "fonttools": FONTTOOLS_AVAILABLE,
+            "roots": {self.font_dir: {
+                "dirs": {self.font_dir: os.stat(self.font_dir).st_mtime_ns},
+                "files": {data["path"]: {"size": 0, "mtime_ns": 0, "faces": [data]} for data in faces}
+            }}
+        }
+        with open(self.index_path, "w", encoding="utf-8") as f:
+            json.dump(stored, f)
+
+        index = FontIndex([self.font_dir], self.index_path)
+        self.assertEqual(index.resolve("Arial").family, "Liberation Sans")
+        self.assertEqual(index.resolve("Arial", bold=True).style, "Bold")
+        self.assertEqual(index.resolve("Arial", italic=True).style, "Italic")
+        self.assertEqual(index.resolve("arial", bold=True, italic=True).style, "Bold Italic")
+        self.assertEqual(index.resolve("NotoSansCJK-Bold").family, "Noto Sans CJK SC")
+        self.assertEqual(index.get_stats()['parsed_files'], 0)
+
+        # 文本含中文时跳过不含中文字形的字体
+        self.assertEqual(index.resolve("Arial", text="Hello").family, "Liberation Sans")
+        cjk_face = index.resolve("Arial", bold=True, text="字幕")
+        self.assertEqual((cjk_face.family, cjk_face.weight), ("Noto Sans CJK SC", 700))
+        self.assertEqual(index.resolve("微软雅黑", text="标题").family, "Noto Sans CJK SC")
+        self.assertEqual(index.resolve("Unknown Family").family, "DejaVu Sans")
+
+    def test_03_background_load_and_default_font(self):
+        """测试后台加载索引、刷新扫描期间缓存查询不阻塞、没有字体时使用默认字体"""
+        import shutil
+        import app.utils.font_index as font_index_module
+        fonts = self.find_system_fonts()
+        shutil.copy(fonts[0], self.font_dir)
+
+        index = FontIndex([self.font_dir], self.index_path)
+        thread = index.load_in_background()
+        self.assertEqual(thread.name, "font-index-load")
+        thread.join(10)
+        self.assertIsNone(index.load_in_background())
+        family = index.families()[0]
+        self.assertIsNotNone(index.resolve(family))
+        self.assertEqual(index.get_stats()['parsed_files'], 1)
+
+        # 刷新时解析新字体文件被阻塞，已缓存的查询仍立即返回
+        shutil.copy(fonts[1], self.font_dir)
+        os.utime(self.font_dir, ns=(0, os.stat(self.font_dir).st_mtime_ns + 10 ** 9))
+        parsing = threading.Event()
+        release = threading.Event()
+        original_read = font_index_module.read_font_faces
+
+        def slow_read(path):
+            parsing.set()
+            release.wait(10)
+            return original_read(path)
+
+        with patch.object(font_index_module, "read_font_faces", slow_read):
+            refresher = threading.Thread(target=index.refresh)
+            refresher.start()
+            self.assertTrue(parsing.wait(10))
+            _, lookup_time = self.runner.measure_execution_time(index.resolve, family)
+            release.set()
+            refresher.join(10)
+        self.assertLess(lookup_time, 1.0)
+        self.assertEqual(index.get_stats()['parsed_files'], 2)
+
+        # 没有可用字体：Pillow 10.0 的默认字体，不记录加载失败
+        empty = FontIndex([os.path.join(self.temp_dir, "empty")], None)
+        with patch("app.effects.text_effects.get_font_index", return_value=empty):
+            with self.assertNoLogs("app.effects.text_effects", level="WARNING"):
+                font = TextEffectEngine()._get_font(TextStyle(font_family="Missing", font_size=48))
+        self.assertIsNotNone(font)
+
+        print(f"字体索引: 刷新期间缓存查询 {lookup_time * 1000:.2f}ms")
+
+
+class EffectGraphPerformanceTest(unittest.TestCase):
+    """特效执行计划测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        import cv2
+        import numpy as np
+        self.runner = PerformanceTestRunner()
+        self.manager = EffectsManager(None)
+        noise = np.random.RandomState(0).randint(0, 256, (1080, 1920, 3), dtype=np.uint8)
+        self.frame = cv2.GaussianBlur(noise, (0, 0), 4)
+
+    def add(self, effect_id, opacity=1.0, **parameters):
+        instance = self.manager.create_effect_instance(effect_id, **parameters)
+        self.assertIsNotNone(instance)
+        instance.end_time = 10.0
+        instance.opacity = opacity
+        return instance
+
+    def tearDown(self):
+        """清理测试环境"""
+        self.manager.compiler.shutdown()
+
+    def test_01_fused_color_stack(self):
+        """测试参数稳定后相邻调色特效合并为一张查找表（后台生成），结果与逐个执行完全一致"""
+        import numpy as np
+        brightness = self.add("brightness", value=15)
+        self.add("contrast", value=20)
+        self.add("saturation", value=-25)
+        self.add("curves", points=[(0, 10), (128, 140), (255, 245)])
+        self.add("color_balance", lift=(0.02, 0.01, 0.03), gamma=(0.95, 1.05, 1.1), gain=(1.1, 1.05, 0.95))
+        self.add("filter_preset", preset="vivid")
+        compiler = self.manager.compiler
+
+        # 参数刚变化时不在渲染线程上生成3D查找表，逐个执行
+        fused, first_time = self.runner.measure_execution_time(self.manager.apply_effects_to_frame, self.frame, 1.0)
+        unfused = self.manager.apply_effects_unfused(self.frame, 1.0)
+        self.assertTrue(np.array_equal(fused, unfused))
+        plan = self.manager.get_execution_plan(1.0, self.frame.shape).describe()
+        self.assertNotIn('lut_3d', [step['kind'] for step in plan['steps']])
+
+        # 参数连续几帧不变后在后台生成，完成后换用合并的计划
+        for _ in range(compiler.lut_stable_frames):
+            self.manager.apply_effects_to_frame(self.frame, 1.0)
+        self.assertTrue(compiler.wait_for_luts(timeout=30))
+        fused = self.manager.apply_effects_to_frame(self.frame, 1.0)
+        self.assertTrue(np.array_equal(fused, unfused))
+
+        plan = self.manager.get_execution_plan(1.0, self.frame.shape).describe()
+        self.assertEqual([step['kind'] for step in plan['steps']], ['lut_3d'])
+        self.assertEqual(len(plan['steps'][0]['effects']), 6)
+
+        def run_fused():
+            for _ in range(5):
+                self.manager.apply_effects_to_frame(self.frame, 1.0)
+
+        def run_unfused():
+            for _ in range(5):
+                self.manager.apply_effects_unfused(self.frame, 1.0)
+
+        _, fused_time = self.runner.measure_execution_time(run_fused)
+        _, unfused_time = self.runner.measure_execution_time(run_unfused)
+        self.assertLess(fused_time, unfused_time)
+
+        plan = self.manager.get_execution_plan(1.0, self.frame.shape).describe()
+        self.assertEqual(plan['steps'][0]['calls'], 6)
+        self.assertGreater(plan['steps'][0]['avg_ms'], 0)
+
+        # 拖动参数：每次变化都重新编译，但编译本身不生成3D查找表
+        builds = compiler.get_stats()['lut_builds']
+
+        def drag_slider():
+            for value in range(16, 26):
+                brightness.parameters['value'] = value
+                self.manager.apply_effects_to_frame(self.frame, 1.0)
+
+        _, drag_time = self.runner.measure_execution_time(drag_slider)
+        self.assertEqual(compiler.get_stats()['lut_builds'], builds)
+        self.assertLess(drag_time / 10, unfused_time / 5 * 2)
+
+        print(f"6个调色特效 x5帧: 合并 {fused_time:.3f}s, 逐个执行 {unfused_time:.3f}s, "
+              f"加速 {unfused_time / fused_time:.1f}x; 参数变化后首帧 {first_time * 1000:.0f}ms, "
+              f"拖动参数每帧 {drag_time / 10 * 1000:.0f}ms")
+
+    def test_02_spatial_grouping_and_skips(self):
+        """测试模糊、变换分组合并，跳过无效特效，半透明特效不参与合并"""
+        import numpy as np
+        self.add("contrast", value=10)
+        self.add("curves", points=[(0, 0), (255, 230)])
+        self.add("sharpen", amount=0.0)
+        self.add("gaussian_blur", radius=2)
+        self.add("gaussian_blur", radius=3)
+        self.add("transform", scale=1.1)
+        self.add("transform", rotation=5.0, offset_x=12.0)
+        self.add("brightness", opacity=0.5, value=20)
+
+        fused = self.manager.apply_effects_to_frame(self.frame, 1.0)
+        unfused = self.manager.apply_effects_unfused(self.frame, 1.0)
+        plan = self.manager.get_execution_plan(1.0, self.frame.shape).describe()
+
+        self.assertEqual(plan['skipped'], ['sharpen'])
+        # 对称模糊核合并为一次卷积；连续两个变换逐个执行
+        self.assertEqual([step['kind'] for step in plan['steps']], ['lut_1d', 'convolution', 'effect', 'effect'])
+
+        # 包括画面边缘在内，与逐个执行只有中间结果取整的差别
+        difference = np.abs(fused.astype(np.int16) - unfused)
+        self.assertLessEqual(int(difference.max()), 2)
+        border = np.concatenate([difference[:8].ravel(), difference[-8:].ravel(),
+                                 difference[:, :8].ravel(), difference[:, -8:].ravel()])
+        self.assertLessEqual(int(border.max()), 2)
+
+        # 参数变化后重新编译，未变化时复用计划
+        stats = self.manager.compiler.get_stats()
+        self.manager.apply_effects_to_frame(self.frame, 2.0)
+        self.assertEqual(self.manager.compiler.get_stats()['compiles'], stats['compiles'])
+        self.manager.effect_instances[0].parameters['value'] = 30
+        self.manager.apply_effects_to_frame(self.frame, 2.0)
+        self.assertEqual(self.manager.compiler.get_stats()['compiles'], stats['compiles'] + 1)
+
+
+class WaveformCachePerformanceTest(unittest.TestCase):
+    """音频波形峰值金字塔测试"""
+
+    # 用Python脚本模拟ffmpeg：输出60秒 8kHz 单声道 s16le，振幅随时间线性增长
+    FAKE_FFMPEG = (
+        "import sys\n"
+        "import numpy as np\n"
+        "rate = int(sys.argv[sys.argv.index('-ar') + 1])\n"
+        "t = np.arange(rate * 60) / rate\n"
+        "signal = np.sin(2 * np.pi * 440 * t) * (t / 60) * 30000\n"
+        "sys.stdout.buffer.write(signal.astype('<i2').tobytes())\n"
+    )
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "waveforms")
+
+        self.ffmpeg_path = os.path.join(self.temp_dir, "ffmpeg")
+        with open(self.ffmpeg_path, "w") as f:
+            f.write(f"#!{sys.executable}\n" + self.FAKE_FFMPEG)
+        os.chmod(self.ffmpeg_path, 0o755)
+
+        self.media_path = os.path.join(self.temp_dir, "voice.wav")
+        with open(self.media_path, "wb") as f:
+            f.write(os.urandom(4096))
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def create_cache(self, **kwargs):
+        kwargs.setdefault("duration_provider", lambda path: 60.0)
+        cache = WaveformCache(cache_dir=self.cache_dir, **kwargs)
+        self.addCleanup(cache.shutdown)
+        return cache
+
+    def test_01_decode_once_and_persist(self):
+        """测试音频只解码一次，峰值与原始采样一致，磁盘缓存跨实例命中"""
+        import numpy as np
+        progress = []
+        cache = self.create_cache(ffmpeg_path=self.ffmpeg_path)
+
+        # 未就绪时不阻塞，返回 None 并在后台提取
+        self.assertIsNone(cache.get_peaks(self.media_path, 0, 60, 600))
+        pyramid, extract_time = self.runner.measure_execution_time(
+            cache.load_or_extract, self.media_path, lambda path, value: progress.append(value))
+        self.assertEqual(cache.get_stats()['decodes'], 1)
+        self.assertEqual(pyramid.sample_count, 8000 * 60)
+        self.assertEqual(len(pyramid.levels[-1]), 1)
+        self.assertEqual(progress[-1], 1.0)
+
+        # 列宽与层级对齐时逐列与原始采样比较
+        rate = 8000
+        t = np.arange(rate * 60) / rate
+        samples = (np.sin(2 * np.pi * 440 * t) * (t / 60) * 30000).astype(np.int16)
+        for level in (0, 2, 4):
+            bucket = 64 << level
+            pixels = len(samples) // bucket
+            peaks = cache.get_peaks(self.media_path, 0, pixels * bucket / rate, pixels)
+            expected = samples[:pixels * bucket].reshape(pixels, bucket)
+            self.assertTrue(np.allclose(peaks[:, 0], expected.min(axis=1) / 32768.0))
+            self.assertTrue(np.allclose(peaks[:, 1], expected.max(axis=1) / 32768.0))
+
+        # 新实例命中磁盘缓存，不再启动解码器
+        cache2 = self.create_cache(ffmpeg_path=os.path.join(self.temp_dir, "missing-ffmpeg"))
+        pyramid2, load_time = self.runner.measure_execution_time(cache2.load_or_extract, self.media_path)
+        self.assertEqual(cache2.get_stats()['decodes'], 0)
+        self.assertEqual(cache2.get_stats()['disk_hits'], 1)
+        self.assertEqual(len(pyramid2.levels), len(pyramid.levels))
+        self.assertTrue(all(np.array_equal(a, b) for a, b in zip(pyramid.levels, pyramid2.levels)))
+
+        print(f"60秒音频: 解码生成金字塔 {extract_time:.3f}s, 读取磁盘缓存 {load_time * 1000:.1f}ms")
+
+    def test_02_slice_cost_independent_of_duration(self):
+        """测试一小时音频任意缩放级别的切片开销只与可见像素数有关"""
+        import numpy as np
+        rate = 8000
+        hour = (np.random.RandomState(0).standard_normal(rate * 60) * 8000).astype(np.int16)
+
+        def decoder(path, sample_rate):
+            for _ in range(60):
+                yield hour
+
+        cache = self.create_cache(decoder=decoder, duration_provider=lambda path: 3600.0)
+        cache.load_or_extract(self.media_path)
+
+        def scroll(seconds_visible):
+            # 模拟在时间线上滚动：每次重绘1920列
+            for step in range(200):
+                start = (step * 17.0) % (3600 - seconds_visible)
+                cache.get_peaks(self.media_path, start, start + seconds_visible, 1920)
+
+        _, full_time = self.runner.measure_execution_time(scroll, 3000.0)
+        _, zoomed_time = self.runner.measure_execution_time(scroll, 2.0)
+        self.assertEqual(cache.get_stats()['decodes'], 1)
+
+        # 最粗和最细缩放下单次切片都在毫秒量级，与整段一小时音频的规模无关
+        self.assertLess(full_time / 200, 0.01)
+        self.assertLess(zoomed_time / 200, 0.01)
+
+        # 粗层级峰值包络覆盖细层级
+        coarse = cache.get_peaks(self.media_path, 0, 3600, 100)
+        fine = cache.get_peaks(self.media_path, 0, 3600, 3600)
+        self.assertTrue(np.all(coarse[:, 1] >= fine.reshape(100, 36, 2)[:, :, 1].max(axis=1) - 1e-6))
+        self.assertTrue(np.all(coarse[:, 0] <= fine.reshape(100, 36, 2)[:, :, 0].min(axis=1) + 1e-6))
+
+        print(f"一小时音频 200次重绘x1920列: 全景 {full_time * 1000:.1f}ms, 放大 {zoomed_time * 1000:.1f}ms")
+
+    def test_03_repaints_while_pending(self):
+        """测试提取进行中反复重绘不会累积回调，绘制路径不逐次 stat 文件"""
+        import numpy as np
+        gate = threading.Event()
+
+        def decoder(path, sample_rate):
+            for _ in range(10):
+                gate.wait(5)
+                yield np.zeros(sample_rate, dtype=np.int16)
+
+        class Clip:
+            def __init__(self):
+                self.progress_calls = 0
+                self.ready_calls = 0
+
+            def on_progress(self, path, fraction):
+                self.progress_calls += 1
+
+            def on_ready(self, path, pyramid):
+                self.ready_calls += 1
+
+        cache = self.create_cache(decoder=decoder, duration_provider=lambda path: 10.0)
+        clip = Clip()
+        stat_calls = []
+        original_key = WaveformCache._cache_key
+        with patch.object(WaveformCache, "_cache_key",
+                          side_effect=lambda path: stat_calls.append(path) or original_key(path)):
+            for _ in range(200):
+                self.assertIsNone(cache.get_peaks(self.media_path, 0, 10, 100,
+                                                  progress=clip.on_progress, callback=clip.on_ready))
+        self.assertEqual(len(stat_calls), 1)
+
+        gate.set()
+        cache.load_or_extract(self.media_path)
+        deadline = time.time() + 5
+        while clip.ready_calls == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(clip.ready_calls, 1)
+        # 每个进度节点只通知一次（10个数据块 + 完成）
+        self.assertLessEqual(clip.progress_calls, 11)
+        self.assertIsNotNone(cache.get_peaks(self.media_path, 0, 10, 100))
+
+        # 显式请求重新检查文件，修改后的文件重新提取
+        with open(self.media_path, "ab") as f:
+            f.write(b"changed")
+        cache.load_or_extract(self.media_path)
+        self.assertEqual(cache.get_stats()['decodes'], 2)
+
+        print(f"提取中重绘200次: stat {len(stat_calls)} 次, 进度通知 {clip.progress_calls} 次, "
+              f"完成通知 {clip.ready_calls} 次")
+
+
+class ThumbnailGeneratorPerformanceTest(unittest.TestCase):
+    """缩略图生成器测试"""
+
+    FRAME_COUNT = 250
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        import cv2
+        import numpy as np
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "thumbnails")
+        self.video_paths = []
+        for index in range(8):
+            path = os.path.join(self.temp_dir, f"clip_{index}.avi")
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 25, (320, 240))
+            for i in range(self.FRAME_COUNT):
+                writer.write(np.full((240, 320, 3), i, dtype=np.uint8))
+            writer.release()
+            self.video_paths.append(path)
+        # 关闭空闲超时定时器，线程数统计只反映缩略图工作线程
+        self.pool = DecoderPool(max_open=4, idle_timeout=0)
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        self.pool.close_all()
+        shutil.rmtree(self.temp_dir)
+
+    def create_generator(self, max_workers=2):
+        generator = ThumbnailGenerator(self.cache_dir, max_workers=max_workers, decoder_pool=self.pool)
+        self.addCleanup(generator.shutdown)
+        return generator
+
+    def test_01_pooled_deduplicated_and_persistent(self):
+        """测试导入大量片段时线程数有上限、重复请求共享任务、重启后缓存直接命中"""
+        import threading
+        generator = self.create_generator(max_workers=2)
+        baseline_threads = threading.active_count()
+
+        def import_folder():
+            # 每个片段被素材库和时间线各请求一次
+            requests = [generator.request_thumbnail(path, 2.0) for path in self.video_paths * 5]
+            peak_threads = threading.active_count()
+            return [request.result() for request in requests], peak_threads
+
+        (paths, peak_threads), import_time = self.runner.measure_execution_time(import_folder)
+        self.assertTrue(all(path and os.path.exists(path) for path in paths))
+        self.assertLessEqual(peak_threads - baseline_threads, 2)
+        stats = generator.get_stats()
+        self.assertEqual(stats['generated'], len(self.video_paths))
+        self.assertEqual(stats['deduplicated'] + stats['cache_hits'], len(self.video_paths) * 4)
+
+        # 新实例（模拟重启）按内容键命中缓存，不再解码
+        restarted = self.create_generator()
+        cached, cached_time = self.runner.measure_execution_time(
+            lambda: [restarted.generate_thumbnail_sync(path, 2.0) for path in self.video_paths])
+        self.assertEqual(cached, paths[:len(self.video_paths)])
+        self.assertEqual(restarted.get_stats()['generated'], 0)
+        self.assertEqual(restarted.get_stats()['frames_decoded'], 0)
+        self.assertEqual(restarted.get_cached_thumbnail(self.video_paths[0], 2.0), paths[0])
+
+        # 文件变化后缓存键随之变化
+        os.utime(self.video_paths[0], ns=(0, 0))
+        self.assertIsNone(restarted.get_cached_thumbnail(self.video_paths[0], 2.0))
+
+        print(f"{len(self.video_paths)}个片段x5次请求: 生成 {import_time:.3f}s, "
+              f"重启后命中缓存 {cached_time * 1000:.1f}ms")
+
+    def test_02_filmstrip_single_pass_and_cancel(self):
+        """测试胶片条一次顺序解码生成雪碧图，并可取消滚出视图的请求"""
+        import cv2
+        generator = self.create_generator(max_workers=1)
+        path = self.video_paths[0]
+        count = 40
+
+        filmstrip, strip_time = self.runner.measure_execution_time(
+            generator.generate_filmstrip_sync, path, count, (96, 54))
+        self.assertEqual(len(filmstrip.timestamps), count)
+        self.assertEqual(generator.get_stats()['frames_decoded'], count)
+        self.assertEqual(self.pool.get_stats()['opens'], 1)
+
+        sheet = cv2.imread(filmstrip.sheet_path)
+        self.assertEqual(sheet.shape[:2], (54 * 4, 96 * 10))
+        previous = -1
+        for index in range(count):
+            x, y, width, height = filmstrip.tile_rect(index)
+            value = int(sheet[y + height // 2, x + width // 2, 0])
+            expected = int(filmstrip.timestamps[index] * 25)
+            self.assertLessEqual(abs(value - expected), 6)
+            self.assertGreaterEqual(value, previous)
+            previous = value
+
+        # 逐张请求同样的时间点作为对比
+        def single_thumbnails():
+            for time_pos in filmstrip.timestamps:
+                generator.generate_thumbnail_sync(self.video_paths[1], time_pos, (96, 54))
+
+        _, single_time = self.runner.measure_execution_time(single_thumbnails)
+        self.assertLess(strip_time, single_time)
+
+        # 单线程池被占用时，排队的请求取消后不会执行
+        blocker = generator.request_filmstrip(self.video_paths[2], count=200)
+        queued = [generator.request_filmstrip(other, count=200) for other in self.video_paths[3:]]
+        shared = generator.request_filmstrip(self.video_paths[3], count=200)
+        for request in queued:
+            generator.cancel(request)
+        self.assertFalse(queued[0].future.cancelled())  # 仍有另一个请求者
+        generator.cancel(shared)
+        blocker.result()
+        self.assertTrue(all(request.future.cancelled() for request in queued))
+        self.assertEqual(generator.get_stats()['filmstrips'], 2)
+        self.assertIsNone(generator.get_cached_filmstrip(self.video_paths[4], count=200))
+
+        print(f"{count}张胶片条: 一次顺序解码 {strip_time * 1000:.1f}ms, 逐张生成 {single_time * 1000:.1f}ms")
+
+    def test_03_stale_index_and_sync_owner_release(self):
+        """测试缓存文件被外部删除后重新生成、同步请求结束后释放共享任务的请求者计数"""
+        generator = self.create_generator(max_workers=1)
+        path = generator.generate_thumbnail_sync(self.video_paths[0], 1.0)
+        os.remove(path)
+        self.assertIsNone(generator.get_cached_thumbnail(self.video_paths[0], 1.0))
+        self.assertEqual(generator.generate_thumbnail_sync(self.video_paths[0], 1.0), path)
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(generator.get_stats()['generated'], 2)
+
+        filmstrip = generator.generate_filmstrip_sync(self.video_paths[1], 10)
+        os.remove(filmstrip.sheet_path)
+        self.assertIsNone(generator.get_cached_filmstrip(self.video_paths[1], 10))
+        regenerated = generator.generate_filmstrip_sync(self.video_paths[1], 10)
+        self.assertTrue(os.path.isfile(regenerated.sheet_path))
+        self.assertEqual(generator.get_stats()['stale_entries'], 2)
+
+        # 同步调用加入排队中的异步任务，返回后请求者计数恢复
+        blocker = generator.request_filmstrip(self.video_paths[2], count=200)
+        request = generator.request_thumbnail(self.video_paths[3], 2.0)
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(
+            generator.generate_thumbnail_sync(self.video_paths[3], 2.0)))
+        waiter.start()
+        deadline = time.time() + 10
+        while generator.get_stats()['deduplicated'] < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        blocker.result()
+        waiter.join(10)
+        self.assertEqual(results, [request.result()])
+        self.assertEqual(request.owners, 1)
+
+        print(f"缩略图缓存: 过期索引项 {generator.get_stats()['stale_entries']}")
+
+
+def stop_batch_processor(processor):
+    """停止批量处理器的工作线程（不做 cleanup() 中的等待和临时文件清理）"""
+    processor.running = False
+    processor.scheduler.close()
+    processor.thread_pool.shutdown(wait=False)
+
+
+class TaskGraphPerformanceTest(unittest.TestCase):
+    """批量处理任务依赖图测试"""
+
+    STAGES = (("probe", 1.0), ("proxy", 5.0), ("analyze", 2.0), ("render", 10.0), ("package", 1.0))
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def chain_specs(self, chains):
+        specs = []
+        for chain in range(chains):
+            previous = None
+            for stage, cost in self.STAGES:
+                task_id = f"{chain}:{stage}"
+                specs.append((task_id, None, [previous] if previous else [], cost, 0))
+                previous = task_id
+        return specs
+
+    def test_01_scheduling_overhead_10k_tasks(self):
+        """测试1万个合成任务的调度开销，与线性扫描已完成列表的旧调度方式对比"""
+        import queue
+        import random
+
+        specs = self.chain_specs(2000)
+        random.Random(0).shuffle(specs)
+
+        def run_graph():
+            graph = TaskGraph()
+            graph.add_many(specs)
+            order = []
+            while True:
+                node = graph.pop_ready(timeout=0)
+                if node is None:
+                    break
+                order.append(node.task_id)
+                graph.complete(node.task_id)
+            return graph, order
+
+        (graph, order), graph_time = self.runner.measure_execution_time(run_graph)
+        self.assertEqual(len(order), 10000)
+        self.assertEqual(graph.get_stats()['completed'], 10000)
+        position = {task_id: index for index, task_id in enumerate(order)}
+        for task_id, _, dependencies, _, _ in specs:
+            for dependency_id in dependencies:
+                self.assertLess(position[dependency_id], position[task_id])
+
+        # 旧调度方式：优先队列取任务，线性扫描已完成列表检查依赖，未就绪则重新入队
+        legacy_specs = self.chain_specs(1000)
+        random.Random(0).shuffle(legacy_specs)
+
+        def run_legacy():
+            task_queue = queue.PriorityQueue()
+            for index, spec in enumerate(legacy_specs):
+                task_queue.put((index, spec))
+            completed = []
+            counter = len(legacy_specs)
+            while not task_queue.empty():
+                _, (task_id, _, dependencies, _, _) = task_queue.get()
+                if all(any(done == dependency_id for done in completed) for dependency_id in dependencies):
+                    completed.append(task_id)
+                else:
+                    task_queue.put((counter, (task_id, None, dependencies, 0, 0)))
+                    counter += 1
+            return completed
+
+        legacy_done, legacy_time = self.runner.measure_execution_time(run_legacy)
+        self.assertEqual(len(legacy_done), len(legacy_specs))
+        legacy_per_task = legacy_time / len(legacy_specs)
+        self.assertLess(graph_time / 10000, legacy_per_task)
+        self.assertLess(graph_time / 10000, 0.0002)
+
+        print(f"1万个任务调度: 依赖图 {graph_time * 1000:.1f}ms ({graph_time / 10000 * 1e6:.1f}us/任务), "
+              f"旧方式5千个任务 {legacy_time * 1000:.1f}ms ({legacy_per_task * 1e6:.1f}us/任务)")
+
+    def test_02_critical_path_and_failure_propagation(self):
+        """测试长链优先执行，失败和作业取消沿依赖传播，作业状态正确结束"""
+        import time
+
+        executed = []
+
+        class RecordingProcessor(BatchProcessor):
+            def _check_memory_usage(self):
+                return True
+
+            def _execute_task(self, task):
+                executed.append(task.task_id)
+                time.sleep(0.002)
+                if task.params.get("fail"):
+                    return {"success": False, "error": "模拟失败"}
+                return {"success": True}
+
+        config = BatchConfig(max_concurrent_tasks=1, retry_delay=0,
+                             temp_dir=os.path.join(self.temp_dir, "temp"),
+                             log_dir=os.path.join(self.temp_dir, "logs"),
+                             result_dir=os.path.join(self.temp_dir, "results"),
+                             cleanup_enabled=False)
+        processor = RecordingProcessor(config)
+        self.addCleanup(stop_batch_processor, processor)
+        processor.pause_processing()
+
+        def task(task_id, task_type=BatchTaskType.CUSTOM, dependencies=(), **params):
+            created = BatchTask(task_id, task_type, "", os.path.join(self.temp_dir, "out", task_id), params,
+                                dependencies=list(dependencies))
+            created.max_retries = 1
+            return created
+
+        chain_types = (BatchTaskType.ANALYZE, BatchTaskType.CONVERT, BatchTaskType.ANALYZE,
+                       BatchTaskType.COMPRESS, BatchTaskType.CUSTOM)
+        tasks = [task(f"thumb_{i}", BatchTaskType.GENERATE_THUMBNAILS) for i in range(10)]
+        previous = []
+        for (stage, _), task_type in zip(self.STAGES, chain_types):
+            tasks.append(task(stage, task_type, previous))
+            previous = [stage]
+        cheap = BatchTaskType.GENERATE_THUMBNAILS
+        tasks.append(task("broken", cheap, fail=True))
+        tasks.extend([task("after_broken", cheap, ["broken"]),
+                      task("after_after", cheap, ["after_broken"])])
+        job_id = processor.create_batch_job("混合作业", "长链 + 缩略图 + 失败链", tasks)
+
+        other = [task("remote_a"), task("remote_b", dependencies=["remote_a"])]
+        other_job = processor.create_batch_job("待取消", "", other)
+        self.assertTrue(processor.cancel_job(other_job))
+        processor.resume_processing()
+        self.assertTrue(processor.scheduler.wait_all(timeout=30))
+
+        # 长链在缩略图之前全部完成；失败任务按配置重试一次
+        self.assertEqual(executed[:4], ["probe", "proxy", "analyze", "render"])
+        self.assertLess(executed.index("package"), executed.index("thumb_0"))
+        self.assertEqual(executed.count("broken"), 2)
+        self.assertNotIn("after_broken", executed)
+        self.assertNotIn("remote_a", executed)
+
+        by_id = {t.task_id: t for t in tasks + other}
+        self.assertEqual(by_id["broken"].status, BatchStatus.FAILED)
+        self.assertEqual(by_id["after_after"].status, BatchStatus.CANCELLED)
+        self.assertEqual(by_id["remote_b"].status, BatchStatus.CANCELLED)
+
+        job = processor.get_job_status(job_id)
+        self.assertEqual((job.completed_tasks, job.failed_tasks, job.cancelled_tasks), (15, 1, 2))
+        self.assertEqual(job.status, BatchStatus.FAILED)
+        self.assertEqual(processor.get_job_status(other_job).status, BatchStatus.CANCELLED)
+
+    def test_03_unresolved_dependencies_finish_job(self):
+        """测试依赖未提交任务（拼错的任务ID）的作业任务被取消，作业结束而不是一直等待"""
+        graph = TaskGraph()
+        graph.add("later", dependencies=["upstream"])
+        graph.add_many([("a", None, [], 1.0, 0), ("b", None, ["typo"], 1.0, 0), ("c", None, ["b", "a"], 1.0, 0)])
+        self.assertEqual(graph.get_stats()['unresolved'], 2)
+
+        cancelled = graph.cancel_unresolved(["a", "b", "c"])
+        self.assertEqual(sorted(node.task_id for node in cancelled), ["b", "c"])
+        self.assertIn("typo", graph.get("b").error)
+        graph.complete(graph.pop_ready(timeout=1).task_id)
+        graph.add("upstream")  # 未要求检查的任务仍可以先引用后提交
+        graph.complete(graph.pop_ready(timeout=1).task_id)
+        graph.complete(graph.pop_ready(timeout=1).task_id)
+        self.assertTrue(graph.wait_all(timeout=1))
+        self.assertEqual(graph.state("later"), NodeState.COMPLETED)
+
+        class NoopProcessor(BatchProcessor):
+            def _check_memory_usage(self):
+                return True
+
+            def _execute_task(self, task):
+                return {"success": True}
+
+        config = BatchConfig(max_concurrent_tasks=1, retry_delay=0,
+                             temp_dir=os.path.join(self.temp_dir, "temp"),
+                             log_dir=os.path.join(self.temp_dir, "logs"),
+                             result_dir=os.path.join(self.temp_dir, "results"),
+                             cleanup_enabled=False)
+        processor = NoopProcessor(config)
+        self.addCleanup(stop_batch_processor, processor)
+        tasks = [BatchTask(task_id, BatchTaskType.CUSTOM, "", os.path.join(self.temp_dir, "out", task_id), {},
+                           dependencies=dependencies)
+                 for task_id, dependencies in (("probe", []), ("render", ["prbe"]), ("package", ["render"]))]
+        job_id = processor.create_batch_job("拼错依赖", "", tasks)
+
+        self.assertTrue(processor.scheduler.wait_all(timeout=10))
+        job = processor.get_job_status(job_id)
+        self.assertEqual((job.completed_tasks, job.cancelled_tasks), (1, 2))
+        self.assertEqual(job.status, BatchStatus.FAILED)
+        self.assertIn("prbe", tasks[1].error_message)
+
+
+class ResourceAdmissionPerformanceTest(unittest.TestCase):
+    """批量任务资源准入控制测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.runner = PerformanceTestRunner()
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def make_config(self, **overrides):
+        settings = dict(retry_delay=0, cleanup_enabled=False,
+                        temp_dir=os.path.join(self.temp_dir, "temp"),
+                        log_dir=os.path.join(self.temp_dir, "logs"),
+                        result_dir=os.path.join(self.temp_dir, "results"))
+        settings.update(overrides)
+        return BatchConfig(**settings)
+
+    def test_01_budget_threads_and_learning(self):
+        """测试预算约束、弹性任务按余量缩减线程数、实测用量学习和持久化、ffmpeg 线程参数"""
+        history_path = os.path.join(self.temp_dir, "history.json")
+        governor = ResourceGovernor(ResourceBudget(cpu=8, memory_mb=4096, io_mbps=400),
+                                    history_path=history_path, starvation_timeout=0.05)
+        render = ResourceCost(cpu=6, min_cpu=2, memory_mb=1500)
+        transcribe = ResourceCost(cpu=4, memory_mb=3000)
+
+        first = governor.try_acquire("render_1", "render_4k", render)
+        self.assertEqual((first.cpu, first.threads), (6, 6))
+        second = governor.try_acquire("render_2", "render_4k", render)
+        self.assertEqual((second.cpu, second.threads), (2, 2))  # 只剩2核，弹性缩减
+        self.assertIsNone(governor.try_acquire("render_3", "render_4k", render))
+        governor.forget("render_3")  # 被取消，不再等待
+        self.assertIsNone(governor.try_acquire("whisper", "transcribe", transcribe))  # 内存不足
+
+        # 超过阈值仍等不到资源的任务获得预留，其他任务暂停放行
+        governor.release(second)
+        time.sleep(0.06)
+        self.assertIsNone(governor.try_acquire("whisper", "transcribe", transcribe))
+        self.assertIsNone(governor.try_acquire("thumb", "generate_thumbnails"))
+        governor.release(first)
+        for grant in (governor.try_acquire("whisper", "transcribe", transcribe),
+                      governor.try_acquire("thumb", "generate_thumbnails")):
+            self.assertIsNotNone(grant)
+            governor.release(grant)
+
+        # 机器空闲时同样为饥饿任务预留资源，预留之外的余量仍可放行小任务
+        reserving = ResourceGovernor(ResourceBudget(cpu=4, memory_mb=4096), starvation_timeout=0.05)
+        holder = reserving.try_acquire("holder", "custom", ResourceCost(cpu=2, memory_mb=3000))
+        self.assertIsNone(reserving.try_acquire("starving", "custom", ResourceCost(cpu=2, memory_mb=2000)))
+        time.sleep(0.06)
+        reserving.release(holder)
+        self.assertIsNone(reserving.try_acquire("large", "custom", ResourceCost(cpu=2, memory_mb=2500)))
+        small = reserving.try_acquire("small", "generate_thumbnails")
+        self.assertIsNotNone(small)
+        self.assertIsNotNone(reserving.try_acquire("starving", "custom", ResourceCost(cpu=2, memory_mb=2000)))
+        self.assertEqual(reserving.get_stats()["starvation_holds"], 1)
+
+        # 空闲时超出预算的任务也能单独运行
+        idle = ResourceGovernor(ResourceBudget(cpu=2, memory_mb=1024))
+        oversized = idle.try_acquire("huge", "upscale")
+        self.assertEqual((oversized.cpu, oversized.memory_mb), (2, 1024))
+
+        # 学习实测用量（默认配置声明 2GB，实测 300MB），重启后从磁盘恢复
+        for index in range(3):
+            grant = governor.try_acquire(f"denoise_{index}", "denoise")
+            governor.release(grant, ResourceUsage(cpu_seconds=8.0, peak_memory_mb=300.0,
+                                                  io_bytes=200 * 1024 * 1024, wall_seconds=4.0, samples=10))
+        learned = governor.cost_for("denoise")
+        self.assertAlmostEqual(learned.memory_mb, 300.0 * ResourceGovernor.MEMORY_HEADROOM)
+        self.assertAlmostEqual(learned.io_mbps, 50.0)
+        self.assertEqual(learned.cpu, 6.0)  # 弹性任务保留声明的核数
+        governor.save_history()
+        restored = ResourceGovernor(ResourceBudget(cpu=8, memory_mb=4096), history_path=history_path)
+        self.assertEqual(restored.get_learned("denoise")["samples"], 3)
+
+        # ffmpeg 命令按授予的核数设置 -threads，并采样子进程用量
+        bin_dir = os.path.join(self.temp_dir, "bin")
+        os.makedirs(bin_dir)
+        log_path = os.path.join(self.temp_dir, "ffmpeg_calls.txt")
+        fake_ffmpeg = os.path.join(bin_dir, "ffmpeg")
+        with open(fake_ffmpeg, "w") as f:
+            f.write(f"""#!{sys.executable}
+import sys, time
+with open({log_path!r}, "a") as log:
+    log.write(" ".join(sys.argv[1:]) + "\\n")
+buffer = bytearray(64 * 1024 * 1024)
+time.sleep(0.6)
+open(sys.argv[-1], "w").close()
+""")
+        os.chmod(fake_ffmpeg, 0o755)
+
+        processor = BatchProcessor(self.make_config(cpu_budget=6, memory_limit_mb=4096))
+        self.addCleanup(stop_batch_processor, processor)
+        processor._check_memory_usage = lambda: True
+        tasks = [BatchTask(f"compress_{i}", BatchTaskType.COMPRESS, os.path.join(self.temp_dir, "in.mp4"),
+                           os.path.join(self.temp_dir, "out", f"{i}.mp4"), {}) for i in range(2)]
+        with patch.dict(os.environ, {"PATH": bin_dir + os.pathsep + os.environ["PATH"]}):
+            processor.create_batch_job("压缩", "", tasks)
+            self.assertTrue(processor.scheduler.wait_all(timeout=30))
+
+        self.assertTrue(all(task.status == BatchStatus.COMPLETED for task in tasks))
+        with open(log_path) as f:
+            threads = sorted(int(line.split("-threads ")[1].split()[0]) for line in f)
+        self.assertEqual(threads, [2, 4])
+        compress = processor.governor.get_learned("compress")
+        self.assertEqual(compress["samples"], 2)
+        self.assertGreater(compress["memory_mb"], 60)
+        stats = processor.get_stats()["resources"]
+        self.assertEqual((stats["active"], stats["cpu_used"]), (0, 0))
+
+    def test_02_mixed_queue_throughput(self):
+        """测试混合队列（4K渲染、语音转写、缩略图）在准入控制下的内存峰值和放行情况，与固定4个工作线程对比
+
+        模拟机器：4核、4GB内存；运行中任务的CPU需求超过核数时按比例变慢，内存超额时发生换页，速度降为1/4
+        """
+        cores, memory_mb = 4.0, 4096.0
+        workload = {
+            "render": dict(task_type=BatchTaskType.CONVERT, count=4, work=0.4, parallel=4, memory=1500,
+                           resources={"cpu": 4, "min_cpu": 1, "memory_mb": 1500}),
+            "transcribe": dict(task_type=BatchTaskType.CUSTOM, count=4, work=0.2, parallel=2, memory=1200,
+                               resources={"cpu": 2, "memory_mb": 1200}),
+            "thumb": dict(task_type=BatchTaskType.GENERATE_THUMBNAILS, count=24, work=0.03, parallel=1,
+                          memory=100, resources={"cpu": 1, "memory_mb": 100}),
+        }
+
+        def run(admission_control):
+            lock = threading.Lock()
+            running = {}
+            peak = {"memory": 0.0}
+
+            class SimulatedProcessor(BatchProcessor):
+                def _check_memory_usage(self):
+                    return True
+
+                def _execute_task(self, task):
+                    spec = workload[task.metadata["kind"]]
+                    grant = self._grants.get(task.task_id)
+                    parallel = min(spec["parallel"], grant.threads) if grant else spec["parallel"]
+                    remaining = spec["work"]
+                    with lock:
+                        running[task.task_id] = (parallel, spec["memory"])
+                    try:
+                        while remaining > 0:
+                            with lock:
+                                demand = sum(p for p, _ in running.values())
+                                used = sum(m for _, m in running.values())
+                                peak["memory"] = max(peak["memory"], used)
+                            rate = parallel * min(1.0, cores / demand) * (0.25 if used > memory_mb else 1.0)
+                            time.sleep(0.005)
+                            remaining -= rate * 0.005
+                    finally:
+                        with lock:
+                            running.pop(task.task_id)
+                    return {"success": True}
+
+            if admission_control:
+                config = self.make_config(cpu_budget=cores, memory_limit_mb=memory_mb)
+            else:
+                config = self.make_config(admission_control=False, max_concurrent_tasks=4)
+            processor = SimulatedProcessor(config)
+            self.addCleanup(stop_batch_processor, processor)
+            tasks = []
+            for kind, spec in workload.items():
+                for index in range(spec["count"]):
+                    tasks.append(BatchTask(f"{kind}_{index}", spec["task_type"], "", "", {},
+                                           metadata={"kind": kind, "resources": spec["resources"]}))
+            start = time.perf_counter()
+            processor.create_batch_job("混合队列", "", tasks)
+            self.assertTrue(processor.scheduler.wait_all(timeout=60))
+            elapsed = time.perf_counter() - start
+            self.assertTrue(all(task.status == BatchStatus.COMPLETED for task in tasks))
+            return elapsed, peak["memory"], processor.governor and processor.governor.get_stats()
+
+        fixed_time, fixed_memory, fixed_stats = run(False)
+        admitted_time, admitted_memory, admitted_stats = run(True)
+
+        self.assertGreater(fixed_memory, memory_mb)
+        self.assertLessEqual(admitted_memory, memory_mb)
+        self.assertIsNone(fixed_stats)
+        self.assertEqual(admitted_stats["granted"], 32)
+        self.assertGreater(admitted_stats["refused"], 0)
+        self.assertGreater(admitted_stats["peak_concurrency"], 1)
+        self.assertEqual((admitted_stats["active"], admitted_stats["memory_used_mb"]), (0, 0))
+
+        print(f"混合队列32个任务: 固定4线程 {fixed_time:.2f}s (内存峰值 {fixed_memory:.0f}MB), "
+              f"准入控制 {admitted_time:.2f}s (内存峰值 {admitted_memory:.0f}MB), "
+              f"吞吐提升 {fixed_time / admitted_time:.2f}x")
+
+    def test_03_admission_errors_and_invalid_resources(self):
+        """测试准入检查抛出异常时任务留在就绪堆，非法资源声明在提交时拒绝"""
+        graph = TaskGraph()
+        graph.add("render", cost=2.0)
+
+        def broken_admit(node):
+            raise RuntimeError("准入检查失败")
+
+        with self.assertRaises(RuntimeError):
+            graph.pop_ready(timeout=0, admit=broken_admit)
+        node = graph.pop_ready(timeout=0, admit=lambda node: True)
+        self.assertIsNotNone(node)
+        self.assertEqual(node.task_id, "render")
+        graph.complete("render")
+        self.assertEqual(graph.get_stats()["pending"], 0)
+
+        processor = BatchProcessor(self.make_config(cpu_budget=4, memory_limit_mb=4096))
+        self.addCleanup(stop_batch_processor, processor)
+        processor.pause_processing()
+        bad = BatchTask("bad", BatchTaskType.CUSTOM, "", "", {}, metadata={"resources": {"gpu": 1}})
+        with self.assertRaises(ValueError):
+            processor.create_batch_job("非法资源", "", [bad])
+        with self.assertRaises(ValueError):
+            processor.add_task_to_queue(BatchTask("bad_type", BatchTaskType.CUSTOM, "", "", {},
+                                                  metadata={"resources": 2}))
+        self.assertEqual(processor.get_stats()["total_jobs"], 0)
+        self.assertEqual(processor.scheduler.get_stats()["pending"], 0)
+
+        good = BatchTask("good", BatchTaskType.CUSTOM, "", "", {}, metadata={"resources": {"cpu": 2}})
+        processor.add_task_to_queue(good)
+        self.assertEqual(good.metadata["resources"], ResourceCost(cpu=2))
+
+
+class MediaPackagingPerformanceTest(unittest.TestCase):
+    """媒体文件放置测试"""
+
+    def setUp(self):
+        """设置测试环境"""
+        import tempfile
+        self.temp_dir = tempfile.mkdtemp()
+        self.source = os.path.join(self.temp_dir, "source", "clip.mp4")
+        os.makedirs(os.path.dirname(self.source))
+        self.content = os.urandom(256 * 1024)
+        with open(self.source, "wb") as f:
+            f.write(self.content)
+
+    def tearDown(self):
+        """清理测试环境"""
+        import shutil
+        shutil.rmtree(self.temp_dir)
+
+    def read(self, path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    def leftovers(self, directory):
+        return [name for name in os.listdir(directory) if name.endswith(".part")]
+
+    def test_01_reflink_hardlink_copy_fallback(self):
+        """测试 reflink → 硬链接 → 复制 的回退顺序，且不残留临时文件"""
+        output = os.path.join(self.temp_dir, "out")
+
+        def fake_clone(dst_fd, request, src_fd):
+            os.write(dst_fd, os.pread(src_fd, len(self.content), 0))
+
+        with patch("fcntl.ioctl", side_effect=fake_clone):
+            method = place_file(self.source, os.path.join(output, "reflink.mp4"))
+        self.assertEqual(method, PlacementMethod.REFLINK)
+        self.assertEqual(self.read(os.path.join(output, "reflink.mp4")), self.content)
+
+        with patch("fcntl.ioctl", side_effect=OSError(95, "不支持")):
+            method = place_file(self.source, os.path.join(output, "hardlink.mp4"))
+            self.assertEqual(method, PlacementMethod.HARDLINK)
+            self.assertTrue(os.path.samefile(self.source, os.path.join(output, "hardlink.mp4")))
+
+            with patch("os.link", side_effect=OSError(18, "跨设备")):
+                method = place_file(self.source, os.path.join(output, "copy.mp4"))
+            self.assertEqual(method, PlacementMethod.COPY)
+            self.assertFalse(os.path.samefile(self.source, os.path.join(output, "copy.mp4")))
+            self.assertEqual(self.read(os.path.join(output, "copy.mp4")), self.content)
+
+        self.assertEqual(place_file(self.source, os.path.join(output, "plain.mp4"), allow_link=False),
+                         PlacementMethod.COPY)
+        self.assertEqual(self.leftovers(output), [])
+
+    def test_02_place_same_destination_twice(self):
+        """测试重复放置到已是源文件硬链接的目标、以及不同源文件落到同一目标时源文件不被截断"""
+        output = os.path.join(self.temp_dir, "out")
+        destination = os.path.join(output, "clip.mp4")
+        with patch("fcntl.ioctl", side_effect=OSError(95, "不支持")):
+            self.assertEqual(place_file(self.source, destination), PlacementMethod.HARDLINK)
+            self.assertEqual(place_file(self.source, destination), PlacementMethod.HARDLINK)
+            self.assertEqual(self.read(self.source), self.content)
+
+            # 另一个同名源文件覆盖目标：第一个源文件保持不变
+            other = os.path.join(self.temp_dir, "other", "clip.mp4")
+            os.makedirs(os.path.dirname(other))
+            with open(other, "wb") as f:
+                f.write(b"other clip")
+            place_file(other, destination)
+            self.assertEqual(self.read(self.source), self.content)
+            self.assertEqual(self.read(destination), b"other clip")
+
+            # 并行放置到同一目标
+            placed, stats = place_files([(self.source, destination), (other, destination)] * 4, max_workers=4)
+            self.assertEqual(stats.files, 8)
+        self.assertEqual(self.read(self.source), self.content)
+        self.assertEqual(self.read(other), b"other clip")
+        self.assertIn(self.read(destination), (self.content, b"other clip"))
+        self.assertEqual(self.leftovers(output), [])
+
+
 def run_performance_tests():
     """运行性能测试"""
     print("=" * 60)
@@ -555,7 +3645,31 @@ def run_performance_tests():
         MemoryManagerPerformanceTest,
         PerformanceOptimizerTest,
         ConcurrencyPerformanceTest,
-        MemoryLeakTest
+        MemoryLeakTest,
+        FileFingerprintPerformanceTest,
+        MediaDatabasePerformanceTest,
+        MediaImportPipelinePerformanceTest,
+        FrameBufferPoolPerformanceTest,
+        ProjectSaveEnginePerformanceTest,
+        ProjectObjectStorePerformanceTest,
+        ProjectBackupPerformanceTest,
+        EventSystemPerformanceTest,
+        AsyncEventBusPerformanceTest,
+        StartupOrchestratorPerformanceTest,
+        ImportTimePerformanceTest,
+        DecoderPoolPerformanceTest,
+        ProbeCachePerformanceTest,
+        TransitionEnginePerformanceTest,
+        TransitionRenderPerformanceTest,
+        AnimationEnginePerformanceTest,
+        TextRasterCachePerformanceTest,
+        FontIndexPerformanceTest,
+        EffectGraphPerformanceTest,
+        WaveformCachePerformanceTest,
+        ThumbnailGeneratorPerformanceTest,
+        TaskGraphPerformanceTest,
+        ResourceAdmissionPerformanceTest,
+        MediaPackagingPerformanceTest
     ]
 
     test_suite = unittest.TestSuite()